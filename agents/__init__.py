@@ -1,7 +1,28 @@
 from .buyer import BuyerAgent
 from .seller import SellerAgent
+from .offer_buffer import OfferBuffer
+from .matching import MatchingEngine
+from .pipeline import SellerPipeline
+from .reservation import ReservationEngine
+from .fleet import SellerFleet
+from .snapshots import CatalogStore, CatalogDelta
+from .match_cache import MatchCache
+from .intents import IntentRegistry, OpenIntent
+from .admission import AdmissionChain, AdmissionStage
 
 __all__ = [
     "BuyerAgent",
-    "SellerAgent"
+    "SellerAgent",
+    "OfferBuffer",
+    "MatchingEngine",
+    "SellerPipeline",
+    "ReservationEngine",
+    "SellerFleet",
+    "CatalogStore",
+    "CatalogDelta",
+    "MatchCache",
+    "IntentRegistry",
+    "OpenIntent",
+    "AdmissionChain",
+    "AdmissionStage"
 ]
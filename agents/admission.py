@@ -0,0 +1,245 @@
+"""
+Pre-Verification Admission Chain
+
+SellerAgent 先做 ECDSA 验签再看类目和预算，买家也是先验签再看价格：
+大部分与自己无关的消息都白白付出了一次验签。
+
+AdmissionChain 把准入拆成有序的阶段，便宜的谓词排在前面，验签只对通过全部谓词的消息执行：
+
+    expired → skew → category → budget / price → blocked → replay ──▶ signature
+
+- 每个阶段是 AdmissionStage(name, check, commit)：check(message, context) 返回 False 即拒绝
+- commit 在验签通过之后执行（如记录 nonce），伪造的消息不会占用别人的 nonce
+- 每个阶段单独计数拒绝量；stats()["saved"] 为验签之前就被拒绝的消息数，即省下的 ECDSA 次数
+- context 为消息所属的上下文（买家侧为 Offer 对应的 Intent；卖家侧为 None）
+
+用法:
+    chain = AdmissionChain([not_expired(), timestamp_skew(), category_served(seller.price_range)])
+    if chain.admit(intent):
+        ...
+
+    seller_chain(seller)  # SellerAgent 的默认链
+    buyer_chain(buyer)    # BuyerAgent 的默认链
+
+NOTE: 谓词只能拒绝一定不会被接受的消息（如类目价格区间与预算不相交），不能代替匹配；
+      nonce 集合容量有界，淘汰掉的 nonce 由时间戳窗口兜底（超出 skew 的重放在第一阶段被拒绝）。
+"""
+
+import threading
+from typing import Callable, Collection, Dict, Iterable, Optional, Tuple
+from acp0.core.messages import ACPMessage, is_timestamp_valid
+from acp0.network.relay import SeenSet
+
+SIGNATURE = "signature"  # 验签阶段的名字（check() 的返回值之一）
+
+Check = Callable[[ACPMessage, object], bool]
+
+
+class AdmissionStage:
+    """准入阶段：check 为验签前的谓词，commit 为验签通过后的登记"""
+
+    def __init__(self, name: str, check: Check,
+                 commit: Optional[Callable[[ACPMessage, object], bool]] = None):
+        """
+        Args:
+            name: 阶段名（拒绝计数的键）
+            check: (message, context) -> 是否放行
+            commit: 可选，验签通过后调用；返回 False 时仍按本阶段拒绝（并发下的重放）
+        """
+        if name == SIGNATURE:
+            raise ValueError(f"Stage name {SIGNATURE!r} is reserved")
+        self.name = name
+        self.check = check
+        self.commit = commit
+
+    def __repr__(self) -> str:
+        return f"AdmissionStage({self.name})"
+
+
+class AdmissionChain:
+    """有序的准入阶段 + 验签"""
+
+    def __init__(self, stages: Iterable[AdmissionStage] = (),
+                 verify: Optional[Callable[[ACPMessage], bool]] = None):
+        """
+        Args:
+            stages: 验签之前依次执行的阶段
+            verify: 验签函数（默认 message.verify()）
+        """
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self.verify = verify or (lambda message: message.verify())
+        self._commits = [stage for stage in self.stages if stage.commit is not None]
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"checked": 0, "verified": 0, "admitted": 0}
+        self.rejected: Dict[str, int] = dict.fromkeys(names + [SIGNATURE], 0)
+
+    def check(self, message: ACPMessage, context=None) -> Optional[str]:
+        """
+        执行准入
+
+        Returns:
+            None 表示放行；否则为拒绝该消息的阶段名（验签失败为 SIGNATURE）
+        """
+        rejected = None
+        for stage in self.stages:
+            if not stage.check(message, context):
+                rejected = stage.name
+                break
+        verified = rejected is None
+        if verified:
+            if not self.verify(message):
+                rejected = SIGNATURE
+            else:
+                for stage in self._commits:
+                    if not stage.commit(message, context):
+                        rejected = stage.name
+                        break
+        with self._lock:
+            self.counters["checked"] += 1
+            if verified:
+                self.counters["verified"] += 1
+            if rejected is None:
+                self.counters["admitted"] += 1
+            else:
+                self.rejected[rejected] += 1
+        return rejected
+
+    def admit(self, message: ACPMessage, context=None) -> bool:
+        return self.check(message, context) is None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["rejected"] = dict(self.rejected)
+        stats["saved"] = stats["checked"] - stats["verified"]
+        return stats
+
+
+# ---------- 通用阶段 ----------
+
+def not_expired() -> AdmissionStage:
+    """已超过 expires_at"""
+    return AdmissionStage("expired", lambda message, context: not message.is_expired())
+
+
+def timestamp_skew(tolerance: int = 60) -> AdmissionStage:
+    """时间戳偏差超过 tolerance 秒（与 verify() 的窗口一致）"""
+    return AdmissionStage(
+        "skew", lambda message, context: is_timestamp_valid(message.timestamp, tolerance)
+    )
+
+
+def blocklist(keys: Collection[str]) -> AdmissionStage:
+    """
+    签名者公钥在黑名单中
+
+    Args:
+        keys: base64 公钥集合；调用方之后对它的增删立即生效
+    """
+    return AdmissionStage(
+        "blocked", lambda message, context: message.get_signer_public_key() not in keys
+    )
+
+
+def nonce_replay(seen: Optional[SeenSet] = None, capacity: int = 65536) -> AdmissionStage:
+    """
+    重放：同一 (消息类型, nonce) 已被接受过
+
+    验签前只查询，验签通过后才登记，伪造的消息无法抢先占用 nonce。
+    """
+    seen = SeenSet(capacity) if seen is None else seen
+
+    def key(message: ACPMessage) -> str:
+        return f"{message.message_type}:{message.nonce}"
+
+    return AdmissionStage(
+        "replay",
+        lambda message, context: key(message) not in seen,
+        lambda message, context: seen.add(key(message))
+    )
+
+
+# ---------- 卖家侧（Intent） ----------
+
+PriceRange = Callable[[str], Optional[Tuple[int, int]]]
+
+
+def category_served(price_range: PriceRange) -> AdmissionStage:
+    """
+    Intent 的类目不在本店目录中
+
+    Args:
+        price_range: 类目 -> (最低价, 最高价)，未知类目返回 None（见 MatchingEngine.price_range）
+    """
+    return AdmissionStage(
+        "category", lambda intent, context: price_range(intent.demand.category) is not None
+    )
+
+
+def budget_overlap(price_range: PriceRange) -> AdmissionStage:
+    """预算区间与类目价格区间不相交（类目内任何商品都不可能在预算内）"""
+    def check(intent, context) -> bool:
+        bounds = price_range(intent.demand.category)
+        if bounds is None:
+            return False
+        budget = intent.demand.budget
+        return budget.min <= bounds[1] and bounds[0] <= budget.max
+
+    return AdmissionStage("budget", check)
+
+
+def seller_chain(seller, tolerance: int = 60, replay_capacity: int = 65536) -> AdmissionChain:
+    """SellerAgent 的默认准入链：过期 → 时间戳 → 类目 → 预算 → 黑名单 → 重放 → 验签"""
+    return AdmissionChain([
+        not_expired(),
+        timestamp_skew(tolerance),
+        category_served(seller.price_range),
+        budget_overlap(seller.price_range),
+        blocklist(seller.blocked_keys),
+        nonce_replay(capacity=replay_capacity),
+    ], verify=_session_verify(seller))
+
+
+# ---------- 买家侧（Offer，context 为对应的 Intent） ----------
+
+def price_cap(max_price: Optional[int] = None, within_budget: bool = False) -> AdmissionStage:
+    """
+    Offer 不是针对该 Intent 的（intent_id / 币种不符），或价格超出上限
+
+    Args:
+        max_price: 绝对价格上限（最小货币单位）；None 为不限
+        within_budget: 同时以 Intent 的预算上限为价格上限
+    """
+    def check(offer, intent) -> bool:
+        amount = offer.price.amount
+        if max_price is not None and amount > max_price:
+            return False
+        if intent is None:
+            return True
+        budget = intent.demand.budget
+        if offer.intent_id != intent.intent_id or offer.price.currency != budget.currency:
+            return False
+        return not within_budget or amount <= budget.max
+
+    return AdmissionStage("price", check)
+
+
+def buyer_chain(buyer, tolerance: int = 60, within_budget: bool = False,
+                replay_capacity: int = 65536) -> AdmissionChain:
+    """BuyerAgent 的默认准入链：过期 → 时间戳 → 价格（buyer.max_price） → 黑名单 → 重放 → 验签"""
+    return AdmissionChain([
+        not_expired(),
+        timestamp_skew(tolerance),
+        price_cap(buyer.max_price, within_budget),
+        blocklist(buyer.blocked_keys),
+        nonce_replay(capacity=replay_capacity),
+    ], verify=_session_verify(buyer))
+
+
+def _session_verify(agent) -> Optional[Callable[[ACPMessage], bool]]:
+    """开启会话模式的代理用 SessionManager.verify（会话标签或 ECDSA）"""
+    sessions = getattr(agent, "sessions", None)
+    return None if sessions is None else sessions.verify
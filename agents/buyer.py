@@ -1,16 +1,67 @@
-from typing import List
+import math
+import os
+import time
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Set, Union
 from acp0.core.messages import Intent, Offer, Deal, BuyerInfo, Demand, Budget, Payment
-from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.crypto import KeyPair, sign_message, sign_batch_with_key
+from acp0.core.keys import get_key_registry
+from acp0.core.session import SessionManager
 from acp0.network.base import NetworkLayer
+from acp0.agents.offer_buffer import OfferBuffer
+from acp0.agents.intents import IntentRegistry, OpenIntent
+from acp0.agents.admission import AdmissionChain, SIGNATURE, buyer_chain
+from acp0.storage.journal import Journal
+from acp0.utils.timer_wheel import TimerWheel, timer_wheel
 
 class BuyerAgent:
     """买家代理"""
     
-    def __init__(self, agent_id: str, network: NetworkLayer):
+    def __init__(self, agent_id: str, network: NetworkLayer,
+                 score_attributes: Optional[List[str]] = None,
+                 journal: Optional[Journal] = None,
+                 timers: Optional[TimerWheel] = None, listen_timeout: float = 60.0,
+                 intent_retention: float = 60.0, max_price: Optional[int] = None,
+                 admission: Optional[AdmissionChain] = None, key_ids: bool = False,
+                 sessions: Optional[SessionManager] = None, signer=None):
+        """
+        Args:
+            score_attributes: 需要抽取到 OfferBuffer 列中、可用于筛选的 Item 属性名
+            journal: 可选的持久化日志，购买时记录所接受的 Offer 和 Deal
+            timers: 过期调度用的时间轮（默认进程共享的 timer_wheel，注销监听器等回调在其后台线程上执行）
+            listen_timeout: Intent 未设置 expires_at 时，Offer 监听器保留的秒数
+            intent_retention: 已成交 / 已过期的 Intent 在 intents 注册表中保留的秒数
+            max_price: Offer 价格上限（最小货币单位），超出的 Offer 不验签直接丢弃
+            admission: Offer 准入链（默认 buyer_chain：过期、时间戳、价格上限、
+                       黑名单、重放依次过滤后才验签），见 acp0.agents.admission
+            key_ids: 发出的消息只带公钥指纹 key_id（公钥登记到进程级注册表，
+                     见 acp0.core.keys）；False 时带完整公钥
+            sessions: 开启 HMAC 会话模式（acp0.core.session）：Intent 带临时 ECDH 公钥，
+                      与回复了握手的卖家建立会话，之后接受其会话标签的 Offer
+            signer: 可选的 SigningService（acp0.core.signing）；私钥在此时以 agent_id 登记一次，
+                    broadcast_many() 整批交给签名进程
+        """
         self.agent_id = agent_id
         self.keypair = KeyPair()  # 自动生成密钥对
         self.network = network
+        self.key_ids = key_ids
+        self._key_id = None  # (keypair, registry, key_id)：密钥或注册表变化时才重新登记
+        self.sessions = sessions
+        self.signer = signer
+        if signer is not None:
+            signer.register(agent_id, self.keypair)
+        self.score_attributes = score_attributes
+        # 最近一次 broadcast() 的 Offer（兼容旧接口）；并发的 Intent 见 intents
         self.received_offers: List[Offer] = []
+        self.offer_buffer = OfferBuffer(score_attributes)
+        self.journal = journal
+        self.timers = timer_wheel if timers is None else timers
+        self.listen_timeout = listen_timeout
+        self.intents = IntentRegistry(self.timers, retention=intent_retention)
+        # 拉黑的卖家公钥（base64），在验签之前拒绝
+        self.blocked_keys: Set[str] = set()
+        self.max_price = max_price
+        self.admission = buyer_chain(self) if admission is None else admission
         
         # 自动注册到网络
         if hasattr(network, 'register_agent'):
@@ -23,10 +74,7 @@ class BuyerAgent:
         
         NOTE: This is a SYNCHRONOUS implementation for demo simplicity.
         - Uses time.sleep(1) to wait for offers
-        - Production should use async/await or callbacks
-        
-        TODO v1.0: Refactor to:
-            async def broadcast(...) -> AsyncIterator[Offer]
+        - 需要同时进行多个 Intent 时使用 open_intent()
         
         Args:
             category: 商品类别
@@ -34,70 +82,278 @@ class BuyerAgent:
             currency: 货币代码
             **kwargs: 其他可选参数（location, delivery_days, attributes）
         """
-        # 1. 构建 Intent
-        intent = Intent(
-            buyer=BuyerInfo(
-                agent_id=self.agent_id,
-                public_key=self.keypair.get_public_key_base64()
-            ),
+        handle = self.open_intent(category, budget_range, currency, **kwargs)
+        
+        # received_offers / offer_buffer 指向本次 Intent 的缓冲区
+        self.received_offers = handle.offers
+        self.offer_buffer = handle.buffer
+        
+        # 等待 Offers（实际应该异步，这里简化）
+        time.sleep(1)  # FIXME: Replace with proper async in v1.0
+        
+        return self.received_offers
+    
+    def open_intent(self, category: str, budget_range: tuple, currency: str = "CNY",
+                    ttl: Optional[float] = None, **kwargs) -> OpenIntent:
+        """
+        广播购物需求并立即返回，Offer 收集到该 Intent 独立的缓冲区
+        
+        同一个买家可以同时打开任意多个 Intent，互不覆盖；
+        通过返回的 OpenIntent（或 poll_offers / wait_offers / await_offers）取结果。
+        
+        Args:
+            ttl: Intent 有效期（秒），到期后状态变为 expired；expires_at 向上取整到秒，
+                 亚秒的 ttl 不会在创建时即已过期；None 时不设 expires_at，listen_timeout 后停止收集
+            其余参数同 broadcast()
+        """
+        # 1. 构建 Intent（需求来自调用方，需校验；外层由本代理构建，走可信路径）
+        extra = {"expires_at": math.ceil(time.time() + ttl)} if ttl is not None else {}
+        if self.sessions is not None:
+            extra.update(self._session_fields())
+        intent = Intent.trusted(
+            buyer=self._buyer_info(),
             demand=Demand(
                 category=category,
                 budget=Budget(min=budget_range[0], max=budget_range[1], currency=currency),
                 **kwargs
-            )
+            ),
+            **extra
         )
         
         # 2. 签名
         sign_message(intent, self.keypair)
         
-        # 3. 清空之前的 Offers
-        self.received_offers = []
+        # 3. 登记并注册 Offer 监听器
+        handle = self._open(intent)
+        
+        # 4. 广播 Intent
+        self.network.broadcast_intent(intent)
+        return handle
+    
+    def _open(self, intent: Intent) -> OpenIntent:
+        """登记已签名的 Intent，注册 Offer 监听器与过期调度"""
+        handle = self.intents.open(intent, OfferBuffer(self.score_attributes))
         
-        # 4. 注册 Offer 监听器
         def offer_callback(offer: Offer):
-            # 验证 Offer 签名和时间戳
-            if offer.verify():
-                self.received_offers.append(offer)
-            else:
+            if handle.done:
+                return
+            # 过期、超出价格上限、拉黑、重放的 Offer 在验签之前丢弃
+            rejected = self.admission.check(offer, intent)
+            if rejected is None:
+                if offer.ecdh_key is not None and offer.session_id is None:
+                    self._complete_session(intent, offer)
+                index = handle.add(offer)  # 同步抽取列，供向量化打分
+                if index is not None:
+                    self._track_expiry(handle, offer, index)
+            elif rejected == SIGNATURE:
                 print(f"⚠️ Invalid offer: {offer.offer_id}")
         
         self.network.listen_offers(intent.intent_id, offer_callback)
+        self._schedule_unlisten(intent)
+        return handle
+    
+    def poll_offers(self, intent_id: str) -> List[Offer]:
+        """某个 Intent 当前收到的有效 Offer（不阻塞；未知 Intent 返回空列表）"""
+        handle = self.intents.get(intent_id)
+        return handle.poll() if handle is not None else []
+    
+    def wait_offers(self, intent_id: str, min_offers: int = 1,
+                    timeout: Optional[float] = None) -> List[Offer]:
+        """阻塞等待某个 Intent 收到至少 min_offers 个 Offer（或过期 / 超时）"""
+        handle = self.intents.get(intent_id)
+        if handle is None:
+            raise KeyError(intent_id)
+        return handle.wait(min_offers, timeout)
+    
+    async def await_offers(self, intent_id: str, min_offers: int = 1,
+                           timeout: Optional[float] = None) -> List[Offer]:
+        """asyncio 版 wait_offers()"""
+        handle = self.intents.get(intent_id)
+        if handle is None:
+            raise KeyError(intent_id)
+        return await handle.wait_async(min_offers, timeout)
+    
+    def broadcast_many(self, demands: List[Union[Demand, Dict]],
+                       executor: Optional[Executor] = None,
+                       wait: float = 1.0) -> Dict[str, List[Offer]]:
+        """
+        批量广播购物需求，返回 {intent_id: 收到的 Offers}
         
-        # 5. 广播 Intent
-        self.network.broadcast_intent(intent)
+        与逐个调用 broadcast() 相比：整批构建并签名，一次性注册所有监听器，
+        通过 network.broadcast_intents() 以单个批次交给网络层，只等待一次。
+        不影响 received_offers / offer_buffer。
         
-        # 6. 等待 Offers（实际应该异步，这里简化）
-        import time
-        time.sleep(1)  # FIXME: Replace with proper async in v1.0
+        Args:
+            demands: Demand 对象，或与 broadcast() 参数相同的 dict
+                     （category, budget_range, currency, location...）
+            executor: 可选的线程池/进程池，用于并行签名（未配置 signer 时）；
+                      按工作线程数分批，每批一个任务，私钥每批只恢复一次
+            wait: 等待 Offers 的秒数
+        """
+        # 1. 构建 Intent
+        buyer_info = self._buyer_info()
+        extra = self._session_fields() if self.sessions is not None else {}
+        intents = []
+        for demand in demands:
+            if not isinstance(demand, Demand):
+                spec = dict(demand)
+                budget_min, budget_max = spec.pop("budget_range")
+                demand = Demand(
+                    category=spec.pop("category"),
+                    budget=Budget(min=budget_min, max=budget_max,
+                                  currency=spec.pop("currency", "CNY")),
+                    **spec
+                )
+            intents.append(Intent.trusted(buyer=buyer_info, demand=demand, **extra))
         
-        return self.received_offers
+        # 2. 签名（可选并行）
+        if self.signer is not None:
+            self.signer.sign_messages(self.agent_id, intents).result()
+        else:
+            payloads = [intent.to_canonical_bytes() for intent in intents]
+            if executor is None:
+                signatures = [self.keypair.sign_bytes(data) for data in payloads]
+            else:
+                workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+                size = max(1, -(-len(payloads) // workers))
+                chunks = [payloads[i:i + size] for i in range(0, len(payloads), size)]
+                private_key = self.keypair.private_key.to_string()
+                signatures = [signature for batch in executor.map(
+                    sign_batch_with_key, [private_key] * len(chunks), chunks
+                ) for signature in batch]
+            for intent, signature in zip(intents, signatures):
+                intent.signature = signature
+        
+        # 3. 一次性登记全部 Intent 并注册 Offer 监听器
+        handles = [self._open(intent) for intent in intents]
+        
+        # 4. 单批次广播
+        self.network.broadcast_intents(intents)
+        
+        # 5. 整批只等待一次
+        if wait:
+            time.sleep(wait)
+        
+        return {handle.intent_id: handle.offers for handle in handles}
     
-    def select_best(self, offers: List[Offer]) -> Offer:
-        """选择最优 Offer（简单逻辑：价格最低）"""
+    def select_best(self, offers: Union[List[Offer], OfferBuffer, OpenIntent], **filters) -> Offer:
+        """
+        选择最优 Offer（简单逻辑：价格最低）
+        
+        传入 broadcast() 返回的列表、OpenIntent 或 OfferBuffer 时走列式向量化打分；
+        其他列表退回逐个比较。
+        
+        Args:
+            **filters: 传给 OfferBuffer.best() 的筛选条件（max_price, min_stock, attributes...）
+        """
+        if isinstance(offers, OpenIntent):
+            offers = offers.buffer
+        elif offers is self.received_offers and self.offer_buffer.live_count == len(offers):
+            offers = self.offer_buffer
+        
+        if isinstance(offers, OfferBuffer):
+            best = offers.best(**filters)
+            if best is None:
+                raise ValueError("No offers to select from")
+            return best
+        
+        if filters:
+            buffer = OfferBuffer((filters.get("attributes") or {}).keys())
+            buffer.extend(offers)
+            return self.select_best(buffer, **filters)
+        
         if not offers:
             raise ValueError("No offers to select from")
         
         return min(offers, key=lambda o: o.price.amount)
     
-    def purchase(self, offer: Offer, payment_method: str = "mock") -> Deal:
-        """确认购买"""
-        deal = Deal(
+    def _session_fields(self) -> Dict:
+        """Intent 的会话字段：临时 ECDH 公钥，以及待对端确认的 session_acks"""
+        fields = {"ecdh_key": self.sessions.initiator_key()}
+        acks = self.sessions.acks()
+        if acks:
+            fields["session_acks"] = acks
+        return fields
+    
+    def _complete_session(self, intent: Intent, offer: Offer):
+        """已验签的握手 Offer：用本 Intent 的临时私钥完成会话"""
+        if self.sessions is not None and intent.ecdh_key is not None:
+            self.sessions.complete(self.keypair.get_public_key_base64(),
+                                   offer.get_signer_public_key(), intent.ecdh_key, offer.ecdh_key)
+    
+    def purchase(self, offer: Offer, payment_method: str = "mock",
+                 non_repudiation: bool = True) -> Deal:
+        """
+        确认购买
+        
+        Args:
+            non_repudiation: True（默认）时 Deal 用 ECDSA 签名，可作为纠纷凭证；
+                             False 且与卖家有会话时改用会话标签（只能向卖家证明来源）
+        """
+        deal = Deal.trusted(
             offer_id=offer.offer_id,
-            buyer=BuyerInfo(
-                agent_id=self.agent_id,
-                public_key=self.keypair.get_public_key_base64()
-            ),
-            payment=Payment(
+            buyer=self._buyer_info(),
+            payment=Payment.trusted(
                 method=payment_method,
                 status="authorized",
                 token="mock-token-xxx"
             )
         )
         
-        # 签名
-        sign_message(deal, self.keypair)
+        # 签名（或会话标签）
+        session = None
+        if not non_repudiation and self.sessions is not None:
+            session = self.sessions.session_for(offer.get_signer_public_key())
+        if session is not None:
+            self.sessions.seal(deal, session)
+        else:
+            sign_message(deal, self.keypair)
+        
+        # 发送前落盘，作为纠纷凭证
+        if self.journal is not None:
+            self.journal.append_many([offer, deal])
         
         # 发送
         self.network.send_deal(deal, offer.offer_id)
         
+        # 该 Intent 已成交，不再收集 Offer
+        if self.intents.decide(offer.intent_id, deal):
+            self.network.unlisten_offers(offer.intent_id)
+        
         return deal
+    
+    def _schedule_unlisten(self, intent: Intent):
+        """
+        Intent 过期（或等待超时）后注销 Offer 监听器，未成交的 Intent 标记为 expired
+
+        _close_intent 在时间轮线程上执行（共享 timer_wheel 的后台线程），与发送方线程并发
+        调用 network.unlisten_offers()；网络层须容忍监听器在投递期间被注销
+        """
+        deadline = intent.expires_at or time.time() + self.listen_timeout
+        self.timers.schedule(deadline, self._close_intent, intent.intent_id)
+    
+    def _close_intent(self, intent_id: str):
+        self.network.unlisten_offers(intent_id)
+        self.intents.expire(intent_id)
+    
+    def _track_expiry(self, handle: OpenIntent, offer: Offer, index: int):
+        """Offer 过期时从该 Intent 的列表和 OfferBuffer 中剔除"""
+        if offer.expires_at is not None:
+            self.timers.schedule(offer.expires_at, handle.discard, offer, index)
+    
+    def _registered_key_id(self) -> str:
+        """登记公钥并缓存 key_id；之后每条消息不再重复指纹计算或远程登记"""
+        keypair, registry = self.keypair, get_key_registry()
+        cached = self._key_id
+        if cached is None or cached[0] is not keypair or cached[1] is not registry:
+            cached = self._key_id = (keypair, registry, registry.register(keypair.get_public_key_base64()))
+        return cached[2]
+
+    def _buyer_info(self) -> BuyerInfo:
+        """本代理的 BuyerInfo（可信构建）"""
+        if self.key_ids:
+            return BuyerInfo.trusted(agent_id=self.agent_id, key_id=self._registered_key_id())
+        return BuyerInfo.trusted(
+            agent_id=self.agent_id,
+            public_key=self.keypair.get_public_key_base64()
+        )
@@ -0,0 +1,411 @@
+"""
+Seller Fleet Runtime
+
+一台主机上运行成百上千个 SellerAgent 时，纯 Python ECDSA 受 GIL 限制只能用满一个核。
+SellerFleet 把卖家放到一组工作进程里：
+
+    买家网络 (任意 NetworkLayer)
+        │ listen_intents
+        ▼
+    SellerFleet (父进程) ── 按 category 路由 ──▶ 工作进程 k: 托管 hash(category) % N == k 的卖家分片
+        ▲                                         │ SellerAgent.listen()：验签 → 匹配 → 签名
+        └──────────── Offer / Deal / 心跳 ◀────────┘
+
+- 放置：每个卖家的库存按类目拆成分片，分片放到 crc32(category) % workers 号进程；
+  同一卖家的各分片共享同一把私钥，对买家来说仍是同一个卖家
+- 路由：Intent 只发给托管该类目的那一个进程；没有卖家经营的类目直接丢弃
+- 汇聚：工作进程产生的 Offer 回到父进程，经原网络层 send_offer() 发给买家；
+  父进程代为监听 Deal 并转发给发出该 Offer 的进程（库存预留在进程内确认）
+- 健康：工作进程定期发送心跳；进程退出或心跳超时时按原分片重启（进行中的 Intent 会丢失）
+
+父进程与每个工作进程之间是一条 multiprocessing.Pipe，消息为 envelope 帧，
+某个进程被杀不会影响其他进程的通道。
+
+用法:
+    fleet = SellerFleet(network, workers=4)
+    fleet.add_seller("seller_001", "Shop", inventory)
+    fleet.start(on_deal=handle_deal)
+    ...
+    fleet.stop()
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+from acp0.core.messages import Intent, Offer, Deal
+from acp0.core.crypto import KeyPair
+from acp0.core.exceptions import NetworkError
+from acp0.network.base import NetworkLayer
+from acp0.network.envelope import MessageView, encode_frame
+from acp0.utils.timer_wheel import TimerWheel, timer_wheel
+
+
+class SellerShard(NamedTuple):
+    """放到某个工作进程上的卖家分片（单个类目的库存）"""
+    agent_id: str
+    shop_name: str
+    category: str
+    products: List[Dict]
+    private_key: bytes
+    options: Dict
+
+
+def shard_for(category: str, workers: int) -> int:
+    """类目 -> 工作进程号（crc32 跨进程稳定，不受 PYTHONHASHSEED 影响）"""
+    return zlib.crc32(category.encode("utf-8")) % workers
+
+
+# ---------- 工作进程 ----------
+
+class _WorkerNetwork(NetworkLayer):
+    """
+    工作进程内的网络层：Offer / Deal 经管道交回父进程
+
+    工作进程只托管卖家，与买家网络之间只有 Intent 入、Offer / Deal 出两个方向；
+    买家侧的接口（广播 Intent、发送 Deal、监听 Offer）抛出 NetworkError，
+    由 _worker_main 的分发循环捕获并告警，不会让工作进程退出
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.intent_listeners: List[Callable] = []
+        self.deal_callbacks: Dict[str, List[Callable]] = {}
+        self.counters = {"intents": 0, "offers": 0, "deals": 0}
+
+    def broadcast_intent(self, intent: Intent):
+        raise NetworkError("Fleet workers only host sellers: cannot broadcast intents")
+
+    def send_offer(self, offer: Offer, intent_id: str):
+        self.counters["offers"] += 1
+        self.conn.send(("offer", encode_frame(offer)))
+
+    def send_deal(self, deal: Deal, offer_id: str):
+        raise NetworkError("Fleet workers only host sellers: cannot send deals")
+
+    def listen_intents(self, callback: Callable[[Intent], None]):
+        self.intent_listeners.append(callback)
+
+    def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
+        raise NetworkError("Fleet workers only host sellers: cannot listen for offers")
+
+    def listen_deals(self, offer_id: str, callback: Callable[[Deal], None]):
+        self.deal_callbacks.setdefault(offer_id, []).append(callback)
+
+    def unlisten_deals(self, offer_id: str):
+        self.deal_callbacks.pop(offer_id, None)
+
+    def report_deal(self, deal: Deal):
+        """卖家确认的 Deal 交回父进程"""
+        self.counters["deals"] += 1
+        self.conn.send(("deal", encode_frame(deal)))
+
+    def deliver(self, kind: str, frame: bytes):
+        view = MessageView(frame)
+        if kind == "intent":
+            self.counters["intents"] += 1
+            intent = view.to_model()
+            for listener in self.intent_listeners:
+                listener(intent)
+        elif kind == "deal":
+            callbacks = self.deal_callbacks.get(view.header.ref)
+            if callbacks:
+                deal = view.to_model()
+                for callback in list(callbacks):
+                    callback(deal)
+
+
+def _worker_main(index: int, shards: List[SellerShard], conn: Connection,
+                 heartbeat_interval: float):
+    """工作进程入口"""
+    from acp0.agents.seller import SellerAgent
+
+    network = _WorkerNetwork(conn)
+    for shard in shards:
+        seller = SellerAgent(
+            shard.agent_id, shard.shop_name, {shard.category: shard.products}, network,
+            **shard.options
+        )
+        seller.keypair = KeyPair.from_private_key_bytes(shard.private_key)
+        seller.listen(on_deal=network.report_deal)
+
+    conn.send(("heartbeat", dict(network.counters, pid=os.getpid())))
+    last_beat = time.monotonic()
+    while True:
+        if conn.poll(heartbeat_interval):
+            try:
+                kind, frame = conn.recv()
+            except EOFError:
+                return  # 父进程已退出
+            if kind == "stop":
+                return
+            try:
+                network.deliver(kind, frame)
+            except Exception as e:
+                print(f"⚠️ Worker {index} failed to handle {kind}: {e}")
+        now = time.monotonic()
+        if now - last_beat >= heartbeat_interval:
+            conn.send(("heartbeat", dict(network.counters, pid=os.getpid())))
+            last_beat = now
+
+
+class _Worker:
+    """父进程侧的工作进程句柄"""
+
+    def __init__(self, index: int, shards: List[SellerShard]):
+        self.index = index
+        self.shards = shards
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn: Optional[Connection] = None
+        self.send_lock = threading.Lock()
+        self.last_heartbeat = 0.0
+        self.stats: Dict[str, int] = {}
+        self.restarts = 0
+
+    def send(self, kind: str, frame: bytes) -> bool:
+        try:
+            with self.send_lock:
+                self.conn.send((kind, frame))
+            return True
+        except (OSError, ValueError, AttributeError):
+            return False  # 进程已退出，等待监控线程重启
+
+
+# ---------- 父进程 ----------
+
+class SellerFleet:
+    """多进程卖家运行时"""
+
+    def __init__(self, network: NetworkLayer, workers: Optional[int] = None,
+                 context=None, heartbeat_interval: float = 1.0,
+                 heartbeat_timeout: float = 5.0, timers: Optional[TimerWheel] = None):
+        """
+        Args:
+            network: 买家所在的网络层（任意 NetworkLayer 实现）
+            workers: 工作进程数（默认 CPU 核数）
+            context: multiprocessing 上下文（默认 spawn，父进程中有线程时 fork 不安全）
+            heartbeat_interval: 工作进程心跳间隔（秒）
+            heartbeat_timeout: 超过该时长无心跳视为失联并重启
+            timers: Offer 过期后注销 Deal 转发用的时间轮
+        """
+        self.network = network
+        self.workers = workers or os.cpu_count() or 1
+        self.context = context or multiprocessing.get_context("spawn")
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.timers = timer_wheel if timers is None else timers
+        self.on_deal: Optional[Callable[[Deal], None]] = None
+
+        self._placement: Dict[int, List[SellerShard]] = {}
+        self._categories: Dict[str, int] = {}  # category -> 工作进程号
+        self._workers: Dict[int, _Worker] = {}
+        self._retired: List[Connection] = []  # 重启后待收集线程关闭的旧连接
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.running = False
+        self.counters: Dict[str, int] = {
+            "routed": 0,      # 发给工作进程的 Intent
+            "unrouted": 0,    # 没有卖家经营该类目
+            "offers": 0,      # 汇聚回买家网络的 Offer
+            "deals": 0,       # 工作进程确认的 Deal
+            "restarts": 0,
+            "send_failures": 0,
+        }
+
+    # ---------- 放置 ----------
+
+    def add_seller(self, agent_id: str, shop_name: str, inventory: Dict[str, List[Dict]],
+                   keypair: Optional[KeyPair] = None, **options) -> KeyPair:
+        """
+        登记一个卖家（start() 之前调用）
+
+        Args:
+            inventory: 与 SellerAgent 相同的库存结构，按类目拆成分片
+            keypair: 卖家密钥（默认生成），所有分片共用
+            **options: 传给 SellerAgent 的其他参数（offer_ttl...）
+
+        Returns:
+            卖家密钥对
+        """
+        if self.running:
+            raise RuntimeError("Cannot add sellers to a running fleet")
+        keypair = keypair or KeyPair()
+        private_key = keypair.private_key.to_string()
+        for category, products in inventory.items():
+            index = shard_for(category, self.workers)
+            self._placement.setdefault(index, []).append(
+                SellerShard(agent_id, shop_name, category, products, private_key, options)
+            )
+            self._categories[category] = index
+        return keypair
+
+    def worker_for(self, category: str) -> Optional[int]:
+        """托管该类目的工作进程号；无卖家经营时返回 None"""
+        return self._categories.get(category)
+
+    # ---------- 生命周期 ----------
+
+    def start(self, on_deal: Optional[Callable[[Deal], None]] = None):
+        """启动工作进程并开始监听 Intent"""
+        if self.running:
+            return
+        self.on_deal = on_deal
+        self.running = True
+        for index, shards in self._placement.items():
+            worker = self._workers[index] = _Worker(index, shards)
+            self._spawn(worker)
+        for target in (self._collect_loop, self._monitor_loop):
+            thread = threading.Thread(target=target, name=f"acp0-fleet-{target.__name__}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.network.listen_intents(self._route)
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker.index, worker.shards, child_conn, self.heartbeat_interval),
+            name=f"acp0-fleet-worker-{worker.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        with worker.send_lock:
+            worker.process, worker.conn = process, parent_conn
+        worker.last_heartbeat = time.monotonic()
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """等待所有工作进程发出第一次心跳（卖家已就绪）"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(w.stats for w in self._workers.values()):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def stop(self, timeout: float = 5.0):
+        """通知工作进程退出并回收"""
+        if not self.running:
+            return
+        self.running = False
+        for worker in self._workers.values():
+            worker.send("stop", b"")
+        for worker in self._workers.values():
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for conn in self._retired + [w.conn for w in self._workers.values()]:
+            conn.close()
+        self._retired = []
+
+    # ---------- 路由 ----------
+
+    def _route(self, intent: Intent):
+        """网络层 Intent 回调：只发给托管该类目的工作进程"""
+        if not self.running or intent.is_expired():
+            return
+        index = self._categories.get(intent.demand.category)
+        if index is None:
+            self._count("unrouted")
+            return
+        if self._workers[index].send("intent", encode_frame(intent)):
+            self._count("routed")
+        else:
+            self._count("send_failures")
+
+    def _forward_deal(self, index: int) -> Callable[[Deal], None]:
+        def callback(deal: Deal):
+            if not self._workers[index].send("deal", encode_frame(deal)):
+                self._count("send_failures")
+        return callback
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    # ---------- 汇聚 ----------
+
+    def _collect_loop(self):
+        while self.running:
+            # 连接只在本线程关闭，避免与 wait()/recv() 竞争
+            while self._retired:
+                self._retired.pop().close()
+            conns = {w.conn: w for w in self._workers.values() if w.conn is not None}
+            try:
+                ready = wait(list(conns), timeout=0.1)
+            except OSError:
+                continue
+            for conn in ready:
+                worker = conns[conn]
+                try:
+                    kind, payload = conn.recv()
+                except (EOFError, OSError):
+                    if worker.conn is conn:
+                        worker.last_heartbeat = 0.0  # 进程已退出，交给监控线程重启
+                    continue
+                try:
+                    self._handle(worker, kind, payload)
+                except Exception as e:
+                    print(f"⚠️ Fleet failed to handle {kind} from worker {worker.index}: {e}")
+
+    def _handle(self, worker: _Worker, kind: str, payload):
+        if kind == "heartbeat":
+            worker.last_heartbeat = time.monotonic()
+            worker.stats = payload
+        elif kind == "offer":
+            offer = MessageView(payload).to_model()
+            self.network.listen_deals(offer.offer_id, self._forward_deal(worker.index))
+            if offer.expires_at is not None:
+                self.timers.schedule(offer.expires_at, self.network.unlisten_deals, offer.offer_id)
+            self.network.send_offer(offer, offer.intent_id)
+            self._count("offers")
+        elif kind == "deal":
+            self._count("deals")
+            if self.on_deal:
+                self.on_deal(MessageView(payload).to_model())
+
+    # ---------- 健康检查 ----------
+
+    def _monitor_loop(self):
+        while self.running:
+            time.sleep(self.heartbeat_interval / 2)
+            now = time.monotonic()
+            for worker in list(self._workers.values()):
+                if not self.running:
+                    return
+                alive = worker.process.is_alive()
+                if alive and now - worker.last_heartbeat <= self.heartbeat_timeout:
+                    continue
+                print(f"⚠️ Fleet worker {worker.index} {'stalled' if alive else 'exited'}, restarting")
+                self.restart(worker.index)
+
+    def restart(self, index: int):
+        """重启指定工作进程（分片不变）"""
+        worker = self._workers[index]
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join()
+        retired = worker.conn
+        worker.stats = {}
+        worker.restarts += 1
+        self._count("restarts")
+        self._spawn(worker)
+        self._retired.append(retired)  # 新连接就位后再交给收集线程关闭
+
+    def stats(self) -> Dict:
+        with self._lock:
+            snapshot = dict(self.counters)
+        snapshot["workers"] = {
+            index: dict(worker.stats, restarts=worker.restarts,
+                        alive=worker.process is not None and worker.process.is_alive(),
+                        shards=len(worker.shards))
+            for index, worker in self._workers.items()
+        }
+        return snapshot
@@ -0,0 +1,206 @@
+"""
+Buyer Intent Registry
+
+BuyerAgent.broadcast() 只有一个 received_offers 列表，第二次广播会覆盖第一次的 Offer。
+IntentRegistry 为每个进行中的 Intent 保存独立的 OpenIntent：
+- 独立的 Offer 列表与 OfferBuffer（列式打分）
+- 生命周期：open（已广播）→ collecting（收到 Offer）→ decided（已成交）/ expired（过期未成交）
+- 轮询 poll()、阻塞等待 wait()、asyncio 等待 wait_async()，可以在任何线程上使用
+- decided / expired 的条目保留 retention 秒后从注册表移除，供事后查询
+
+用法:
+    handles = [buyer.open_intent("laptop", (100000, 200000)) for _ in range(100)]
+    for handle in handles:
+        offers = handle.wait(min_offers=1, timeout=2)
+        if offers:
+            buyer.purchase(buyer.select_best(handle))
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from acp0.core.messages import Intent, Offer, Deal
+from acp0.agents.offer_buffer import OfferBuffer
+from acp0.utils.timer_wheel import TimerWheel, timer_wheel
+
+OPEN = "open"
+COLLECTING = "collecting"
+DECIDED = "decided"
+EXPIRED = "expired"
+
+STATES = (OPEN, COLLECTING, DECIDED, EXPIRED)
+TERMINAL_STATES = (DECIDED, EXPIRED)
+
+
+class OpenIntent:
+    """单个 Intent 的 Offer 缓冲区与状态"""
+
+    def __init__(self, intent: Intent, buffer: Optional[OfferBuffer] = None):
+        self.intent = intent
+        self.state = OPEN
+        self.offers: List[Offer] = []
+        self.buffer = buffer if buffer is not None else OfferBuffer()
+        self.deal: Optional[Deal] = None
+        self.opened_at = time.time()
+        self.closed_at: Optional[float] = None
+        self.first_offer_at: Optional[float] = None  # 第一个 Offer 加入的时刻
+        self._cond = threading.Condition()
+        # asyncio 等待者：(事件循环, future, min_offers)
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future, int]] = []
+
+    @property
+    def intent_id(self) -> str:
+        return self.intent.intent_id
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    # ---------- 状态变化 ----------
+
+    def add(self, offer: Offer) -> Optional[int]:
+        """加入已验签的 Offer，返回其在 buffer 中的下标；终态时忽略并返回 None"""
+        with self._cond:
+            if self.done:
+                return None
+            index = len(self.buffer)
+            if self.first_offer_at is None:
+                self.first_offer_at = time.time()
+            self.offers.append(offer)
+            self.buffer.append(offer)
+            self.state = COLLECTING
+            self._notify()
+        return index
+
+    def discard(self, offer: Offer, index: int):
+        """Offer 过期：从列表与 buffer 中剔除"""
+        with self._cond:
+            self.buffer.discard(index, offer)
+            for i, received in enumerate(self.offers):
+                if received is offer:
+                    del self.offers[i]
+                    break
+
+    def close(self, state: str, deal: Optional[Deal] = None) -> bool:
+        """进入终态（decided / expired）；已是终态时返回 False"""
+        with self._cond:
+            if self.done:
+                return False
+            self.state = state
+            self.deal = deal
+            self.closed_at = time.time()
+            self._notify()
+        return True
+
+    def _ready(self, min_offers: int) -> bool:
+        return self.done or len(self.offers) >= min_offers
+
+    def _notify(self):
+        """调用方持有 _cond"""
+        self._cond.notify_all()
+        pending = []
+        for loop, future, min_offers in self._waiters:
+            if self._ready(min_offers):
+                loop.call_soon_threadsafe(_resolve, future)
+            else:
+                pending.append((loop, future, min_offers))
+        self._waiters = pending
+
+    # ---------- 查询 / 等待 ----------
+
+    def poll(self) -> List[Offer]:
+        """当前有效 Offer 的快照（不阻塞）"""
+        with self._cond:
+            return list(self.offers)
+
+    def wait(self, min_offers: int = 1, timeout: Optional[float] = None) -> List[Offer]:
+        """等待至少 min_offers 个 Offer（或进入终态 / 超时），返回快照"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready(min_offers), timeout)
+            return list(self.offers)
+
+    async def wait_async(self, min_offers: int = 1, timeout: Optional[float] = None) -> List[Offer]:
+        """asyncio 版 wait()"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self._ready(min_offers):
+                return list(self.offers)
+            self._waiters.append((loop, future, min_offers))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._waiters = [w for w in self._waiters if w[1] is not future]
+        return self.poll()
+
+    def __repr__(self) -> str:
+        return f"OpenIntent({self.intent_id}, {self.state}, offers={len(self.offers)})"
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class IntentRegistry:
+    """买家进行中的 Intent 表"""
+
+    def __init__(self, timers: Optional[TimerWheel] = None, retention: float = 60.0):
+        """
+        Args:
+            timers: 终态条目清理用的时间轮（默认进程共享的 timer_wheel）
+            retention: decided / expired 条目保留的秒数
+        """
+        self.timers = timer_wheel if timers is None else timers
+        self.retention = retention
+        self._intents: Dict[str, OpenIntent] = {}
+        self._lock = threading.Lock()
+        self.on_close: Optional[Callable[[OpenIntent], None]] = None
+
+    def open(self, intent: Intent, buffer: Optional[OfferBuffer] = None) -> OpenIntent:
+        handle = OpenIntent(intent, buffer)
+        with self._lock:
+            self._intents[intent.intent_id] = handle
+        return handle
+
+    def get(self, intent_id: str) -> Optional[OpenIntent]:
+        return self._intents.get(intent_id)
+
+    def __contains__(self, intent_id: str) -> bool:
+        return intent_id in self._intents
+
+    def __len__(self) -> int:
+        return len(self._intents)
+
+    def decide(self, intent_id: str, deal: Deal) -> bool:
+        return self._close(intent_id, DECIDED, deal)
+
+    def expire(self, intent_id: str) -> bool:
+        return self._close(intent_id, EXPIRED)
+
+    def _close(self, intent_id: str, state: str, deal: Optional[Deal] = None) -> bool:
+        handle = self._intents.get(intent_id)
+        if handle is None or not handle.close(state, deal):
+            return False
+        if self.on_close is not None:
+            self.on_close(handle)
+        self.timers.schedule(time.time() + self.retention, self._forget, handle)
+        return True
+
+    def _forget(self, handle: OpenIntent):
+        with self._lock:
+            if self._intents.get(handle.intent_id) is handle:
+                del self._intents[handle.intent_id]
+
+    def by_state(self, state: str) -> List[OpenIntent]:
+        return [handle for handle in list(self._intents.values()) if handle.state == state]
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        for handle in list(self._intents.values()):
+            counts[handle.state] += 1
+        return counts
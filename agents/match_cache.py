@@ -0,0 +1,220 @@
+"""
+Match Result Cache
+
+大量买家广播几乎相同的需求（同类目、同预算、同属性），SellerAgent 每次都重新匹配。
+MatchCache 包装匹配器（MatchingEngine / CatalogStore），把规范化的需求映射到匹配结果：
+
+- 键：(类目, 预算上下限, 排序去重后的属性, 地点, 配送天数)；币种不参与匹配，不进键
+- 容量有界，LRU 淘汰
+- 精确失效：匹配结果只在以下情况可能改变，只丢弃受影响的条目
+    * 结果商品本身改变（改价、改字段、下架）或售罄（stock 降到 0）-> 丢弃以它为结果的条目
+    * 某个商品变得可售（补货 0 -> 正数、上架、改价）-> 只丢弃它满足、且它比缓存结果
+      更便宜（或缓存结果为无匹配）的条目
+  其余库存增减不改变"预算内最便宜的有货商品"，缓存保持有效
+- 合并：开启 coalesce_window 时，相同需求的并发匹配只计算一次，
+  后到者等待首个请求的结果；窗口大于 0 时首个请求先等待窗口时长，让同一波突发请求都挂上来
+
+失效事件来源：
+- ReservationEngine 的库存跨越 0 的变化（add_listener）
+- CatalogStore 快照替换（subscribe）
+- SellerAgent.reindex()：直接修改了 dict 库存，按类目整体失效
+
+NOTE: 库存事件不携带类目，"变得可售"的检查不区分类目，可能多丢弃其他类目的条目（保守）。
+      命中时还会检查结果商品当前 stock > 0，失效事件与并发匹配之间的竞态最多造成一次未命中。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from acp0.core.messages import Demand
+from acp0.agents.matching import product_matches
+
+_MISSING = object()
+
+
+def demand_key(demand: Demand) -> Tuple:
+    """需求 -> 规范化缓存键"""
+    return (
+        demand.category,
+        demand.budget.min,
+        demand.budget.max,
+        tuple(sorted(set(demand.attributes or ()))),
+        demand.location,
+        demand.delivery_days,
+    )
+
+
+class _Flight:
+    """进行中的一次匹配（合并等待用）"""
+
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class MatchCache:
+    """匹配结果缓存 + 相同需求合并"""
+
+    COUNTERS = ("hits", "misses", "stale", "invalidated", "evicted", "coalesced")
+
+    def __init__(self, matcher, capacity: int = 4096,
+                 coalesce_window: Optional[float] = None):
+        """
+        Args:
+            matcher: 提供 match(demand) / rebuild(category) 的匹配器
+            capacity: 最多缓存的需求数
+            coalesce_window: None 不合并；0 只合并同时进行中的相同需求；
+                             > 0 时首个请求先等待该时长（秒）再计算
+        """
+        self.matcher = matcher
+        self.capacity = capacity
+        self.coalesce_window = coalesce_window
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[Demand, Optional[Dict]]]" = OrderedDict()
+        self._by_sku: Dict[str, Set[Tuple]] = {}
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._generation = 0  # 每次失效 +1；计算期间发生失效的结果不写入缓存
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    # ---------- 匹配 ----------
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        key = demand_key(demand)
+        with self._lock:
+            cached = self._entries.get(key, _MISSING)
+            if cached is not _MISSING:
+                product = cached[1]
+                if product is None or product['stock'] > 0:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return product
+                self._drop(key)  # 售罄事件尚未到达
+                self.counters["stale"] += 1
+            self.counters["misses"] += 1
+
+            flight = None
+            if self.coalesce_window is not None:
+                flight = self._flights.get(key)
+                if flight is not None:
+                    self.counters["coalesced"] += 1
+                    leader = False
+                else:
+                    flight = self._flights[key] = _Flight()
+                    leader = True
+            generation = self._generation
+
+        if flight is not None and not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            if flight is not None and self.coalesce_window > 0:
+                time.sleep(self.coalesce_window)
+            product = self.matcher.match(demand)
+            if flight is not None:
+                flight.result = product
+        finally:
+            if flight is not None:
+                with self._lock:
+                    self._flights.pop(key, None)
+                flight.done.set()  # 匹配异常时等待者得到 None
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, demand, product)
+        return product
+
+    def _store(self, key: Tuple, demand: Demand, product: Optional[Dict]):
+        if self.capacity <= 0:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (demand, product)
+        if product is not None:
+            self._by_sku.setdefault(product['sku'], set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._drop(next(iter(self._entries)))
+            self.counters["evicted"] += 1
+
+    def _drop(self, key: Tuple):
+        _, product = self._entries.pop(key)
+        if product is not None:
+            keys = self._by_sku.get(product['sku'])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_sku[product['sku']]
+
+    # ---------- 失效 ----------
+
+    def _invalidate_keys(self, keys) -> int:
+        keys = [key for key in keys if key in self._entries]
+        for key in keys:
+            self._drop(key)
+        self.counters["invalidated"] += len(keys)
+        return len(keys)
+
+    def _invalidate_product(self, sku: str, product: Optional[Dict]) -> int:
+        """sku 对应的商品变了：丢弃以它为结果的条目，以及它可能胜出的条目"""
+        dropped = self._invalidate_keys(list(self._by_sku.get(sku, ())))
+        if product is not None and product['stock'] > 0:
+            better = [
+                key for key, (demand, result) in self._entries.items()
+                if (result is None or product['price'] <= result['price'])
+                and product_matches(product, demand)
+            ]
+            dropped += self._invalidate_keys(better)
+        return dropped
+
+    def invalidate(self, category: Optional[str] = None) -> int:
+        """整体失效（category 为 None 时清空）"""
+        with self._lock:
+            self._generation += 1
+            if category is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                self._by_sku.clear()
+                self.counters["invalidated"] += dropped
+                return dropped
+            return self._invalidate_keys([key for key in self._entries if key[0] == category])
+
+    def stock_changed(self, sku: str, product: Dict, before: int, after: int):
+        """ReservationEngine 回调：可售数量跨越 0"""
+        if (before > 0) == (after > 0):
+            return
+        with self._lock:
+            self._generation += 1
+            if after <= 0:
+                self._invalidate_keys(list(self._by_sku.get(sku, ())))
+            else:
+                self._invalidate_product(sku, product)
+
+    def catalog_changed(self, changes: List):
+        """CatalogStore 回调：快照替换后的商品变化（acp0.agents.snapshots.ProductChange）"""
+        with self._lock:
+            self._generation += 1
+            for change in changes:
+                self._invalidate_product(change.sku, change.new)
+
+    def rebuild(self, category: Optional[str] = None):
+        """与 MatchingEngine.rebuild 兼容：重建底层索引并失效对应类目"""
+        self.matcher.rebuild(category)
+        self.invalidate(category)
+
+    def price_range(self, category: str) -> Optional[Tuple[int, int]]:
+        """透传底层匹配器（不缓存）"""
+        return self.matcher.price_range(category)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,284 @@
+"""
+Inventory Matching Engine
+
+在卖家库存上建立索引，使带 attributes / location / delivery_days 的 Intent
+在大目录下也能快速匹配：
+- 价格索引：每个类目按 (price, 原始顺序) 排序，预算区间用 bisect 定位
+- 属性倒排索引："ram=16GB" -> 商品下标集合；裸值 "16GB" 匹配任意属性键
+- 地点索引：location -> 商品下标集合（未声明 location 的商品视为不限地点）
+- 配送过滤：delivery_days <= 需求天数（未声明的商品视为不限）
+
+匹配时各过滤条件的 posting list 按大小升序求交集（最小的先交），
+结果再与价格索引结合，取预算内、有库存、价格最低的商品。
+不适合物化成集合的条件（配送天数、含"不限地点"商品的地点过滤）在最后逐个检查。
+
+库存商品格式（location / delivery_days 可选）:
+    {"sku": "LTP-001", "name": "...", "price": 499900, "stock": 10,
+     "attributes": {"ram": "16GB"}, "location": "shanghai", "delivery_days": 2}
+location 也可以是列表（多仓发货）。
+
+库存为 ColumnarCatalog（acp0.storage.catalog）时不在内存中建索引：目录的行已按价格排序、
+倒排表是磁盘上的升序行号数组，匹配直接在 mmap 的列上进行（见 _ColumnarIndex）。
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Set, Tuple
+from acp0.core.messages import Demand
+from acp0.storage.catalog import ColumnarCatalog
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def product_matches(product: Dict, demand: Demand) -> bool:
+    """
+    单个商品是否满足需求（预算、有库存、属性、地点、配送天数；不检查类目）
+
+    与索引匹配的过滤语义一致，供缓存失效判断等逐个检查的场景使用。
+    """
+    if not demand.budget.min <= product['price'] <= demand.budget.max or product['stock'] <= 0:
+        return False
+    if demand.attributes:
+        terms = set()
+        for key, value in (product.get('attributes') or {}).items():
+            for v in _as_list(value):
+                terms.add(f"{key}={v}")
+                terms.add(str(v))
+        if not all(attr in terms for attr in demand.attributes):
+            return False
+    if demand.location is not None:
+        locations = _as_list(product.get('location'))
+        if locations and demand.location not in locations:
+            return False
+    if demand.delivery_days is not None:
+        days = product.get('delivery_days')
+        if days is not None and days > demand.delivery_days:
+            return False
+    return True
+
+
+class _CategoryIndex:
+    """单个类目的索引"""
+
+    def __init__(self, products: List[Dict]):
+        self.products = products
+
+        # 价格索引：稳定排序，同价时保持库存原始顺序（与 min() 一致）
+        self.by_price = sorted(range(len(products)), key=lambda i: products[i]['price'])
+        self.prices = [products[i]['price'] for i in self.by_price]
+
+        self.attributes: Dict[str, Set[int]] = {}
+        self.locations: Dict[str, Set[int]] = {}
+        self.anywhere: Set[int] = set()  # 未声明 location，不限地点
+        self.delivery: List[Optional[int]] = []  # 下标 -> delivery_days
+
+        for i, product in enumerate(products):
+            for key, value in (product.get('attributes') or {}).items():
+                for v in _as_list(value):
+                    self.attributes.setdefault(f"{key}={v}", set()).add(i)
+                    self.attributes.setdefault(str(v), set()).add(i)
+
+            locations = _as_list(product.get('location'))
+            if locations:
+                for loc in locations:
+                    self.locations.setdefault(loc, set()).add(i)
+            else:
+                self.anywhere.add(i)
+
+            self.delivery.append(product.get('delivery_days'))
+
+    def price_range(self) -> Optional[Tuple[int, int]]:
+        """类目内的最低价与最高价（不看库存）；空类目返回 None"""
+        return (self.prices[0], self.prices[-1]) if self.prices else None
+
+    def filters(self, demand: Demand):
+        """
+        收集过滤条件
+
+        Returns:
+            (postings, predicates)：postings 为下标集合列表，predicates 为逐个检查的函数；
+            任一条件确定无命中时返回 None
+        """
+        postings: List[Set[int]] = []
+        predicates = []
+
+        for attr in demand.attributes or []:
+            hits = self.attributes.get(attr)
+            if not hits:
+                return None
+            postings.append(hits)
+
+        if demand.location is not None:
+            local = self.locations.get(demand.location, set())
+            if not self.anywhere:
+                if not local:
+                    return None
+                postings.append(local)
+            elif local:
+                # 有不限地点的商品时不做并集（O(n)），改为逐个检查
+                anywhere = self.anywhere
+                predicates.append(lambda i: i in local or i in anywhere)
+            else:
+                postings.append(self.anywhere)
+
+        if demand.delivery_days is not None:
+            limit = demand.delivery_days
+            delivery = self.delivery
+            predicates.append(lambda i: delivery[i] is None or delivery[i] <= limit)
+
+        return postings, predicates
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        """预算内、满足条件、有库存且价格最低的商品"""
+        filters = self.filters(demand)
+        if filters is None:
+            return None
+        postings, predicates = filters
+
+        # 1. posting list 按大小升序求交集
+        candidates: Optional[Set[int]] = None
+        for hits in sorted(postings, key=len):
+            candidates = hits if candidates is None else candidates & hits
+            if not candidates:
+                return None
+
+        # 2. 结合价格索引
+        products = self.products
+        lo = bisect_left(self.prices, demand.budget.min)
+        hi = bisect_right(self.prices, demand.budget.max)
+
+        if candidates is not None and len(candidates) < hi - lo:
+            # 候选集比价格区间小：直接在候选集中取最低价
+            best = None
+            for i in candidates:
+                p = products[i]
+                if (demand.budget.min <= p['price'] <= demand.budget.max and p['stock'] > 0
+                        and all(pred(i) for pred in predicates)):
+                    if best is None or (p['price'], i) < (products[best]['price'], best):
+                        best = i
+            return None if best is None else products[best]
+
+        # 价格区间更小：按价格升序扫描，第一个命中即最低价
+        for i in self.by_price[lo:hi]:
+            if (products[i]['stock'] > 0 and (candidates is None or i in candidates)
+                    and all(pred(i) for pred in predicates)):
+                return products[i]
+        return None
+
+
+def _contains(sorted_rows, row: int) -> bool:
+    """升序行号数组上的成员判断"""
+    i = bisect_left(sorted_rows, row)
+    return i < len(sorted_rows) and sorted_rows[i] == row
+
+
+class _ColumnarIndex:
+    """
+    列式目录上单个类目的"索引"：只保存行区间，其余都在 mmap 上
+
+    行在类目内按价格升序，倒排表是升序行号，所以沿最短的倒排表（或价格区间）
+    顺序扫描时遇到的第一个命中就是最低价，同价时保持原始顺序，与 _CategoryIndex 一致。
+    """
+
+    def __init__(self, catalog: ColumnarCatalog, category: str):
+        self.catalog = catalog
+        self.category = category
+        self.start, self.end = catalog.bounds(category)
+        self.products = catalog[category] if category in catalog else ()
+
+    def price_range(self) -> Optional[Tuple[int, int]]:
+        if self.start >= self.end:
+            return None
+        return self.catalog.prices[self.start], self.catalog.prices[self.end - 1]
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        catalog, category = self.catalog, self.category
+        prices, stocks = catalog.prices, catalog.stocks
+        lo = bisect_left(prices, demand.budget.min, self.start, self.end)
+        hi = bisect_right(prices, demand.budget.max, lo, self.end)
+        if lo >= hi:
+            return None
+
+        postings = []
+        for attr in demand.attributes or []:
+            hits = catalog.postings(category, "attributes", attr)
+            if not len(hits):
+                return None
+            postings.append(hits)
+
+        predicates = []
+        if demand.location is not None:
+            local = catalog.postings(category, "locations", demand.location)
+            anywhere = catalog.postings(category, "anywhere")
+            if not len(anywhere):
+                if not len(local):
+                    return None
+                postings.append(local)
+            elif len(local):
+                predicates.append(lambda i: _contains(local, i) or _contains(anywhere, i))
+            else:
+                postings.append(anywhere)
+
+        if demand.delivery_days is not None:
+            limit = demand.delivery_days
+            delivery = catalog.delivery
+            predicates.append(lambda i: delivery[i] < 0 or delivery[i] <= limit)
+
+        postings.sort(key=len)
+        if postings and len(postings[0]) < hi - lo:
+            # 最短的倒排表比价格区间小：沿倒排表扫描，其余条件二分判断
+            rows, others = postings[0], postings[1:]
+            candidates = (rows[k] for k in range(bisect_left(rows, lo), bisect_left(rows, hi)))
+        else:
+            others = postings
+            candidates = range(lo, hi)
+
+        for i in candidates:
+            if (stocks[i] > 0 and all(_contains(hits, i) for hits in others)
+                    and all(pred(i) for pred in predicates)):
+                return catalog.row(i)
+        return None
+
+
+class MatchingEngine:
+    """基于倒排索引的库存匹配引擎"""
+
+    def __init__(self, inventory: Dict[str, List[Dict]]):
+        self.inventory = inventory
+        self.rebuild()
+
+    def rebuild(self, category: Optional[str] = None):
+        """
+        重建索引
+
+        价格、属性、地点、配送天数变化后需调用；库存数量 stock 在匹配时实时读取，无需重建。
+        """
+        if isinstance(self.inventory, ColumnarCatalog):
+            # 列式目录自带价格顺序和倒排表，只记录各类目的行区间
+            self._indexes = {cat: _ColumnarIndex(self.inventory, cat) for cat in self.inventory}
+        elif category is None:
+            self._indexes = {
+                cat: _CategoryIndex(products)
+                for cat, products in self.inventory.items()
+            }
+        elif category in self.inventory:
+            self._indexes[category] = _CategoryIndex(self.inventory[category])
+        else:
+            self._indexes.pop(category, None)
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        """返回满足需求、预算内、有库存且价格最低的商品；无匹配时返回 None"""
+        index = self._indexes.get(demand.category)
+        if index is None or not index.products:
+            return None
+        return index.match(demand)
+
+    def price_range(self, category: str) -> Optional[Tuple[int, int]]:
+        """类目内的 (最低价, 最高价)，供 Intent 准入时快速判断预算是否有交集；未知类目返回 None"""
+        index = self._indexes.get(category)
+        return None if index is None else index.price_range()
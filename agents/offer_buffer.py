@@ -0,0 +1,306 @@
+"""
+Columnar Offer Buffer
+
+热门类目的一个 Intent 可能收到成千上万个 Offer，逐个访问 pydantic 对象打分很慢。
+OfferBuffer 在 Offer 到达时把 price / stock / seller_id / 选定属性抽取成列：
+- 数值列（price, stock）：NumPy 可用时为预分配、按倍数扩容的 int64 数组
+- 字符串列（seller_id, 属性值）：字典编码为整数 code，筛选时只比较整数；
+  list / dict 等不可哈希的属性值按规范化 JSON（键排序）编码
+打分与筛选走 NumPy 向量化表达式；NumPy 不可用时退回纯 Python 实现，结果一致。
+过期的 Offer 通过 discard() 标记为失效（不移动其他行），之后的筛选和选优都会跳过它。
+"""
+
+import heapq
+import json
+from typing import Dict, Iterable, List, Optional
+from acp0.core.messages import Offer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+_MISSING = -1  # 属性缺失时的 code
+_JSON = object()  # 不可哈希属性值的编码键标记，避免与同文本的字符串值冲突
+
+
+def _column_key(value):
+    """属性值 -> 字典编码的键（属性值由卖家提供，可能是 list / dict）"""
+    try:
+        hash(value)
+    except TypeError:
+        return (_JSON, json.dumps(value, sort_keys=True, default=str))
+    return value
+
+
+class OfferBuffer:
+    """按列存储的 Offer 缓冲区"""
+
+    def __init__(self, attribute_keys: Optional[Iterable[str]] = None,
+                 use_numpy: Optional[bool] = None, capacity: int = 1024):
+        """
+        Args:
+            attribute_keys: 需要抽取成列的 Item 属性名（如 ["ram", "cpu"]）
+            use_numpy: None 表示自动检测；False 强制使用纯 Python 实现
+            capacity: NumPy 数组的初始容量
+        """
+        if use_numpy and np is None:
+            raise ImportError("NumPy is not installed")
+        self.use_numpy = (np is not None) if use_numpy is None else use_numpy
+        self.attribute_keys = tuple(attribute_keys or ())
+        self.offers: List[Offer] = []
+        self._discarded = 0
+
+        # 字符串列的字典编码：value -> code
+        self._seller_codes: Dict[str, int] = {}
+        self._attr_codes: Dict[str, Dict[str, int]] = {k: {} for k in self.attribute_keys}
+
+        if self.use_numpy:
+            capacity = max(capacity, 1)
+            self._prices = np.empty(capacity, dtype=np.int64)
+            self._stocks = np.empty(capacity, dtype=np.int64)
+            self._sellers = np.empty(capacity, dtype=np.int32)
+            self._live = np.empty(capacity, dtype=bool)
+            self._attrs = {k: np.empty(capacity, dtype=np.int32) for k in self.attribute_keys}
+        else:
+            self._prices = []
+            self._stocks = []
+            self._sellers = []
+            self._live = []
+            self._attrs = {k: [] for k in self.attribute_keys}
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    @property
+    def live_count(self) -> int:
+        """未被 discard() 的 Offer 数"""
+        return len(self.offers) - self._discarded
+
+    @staticmethod
+    def _encode(table: Dict[str, int], value) -> int:
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+        return code
+
+    def _grow(self):
+        """容量翻倍（仅 NumPy 模式）"""
+        new_capacity = len(self._prices) * 2
+        for name in ("_prices", "_stocks", "_sellers", "_live"):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for key, old in self._attrs.items():
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            self._attrs[key] = new
+
+    def append(self, offer: Offer):
+        """追加一个 Offer，并抽取列值"""
+        i = len(self.offers)
+        attributes = offer.item.attributes or {}
+        seller_code = self._encode(self._seller_codes, offer.seller.agent_id)
+
+        if self.use_numpy:
+            if i == len(self._prices):
+                self._grow()
+            self._prices[i] = offer.price.amount
+            self._stocks[i] = offer.stock
+            self._sellers[i] = seller_code
+            self._live[i] = True
+            for key, column in self._attrs.items():
+                value = attributes.get(key)
+                column[i] = _MISSING if value is None else self._encode(self._attr_codes[key], _column_key(value))
+        else:
+            self._prices.append(offer.price.amount)
+            self._stocks.append(offer.stock)
+            self._sellers.append(seller_code)
+            self._live.append(True)
+            for key, column in self._attrs.items():
+                value = attributes.get(key)
+                column.append(_MISSING if value is None else self._encode(self._attr_codes[key], _column_key(value)))
+
+        self.offers.append(offer)
+
+    def extend(self, offers: Iterable[Offer]):
+        for offer in offers:
+            self.append(offer)
+
+    def clear(self):
+        """清空缓冲区（保留已分配的数组容量）"""
+        self.offers = []
+        self._discarded = 0
+        self._seller_codes.clear()
+        for table in self._attr_codes.values():
+            table.clear()
+        if not self.use_numpy:
+            self._prices, self._stocks, self._sellers, self._live = [], [], [], []
+            self._attrs = {k: [] for k in self.attribute_keys}
+
+    def discard(self, index: int, offer: Optional[Offer] = None) -> bool:
+        """
+        将第 index 行标记为失效（如 Offer 已过期）
+
+        Args:
+            offer: 可选，校验该行仍是这个 Offer（缓冲区可能已被 clear() 复用）
+        """
+        if index >= len(self.offers) or (offer is not None and self.offers[index] is not offer):
+            return False
+        if not self._live[index]:
+            return False
+        self._live[index] = False
+        self._discarded += 1
+        return True
+
+    # ---------- 列访问 ----------
+
+    @property
+    def prices(self):
+        n = len(self.offers)
+        return self._prices[:n]
+
+    @property
+    def stocks(self):
+        n = len(self.offers)
+        return self._stocks[:n]
+
+    # ---------- 筛选与打分 ----------
+
+    def _attribute_code(self, key: str, value) -> Optional[int]:
+        if key not in self._attr_codes:
+            raise KeyError(f"Attribute '{key}' is not buffered")
+        return self._attr_codes[key].get(_column_key(value))
+
+    def _indices(self, min_price: Optional[int] = None, max_price: Optional[int] = None,
+                 min_stock: Optional[int] = None,
+                 attributes: Optional[Dict[str, str]] = None,
+                 exclude_sellers: Optional[Iterable[str]] = None):
+        """返回候选下标（NumPy 模式下为 ndarray，避免来回转换）"""
+        n = len(self.offers)
+        attributes = attributes or {}
+        excluded = [self._seller_codes[s] for s in (exclude_sellers or ()) if s in self._seller_codes]
+        attr_conds = [(key, self._attribute_code(key, value)) for key, value in attributes.items()]
+        if any(code is None for _, code in attr_conds):
+            # 某个属性值从未出现过
+            return np.empty(0, dtype=np.int64) if self.use_numpy else []
+
+        if self.use_numpy:
+            mask = np.ones(n, dtype=bool)
+            if min_price is not None:
+                mask &= self._prices[:n] >= min_price
+            if max_price is not None:
+                mask &= self._prices[:n] <= max_price
+            if min_stock is not None:
+                mask &= self._stocks[:n] >= min_stock
+            for key, code in attr_conds:
+                mask &= self._attrs[key][:n] == code
+            if excluded:
+                mask &= ~np.isin(self._sellers[:n], excluded)
+            if self._discarded:
+                mask &= self._live[:n]
+            return np.flatnonzero(mask)
+
+        # 纯 Python：逐列收窄候选集，每个谓词只扫一遍剩余下标
+        candidates = range(n)
+        if self._discarded:
+            live = self._live
+            candidates = [i for i in candidates if live[i]]
+        prices, stocks = self._prices, self._stocks
+        if min_price is not None:
+            candidates = [i for i in candidates if prices[i] >= min_price]
+        if max_price is not None:
+            candidates = [i for i in candidates if prices[i] <= max_price]
+        if min_stock is not None:
+            candidates = [i for i in candidates if stocks[i] >= min_stock]
+        for key, code in attr_conds:
+            column = self._attrs[key]
+            candidates = [i for i in candidates if column[i] == code]
+        if excluded:
+            excluded = set(excluded)
+            sellers = self._sellers
+            candidates = [i for i in candidates if sellers[i] not in excluded]
+        return list(candidates)
+
+    def filter(self, min_price: Optional[int] = None, max_price: Optional[int] = None,
+               min_stock: Optional[int] = None,
+               attributes: Optional[Dict[str, str]] = None,
+               exclude_sellers: Optional[Iterable[str]] = None) -> List[int]:
+        """
+        返回满足所有条件的 Offer 下标
+
+        Args:
+            attributes: 属性等值条件，key 必须在 attribute_keys 中
+            exclude_sellers: 排除的卖家 agent_id
+        """
+        indices = self._indices(min_price, max_price, min_stock, attributes, exclude_sellers)
+        return indices.tolist() if self.use_numpy else indices
+
+    def scores(self, price_weight: float = 1.0, stock_weight: float = 0.0):
+        """
+        计算每个 Offer 的分数（越低越好）
+
+        score = price_weight * price - stock_weight * stock
+        """
+        n = len(self.offers)
+        if self.use_numpy:
+            return price_weight * self._prices[:n] - stock_weight * self._stocks[:n]
+        return [
+            price_weight * p - stock_weight * s
+            for p, s in zip(self._prices, self._stocks)
+        ]
+
+    def best(self, price_weight: float = 1.0, stock_weight: float = 0.0,
+             **filters) -> Optional[Offer]:
+        """
+        返回分数最低的 Offer；无候选时返回 None
+
+        同分时取最先到达的 Offer（与 min() 行为一致）。
+        filters 参数同 filter()。
+        """
+        n = len(self.offers)
+        if n == 0:
+            return None
+
+        if self.use_numpy:
+            scores = self.scores(price_weight, stock_weight)
+            if self._discarded or any(v is not None for v in filters.values()):
+                idx = self._indices(**filters)
+                if len(idx) == 0:
+                    return None
+                return self.offers[int(idx[np.argmin(scores[idx])])]
+            return self.offers[int(np.argmin(scores))]
+
+        scores = self.scores(price_weight, stock_weight)
+        if self._discarded or any(v is not None for v in filters.values()):
+            candidates = self._indices(**filters)
+        else:
+            candidates = range(n)
+        best_index = min(candidates, key=scores.__getitem__, default=None)
+        return None if best_index is None else self.offers[best_index]
+
+    def top_k(self, k: int, price_weight: float = 1.0, stock_weight: float = 0.0,
+              **filters) -> List[Offer]:
+        """返回分数最低的 k 个 Offer（按分数升序）"""
+        n = len(self.offers)
+        if n == 0 or k <= 0:
+            return []
+        filtered = self._discarded or any(v is not None for v in filters.values())
+
+        scores = self.scores(price_weight, stock_weight)
+        if self.use_numpy:
+            idx = self._indices(**filters) if filtered else np.arange(n)
+            if len(idx) == 0:
+                return []
+            candidate_scores = scores[idx]
+            if k < len(idx):
+                part = np.argpartition(candidate_scores, k - 1)[:k]
+            else:
+                part = np.arange(len(idx))
+            part = np.sort(part)  # 保证同分时按到达顺序
+            order = part[np.argsort(candidate_scores[part], kind="stable")]
+            return [self.offers[int(i)] for i in idx[order]]
+
+        candidates = self._indices(**filters) if filtered else range(n)
+        return [self.offers[i] for i in heapq.nsmallest(k, candidates, key=scores.__getitem__)]
@@ -0,0 +1,121 @@
+"""
+Offer Templates
+
+每个 Intent 生成 Offer 时，SellerInfo / Item / Price 对同一个 SKU 完全相同。
+OfferTemplates 按 (SKU, 币种) 缓存预先构建好的嵌套模型，生成 Offer 时只需填入
+intent_id、nonce、timestamp、expires_at 与当前库存：
+
+    template = templates.get(product, currency)
+    offer = template.offer(intent_id, stock, now, ttl)
+
+失效：
+- 商品的 name / price 与模板不一致时自动重建（改价未调用 reindex 也不会发出旧价格）
+- SellerAgent.reindex() 清空全部模板（属性等字段变化）
+- CatalogStore 快照替换时按变化的 SKU 失效（subscribe）
+- 卖家换了密钥（如 SellerFleet 在工作进程中恢复密钥）时 SellerInfo 随之重建
+
+NOTE: 嵌套模型在多个 Offer 之间共享，构建后不应修改；Item.attributes 与库存中的
+      attributes dict 是同一个对象（与逐次构建时相同）。
+"""
+
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+from acp0.core.keys import get_key_registry
+
+
+class OfferTemplate(NamedTuple):
+    """某个 SKU 的 Offer 骨架"""
+    seller: SellerInfo
+    item: Item
+    price: Price
+
+    def offer(self, intent_id: str, stock: int, now: float, ttl: float) -> Offer:
+        """
+        填入本次的字段生成 Offer（offer_id / nonce 由默认工厂生成）
+
+        expires_at 向上取整：不足一秒的 ttl 也不会让 Offer 一生成就过期，
+        有效期不短于为它预留库存的时长
+        """
+        return Offer.trusted(
+            intent_id=intent_id,
+            seller=self.seller,
+            item=self.item,
+            price=self.price,
+            stock=stock,
+            timestamp=int(now),
+            expires_at=math.ceil(now + ttl)
+        )
+
+
+class OfferTemplates:
+    """按 (SKU, 币种) 缓存的 Offer 骨架"""
+
+    def __init__(self, seller):
+        """
+        Args:
+            seller: SellerAgent（读取 agent_id / shop_name / keypair / key_ids）
+        """
+        self.seller = seller
+        self._lock = threading.Lock()
+        self._templates: Dict[Tuple[str, str], OfferTemplate] = {}
+        self._seller_info: Optional[SellerInfo] = None
+        self._keypair = None
+        self.built = 0
+
+    def _info(self) -> SellerInfo:
+        keypair = self.seller.keypair
+        if keypair is not self._keypair:
+            if self.seller.key_ids:
+                # 只在密钥变化时登记一次，之后每个 Offer 只带 22 字符的指纹
+                signer = {"key_id": get_key_registry().register(keypair.get_public_key_base64())}
+            else:
+                signer = {"public_key": keypair.get_public_key_base64()}
+            self._seller_info = SellerInfo.trusted(
+                agent_id=self.seller.agent_id,
+                name=self.seller.shop_name,
+                **signer
+            )
+            self._keypair = keypair
+            self._templates.clear()
+        return self._seller_info
+
+    def get(self, product: Dict, currency: str) -> OfferTemplate:
+        """取（必要时构建）商品的 Offer 骨架"""
+        key = (product['sku'], currency)
+        with self._lock:
+            info = self._info()
+            template = self._templates.get(key)
+            if (template is not None and template.price.amount == product['price']
+                    and template.item.name == product['name']):
+                return template
+            template = OfferTemplate(
+                seller=info,
+                item=Item.trusted(
+                    name=product['name'],
+                    sku=product['sku'],
+                    attributes=product.get('attributes')
+                ),
+                price=Price.trusted(amount=product['price'], currency=currency)
+            )
+            self._templates[key] = template
+            self.built += 1
+            return template
+
+    def invalidate(self, sku: Optional[str] = None):
+        """失效某个 SKU 的模板（sku 为 None 时全部失效）"""
+        with self._lock:
+            if sku is None:
+                self._templates.clear()
+                return
+            for key in [key for key in self._templates if key[0] == sku]:
+                del self._templates[key]
+
+    def catalog_changed(self, changes: List):
+        """CatalogStore 回调：快照替换后失效变化的 SKU"""
+        for change in changes:
+            self.invalidate(change.sku)
+
+    def __len__(self) -> int:
+        return len(self._templates)
@@ -0,0 +1,348 @@
+"""
+Seller Intent Pipeline
+
+SellerAgent.listen() 在投递 Intent 的线程上依次完成 验签 → 匹配 → 签名 → 发送，
+一个卖家同一时刻只能处理一个 Intent，还会拖慢网络层的分发循环。
+
+SellerPipeline 把这些步骤拆成显式的阶段，每个阶段有独立的队列和工作线程：
+
+    submit() ──▶ [intake 有界队列] ──▶ verify ×N ──▶ match ×N ──▶ sign(批量) ×N ──▶ send ×N
+
+- submit() 永不阻塞分发线程；intake 满时按 overflow 策略处理：
+    "drop"  - 直接丢弃新 Intent（计入 shed）
+    "defer" - 暂存到 deferred 队列，intake 有空位时补入；deferred 也满时丢弃
+- 签名阶段一次取出最多 sign_batch_size 个 Offer 批量签名；传入 signer
+  （acp0.core.signing.SigningService）时整批交给签名进程，sign_workers 个线程即
+  sign_workers 批同时在签名进程中执行
+- stats() 返回队列深度、丢弃量等计数器
+- 网络层没有注销 Intent 监听器的接口，stop() 之后 submit() 直接拒绝（计入 stopped），
+  不会在无人消费的队列里堆积
+
+NOTE: 工作线程受 GIL 限制，纯 Python ECDSA 无法并行加速（除非使用 signer）；
+      流水线的主要收益是解耦分发线程、削峰和背压。
+"""
+
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+from acp0.core.messages import Intent, Offer, Deal
+from acp0.core.crypto import sign_message
+from acp0.agents.admission import SIGNATURE
+
+_STOP = object()  # 工作线程退出哨兵
+UNMATCHED_STAGES = ("category", "budget")  # 准入链中等价于"无匹配商品"的阶段
+
+
+class SellerPipeline:
+    """卖家 Intent 处理流水线"""
+
+    OVERFLOW_POLICIES = ("drop", "defer")
+
+    def __init__(self, seller, on_deal: Callable[[Deal], None] = None,
+                 queue_size: int = 1024, overflow: str = "drop",
+                 defer_limit: Optional[int] = None,
+                 verify_workers: int = 2, match_workers: int = 1,
+                 sign_workers: int = 1, send_workers: int = 1,
+                 sign_batch_size: int = 16, signer=None):
+        """
+        Args:
+            seller: SellerAgent
+            on_deal: Deal 回调函数
+            queue_size: intake 队列容量
+            overflow: intake 满时的策略，"drop" 或 "defer"
+            defer_limit: deferred 队列容量（None 表示不限）
+            *_workers: 各阶段的工作线程数
+            sign_batch_size: 签名阶段每批最多处理的 Offer 数
+            signer: 可选的 SigningService；start() 时以 agent_id 登记卖家密钥
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.seller = seller
+        self.on_deal = on_deal
+        self.overflow = overflow
+        self.defer_limit = defer_limit
+        self.sign_batch_size = max(1, sign_batch_size)
+        self.signer = signer
+        self.workers = {
+            "verify": verify_workers,
+            "match": match_workers,
+            "sign": sign_workers,
+            "send": send_workers,
+        }
+
+        self.intake: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._matching: queue.Queue = queue.Queue()
+        self._signing: queue.Queue = queue.Queue()
+        self._sending: queue.Queue = queue.Queue()
+        self._deferred = deque()
+
+        self._lock = threading.Lock()
+        self._threads: Dict[str, list] = {}  # 阶段 -> 工作线程
+        self.running = False
+        self._stopped = False  # stop() 之后 submit() 直接拒绝（网络层无法注销监听器）
+        self.counters: Dict[str, int] = {
+            "received": 0,     # submit() 调用次数
+            "accepted": 0,     # 直接进入 intake
+            "deferred": 0,     # 进入 deferred 队列
+            "shed": 0,         # 被丢弃
+            "stopped": 0,      # stop() 之后到达，直接拒绝
+            "expired": 0,      # 已过期（入队前或排队期间），未做验签
+            "filtered": 0,     # 被 seller.admission 的其他谓词（时间戳、黑名单、重放...）拒绝
+            "invalid": 0,      # 验签失败
+            "unmatched": 0,    # 无匹配商品（含类目 / 预算准入阶段拒绝的，未做验签）
+            "signed": 0,
+            "sealed": 0,       # 用 HMAC 会话标签代替签名（seller.sessions）
+            "sent": 0,
+            "errors": 0,       # 阶段内异常
+            "max_queue_depth": 0,
+        }
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        """启动所有阶段的工作线程"""
+        if self.running:
+            return
+        self.running = True
+        self._stopped = False
+        if self.signer is not None:
+            self.signer.register(self.seller.agent_id, self.seller.keypair)
+        stages = [
+            ("verify", self._verify_worker),
+            ("match", self._match_worker),
+            ("sign", self._sign_worker),
+            ("send", self._send_worker),
+        ]
+        for stage, target in stages:
+            for i in range(self.workers[stage]):
+                thread = threading.Thread(
+                    target=target,
+                    name=f"acp0-{self.seller.agent_id}-{stage}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.setdefault(stage, []).append(thread)
+
+    def stop(self, drain: bool = True):
+        """
+        停止流水线
+
+        Args:
+            drain: True 时先处理完所有已接收（含 deferred）的 Intent；
+                   False 时丢弃尚未验签的 Intent，已进入后续阶段的仍会发出
+        """
+        if not self.running:
+            return
+        with self._lock:
+            self._stopped = True  # 不再接收新 Intent，排空期间到达的也拒绝
+        if drain:
+            self._refill()
+            for q in (self.intake, self._matching, self._signing, self._sending):
+                q.join()
+        else:
+            # 丢弃尚未开始处理的 Intent
+            with self._lock:
+                shed = len(self._deferred)
+                self._deferred.clear()
+            while True:
+                try:
+                    self.intake.get_nowait()
+                except queue.Empty:
+                    break
+                self.intake.task_done()
+                shed += 1
+            self._count("shed", shed)
+
+        # 逐阶段停止：上游线程全部退出后才给下游发哨兵，
+        # 否则上游处理中的 Intent / Offer 会推给已退出的下游而丢失（预留的库存也不会释放）
+        for stage, q in (("verify", self.intake), ("match", self._matching),
+                         ("sign", self._signing), ("send", self._sending)):
+            for _ in range(self.workers[stage]):
+                q.put(_STOP)
+            for thread in self._threads.get(stage, ()):
+                thread.join()
+        self._threads = {}
+        self.running = False
+
+    # ---------- 入口 ----------
+
+    def submit(self, intent: Intent) -> bool:
+        """
+        提交 Intent（网络层回调），不会阻塞
+
+        Returns:
+            False 表示 Intent 被丢弃（含 stop() 之后到达的）
+        """
+        with self._lock:
+            self.counters["received"] += 1
+            if self._stopped:
+                self.counters["stopped"] += 1
+                return False
+            if intent.is_expired():
+                self.counters["expired"] += 1
+                return False
+
+        try:
+            self.intake.put_nowait(intent)
+        except queue.Full:
+            with self._lock:
+                if self.overflow == "defer" and (
+                    self.defer_limit is None or len(self._deferred) < self.defer_limit
+                ):
+                    self._deferred.append(intent)
+                    self.counters["deferred"] += 1
+                    return True
+                self.counters["shed"] += 1
+            return False
+
+        with self._lock:
+            self.counters["accepted"] += 1
+            depth = self.intake.qsize()
+            if depth > self.counters["max_queue_depth"]:
+                self.counters["max_queue_depth"] = depth
+        return True
+
+    def _refill(self):
+        """把 deferred 队列中的 Intent 补入 intake"""
+        with self._lock:
+            while self._deferred:
+                try:
+                    self.intake.put_nowait(self._deferred[0])
+                except queue.Full:
+                    break
+                self._deferred.popleft()
+
+    # ---------- 指标 ----------
+
+    @property
+    def queue_depth(self) -> int:
+        return self.intake.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        """返回计数器快照"""
+        with self._lock:
+            snapshot = dict(self.counters)
+            snapshot["deferred_depth"] = len(self._deferred)
+        snapshot["queue_depth"] = self.intake.qsize()
+        snapshot["match_queue_depth"] = self._matching.qsize()
+        snapshot["sign_queue_depth"] = self._signing.qsize()
+        snapshot["send_queue_depth"] = self._sending.qsize()
+        return snapshot
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    # ---------- 阶段 ----------
+
+    def _verify_worker(self):
+        while True:
+            intent = self.intake.get()
+            if intent is _STOP:
+                self.intake.task_done()
+                return
+            try:
+                # 取走一个后立刻补位，deferred 的 Intent 先于 task_done 入队
+                if self._deferred:
+                    self._refill()
+                rejected = self.seller.admission.check(intent)
+                if rejected is None:
+                    self._matching.put(intent)
+                elif rejected == "expired":
+                    self._count("expired")  # 排队期间过期，跳过验签
+                elif rejected == SIGNATURE:
+                    self._count("invalid")
+                    print(f"⚠️ Invalid intent: {intent.intent_id}")
+                elif rejected in UNMATCHED_STAGES:
+                    self._count("unmatched")
+                else:
+                    self._count("filtered")
+            except Exception:
+                self._count("errors")
+            finally:
+                self.intake.task_done()
+
+    def _match_worker(self):
+        while True:
+            intent = self._matching.get()
+            if intent is _STOP:
+                self._matching.task_done()
+                return
+            try:
+                offer = self.seller._match_intent(intent)
+                if offer and self.seller._seal_offer(offer, intent):
+                    self._count("sealed")  # 会话标签，跳过签名阶段
+                    self._sending.put(offer)
+                elif offer:
+                    self._signing.put(offer)
+                else:
+                    self._count("unmatched")
+            except Exception:
+                self._count("errors")
+            finally:
+                self._matching.task_done()
+
+    def _sign_worker(self):
+        while True:
+            first = self._signing.get()
+            if first is _STOP:
+                self._signing.task_done()
+                return
+
+            # 凑一批：阻塞取第一个，其余非阻塞取
+            batch = [first]
+            stop = False
+            while len(batch) < self.sign_batch_size:
+                try:
+                    offer = self._signing.get_nowait()
+                except queue.Empty:
+                    break
+                if offer is _STOP:
+                    stop = True
+                    break
+                batch.append(offer)
+
+            try:
+                self._sign_batch(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._signing.task_done()
+            if stop:
+                return
+
+    def _sign_batch(self, batch):
+        if self.signer is not None:
+            try:
+                self.signer.sign_messages(self.seller.agent_id, batch).result()
+            except Exception:
+                self._count("errors", len(batch))
+                return
+            self._count("signed", len(batch))
+            for offer in batch:
+                self._sending.put(offer)
+            return
+        keypair = self.seller.keypair
+        for offer in batch:
+            try:
+                sign_message(offer, keypair)
+            except Exception:
+                self._count("errors")
+                continue
+            self._count("signed")
+            self._sending.put(offer)
+
+    def _send_worker(self):
+        while True:
+            offer = self._sending.get()
+            if offer is _STOP:
+                self._sending.task_done()
+                return
+            try:
+                self.seller._dispatch_offer(offer, self.on_deal)
+                self._count("sent")
+            except Exception:
+                self._count("errors")
+            finally:
+                self._sending.task_done()
@@ -0,0 +1,247 @@
+"""
+Stock Reservation Engine
+
+卖家发出 Offer 时为该 Offer 预留库存，收到验签通过的 Deal 时确认，
+超过 TTL 未成交则自动释放，避免并发买家下超卖。
+
+库存仍保存在 inventory 的商品 dict 中：
+- 预留时直接从 product["stock"] 扣减，因此 MatchingEngine 实时读到的是可售数量
+- 确认后扣减保持（已售出）；释放/过期时加回
+
+并发：
+- 每个 SKU 按哈希落到一把分段锁（striped lock）上，不同 SKU 的预留/释放互不阻塞
+- 预留表是普通 dict，单次 pop / 赋值在 CPython 下是原子的，确认和释放以 pop 成功者为准，
+  同一个预留不会被确认两次或释放两次
+- 过期清扫由预留操作顺带触发（非阻塞，同一时刻最多一个线程清扫），也可手动调用 expire()；
+  传入 timers（acp0.utils.timer_wheel）时每个预留在 TTL 到期时由时间轮精确释放
+- 库存为 CatalogStore（acp0.agents.snapshots）时，快照替换前在分段锁内把实时库存迁移到新的商品 dict
+
+用法:
+    engine = ReservationEngine(inventory, ttl=30)
+    if engine.reserve(offer.offer_id, "LTP-001"):
+        ...
+    engine.confirm(deal.offer_id)   # 或超时后自动释放
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from acp0.agents.snapshots import CatalogStore, ProductChange, migrate_stock
+from acp0.storage.catalog import ColumnarCatalog
+from acp0.utils.timer_wheel import Timer, TimerWheel
+
+
+class Reservation(NamedTuple):
+    """单个 Offer 的库存预留"""
+    offer_id: str
+    sku: str
+    quantity: int
+    expires_at: float
+
+
+class ReservationEngine:
+    """按 SKU 分段加锁的库存预留"""
+
+    COUNTERS = ("reserved", "rejected", "confirmed", "released", "expired")
+
+    def __init__(self, inventory: Dict[str, List[Dict]], ttl: float = 30.0,
+                 stripes: int = 64, sweep_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 timers: Optional[TimerWheel] = None):
+        """
+        Args:
+            inventory: 与 SellerAgent 共享的库存（按类目分组的商品 dict 列表）
+            ttl: 默认预留时长（秒），通常与 Offer 有效期一致
+            stripes: 分段锁数量
+            sweep_interval: 顺带清扫过期预留的最小间隔（秒）
+            clock: 单调时钟（测试可替换）
+            timers: 可选的时间轮，到期时逐个释放预留
+        """
+        self.inventory = inventory
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # 计数器同样分段，在对应的锁内更新，stats() 汇总
+        self._counters = [dict.fromkeys(self.COUNTERS, 0) for _ in range(stripes)]
+        self._products: Dict[str, Dict] = {}
+        self._reservations: Dict[str, Reservation] = {}
+        self.timers = timers
+        self._expiry_timers: Dict[str, Timer] = {}
+        self._listeners: List[Callable[[str, Dict, int, int], None]] = []
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+        self.rebuild()
+        if isinstance(inventory, CatalogStore):
+            inventory.set_stock_owner(self._migrate)
+
+    def rebuild(self):
+        """库存增删商品后重建 SKU -> 商品映射"""
+        if isinstance(self.inventory, ColumnarCatalog):
+            # 列式目录按 SKU 二分查找，stock 直接读写 mmap 列，不物化整张映射
+            self._products = self.inventory.by_sku
+            return
+        self._products = {
+            product["sku"]: product
+            for products in self.inventory.values()
+            for product in products
+        }
+
+    def _migrate(self, changes: List[ProductChange]):
+        """CatalogStore 替换快照前回调：在分段锁内把实时库存迁移到新的商品 dict"""
+        for change in changes:
+            stripe = self._stripe(change.sku)
+            with self._locks[stripe]:
+                held = self.held(change.sku) if change.stock and change.stock[0] == "set" else 0
+                migrate_stock(change, held)
+                if change.new is None:
+                    self._products.pop(change.sku, None)
+                else:
+                    self._products[change.sku] = change.new
+
+    def add_listener(self, callback: Callable[[str, Dict, int, int], None]):
+        """
+        注册可售数量跨越 0 的回调 callback(sku, product, before, after)
+        （售罄 / 重新有货，供 MatchCache 失效使用；在锁外调用）
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, sku: str, product: Dict, before: int, after: int):
+        if (before > 0) != (after > 0):
+            for callback in self._listeners:
+                callback(sku, product, before, after)
+
+    def _stripe(self, sku: str) -> int:
+        return hash(sku) % len(self._locks)
+
+    # ---------- 预留 ----------
+
+    def reserve(self, offer_id: str, sku: str, quantity: int = 1,
+                ttl: Optional[float] = None) -> bool:
+        """
+        为 Offer 预留库存
+
+        Returns:
+            可售数量不足或 SKU 不存在时返回 False
+        """
+        now = self.clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        stripe = self._stripe(sku)
+        with self._locks[stripe]:
+            # 在锁内查找：目录快照替换时商品 dict 会在同一把锁内被换掉
+            product = self._products.get(sku)
+            counters = self._counters[stripe]
+            if product is None or offer_id in self._reservations or product["stock"] < quantity:
+                counters["rejected"] += 1
+                return False
+            before = product["stock"]
+            product["stock"] = after = before - quantity
+            counters["reserved"] += 1
+            self._reservations[offer_id] = Reservation(
+                offer_id, sku, quantity, now + (self.ttl if ttl is None else ttl)
+            )
+        self._notify(sku, product, before, after)
+        if self.timers is not None:
+            self._expiry_timers[offer_id] = self.timers.schedule_after(
+                self.ttl if ttl is None else ttl, self._expire_one, offer_id
+            )
+        return True
+
+    def confirm(self, offer_id: str) -> bool:
+        """
+        Deal 验签通过后确认预留（库存扣减生效）
+
+        Returns:
+            预留不存在、已释放或已过期时返回 False
+        """
+        reservation = self._reservations.pop(offer_id, None)
+        if reservation is None:
+            return False
+        self._cancel_timer(offer_id)
+        if self.clock() >= reservation.expires_at:
+            self._restock(reservation, "expired")
+            return False
+        stripe = self._stripe(reservation.sku)
+        with self._locks[stripe]:
+            self._counters[stripe]["confirmed"] += 1
+        return True
+
+    def release(self, offer_id: str) -> bool:
+        """主动释放预留（如买家拒绝）"""
+        reservation = self._reservations.pop(offer_id, None)
+        if reservation is None:
+            return False
+        self._cancel_timer(offer_id)
+        self._restock(reservation, "released")
+        return True
+
+    def _restock(self, reservation: Reservation, reason: str):
+        stripe = self._stripe(reservation.sku)
+        with self._locks[stripe]:
+            product = self._products.get(reservation.sku)
+            if product is not None:
+                before = product["stock"]
+                product["stock"] = after = before + reservation.quantity
+            self._counters[stripe][reason] += 1
+        if product is not None:
+            self._notify(reservation.sku, product, before, after)
+
+    # ---------- 过期 ----------
+
+    def _cancel_timer(self, offer_id: str):
+        timer = self._expiry_timers.pop(offer_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _expire_one(self, offer_id: str):
+        """时间轮回调：释放单个到期的预留"""
+        self._expiry_timers.pop(offer_id, None)
+        reservation = self._reservations.pop(offer_id, None)
+        if reservation is not None:
+            self._restock(reservation, "expired")
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """释放所有已过期的预留，返回释放数量"""
+        if now is None:
+            now = self.clock()
+        expired = 0
+        for offer_id, reservation in list(self._reservations.items()):
+            if reservation.expires_at <= now and self._reservations.pop(offer_id, None) is not None:
+                self._cancel_timer(offer_id)
+                self._restock(reservation, "expired")
+                expired += 1
+        return expired
+
+    def _sweep(self, now: float):
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                self.expire(now)
+        finally:
+            self._sweep_lock.release()
+
+    # ---------- 查询 ----------
+
+    def get(self, offer_id: str) -> Optional[Reservation]:
+        return self._reservations.get(offer_id)
+
+    def held(self, sku: Optional[str] = None) -> int:
+        """当前预留中的数量"""
+        return sum(r.quantity for r in list(self._reservations.values())
+                   if sku is None or r.sku == sku)
+
+    def __len__(self) -> int:
+        return len(self._reservations)
+
+    def stats(self) -> Dict[str, int]:
+        totals = dict.fromkeys(self.COUNTERS, 0)
+        for stripe, lock in enumerate(self._locks):
+            with lock:
+                for name, value in self._counters[stripe].items():
+                    totals[name] += value
+        totals["pending"] = len(self._reservations)
+        return totals
@@ -1,13 +1,29 @@
-from typing import Dict, Any, Callable, List
-from acp0.core.messages import Intent, Offer, Deal, SellerInfo, Item, Price
+import time
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+from acp0.core.messages import Intent, Offer, Deal
 from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.session import SessionManager
 from acp0.network.base import NetworkLayer
+from acp0.agents.matching import MatchingEngine
+from acp0.agents.snapshots import CatalogStore
+from acp0.agents.match_cache import MatchCache
+from acp0.agents.offer_template import OfferTemplates
+from acp0.agents.pipeline import SellerPipeline
+from acp0.agents.admission import AdmissionChain, SIGNATURE, seller_chain
+from acp0.agents.reservation import ReservationEngine
+from acp0.storage.journal import Journal
+from acp0.utils.timer_wheel import TimerWheel, timer_wheel
 
 class SellerAgent:
     """卖家代理"""
     
     def __init__(self, agent_id: str, shop_name: str, 
-                 inventory: Dict[str, List[Dict]], network: NetworkLayer):
+                 inventory: Dict[str, List[Dict]], network: NetworkLayer,
+                 journal: Optional[Journal] = None, offer_ttl: float = 30.0,
+                 timers: Optional[TimerWheel] = None, match_cache: int = 0,
+                 coalesce_window: Optional[float] = None,
+                 admission: Optional[AdmissionChain] = None, key_ids: bool = False,
+                 sessions: Optional[SessionManager] = None):
         """
         Args:
             inventory: {
@@ -17,12 +33,46 @@ class SellerAgent:
                 ],
                 "phone": [...]
             }
+            商品可选字段 location / delivery_days，见 acp0.agents.matching；
+            大目录可传入 acp0.storage.catalog.ColumnarCatalog（mmap 列式存储，库存原地扣减）；
+            需要边匹配边改价、补货时传入 acp0.agents.snapshots.CatalogStore
+            journal: 可选的持久化日志，记录发出的 Offer 和收到的 Deal
+            offer_ttl: Offer 有效期（秒），期间为其预留 1 件库存，
+                       收到验签通过的 Deal 时确认，超时自动释放
+            timers: 过期调度用的时间轮（默认进程共享的 timer_wheel，注销监听器等回调在其后台线程上执行）
+            match_cache: 匹配结果缓存容量（0 为不缓存），见 acp0.agents.match_cache
+            coalesce_window: 相同需求合并匹配的窗口（秒）；None 为不合并
+            admission: Intent 准入链（默认 seller_chain：过期、时间戳、类目、预算、
+                       黑名单、重放依次过滤后才验签），见 acp0.agents.admission
+            key_ids: 发出的 Offer 只带公钥指纹 key_id（见 acp0.core.keys）
+            sessions: 开启 HMAC 会话模式（acp0.core.session）：与带 ecdh_key 的买家握手，
+                      之后给该买家的 Offer 用会话标签代替 ECDSA 签名
         """
         self.agent_id = agent_id
         self.shop_name = shop_name
         self.inventory = inventory
+        # CatalogStore 在不可变快照上匹配，可以在匹配的同时热更新
+        self.matcher = inventory if isinstance(inventory, CatalogStore) else MatchingEngine(inventory)
+        self.offer_ttl = offer_ttl
+        self.timers = timer_wheel if timers is None else timers
+        self.reservations = ReservationEngine(inventory, ttl=offer_ttl, timers=self.timers)
+        if match_cache > 0 or coalesce_window is not None:
+            self.matcher = MatchCache(self.matcher, capacity=match_cache, coalesce_window=coalesce_window)
+            self.reservations.add_listener(self.matcher.stock_changed)
+            if isinstance(inventory, CatalogStore):
+                inventory.subscribe(self.matcher.catalog_changed)
         self.keypair = KeyPair()
+        self.key_ids = key_ids
+        self.sessions = sessions
+        # 按 SKU 预构建的 Offer 骨架（SellerInfo / Item / Price）
+        self.templates = OfferTemplates(self)
+        if isinstance(inventory, CatalogStore):
+            inventory.subscribe(self.templates.catalog_changed)
         self.network = network
+        self.journal = journal
+        # 拉黑的买家公钥（base64），在验签之前拒绝
+        self.blocked_keys: Set[str] = set()
+        self.admission = seller_chain(self) if admission is None else admission
         
         # 自动注册到网络
         if hasattr(network, 'register_agent'):
@@ -36,64 +86,127 @@ class SellerAgent:
             on_deal: Deal 回调函数
         """
         def intent_callback(intent: Intent):
-            # 验证签名和时间戳
-            if not intent.verify():
+            # 便宜的谓词（过期、类目、预算...）先行，只对通过的 Intent 验签
+            rejected = self.admission.check(intent)
+            if rejected == SIGNATURE:
                 print(f"⚠️ Invalid intent: {intent.intent_id}")
+            if rejected is not None:
                 return
             
             # 检查是否有匹配的商品
             offer = self._match_intent(intent)
             if offer:
-                # 签名并发送
-                sign_message(offer, self.keypair)
-                self.network.send_offer(offer, intent.intent_id)
-                
-                # 监听 Deal
-                if on_deal:
-                    self.network.listen_deals(offer.offer_id, on_deal)
+                # 有会话时用会话标签，否则签名；然后发送
+                if not self._seal_offer(offer, intent):
+                    sign_message(offer, self.keypair)
+                self._dispatch_offer(offer, on_deal)
         
         self.network.listen_intents(intent_callback)
     
-    def _match_intent(self, intent: Intent) -> Offer | None:
-        """匹配 Intent，从多个 SKU 中选择最优"""
-        category = intent.demand.category
+    def listen_pipelined(self, on_deal: Callable[[Deal], None] = None,
+                         **options) -> SellerPipeline:
+        """
+        通过 SellerPipeline 监听 Intent：分发线程只负责入队，
+        验签/匹配/签名/发送在各阶段的工作线程上完成
         
-        # 1. 获取该类目下的所有商品
-        products = self.inventory.get(category, [])
-        if not products:
-            return None
+        Args:
+            on_deal: Deal 回调函数
+            **options: 传给 SellerPipeline 的参数（queue_size, overflow, verify_workers...）
         
-        # 2. 按预算筛选
-        budget_min = intent.demand.budget.min
-        budget_max = intent.demand.budget.max
+        Returns:
+            已启动的 SellerPipeline，调用 stop() 结束
+        """
+        pipeline = SellerPipeline(self, on_deal=on_deal, **options)
+        pipeline.start()
+        self.network.listen_intents(pipeline.submit)
+        return pipeline
+    
+    def _dispatch_offer(self, offer: Offer, on_deal: Callable[[Deal], None] = None):
+        """发送已签名的 Offer，并监听 Deal（用于确认库存预留）"""
+        if self.journal is not None:
+            # Offer 不等待落盘，由后续的组提交一并 fsync；Deal 到达时同步落盘
+            self.journal.append(offer, durable=False)
+        self.network.send_offer(offer, offer.intent_id)
+        self.network.listen_deals(offer.offer_id, self._deal_handler(offer.offer_id, on_deal))
+        if offer.expires_at is not None:
+            # Offer 过期后不再接受 Deal（预留由 ReservationEngine 自行释放）；
+            # unlisten_deals 在时间轮线程上执行，与投递 Deal 的线程并发
+            self.timers.schedule(offer.expires_at, self.network.unlisten_deals, offer.offer_id)
+    
+    def _deal_handler(self, offer_id: str,
+                      on_deal: Callable[[Deal], None] = None) -> Callable[[Deal], None]:
+        """Deal 回调：验签 -> 确认预留 -> 写入日志 -> 交给业务处理"""
+        verify = Deal.verify if self.sessions is None else self.sessions.verify
         
-        candidates = [
-            p for p in products 
-            if budget_min <= p['price'] <= budget_max and p['stock'] > 0
-        ]
+        def callback(deal: Deal):
+            if deal.offer_id != offer_id or not verify(deal):
+                print(f"⚠️ Invalid deal: {deal.deal_id}")
+                return
+            if not self.reservations.confirm(offer_id):
+                # 预留已过期/已释放，库存可能已被其他买家占用
+                print(f"⚠️ Reservation expired for offer: {offer_id}")
+                return
+            if self.journal is not None:
+                self.journal.append(deal)
+            if on_deal:
+                on_deal(deal)
+        return callback
+    
+    def reindex(self, category: str = None):
+        """
+        库存价格/属性等字段变化后重建匹配索引（stock 变化无需重建）
         
-        if not candidates:
+        开启 match_cache 时，绕过 ReservationEngine 直接修改 stock 后也应调用，以失效缓存。
+        """
+        self.matcher.rebuild(category)
+        self.reservations.rebuild()
+        self.templates.invalidate()
+    
+    def price_range(self, category: str) -> Optional[Tuple[int, int]]:
+        """类目内的 (最低价, 最高价)；本店不经营的类目返回 None"""
+        return self.matcher.price_range(category)
+    
+    def _seal_offer(self, offer: Offer, intent: Intent) -> bool:
+        """
+        会话模式：与该买家有已确认的会话时写入会话标签并返回 True；
+        否则若 Intent 带 ecdh_key 则发起（或重发）握手（Offer 带上本端临时公钥），
+        返回 False 由调用方做 ECDSA 签名
+        """
+        if self.sessions is None:
+            return False
+        buyer = intent.get_signer_public_key()
+        if intent.session_acks:
+            # Intent 已验签：买家确认已完成握手，待确认的会话此后才用于发送
+            self.sessions.confirm(buyer, intent.session_acks)
+        session = self.sessions.session_for(buyer)
+        if session is not None:
+            self.sessions.seal(offer, session)
+            return True
+        if intent.ecdh_key is not None:
+            try:
+                offer.ecdh_key = self.sessions.accept(
+                    self.keypair.get_public_key_base64(), buyer, intent.ecdh_key)
+            except ValueError:
+                pass  # 临时公钥非法：本次不握手
+        return False
+    
+    def _match_intent(self, intent: Intent) -> Offer | None:
+        """匹配 Intent，从多个 SKU 中选择最优，并为 Offer 预留库存"""
+        # 并发下匹配到的最后几件可能被其他 Offer 抢先预留，重新匹配
+        for _ in range(3):
+            offer = self._build_offer(intent)
+            if offer is None:
+                return None
+            if self.reservations.reserve(offer.offer_id, offer.item.sku, ttl=self.offer_ttl):
+                return offer
+        return None
+    
+    def _build_offer(self, intent: Intent) -> Offer | None:
+        # 1. 按类目、属性、地点、配送天数、预算筛选，选择有库存且价格最低的
+        best_product = self.matcher.match(intent.demand)
+        if best_product is None:
             return None
         
-        # 3. 选择价格最低的（简单策略，可扩展）
-        best_product = min(candidates, key=lambda p: p['price'])
-        
-        # 4. 生成 Offer
-        return Offer(
-            intent_id=intent.intent_id,
-            seller=SellerInfo(
-                agent_id=self.agent_id,
-                name=self.shop_name,
-                public_key=self.keypair.get_public_key_base64()
-            ),
-            item=Item(
-                name=best_product['name'],
-                sku=best_product['sku'],
-                attributes=best_product.get('attributes')
-            ),
-            price=Price(
-                amount=best_product['price'],
-                currency=intent.demand.budget.currency
-            ),
-            stock=best_product['stock']
-        )
+        # 2. 在预构建的骨架上填入本次字段（值来自本代理的库存和已验签的 Intent，走可信路径）
+        template = self.templates.get(best_product, intent.demand.budget.currency)
+        return template.offer(intent.intent_id, best_product['stock'], time.time(), self.offer_ttl)
@@ -0,0 +1,356 @@
+"""
+Copy-on-Write Catalog Snapshots
+
+商家不断改价、补货，而 SellerAgent.inventory 在匹配的同时被原地修改是不安全的
+（MatchingEngine 的索引与商品列表可能不一致）。CatalogStore 把库存变成版本化的不可变快照：
+
+- 读：匹配线程读取 store.current（一次属性读取，原子），在该快照上匹配，全程无锁
+- 写：写入方提交一批 CatalogDelta（改价 / 设库存 / 补货 / 上架 / 下架 / 改字段），
+  在写锁内基于当前快照构建下一个快照，再原子替换 current
+- 结构共享：未改动的类目直接复用上一个快照的商品元组和匹配索引；
+  改动的类目复制商品元组、只复制被改的商品 dict，然后重建该类目的索引
+
+stock 是例外：它是 ReservationEngine 在商品 dict 上原地扣减的实时计数，不属于快照内容。
+替换某个商品 dict 时，库存所有者（ReservationEngine）在对应的分段锁内把实时库存
+搬到新 dict 上，再应用本批的设库存 / 补货，最后才替换 current，预留不会丢失。
+旧快照上的 stock 可能已过时，匹配到无货商品时由 SellerAgent 的预留重试兜底。
+
+用法:
+    store = CatalogStore(inventory)
+    seller = SellerAgent("seller_001", "Shop", store, network)
+    store.apply([
+        CatalogDelta.price("LTP-001", 459900),
+        CatalogDelta.restock("LTP-002", 20),
+        CatalogDelta.add("phone", {"sku": "PHN-009", "name": "...", "price": 199900, "stock": 5}),
+        CatalogDelta.remove("LTP-003"),
+    ])
+    store.stats()   # version / age_seconds / 应用耗时
+"""
+
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from acp0.core.messages import Demand
+from acp0.agents.matching import _CategoryIndex
+
+
+class CatalogDelta(NamedTuple):
+    """对目录的一次修改"""
+    op: str                          # price | stock | restock | add | remove | update
+    sku: str
+    value: Any = None                # 价格 / 库存 / 增量 / 商品 dict / 字段 dict
+    category: Optional[str] = None   # add 时必填
+
+    @classmethod
+    def price(cls, sku: str, amount: int) -> "CatalogDelta":
+        return cls("price", sku, amount)
+
+    @classmethod
+    def stock(cls, sku: str, quantity: int) -> "CatalogDelta":
+        """设置实物库存（预留中的数量会从中扣除）"""
+        return cls("stock", sku, quantity)
+
+    @classmethod
+    def restock(cls, sku: str, quantity: int) -> "CatalogDelta":
+        """在当前可售库存上增减"""
+        return cls("restock", sku, quantity)
+
+    @classmethod
+    def add(cls, category: str, product: Dict) -> "CatalogDelta":
+        return cls("add", product["sku"], product, category)
+
+    @classmethod
+    def remove(cls, sku: str) -> "CatalogDelta":
+        return cls("remove", sku)
+
+    @classmethod
+    def update(cls, sku: str, **fields) -> "CatalogDelta":
+        """修改 name / attributes / location 等其他字段"""
+        return cls("update", sku, fields)
+
+
+class ProductChange(NamedTuple):
+    """快照替换时某个 SKU 的变化，交给订阅者同步实时库存"""
+    sku: str
+    old: Optional[Dict]                  # 上一个快照中的商品 dict（新上架为 None）
+    new: Optional[Dict]                  # 下一个快照中的商品 dict（下架为 None）
+    stock: Optional[Tuple[str, int]]     # ("set", n) / ("add", n)；None 表示沿用实时库存
+
+
+def migrate_stock(change: ProductChange, held: int = 0):
+    """
+    把旧商品 dict 上的实时库存搬到新 dict 上，并应用本批的设库存 / 补货
+
+    Args:
+        held: 该 SKU 预留中的数量（设置实物库存时从中扣除）
+    """
+    if change.new is None:
+        return
+    live = change.old["stock"] if change.old is not None else 0
+    if change.stock is None:
+        change.new["stock"] = live
+    elif change.stock[0] == "set":
+        change.new["stock"] = change.stock[1] - held
+    else:
+        change.new["stock"] = live + change.stock[1]
+
+
+class _CategoryState(NamedTuple):
+    products: Tuple[Dict, ...]
+    index: _CategoryIndex
+    positions: Dict[str, int]            # sku -> 下标
+
+
+def _category_state(products: Iterable[Dict]) -> _CategoryState:
+    products = tuple(products)
+    return _CategoryState(
+        products,
+        _CategoryIndex(products),
+        {product["sku"]: i for i, product in enumerate(products)}
+    )
+
+
+class CatalogSnapshot(Mapping):
+    """不可变的目录版本（Mapping: 类目 -> 商品元组）"""
+
+    def __init__(self, version: int, categories: Dict[str, _CategoryState]):
+        self.version = version
+        self.created_at = time.monotonic()
+        self._categories = categories
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        """在本快照上匹配（与 MatchingEngine.match 语义相同）"""
+        state = self._categories.get(demand.category)
+        if state is None or not state.products:
+            return None
+        return state.index.match(demand)
+
+    def price_range(self, category: str) -> Optional[Tuple[int, int]]:
+        """类目内的 (最低价, 最高价)；未知类目返回 None"""
+        state = self._categories.get(category)
+        return None if state is None else state.index.price_range()
+
+    def locate(self, sku: str) -> Optional[Tuple[str, int]]:
+        """sku -> (类目, 下标)"""
+        for category, state in self._categories.items():
+            i = state.positions.get(sku)
+            if i is not None:
+                return category, i
+        return None
+
+    def get(self, sku: str, default=None) -> Optional[Dict]:
+        """按 SKU 取商品（注意：按类目取请用 snapshot[category]）"""
+        found = self.locate(sku)
+        if found is None:
+            return default
+        category, i = found
+        return self._categories[category].products[i]
+
+    def shares(self, other: "CatalogSnapshot", category: str) -> bool:
+        """两个快照的某个类目是否为同一份数据（结构共享）"""
+        return self._categories.get(category) is other._categories.get(category)
+
+    def __getitem__(self, category: str) -> Tuple[Dict, ...]:
+        return self._categories[category].products
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def products(self) -> int:
+        return sum(len(state.products) for state in self._categories.values())
+
+
+class CatalogStore(Mapping):
+    """
+    版本化目录：current 为最新快照，apply() 原子地切换到下一个版本
+
+    本身也是 Mapping（委托给当前快照），可以直接作为 SellerAgent 的 inventory。
+    """
+
+    def __init__(self, inventory: Dict[str, List[Dict]]):
+        """
+        Args:
+            inventory: 初始库存；商品 dict 被第一个快照接管，之后不应再直接修改
+        """
+        self._current = CatalogSnapshot(1, {
+            category: _category_state(products) for category, products in inventory.items()
+        })
+        self._write_lock = threading.Lock()
+        self._stock_owner: Optional[Callable[[List[ProductChange]], None]] = None
+        self._subscribers: List[Callable[[List[ProductChange]], None]] = []
+        self.counters = {
+            "applies": 0,
+            "deltas": 0,
+            "rejected": 0,        # 校验失败、整批未应用
+            "total_apply_ms": 0.0,
+            "max_apply_ms": 0.0,
+            "last_apply_ms": 0.0,
+        }
+
+    @property
+    def current(self) -> CatalogSnapshot:
+        return self._current
+
+    def set_stock_owner(self, callback: Callable[[List[ProductChange]], None]):
+        """
+        指定实时库存的所有者（ReservationEngine）：每次替换快照前、写锁之内，
+        由它在自己的锁内把库存迁移到新的商品 dict 上（见 migrate_stock）；
+        未指定时由 store 直接迁移
+        """
+        self._stock_owner = callback
+
+    def subscribe(self, callback: Callable[[List[ProductChange]], None]):
+        """注册快照替换后的回调（如 MatchCache 失效），在写锁内、新快照生效后调用"""
+        self._subscribers.append(callback)
+
+    # ---------- 写 ----------
+
+    def apply(self, deltas: Iterable[CatalogDelta]) -> CatalogSnapshot:
+        """
+        应用一批修改，返回新快照
+
+        整批要么全部生效要么都不生效：任一修改非法（SKU 不存在、重复上架、未知操作）时
+        抛出 ValueError，current 保持不变。
+        """
+        deltas = list(deltas)
+        with self._write_lock:
+            start = time.perf_counter()
+            base = self._current
+            try:
+                snapshot, changes = self._build(base, deltas)
+            except ValueError:
+                self.counters["rejected"] += 1
+                raise
+            if self._stock_owner is not None:
+                self._stock_owner(changes)
+            else:
+                for change in changes:
+                    migrate_stock(change)
+            self._current = snapshot
+            for callback in self._subscribers:
+                callback(changes)
+            elapsed = (time.perf_counter() - start) * 1e3
+            counters = self.counters
+            counters["applies"] += 1
+            counters["deltas"] += len(deltas)
+            counters["total_apply_ms"] += elapsed
+            counters["last_apply_ms"] = elapsed
+            counters["max_apply_ms"] = max(counters["max_apply_ms"], elapsed)
+        return snapshot
+
+    def _build(self, base: CatalogSnapshot,
+               deltas: List[CatalogDelta]) -> Tuple[CatalogSnapshot, List[ProductChange]]:
+        # 本批涉及的 SKU：上一个快照中的位置、最终的商品 dict（None 为下架）与所属类目
+        origin: Dict[str, Optional[Tuple[str, Dict]]] = {}
+        final: Dict[str, Optional[Dict]] = {}
+        homes: Dict[str, str] = {}
+        stock_ops: Dict[str, Tuple[str, int]] = {}
+
+        def lookup(sku: str) -> Optional[Dict]:
+            if sku not in origin:
+                found = base.locate(sku)
+                origin[sku] = None if found is None else (found[0], base[found[0]][found[1]])
+                if found is not None:
+                    final[sku], homes[sku] = origin[sku][1], found[0]
+            return final.get(sku)
+
+        for delta in deltas:
+            sku = delta.sku
+            product = lookup(sku)
+            if delta.op == "add":
+                if delta.category is None:
+                    raise ValueError(f"Category is required to add {sku}")
+                if product is not None:
+                    raise ValueError(f"Duplicate SKU: {sku}")
+                product = dict(delta.value)
+                product.setdefault("stock", 0)
+                final[sku], homes[sku] = product, delta.category
+                stock_ops[sku] = ("set", product["stock"])
+                continue
+            if product is None:
+                raise ValueError(f"Unknown SKU: {sku}")
+            if delta.op == "remove":
+                final[sku] = None
+                stock_ops.pop(sku, None)
+            elif delta.op == "price":
+                final[sku] = dict(product, price=int(delta.value))
+            elif delta.op == "update":
+                if "sku" in delta.value or "stock" in delta.value:
+                    raise ValueError("Use stock/restock deltas to change stock; SKU is immutable")
+                final[sku] = dict(product, **delta.value)
+            elif delta.op == "stock":
+                final[sku] = dict(product)
+                stock_ops[sku] = ("set", int(delta.value))
+            elif delta.op == "restock":
+                final[sku] = dict(product)
+                op, amount = stock_ops.get(sku, ("add", 0))
+                stock_ops[sku] = (op, amount + int(delta.value))
+            else:
+                raise ValueError(f"Unknown catalog delta: {delta.op}")
+
+        # 按类目汇总：原位替换 / 删除，新上架（或换类目）的追加到末尾
+        replaced: Dict[str, Dict[str, Optional[Dict]]] = {}
+        appended: Dict[str, List[Dict]] = {}
+        changes: List[ProductChange] = []
+        for sku, product in final.items():
+            old = origin[sku]
+            if old is None and product is None:
+                continue  # 本批内上架又下架
+            if old is not None:
+                moved = product is not None and homes[sku] != old[0]
+                replaced.setdefault(old[0], {})[sku] = None if moved else product
+            if product is not None and (old is None or homes[sku] != old[0]):
+                appended.setdefault(homes[sku], []).append(product)
+            changes.append(ProductChange(sku, old and old[1], product, stock_ops.get(sku)))
+
+        categories = dict(base._categories)  # 结构共享：只替换被改动的类目
+        for category in set(replaced) | set(appended):
+            edits = replaced.get(category, {})
+            previous = base._categories.get(category)
+            products = [edits.get(product["sku"], product) for product in (previous.products if previous else ())]
+            products = [product for product in products if product is not None]
+            products.extend(appended.get(category, ()))
+            if products:
+                categories[category] = _category_state(products)
+            else:
+                categories.pop(category, None)
+        return CatalogSnapshot(base.version + 1, categories), changes
+
+    # ---------- 读 ----------
+
+    def match(self, demand: Demand) -> Optional[Dict]:
+        """在当前快照上匹配（可替代 MatchingEngine）"""
+        return self._current.match(demand)
+
+    def price_range(self, category: str) -> Optional[Tuple[int, int]]:
+        return self._current.price_range(category)
+
+    def rebuild(self, category: Optional[str] = None):
+        """与 MatchingEngine.rebuild 兼容：快照的索引随版本构建，无需重建"""
+        pass
+
+    def __getitem__(self, category: str) -> Tuple[Dict, ...]:
+        return self._current[category]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._current)
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def stats(self) -> Dict:
+        snapshot = self._current
+        counters = dict(self.counters)
+        applies = counters["applies"]
+        counters["avg_apply_ms"] = counters["total_apply_ms"] / applies if applies else 0.0
+        counters.update(
+            version=snapshot.version,
+            age_seconds=time.monotonic() - snapshot.created_at,
+            categories=len(snapshot),
+            products=snapshot.products(),
+        )
+        return counters
@@ -0,0 +1,82 @@
+"""
+准入链基准：先验签 vs 便宜谓词先行
+
+混合流量（类目不经营、预算不相交、过期、重放、正常），
+verify_cache 关闭以测量真实的 ECDSA 开销。
+
+- verify-first: 旧流程（is_expired → verify，其余由匹配判断）
+- admission: SellerAgent 默认的 seller_chain
+
+用法:
+    python benchmarks/bench_admission.py [--intents 2000] [--relevant 0.2]
+
+NOTE: 每条 Intent 用独立的 nonce 签名，重放流量为同一条 Intent 的再次投递；
+      只测量准入阶段，不包含匹配和 Offer 签名。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.seller import SellerAgent
+from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.core.verify_cache import verification_cache
+from acp0.network.memory import InMemoryNetwork
+
+
+def make_intents(n: int, relevant: float, seed: int = 5):
+    rng = random.Random(seed)
+    keypair = KeyPair()
+    buyer = BuyerInfo(agent_id="bench-buyer", public_key=keypair.get_public_key_base64())
+    intents = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < relevant:
+            category, budget = "laptop", (100000, 900000)
+        elif roll < relevant + (1 - relevant) / 3:
+            category, budget = "phone", (100000, 900000)       # 类目不经营
+        else:
+            category, budget = "laptop", (1000, 2000)           # 预算不相交
+        intent = Intent(buyer=buyer, demand=Demand(
+            category=category, budget=Budget(min=budget[0], max=budget[1], currency="CNY")))
+        sign_message(intent, keypair)
+        intents.append(intent)
+    # 重放：再次投递一部分已收到的 Intent
+    intents.extend(rng.sample(intents, n // 10))
+    return intents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intents", type=int, default=2000)
+    parser.add_argument("--relevant", type=float, default=0.2)
+    args = parser.parse_args()
+
+    inventory = {"laptop": [{"sku": f"LTP-{i}", "name": f"Laptop {i}", "price": 100000 + i * 1000, "stock": 10}
+                            for i in range(100)]}
+    seller = SellerAgent("bench-seller", "Bench Shop", inventory, InMemoryNetwork())
+    intents = make_intents(args.intents, args.relevant)
+    verification_cache.enabled = False
+
+    start = time.perf_counter()
+    passed = sum(1 for intent in intents if not intent.is_expired() and intent.verify())
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    admitted = sum(1 for intent in intents if seller.admission.admit(intent))
+    chained = time.perf_counter() - start
+
+    stats = seller.admission.stats()
+    print(f"[{len(intents)} intents, {args.relevant:.0%} relevant, 10% replayed]")
+    print(f"   verify-first {legacy * 1e3:9.1f} ms   verified {len(intents):6d}   passed {passed:6d}")
+    print(f"   admission    {chained * 1e3:9.1f} ms   verified {stats['verified']:6d}   admitted {admitted:6d}"
+          f"   saved {stats['saved']} ECDSA   {legacy / chained:.1f}x")
+    print(f"   rejected by stage: {stats['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
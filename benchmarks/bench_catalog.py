@@ -0,0 +1,110 @@
+"""
+大目录基准：dict 库存 vs mmap 列式目录
+
+- 内存：tracemalloc 统计构建 dict 库存 + 匹配索引、打开列式目录后的 Python 堆占用
+- 匹配：随机需求（预算 + 属性 / 地点）的平均匹配耗时
+
+用法:
+    python benchmarks/bench_catalog.py [--skus 200000] [--queries 5000]
+
+NOTE: 列式目录的数据在页缓存中，不计入 Python 堆；首次访问的缺页开销也不在统计之内
+      （先做一轮预热）。dict 引擎的内存包含匹配索引本身。
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.matching import MatchingEngine
+from acp0.core.messages import Demand, Budget
+from acp0.storage.catalog import ColumnarCatalog
+
+CATEGORIES = ["laptop", "phone", "tablet", "camera", "watch"]
+
+
+def write_jsonl(path: str, skus: int, seed: int = 3):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(skus):
+            product = {
+                "category": rng.choice(CATEGORIES), "sku": f"SKU-{i:08d}", "name": f"Product {i}",
+                "price": rng.randrange(1000, 1_000_000), "stock": rng.randint(0, 50),
+                "attributes": {"color": rng.choice(["black", "white", "silver", "blue"]),
+                               "size": rng.choice(["S", "M", "L", "XL"])},
+            }
+            if rng.random() < 0.5:
+                product["location"] = rng.choice(["shanghai", "beijing", "shenzhen", "chengdu"])
+            f.write(json.dumps(product) + "\n")
+
+
+def load_dict(path: str):
+    inventory = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            product = json.loads(line)
+            inventory.setdefault(product.pop("category"), []).append(product)
+    return inventory
+
+
+def make_demands(count: int, seed: int = 4):
+    rng = random.Random(seed)
+    demands = []
+    for _ in range(count):
+        low = rng.randrange(1000, 900_000)
+        kwargs = {}
+        if rng.random() < 0.5:
+            kwargs["attributes"] = [f"color={rng.choice(['black', 'white'])}", rng.choice(["S", "XL"])]
+        if rng.random() < 0.3:
+            kwargs["location"] = rng.choice(["shanghai", "beijing"])
+        demands.append(Demand(category=rng.choice(CATEGORIES),
+                              budget=Budget(min=low, max=low + rng.randrange(1000, 50_000), currency="CNY"),
+                              **kwargs))
+    return demands
+
+
+def measure(label: str, build, demands):
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = build()
+    build_seconds = time.perf_counter() - start
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    for demand in demands[:200]:
+        engine.match(demand)  # 预热
+    start = time.perf_counter()
+    hits = sum(engine.match(demand) is not None for demand in demands)
+    per_query = (time.perf_counter() - start) / len(demands) * 1e6
+    print(f"   {label:10} heap {heap / 1e6:8.2f} MB   load {build_seconds:6.2f} s   "
+          f"match {per_query:8.1f} us   hits {hits}")
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar catalog benchmark")
+    parser.add_argument("--skus", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    source = os.path.join(workdir, "products.jsonl")
+    write_jsonl(source, args.skus)
+    start = time.perf_counter()
+    ColumnarCatalog.build(os.path.join(workdir, "catalog"), source).close()
+    print(">>> Catalog Benchmark")
+    print(f"   {args.skus} SKUs, columnar build {time.perf_counter() - start:.2f} s")
+    print()
+
+    demands = make_demands(args.queries)
+    measure("dict", lambda: MatchingEngine(load_dict(source)), demands)
+    measure("columnar", lambda: MatchingEngine(ColumnarCatalog(os.path.join(workdir, "catalog"))), demands)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+正文压缩基准：线上字节数与 CPU 开销
+
+对比（同一批带图片列表、丰富属性的 Offer，以及小的 Intent / Deal）：
+- json: 不压缩
+- zlib: 不带字典
+- dict v1: 内置字典
+- trained: 用前一半样本训练的字典，在后一半上测量
+
+用法:
+    python benchmarks/bench_compression.py [--messages 2000] [--attributes 30] [--images 8]
+
+NOTE: 只测量正文（envelope 路由头不压缩）；耗时为单条消息的平均压缩 / 解压微秒数。
+      阈值以下的消息（小 Intent / Deal）保持原样，见 "skipped" 一列。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.core.crypto import KeyPair
+from acp0.core.messages import Offer, SellerInfo, Item, Price, Intent, BuyerInfo, Demand, Budget, Deal, Payment
+from acp0.network.compression import FrameCompression, PresetDictionaries, decompress, register_dictionaries
+from acp0.network.envelope import encode_json
+
+VOCABULARY = {
+    "color": ["black", "white", "silver", "blue", "red"],
+    "ram": ["8GB", "16GB", "32GB", "64GB"],
+    "storage": ["256GB", "512GB", "1TB", "2TB"],
+    "cpu": ["4-core", "8-core", "10-core", "12-core"],
+    "screen": ["13.3 inch", "14 inch", "15.6 inch", "16 inch"],
+    "warranty": ["1 year", "2 years", "3 years"],
+    "material": ["aluminium", "magnesium", "plastic"],
+    "origin": ["Shenzhen", "Suzhou", "Chongqing"],
+}
+
+
+def make_messages(n: int, attributes: int, images: int, seed: int = 9):
+    rng = random.Random(seed)
+    keypair = KeyPair()
+    public_key = keypair.get_public_key_base64()
+    messages = []
+    for i in range(n):
+        attrs = {key: rng.choice(values) for key, values in VOCABULARY.items()}
+        for j in range(max(attributes - len(attrs), 0)):
+            attrs[f"spec_{j}"] = rng.choice(["yes", "no", "optional", str(rng.randint(1, 100))])
+        sku = f"SKU-{rng.randrange(10 ** 6):06d}"
+        offer = Offer(
+            intent_id=f"intent-{i}",
+            seller=SellerInfo(agent_id=f"seller-{i % 20}", name=f"Shop {i % 20}", public_key=public_key),
+            item=Item(name=f"Laptop {sku}", sku=sku, attributes=attrs,
+                      images=[f"https://cdn.example.com/items/{sku}/{k}.jpg" for k in range(images)]),
+            price=Price(amount=rng.randrange(100000, 900000), currency="CNY"),
+            stock=rng.randint(1, 50),
+            expires_at=int(time.time()) + 30
+        )
+        offer.sign(keypair)
+        messages.append(offer)
+        if i % 4 == 0:
+            intent = Intent(buyer=BuyerInfo(agent_id="buyer", public_key=public_key),
+                            demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY")))
+            intent.sign(keypair)
+            deal = Deal(offer_id=offer.offer_id, buyer=intent.buyer,
+                        payment=Payment(method="mock", status="authorized"))
+            deal.sign(keypair)
+            messages.extend([intent, deal])
+    return messages
+
+
+class _PlainZlib(FrameCompression):
+    """不带字典的 zlib（对照组）"""
+
+    def compress(self, message_type, body):
+        if len(body) < self.threshold:
+            return None
+        return b"\x00" + zlib.compress(body, self.level)
+
+
+def measure(label, compression, bodies):
+    raw = sum(len(body) for _, body in bodies)
+    wire, skipped, packed = 0, 0, []
+    start = time.perf_counter()
+    for message_type, body in bodies:
+        out = compression.compress(message_type, body) if compression is not None else None
+        packed.append((message_type, out, body))
+    compress_us = (time.perf_counter() - start) / len(bodies) * 1e6
+
+    start = time.perf_counter()
+    for message_type, out, body in packed:
+        if out is None:
+            skipped += 1
+            wire += len(body)
+        else:
+            wire += len(out)
+            if isinstance(compression, _PlainZlib):
+                zlib.decompress(out[1:])
+            else:
+                decompress(message_type, out)
+    decompress_us = (time.perf_counter() - start) / len(bodies) * 1e6
+    print(f"   {label:<10} {wire / 1024:10.1f} KB  {wire / raw:7.1%}  skipped {skipped:6d}"
+          f"   compress {compress_us:7.1f} us   decompress {decompress_us:7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--attributes", type=int, default=30)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--threshold", type=int, default=512)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.attributes, args.images)
+    half = len(messages) // 2
+    register_dictionaries(PresetDictionaries.train(2, messages[:half]))
+    bodies = [(m.message_type, encode_json(m)) for m in messages[half:]]
+    offers = [len(body) for message_type, body in bodies if message_type == "offer"]
+
+    print(f"[{len(bodies)} messages, offer body avg {sum(offers) / len(offers):.0f} B, threshold {args.threshold}]")
+    measure("json", None, bodies)
+    measure("zlib", _PlainZlib(threshold=args.threshold), bodies)
+    measure("dict v1", FrameCompression(1, threshold=args.threshold), bodies)
+    measure("trained", FrameCompression(2, threshold=args.threshold), bodies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+故障注入负载基准：同一段种子化负载在不同网络状况下，买家收集 Offer 与卖家流水线的退化
+
+负载：若干买家按泊松到达 open_intent()，若干卖家（listen_pipelined）都能报价；
+网络：FaultyNetwork 包装 InMemoryNetwork，按 --profiles 依次运行
+    none  - 不注入
+    wan   - 对数正态时延（中位数 20ms）+ 抖动
+    tail  - 帕累托重尾时延（最小 5ms，alpha 1.5，上限 2s）
+    lossy - wan + 丢包 5%、重复 2%、乱序 5%
+
+每个 Intent 在打开后 --window 秒时统计：
+    first offer  首个 Offer 到达的耗时 p50 / p99 / max
+    complete     收齐全部卖家 Offer 的比例
+    empty        一个 Offer 都没有的比例
+
+用法:
+    python benchmarks/bench_faults.py [--intents 100] [--rate 20] [--sellers 4] [--profiles none,wan,lossy]
+
+NOTE: 到达序列（买家、类目、预算、间隔）由 --seed 决定；故障按 (seed, 消息 nonce, 接收方) 判定，
+      与卖家流水线线程、投递线程的交错无关。消息 nonce 每次运行随机生成，因此各次运行的故障
+      比例与分布一致，但不是逐条相同。计时受机器负载影响。纯 Python ECDSA 很慢，--rate 过高时测到的是 CPU 饱和而不是网络。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.faults import FaultProfile, FaultyNetwork, lognormal, pareto
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.trace import _percentiles
+
+CATEGORIES = ["laptop", "phone", "tablet", "camera"]
+
+_WAN = FaultProfile(delay=lognormal(0.02, 0.5), jitter=0.005)
+_TAIL = FaultProfile(delay=pareto(0.005, 1.5, cap=2.0))
+_LOSSY = _WAN._replace(drop=0.05, duplicate=0.02, reorder=0.05)
+PROFILES = {
+    "none": {},
+    "wan": {"intent": _WAN, "offer": _WAN, "deal": _WAN},
+    "tail": {"intent": _TAIL, "offer": _TAIL, "deal": _TAIL},
+    "lossy": {"intent": _LOSSY, "offer": _LOSSY, "deal": _LOSSY},
+}
+
+
+def inventory():
+    return {category: [{"sku": f"{category}-{i}", "name": f"{category} {i}",
+                        "price": 10000 * (i + 1), "stock": 1_000_000} for i in range(50)]
+            for category in CATEGORIES}
+
+
+def run(profile: str, args) -> dict:
+    network = FaultyNetwork(InMemoryNetwork(), PROFILES[profile], seed=args.seed)
+    sellers = [SellerAgent(f"seller-{i}", f"Shop {i}", inventory(), network, offer_ttl=300)
+               for i in range(args.sellers)]
+    pipelines = [seller.listen_pipelined() for seller in sellers]
+    buyers = [BuyerAgent(f"buyer-{i}", network) for i in range(args.buyers)]
+
+    # 负载：与网络共用 seed，故障另按每条消息的 nonce 派生随机数
+    rng = random.Random(args.seed)
+    handles = []
+    for _ in range(args.intents):
+        low = rng.randrange(10000, 300000, 10000)
+        handles.append(rng.choice(buyers).open_intent(
+            rng.choice(CATEGORIES), (low, low + 100000), ttl=args.window + 5))
+        time.sleep(rng.expovariate(args.rate))
+
+    first, counts = [], []
+    for handle in handles:
+        remaining = handle.opened_at + args.window - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        counts.append(len(handle.poll()))
+        if handle.first_offer_at is not None and handle.first_offer_at <= handle.opened_at + args.window:
+            first.append(handle.first_offer_at - handle.opened_at)
+
+    pipeline_stats = {}
+    for pipeline in pipelines:
+        pipeline.stop()
+        for name, value in pipeline.stats().items():
+            total = pipeline_stats.get(name, 0)
+            pipeline_stats[name] = max(total, value) if name == "max_queue_depth" else total + value
+    network.close()
+    return {
+        "first_offer": _percentiles(first),
+        "complete": sum(count >= args.sellers for count in counts) / len(counts),
+        "empty": sum(count == 0 for count in counts) / len(counts),
+        "mean_offers": sum(counts) / len(counts),
+        "pipeline": pipeline_stats,
+        "network": network.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fault injection load benchmark")
+    parser.add_argument("--intents", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=20, help="intent arrivals per second")
+    parser.add_argument("--sellers", type=int, default=4)
+    parser.add_argument("--buyers", type=int, default=4)
+    parser.add_argument("--window", type=float, default=1.0, help="offer collection window (s)")
+    parser.add_argument("--profiles", default="none,wan,tail,lossy")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for profile in args.profiles.split(","):
+        stats = run(profile, args)
+        first = stats["first_offer"]
+        print(f">>> {profile} ({args.intents} intents, {args.sellers} sellers, {args.window:g}s window)")
+        print(f"   first offer     p50 {first['p50_ms']:.1f} ms   p99 {first['p99_ms']:.1f} ms   max {first['max_ms']:.1f} ms")
+        print(f"   offers          mean {stats['mean_offers']:.2f} / {args.sellers}   "
+              f"complete {stats['complete']:.1%}   empty {stats['empty']:.1%}")
+        pipeline = stats["pipeline"]
+        print(f"   sellers         sent {pipeline['sent']}   filtered {pipeline['filtered']}   "
+              f"expired {pipeline['expired']}   shed {pipeline['shed']}   max queue {pipeline['max_queue_depth']}")
+        for message_type, counters in sorted(stats["network"].items()):
+            print(f"   {message_type:15} " + "   ".join(f"{name} {value}" for name, value in counters.items()))
+
+
+if __name__ == "__main__":
+    main()
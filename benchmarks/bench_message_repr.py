@@ -0,0 +1,100 @@
+"""
+消息表示基准：校验构建 vs 可信构建 vs 紧凑表示
+
+测量每条 Offer 的构建耗时和常驻内存（tracemalloc）。
+
+用法:
+    python benchmarks/bench_message_repr.py [--count 20000]
+"""
+
+import argparse
+import gc
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+from acp0.core.compact import CompactOffer, compact, expand
+
+ATTRIBUTES = {"cpu": "R7-8840U", "ram": "16GB", "ssd": "512GB"}
+
+
+def build_validated(i: int) -> Offer:
+    return Offer(
+        intent_id="bench-intent",
+        seller=SellerInfo(agent_id=f"seller-{i % 100}", name="Shop", public_key="pk" * 44),
+        item=Item(name="Laptop Pro 14", sku=f"SKU-{i}", attributes=ATTRIBUTES),
+        price=Price(amount=499900, currency="CNY"),
+        stock=10
+    )
+
+
+def build_trusted(i: int) -> Offer:
+    return Offer.trusted(
+        intent_id="bench-intent",
+        seller=SellerInfo.trusted(agent_id=f"seller-{i % 100}", name="Shop",
+                                  public_key="pk" * 44),
+        item=Item.trusted(name="Laptop Pro 14", sku=f"SKU-{i}", attributes=ATTRIBUTES),
+        price=Price.trusted(amount=499900, currency="CNY"),
+        stock=10
+    )
+
+
+def measure(label: str, build, count: int):
+    # 计时期间关闭 GC，避免分代回收的抖动掩盖构建本身的差异
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    objs = [build(i) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    del objs
+
+    # 内存单独测量，避免 tracemalloc 开销影响计时
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    per_msg_us = elapsed / count * 1e6
+    per_msg_bytes = (after - before) / count
+    print(f"   {label:28} {per_msg_us:8.2f} us/msg  {per_msg_bytes:8.0f} B/msg")
+    return objs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message representation benchmark")
+    parser.add_argument("--count", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(">>> Message Representation Benchmark")
+    print(f"   {args.count} offers")
+    print()
+
+    measure("validated Offer(...)", build_validated, args.count)
+    trusted = measure("trusted Offer.trusted(...)", build_trusted, args.count)
+    measure("CompactOffer.from_model", lambda i: compact(trusted[i]), args.count)
+
+    compacts = [compact(o) for o in trusted]
+    start = time.perf_counter()
+    for c in compacts:
+        expand(c)
+    print(f"   {'expand (trusted)':28} {(time.perf_counter() - start) / args.count * 1e6:8.2f} us/msg")
+    start = time.perf_counter()
+    for c in compacts:
+        expand(c, validate=True)
+    print(f"   {'expand (validated)':28} {(time.perf_counter() - start) / args.count * 1e6:8.2f} us/msg")
+
+    print()
+    print("NOTE: pydantic v2 的校验在 Rust 中完成，可信构建主要省去的是校验与嵌套模型检查，")
+    print("      构建耗时的大头是 uuid4 / 时间戳生成；内存收益主要来自紧凑表示。")
+    print("NOTE: CompactOffer 内存不含与原 Offer 共享的字符串（sku、name 等），")
+    print("      即只转换后丢弃 pydantic 对象时节省的增量。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Offer 生成基准：逐次构建 SellerInfo / Item / Price vs 预构建骨架
+
+- legacy: 旧版 _build_offer 的写法（每次新建嵌套模型、重新 base64 编码公钥）
+- template: SellerAgent._build_offer（OfferTemplates 骨架 + 缓存的公钥编码）
+- 两者都测量 "构建 + 签名"（签名不受骨架影响，用于看端到端占比）
+
+用法:
+    python benchmarks/bench_offer_build.py [--offers 20000] [--skus 100]
+
+NOTE: 匹配走同一个 MatchingEngine，只在构建阶段不同；不做库存预留。
+"""
+
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.seller import SellerAgent
+from acp0.core.crypto import sign_message
+from acp0.core.messages import Intent, Offer, BuyerInfo, Demand, Budget, SellerInfo, Item, Price
+from acp0.network.memory import InMemoryNetwork
+
+
+def make_seller(skus: int, seed: int = 7) -> SellerAgent:
+    rng = random.Random(seed)
+    inventory = {"laptop": [
+        {"sku": f"LTP-{i:05d}", "name": f"Laptop {i}", "price": rng.randrange(100000, 900000),
+         "stock": 1000, "attributes": {"ram": rng.choice(["8GB", "16GB", "32GB"])}}
+        for i in range(skus)
+    ]}
+    return SellerAgent("bench-seller", "Bench Shop", inventory, InMemoryNetwork())
+
+
+def make_intents(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    intents = []
+    for _ in range(n):
+        low = rng.randrange(100000, 800000)
+        intents.append(Intent(
+            buyer=BuyerInfo(agent_id="bench-buyer", public_key="pk"),
+            demand=Demand(category="laptop", budget=Budget(min=low, max=low + 200000, currency="CNY"))
+        ))
+    return intents
+
+
+def legacy_build(seller: SellerAgent, intent: Intent):
+    best_product = seller.matcher.match(intent.demand)
+    if best_product is None:
+        return None
+    now = int(time.time())
+    return Offer.trusted(
+        intent_id=intent.intent_id,
+        seller=SellerInfo.trusted(
+            agent_id=seller.agent_id,
+            name=seller.shop_name,
+            public_key=base64.b64encode(seller.keypair.public_key.to_string()).decode('utf-8')
+        ),
+        item=Item.trusted(
+            name=best_product['name'],
+            sku=best_product['sku'],
+            attributes=best_product.get('attributes')
+        ),
+        price=Price.trusted(
+            amount=best_product['price'],
+            currency=intent.demand.budget.currency
+        ),
+        stock=best_product['stock'],
+        timestamp=now,
+        expires_at=now + int(seller.offer_ttl)
+    )
+
+
+def run(build, seller, intents, sign: bool) -> float:
+    """返回 offers/sec"""
+    start = time.perf_counter()
+    produced = 0
+    for intent in intents:
+        offer = build(seller, intent)
+        if offer is not None:
+            produced += 1
+            if sign:
+                sign_message(offer, seller.keypair)
+    return produced / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=20000)
+    parser.add_argument("--skus", type=int, default=100)
+    args = parser.parse_args()
+
+    seller = make_seller(args.skus)
+    intents = make_intents(args.offers)
+    signed = intents[:max(args.offers // 10, 1)]
+    template_build = SellerAgent._build_offer
+    run(template_build, seller, intents[:1000], sign=False)  # 预热：骨架全部建好
+
+    print(f"[1 seller, {args.skus} SKUs, {args.offers} intents]")
+    for label, build in (("legacy", legacy_build), ("template", template_build)):
+        rate = run(build, seller, intents, sign=False)
+        signed_rate = run(build, seller, signed, sign=True)
+        print(f"   {label:<10} build {rate:>10,.0f} offers/s   build+sign {signed_rate:>8,.0f} offers/s")
+    print(f"   templates built: {seller.templates.built}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Offer 打分基准：逐对象 min() vs OfferBuffer（NumPy / 纯 Python）
+
+用法:
+    python benchmarks/bench_offer_scoring.py [--sizes 10000 100000]
+
+NOTE: Offer 不签名（签名成本与打分无关），只测量缓冲区填充与选优耗时。
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.offer_buffer import OfferBuffer, np
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+
+RAM_CHOICES = ["8GB", "16GB", "32GB"]
+
+
+def make_offers(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        Offer(
+            intent_id="bench-intent",
+            seller=SellerInfo(agent_id=f"seller-{i % 500}", name="Shop", public_key="pk"),
+            item=Item(name="Laptop", sku=f"SKU-{i}", attributes={"ram": rng.choice(RAM_CHOICES)}),
+            price=Price(amount=rng.randint(300000, 900000), currency="CNY"),
+            stock=rng.randint(0, 50)
+        )
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """返回最佳一次耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(n: int):
+    offers = make_offers(n)
+    print(f"[{n} offers]")
+
+    t = timed(lambda: min(offers, key=lambda o: o.price.amount))
+    print(f"   list min(price)                 {t:9.2f} ms")
+    t = timed(lambda: min(
+        (o for o in offers if o.stock > 0 and (o.item.attributes or {}).get("ram") == "16GB"),
+        key=lambda o: o.price.amount
+    ))
+    print(f"   list filter + min               {t:9.2f} ms")
+
+    modes = [False] + ([True] if np is not None else [])
+    for use_numpy in modes:
+        label = "numpy" if use_numpy else "python"
+        buffer = OfferBuffer(attribute_keys=["ram"], use_numpy=use_numpy)
+        start = time.perf_counter()
+        buffer.extend(offers)
+        fill = (time.perf_counter() - start) * 1000
+        print(f"   buffer[{label:6}] fill              {fill:9.2f} ms  (amortized over arrival)")
+
+        t = timed(lambda: buffer.best())
+        print(f"   buffer[{label:6}] best()            {t:9.2f} ms")
+        t = timed(lambda: buffer.best(min_stock=1, attributes={"ram": "16GB"}))
+        print(f"   buffer[{label:6}] filter + best()   {t:9.2f} ms")
+        t = timed(lambda: buffer.top_k(10, stock_weight=100.0, min_stock=1))
+        print(f"   buffer[{label:6}] top_k(10)         {t:9.2f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(">>> Offer Scoring Benchmark")
+    print(f"   NumPy: {'available' if np is not None else 'not installed (python fallback only)'}")
+    print()
+    for n in args.sizes:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main()
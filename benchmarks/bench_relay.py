@@ -0,0 +1,127 @@
+"""
+中继联邦基准：集群规模 / 拓扑对传播延迟与重复抑制的影响
+
+- 传播延迟：Intent 在节点 0 广播到每个其他节点投递的耗时（p50 / p99 / 最慢节点）
+- 重复抑制率：各中继收到的消息中被 nonce 去重丢弃的比例
+- 覆盖率：跳数上限内被投递到的节点比例
+
+用法:
+    python benchmarks/bench_relay.py [--sizes 2 4 8 16] [--intents 200] [--transport memory|tcp]
+                                     [--topology chain|ring|mesh|random] [--max-hops 4]
+
+NOTE: memory 传输为同进程同步调用，延迟只反映中继处理开销；
+      tcp 走 localhost socket，每条链路一个读线程。Intent 不签名（中继不验签）。
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.relay import RelayNode, connect
+from acp0.utils.timer_wheel import TimerWheel
+
+
+def edges_for(topology: str, n: int, seed: int = 5):
+    if topology == "chain":
+        return [(i, i + 1) for i in range(n - 1)]
+    if topology == "ring":
+        return [(i, (i + 1) % n) for i in range(n)] if n > 2 else [(0, 1)]
+    if topology == "mesh":
+        return [(a, b) for a in range(n) for b in range(a + 1, n)]
+    # random：环 + 每个节点再随机连 2 条边
+    rng = random.Random(seed)
+    edges = set(edges_for("ring", n))
+    for a in range(n):
+        for b in rng.sample(range(n), min(2, n)):
+            if a != b and (b, a) not in edges:
+                edges.add((a, b))
+    return sorted(edges)
+
+
+def build(n: int, topology: str, transport: str, max_hops: int):
+    timers = TimerWheel()
+    relays = [RelayNode(InMemoryNetwork(), f"r{i}", max_hops=max_hops, timers=timers) for i in range(n)]
+    ports = [relay.serve() for relay in relays] if transport == "tcp" else None
+    for a, b in edges_for(topology, n):
+        if transport == "memory":
+            connect(relays[a], relays[b])
+        else:
+            relays[a].connect_tcp("127.0.0.1", ports[b])
+    if transport == "tcp":
+        expected = sum(1 for _ in edges_for(topology, n)) * 2
+        while sum(len(r.links) for r in relays) < expected:
+            time.sleep(0.01)
+    return relays
+
+
+def bench(n: int, args):
+    relays = build(n, args.topology, args.transport, args.max_hops)
+    lock = threading.Lock()
+    arrivals = {}
+
+    def on_deliver(node_id, message, hops):
+        with lock:
+            arrivals.setdefault(message.intent_id, []).append(time.perf_counter())
+
+    for relay in relays:
+        relay.on_deliver = on_deliver
+
+    latencies, slowest, coverage = [], [], []
+    for i in range(args.intents):
+        intent = Intent.trusted(
+            buyer=BuyerInfo.trusted(agent_id="bench-buyer", public_key="pk"),
+            demand=Demand.trusted(category="laptop", budget=Budget.trusted(min=1, max=i + 2, currency="CNY"))
+        )
+        start = time.perf_counter()
+        relays[0].network.broadcast_intent(intent)
+        deadline = time.monotonic() + 1.0
+        while args.transport == "tcp" and len(arrivals.get(intent.intent_id, ())) < n - 1:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.0002)
+        with lock:
+            times = [t - start for t in arrivals.get(intent.intent_id, ())]
+        latencies.extend(times)
+        if times:
+            slowest.append(max(times))
+        coverage.append(len(times) / (n - 1))
+
+    received = sum(r.stats()["received"] for r in relays)
+    duplicates = sum(r.stats()["duplicates"] for r in relays)
+    for relay in relays:
+        relay.close()
+
+    def ms(samples, q):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[max(int(len(ordered) * q) - 1, 0)] * 1e3
+
+    print(f"   n={n:<3} p50 {statistics.median(latencies) * 1e3 if latencies else 0:8.3f} ms"
+          f"   p99 {ms(latencies, 0.99):8.3f} ms   slowest p50 {statistics.median(slowest) * 1e3 if slowest else 0:8.3f} ms"
+          f"   dup {duplicates / received if received else 0:6.1%}   coverage {statistics.mean(coverage):6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--intents", type=int, default=200)
+    parser.add_argument("--transport", choices=["memory", "tcp"], default="memory")
+    parser.add_argument("--topology", choices=["chain", "ring", "mesh", "random"], default="random")
+    parser.add_argument("--max-hops", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"[{args.topology}, {args.transport}, max_hops={args.max_hops}, {args.intents} intents]")
+    for n in args.sizes:
+        bench(n, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Trace 重放基准：把录制的 Intent 重放给一个卖家，比较不同版本的匹配 / 验签 / 签名开销
+
+未指定 --trace 时先合成一段 trace：若干买家按泊松到达广播 Intent。
+同一个 trace 文件可以在不同版本的代码上重放，负载完全一致。
+
+用法:
+    python benchmarks/bench_replay.py [--trace FILE] [--intents 500] [--rate 200] [--speed 0]
+
+NOTE: --speed 0 为全速重放（吞吐上限）；--speed 1 按录制节奏重放，看调度滞后和单次调用耗时。
+      重放时 refresh=True，消息按重放时间重新签名，trace 可以是任意时间前录制的。
+"""
+
+import argparse
+import copy
+import random
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.seller import SellerAgent
+from acp0.core.crypto import KeyPair
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.trace import RecordingNetwork, TraceReplayer
+
+CATEGORIES = ["laptop", "phone", "tablet", "camera"]
+INVENTORY = {
+    category: [{"sku": f"{category}-{i}", "name": f"{category} {i}", "price": 10000 * (i + 1), "stock": 1_000_000}
+               for i in range(50)]
+    for category in CATEGORIES
+}
+
+
+def synthesize(path: str, intents: int, rate: float, seed: int = 7):
+    """按泊松到达合成 Intent 流"""
+    rng = random.Random(seed)
+    buyers = [KeyPair() for _ in range(20)]
+    recorder = RecordingNetwork(InMemoryNetwork(), path)
+    for _ in range(intents):
+        keypair = rng.choice(buyers)
+        low = rng.randrange(10000, 300000, 10000)
+        intent = Intent(
+            buyer=BuyerInfo(agent_id="bench-buyer", public_key=keypair.get_public_key_base64()),
+            demand=Demand(category=rng.choice(CATEGORIES),
+                          budget=Budget(min=low, max=low + 100000, currency="CNY")),
+            expires_at=int(time.time()) + 300
+        )
+        intent.sign(keypair)
+        recorder.broadcast_intent(intent)
+        time.sleep(rng.expovariate(rate))
+    recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace replay benchmark")
+    parser.add_argument("--trace", help="trace file (synthesized if omitted)")
+    parser.add_argument("--intents", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=200, help="synthetic arrivals per second")
+    parser.add_argument("--speed", type=float, default=0, help="0 = max speed")
+    args = parser.parse_args()
+
+    path = args.trace
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench.trace")
+        print(f">>> Synthesizing {args.intents} intents at ~{args.rate:.0f}/s -> {path}")
+        synthesize(path, args.intents, args.rate)
+
+    network = InMemoryNetwork()
+    seller = SellerAgent("bench-seller", "Bench Shop", copy.deepcopy(INVENTORY), network, offer_ttl=300)
+    seller.listen()
+    stats = TraceReplayer(network, speed=args.speed, refresh=True).replay(path, types=("intent",))
+
+    print(f">>> Replay ({'max speed' if not args.speed else f'{args.speed:g}x'})")
+    print(f"   messages        {stats['messages']}")
+    print(f"   recorded        {stats['recorded_seconds']:.2f} s")
+    print(f"   elapsed         {stats['elapsed_seconds']:.2f} s")
+    print(f"   throughput      {stats['rate']:,.0f} msg/s")
+    print(f"   lag             p50 {stats['lag']['p50_ms']:.2f} ms   p99 {stats['lag']['p99_ms']:.2f} ms")
+    for message_type, call in stats["call"].items():
+        print(f"   {message_type:15} p50 {call['p50_ms']:.2f} ms   p99 {call['p99_ms']:.2f} ms   max {call['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+库存预留并发基准：单把全局锁 vs 分段锁（striped lock）
+
+多个线程对不同 SKU 执行 reserve -> confirm / release，测量总吞吐。
+
+用法:
+    python benchmarks/bench_reservation.py [--threads 8] [--ops 20000] [--skus 1000]
+
+NOTE: CPython 有 GIL，纯 Python 临界区无法真正并行，分段锁的收益主要体现在
+      减少锁竞争导致的线程切换和等待；stripes=1 即等价于单把全局锁。
+"""
+
+import argparse
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.agents.reservation import ReservationEngine
+
+
+def make_inventory(skus: int):
+    return {"bench": [{"sku": f"SKU-{i}", "name": "Item", "price": 1, "stock": 1_000_000}
+                      for i in range(skus)]}
+
+
+def run(stripes: int, threads: int, ops: int, skus: int) -> float:
+    """返回每秒操作数（reserve + confirm/release 计一次）"""
+    engine = ReservationEngine(make_inventory(skus), ttl=60, stripes=stripes)
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n: int):
+        barrier.wait()
+        for i in range(ops):
+            offer_id = f"{n}-{i}"
+            if engine.reserve(offer_id, f"SKU-{(n * 7919 + i) % skus}"):
+                if i % 2:
+                    engine.confirm(offer_id)
+                else:
+                    engine.release(offer_id)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reservation contention benchmark")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--skus", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(">>> Stock Reservation Benchmark")
+    print(f"   {args.threads} threads x {args.ops} ops, {args.skus} SKUs")
+    print()
+    for stripes in (1, 16, 64, 256):
+        label = "global lock" if stripes == 1 else f"{stripes} stripes"
+        rate = run(stripes, args.threads, args.ops, args.skus)
+        print(f"   {label:14} {rate:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
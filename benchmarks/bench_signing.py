@@ -0,0 +1,93 @@
+"""
+签名基准：调用方线程内 sign_message vs SigningService（多进程）
+
+- 吞吐：N 个线程各签 M 条 Offer 的总耗时
+- 干扰：签名期间另一个线程做固定的纯 Python 计算，测其完成时间（GIL 争用程度）
+
+用法:
+    python benchmarks/bench_signing.py [--offers 2000] [--threads 4] [--workers 4] [--batch 32]
+
+NOTE: 服务启动（spawn 工作进程）不计入耗时；摘要在调用方计算，两种方式相同。
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+from acp0.core.signing import SigningService
+
+
+def make_offers(n: int, public_key: str):
+    return [
+        Offer.trusted(
+            intent_id=f"intent-{i}",
+            seller=SellerInfo.trusted(agent_id="bench-seller", name="Shop", public_key=public_key),
+            item=Item.trusted(name="Laptop", sku=f"SKU-{i}"),
+            price=Price.trusted(amount=150000 + i, currency="CNY"),
+            stock=5
+        )
+        for i in range(n)
+    ]
+
+
+def busy_work(results):
+    start = time.perf_counter()
+    total = 0
+    for i in range(2_000_000):
+        total += i * i
+    results.append(time.perf_counter() - start)
+
+
+def run(label, sign_chunk, offers, threads: int, batch: int):
+    chunks = [offers[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        for i in range(0, len(chunk), batch):
+            sign_chunk(chunk[i:i + batch])
+
+    interference = []
+    pool = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    other = threading.Thread(target=busy_work, args=(interference,))
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    other.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    other.join()
+    print(f"   {label:<10} {len(offers) / elapsed:9,.0f} sig/s   concurrent busy-work {interference[0] * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    keypair = KeyPair()
+    offers = make_offers(args.offers, keypair.get_public_key_base64())
+    baseline = []
+    busy_work(baseline)
+    print(f"[{args.offers} offers, {args.threads} threads, batch {args.batch}, "
+          f"busy-work alone {baseline[0] * 1e3:.1f} ms]")
+
+    run("inline", lambda chunk: [sign_message(offer, keypair) for offer in chunk],
+        offers, args.threads, args.batch)
+    with SigningService(workers=args.workers) as signer:
+        signer.register("bench-seller", keypair)
+        signer.sign_digests("bench-seller", [b"\0" * 32] * args.workers).result()  # 预热
+        run(f"service/{args.workers}", lambda chunk: signer.sign_messages("bench-seller", chunk).result(),
+            offers, args.threads, args.batch)
+    assert all(offer.verify() for offer in offers[:10])
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,17 @@ from .messages import (
     Payment, Deal
 )
 from .crypto import KeyPair, sign_message
+from .verify_cache import VerificationCache, verification_cache
+from .signing import SigningService
+from .session import SessionManager
+from .keys import KeyRegistry, key_fingerprint, get_key_registry, set_key_registry
 
 __all__ = [
     "BuyerInfo", "Budget", "Demand", "Intent",
     "SellerInfo", "Item", "Price", "Offer", 
     "Payment", "Deal",
-    "KeyPair", "sign_message"
+    "KeyPair", "sign_message",
+    "VerificationCache", "verification_cache",
+    "SigningService", "SessionManager",
+    "KeyRegistry", "key_fingerprint", "get_key_registry", "set_key_registry"
 ]
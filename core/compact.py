@@ -0,0 +1,213 @@
+"""
+Compact Message Representation
+
+大量持有的消息（买家收到的 Offers、网络层消息历史）如果都是 pydantic 模型，
+每条消息还带着嵌套的 BuyerInfo / SellerInfo / Item / Price 实例和各自的 __dict__。
+这里的 Compact* 类把消息展平成一个 __slots__ 对象：
+- 没有 __dict__，也没有嵌套对象
+- from_model() / to_model() 与 pydantic 模型互相转换
+- to_model() 默认走可信构建（原消息已校验过），签名和规范化字节保持不变
+
+用法:
+    compact_offer = compact(offer)
+    offer = expand(compact_offer)
+"""
+
+from typing import Union
+from .messages import (
+    ACPMessage, BuyerInfo, Budget, Demand, Intent,
+    SellerInfo, Item, Price, Offer, Payment, Deal
+)
+
+
+class _CompactMessage:
+    """展平后的消息基类"""
+
+    __slots__ = ()
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:3])
+        return f"{type(self).__name__}({fields}, ...)"
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @staticmethod
+    def _build(model, validate: bool, **values):
+        return model(**values) if validate else model.trusted(**values)
+
+
+class CompactIntent(_CompactMessage):
+    __slots__ = (
+        "intent_id", "buyer_id", "buyer_public_key", "buyer_key_id",
+        "category", "budget_min", "budget_max", "currency",
+        "attributes", "location", "delivery_days", "expires_at",
+        "acp_version", "anchor_mode", "signature", "nonce", "timestamp",
+        "session_id", "ecdh_key", "session_acks",
+    )
+
+    @classmethod
+    def from_model(cls, intent: Intent) -> "CompactIntent":
+        self = cls.__new__(cls)
+        demand = intent.demand
+        self.__setstate__((
+            intent.intent_id, intent.buyer.agent_id, intent.buyer.public_key, intent.buyer.key_id,
+            demand.category, demand.budget.min, demand.budget.max, demand.budget.currency,
+            tuple(demand.attributes) if demand.attributes is not None else None,
+            demand.location, demand.delivery_days, intent.expires_at,
+            intent.acp_version, intent.anchor_mode, intent.signature,
+            intent.nonce, intent.timestamp, intent.session_id, intent.ecdh_key,
+            tuple(intent.session_acks) if intent.session_acks is not None else None,
+        ))
+        return self
+
+    def to_model(self, validate: bool = False) -> Intent:
+        build = self._build
+        return build(
+            Intent, validate,
+            intent_id=self.intent_id,
+            buyer=build(BuyerInfo, validate, agent_id=self.buyer_id,
+                        public_key=self.buyer_public_key, key_id=self.buyer_key_id),
+            demand=build(
+                Demand, validate,
+                category=self.category,
+                budget=build(Budget, validate, min=self.budget_min,
+                             max=self.budget_max, currency=self.currency),
+                attributes=list(self.attributes) if self.attributes is not None else None,
+                location=self.location,
+                delivery_days=self.delivery_days,
+            ),
+            expires_at=self.expires_at,
+            acp_version=self.acp_version,
+            anchor_mode=self.anchor_mode,
+            signature=self.signature,
+            nonce=self.nonce,
+            timestamp=self.timestamp,
+            session_id=self.session_id,
+            ecdh_key=self.ecdh_key,
+            session_acks=list(self.session_acks) if self.session_acks is not None else None,
+        )
+
+
+class CompactOffer(_CompactMessage):
+    __slots__ = (
+        "offer_id", "intent_id", "seller_id", "seller_name",
+        "seller_public_key", "seller_key_id",
+        "item_name", "sku", "images", "attributes",
+        "price", "currency", "stock", "expires_at",
+        "acp_version", "anchor_mode", "signature", "nonce", "timestamp",
+        "session_id", "ecdh_key",
+    )
+
+    @classmethod
+    def from_model(cls, offer: Offer) -> "CompactOffer":
+        self = cls.__new__(cls)
+        item = offer.item
+        self.__setstate__((
+            offer.offer_id, offer.intent_id,
+            offer.seller.agent_id, offer.seller.name,
+            offer.seller.public_key, offer.seller.key_id,
+            item.name, item.sku,
+            tuple(item.images) if item.images is not None else None,
+            item.attributes,
+            offer.price.amount, offer.price.currency, offer.stock, offer.expires_at,
+            offer.acp_version, offer.anchor_mode, offer.signature,
+            offer.nonce, offer.timestamp, offer.session_id, offer.ecdh_key,
+        ))
+        return self
+
+    def to_model(self, validate: bool = False) -> Offer:
+        build = self._build
+        return build(
+            Offer, validate,
+            offer_id=self.offer_id,
+            intent_id=self.intent_id,
+            seller=build(SellerInfo, validate, agent_id=self.seller_id,
+                         name=self.seller_name, public_key=self.seller_public_key,
+                         key_id=self.seller_key_id),
+            item=build(Item, validate, name=self.item_name, sku=self.sku,
+                       images=list(self.images) if self.images is not None else None,
+                       attributes=self.attributes),
+            price=build(Price, validate, amount=self.price, currency=self.currency),
+            stock=self.stock,
+            expires_at=self.expires_at,
+            acp_version=self.acp_version,
+            anchor_mode=self.anchor_mode,
+            signature=self.signature,
+            nonce=self.nonce,
+            timestamp=self.timestamp,
+            session_id=self.session_id,
+            ecdh_key=self.ecdh_key,
+        )
+
+
+class CompactDeal(_CompactMessage):
+    __slots__ = (
+        "deal_id", "offer_id", "buyer_id", "buyer_public_key", "buyer_key_id",
+        "payment_method", "payment_status", "payment_token",
+        "acp_version", "anchor_mode", "signature", "nonce", "timestamp",
+        "session_id", "ecdh_key",
+    )
+
+    @classmethod
+    def from_model(cls, deal: Deal) -> "CompactDeal":
+        self = cls.__new__(cls)
+        self.__setstate__((
+            deal.deal_id, deal.offer_id, deal.buyer.agent_id, deal.buyer.public_key, deal.buyer.key_id,
+            deal.payment.method, deal.payment.status, deal.payment.token,
+            deal.acp_version, deal.anchor_mode, deal.signature,
+            deal.nonce, deal.timestamp, deal.session_id, deal.ecdh_key,
+        ))
+        return self
+
+    def to_model(self, validate: bool = False) -> Deal:
+        build = self._build
+        return build(
+            Deal, validate,
+            deal_id=self.deal_id,
+            offer_id=self.offer_id,
+            buyer=build(BuyerInfo, validate, agent_id=self.buyer_id,
+                        public_key=self.buyer_public_key, key_id=self.buyer_key_id),
+            payment=build(Payment, validate, method=self.payment_method,
+                          status=self.payment_status, token=self.payment_token),
+            acp_version=self.acp_version,
+            anchor_mode=self.anchor_mode,
+            signature=self.signature,
+            nonce=self.nonce,
+            timestamp=self.timestamp,
+            session_id=self.session_id,
+            ecdh_key=self.ecdh_key,
+        )
+
+
+_COMPACT_TYPES = {
+    "intent": CompactIntent,
+    "offer": CompactOffer,
+    "deal": CompactDeal,
+}
+
+CompactMessage = Union[CompactIntent, CompactOffer, CompactDeal]
+
+
+def compact(message: ACPMessage) -> CompactMessage:
+    """pydantic 消息 -> 紧凑表示"""
+    try:
+        compact_type = _COMPACT_TYPES[message.message_type]
+    except KeyError:
+        raise ValueError(f"Unknown message type: {message.message_type}")
+    return compact_type.from_model(message)
+
+
+def expand(message: CompactMessage, validate: bool = False) -> ACPMessage:
+    """紧凑表示 -> pydantic 消息"""
+    return message.to_model(validate=validate)
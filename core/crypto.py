@@ -1,5 +1,7 @@
 import hashlib
 import base64
+from functools import lru_cache
+from typing import List
 from ecdsa import SigningKey, VerifyingKey, SECP256k1
 from ecdsa.util import sigencode_der, sigdecode_der
 
@@ -24,12 +26,28 @@ class KeyPair:
             self.private_key = private_key
         
         self.public_key = self.private_key.get_verifying_key()
+        # 编码结果缓存（密钥不可变，每条消息都要取公钥）
+        self._public_key_bytes = None
+        self._public_key_base64 = None
+    
+    @classmethod
+    def from_private_key_bytes(cls, data: bytes) -> "KeyPair":
+        """从原始私钥字节恢复（跨进程传递密钥时使用）"""
+        return cls(SigningKey.from_string(data, curve=SECP256k1))
+    
+    def get_public_key_bytes(self) -> bytes:
+        """返回原始公钥字节（缓存）"""
+        if self._public_key_bytes is None:
+            self._public_key_bytes = self.public_key.to_string()
+        return self._public_key_bytes
     
     def get_public_key_base64(self) -> str:
-        """返回 base64 编码的公钥"""
-        return base64.b64encode(
-            self.public_key.to_string()
-        ).decode('utf-8')
+        """返回 base64 编码的公钥（缓存）"""
+        if self._public_key_base64 is None:
+            self._public_key_base64 = base64.b64encode(
+                self.get_public_key_bytes()
+            ).decode('utf-8')
+        return self._public_key_base64
     
     def get_private_key_base64(self) -> str:
         """返回 base64 编码的私钥"""
@@ -53,7 +71,10 @@ class KeyPair:
     
     def sign_bytes(self, data: bytes) -> str:
         """对字节流签名（改名，更明确）"""
-        message_hash = hashlib.sha256(data).digest()
+        return self.sign_digest(hashlib.sha256(data).digest())
+    
+    def sign_digest(self, message_hash: bytes) -> str:
+        """对 SHA256 摘要签名，返回 base64 编码的签名"""
         signature = self.private_key.sign_digest(
             message_hash,
             sigencode=sigencode_der
@@ -90,16 +111,17 @@ class KeyPair:
     @staticmethod
     def verify_bytes(data: bytes, signature_b64: str, public_key_b64: str) -> bool:
         """验证字节流签名"""
+        return KeyPair.verify_digest(
+            hashlib.sha256(data).digest(), signature_b64, public_key_b64
+        )
+    
+    @staticmethod
+    def verify_digest(message_hash: bytes, signature_b64: str, public_key_b64: str) -> bool:
+        """验证 SHA256 摘要的签名"""
         try:
-            public_key_bytes = base64.b64decode(public_key_b64)
+            verifying_key = _verifying_key(public_key_b64)
             signature_bytes = base64.b64decode(signature_b64)
             
-            verifying_key = VerifyingKey.from_string(
-                public_key_bytes,
-                curve=SECP256k1
-            )
-            
-            message_hash = hashlib.sha256(data).digest()
             verifying_key.verify_digest(
                 signature_bytes,
                 message_hash,
@@ -109,6 +131,11 @@ class KeyPair:
         except Exception:
             return False
 
+@lru_cache(maxsize=4096)
+def _verifying_key(public_key_b64: str) -> VerifyingKey:
+    """解析公钥（缓存：同一签名者的每条消息不再重复解码、构建曲线点）"""
+    return VerifyingKey.from_string(base64.b64decode(public_key_b64), curve=SECP256k1)
+
 def sign_message(message_obj, keypair: KeyPair):
     """给消息对象签名（Intent/Offer/Deal）"""
     canonical_bytes = message_obj.to_canonical_bytes()
@@ -116,4 +143,22 @@ def sign_message(message_obj, keypair: KeyPair):
     message_obj.signature = signature
     return message_obj
 
+def sign_bytes_with_key(private_key_bytes: bytes, data: bytes) -> str:
+    """
+    用原始私钥字节签名
+    
+    参数均可 pickle，可直接提交给 ThreadPoolExecutor / ProcessPoolExecutor
+    """
+    return KeyPair.from_private_key_bytes(private_key_bytes).sign_bytes(data)
+
+def sign_batch_with_key(private_key_bytes: bytes, payloads: List[bytes]) -> List[str]:
+    """
+    用原始私钥字节对一批数据签名
+    
+    恢复私钥（椭圆曲线点乘）的开销与一次签名相当，每批只做一次；
+    提交给进程池时每个任务一批，私钥也只随每批传输一次
+    """
+    keypair = KeyPair.from_private_key_bytes(private_key_bytes)
+    return [keypair.sign_bytes(data) for data in payloads]
+
 # 删除原来的 verify_message()，改用消息自带的 msg.verify()
@@ -6,6 +6,10 @@ class SignatureError(ACP0Error):
     """签名验证失败"""
     pass
 
+class SigningError(ACP0Error):
+    """签名服务错误（工作进程报错、服务已关闭）"""
+    pass
+
 class NetworkError(ACP0Error):
     """网络通信错误"""
     pass
@@ -13,3 +17,7 @@ class NetworkError(ACP0Error):
 class MessageValidationError(ACP0Error):
     """消息验证失败"""
     pass
+
+class StorageError(ACP0Error):
+    """持久化存储错误"""
+    pass
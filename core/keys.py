@@ -0,0 +1,130 @@
+"""
+Public Key Registry
+
+每条 Intent / Offer / Deal 的 buyer / seller 里都带着完整的 base64 公钥（88 字节），
+每条消息都要重复传输、重复规范化。KeyRegistry 把短指纹映射到公钥：
+
+- key_id = base64url(sha256(原始公钥字节)[:16])，22 个字符
+- 消息的 BuyerInfo / SellerInfo 可以只带 key_id，验签时由注册表解析出公钥
+- 解析结果总是按指纹重新校验，注册表（包括远程注册表）无法把 key_id 换成别的公钥
+- 进程级注册表 get_key_registry() 供 ACPMessage.verify() 使用；
+  多进程 / 多主机部署时 set_key_registry(RemoteKeyRegistry(...))，见 acp0.network.keys
+
+用法:
+    key_id = get_key_registry().register(keypair.get_public_key_base64())
+    buyer = BuyerInfo(agent_id="buyer-1", key_id=key_id)
+
+NOTE: 带完整公钥的消息照常验签，不需要注册表；key_id 参与签名（规范化字节中只有 key_id），
+      所以同一条消息不能在两种形式之间转换。
+"""
+
+import base64
+import binascii
+import hashlib
+import threading
+from typing import Dict, Optional
+
+KEY_ID_BYTES = 16
+PUBLIC_KEY_BYTES = 64  # SECP256k1 未压缩公钥（x || y）
+
+
+def key_fingerprint(public_key_b64: str) -> str:
+    """公钥的短指纹（key_id）"""
+    digest = hashlib.sha256(_decode_public_key(public_key_b64)).digest()
+    return base64.urlsafe_b64encode(digest[:KEY_ID_BYTES]).rstrip(b"=").decode("ascii")
+
+
+def _decode_public_key(public_key_b64: str) -> bytes:
+    try:
+        raw = base64.b64decode(public_key_b64, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Public key is not valid base64")
+    if len(raw) != PUBLIC_KEY_BYTES:
+        raise ValueError(f"Public key must be {PUBLIC_KEY_BYTES} bytes")
+    return raw
+
+
+def matches_fingerprint(public_key_b64: str, key_id: str) -> bool:
+    try:
+        return key_fingerprint(public_key_b64) == key_id
+    except ValueError:
+        return False
+
+
+class KeyRegistry:
+    """内存中的 key_id -> 公钥 映射（线程安全）"""
+
+    def __init__(self):
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"registered": 0, "hits": 0, "misses": 0}
+
+    def register(self, public_key_b64: str) -> str:
+        """登记公钥，返回 key_id（重复登记是幂等的）"""
+        key_id = key_fingerprint(public_key_b64)
+        with self._lock:
+            if key_id not in self._keys:
+                self._keys[key_id] = public_key_b64
+                self.counters["registered"] += 1
+        return key_id
+
+    def resolve(self, key_id: str) -> Optional[str]:
+        """key_id -> base64 公钥；未知时返回 None"""
+        public_key = self._keys.get(key_id)
+        with self._lock:
+            self.counters["hits" if public_key is not None else "misses"] += 1
+        return public_key
+
+    def _store(self, key_id: str, public_key_b64: str) -> bool:
+        """写入外部取回的公钥（先校验指纹）"""
+        if not matches_fingerprint(public_key_b64, key_id):
+            return False
+        with self._lock:
+            self._keys[key_id] = public_key_b64
+        return True
+
+    def __contains__(self, key_id: str) -> bool:
+        return key_id in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._keys)
+        return stats
+
+
+_registry: KeyRegistry = KeyRegistry()
+
+
+def get_key_registry() -> KeyRegistry:
+    """进程级注册表"""
+    return _registry
+
+
+def set_key_registry(registry: KeyRegistry) -> KeyRegistry:
+    """替换进程级注册表，返回原来的注册表"""
+    global _registry
+    previous, _registry = _registry, registry
+    return previous
+
+
+def resolve_signer_key(info) -> Optional[str]:
+    """
+    BuyerInfo / SellerInfo -> 签名者的 base64 公钥
+
+    只有 key_id 时查注册表；两者都有时要求指纹一致。无法确定时返回 None。
+    """
+    public_key, key_id = info.public_key, getattr(info, "key_id", None)
+    if public_key is not None:
+        if key_id is not None and not matches_fingerprint(public_key, key_id):
+            return None
+        return public_key
+    if key_id is None:
+        return None
+    public_key = _registry.resolve(key_id)
+    if public_key is None or not matches_fingerprint(public_key, key_id):
+        return None
+    return public_key
@@ -1,10 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+from pydantic_core import PydanticUndefined
 from typing import Optional, Dict, Any, List
 from uuid import uuid4
 from datetime import datetime
 from abc import abstractmethod
 import json
 import time
+from .keys import resolve_signer_key
 
 def is_timestamp_valid(timestamp: int, tolerance_seconds: int = 60) -> bool:
     """
@@ -17,7 +19,58 @@ def is_timestamp_valid(timestamp: int, tolerance_seconds: int = 60) -> bool:
     return abs(now - timestamp) <= tolerance_seconds
 
 
-class ACPMessage(BaseModel):
+# BaseModel 的 __slots__ 描述符，可信构建时直接写入，绕过 BaseModel.__setattr__
+_set_fields_set = BaseModel.__dict__['__pydantic_fields_set__'].__set__
+_set_extra = BaseModel.__dict__['__pydantic_extra__'].__set__
+_set_private = BaseModel.__dict__['__pydantic_private__'].__set__
+
+
+class ACPModel(BaseModel):
+    """所有 ACP 数据模型的基类"""
+    
+    @classmethod
+    def _construct_plan(cls):
+        """缓存每个模型的静态默认值和 default_factory（按类存放，避免子类共用）"""
+        plan = cls.__dict__.get('_trusted_plan')
+        if plan is None:
+            static, factories = {}, []
+            for name, field in cls.model_fields.items():
+                if field.default_factory is not None:
+                    factories.append((name, field.default_factory))
+                elif field.default is not PydanticUndefined:
+                    static[name] = field.default
+            plan = (static, tuple(factories))
+            type.__setattr__(cls, '_trusted_plan', plan)
+        return plan
+    
+    @classmethod
+    def trusted(cls, **values):
+        """
+        可信构建：跳过 pydantic 校验，默认值照常生成
+        
+        仅用于代理内部用已知合法的值构建的消息；嵌套的 BuyerInfo / Item 等
+        也应使用 trusted() 构建并以模型实例传入。
+        来自网络或用户输入的数据必须走正常构造函数校验。
+        
+        NOTE: 比 model_construct() 快（后者每次都要遍历字段、处理别名）；
+              pydantic v2 的校验本身已在 Rust 中完成，耗时大头是 uuid4 / 时间戳生成，
+              所以相对校验构建的收益有限，见 benchmarks/bench_message_repr.py
+        """
+        static, factories = cls._construct_plan()
+        data = {**static, **values}
+        for name, factory in factories:
+            if name not in values:
+                data[name] = factory()
+        
+        obj = object.__new__(cls)
+        object.__setattr__(obj, '__dict__', data)
+        _set_fields_set(obj, set(values))
+        _set_extra(obj, None)
+        _set_private(obj, None)
+        return obj
+
+
+class ACPMessage(ACPModel):
     """所有 ACP 消息的基类"""
     
     acp_version: str = "0.9"
@@ -26,6 +79,9 @@ class ACPMessage(BaseModel):
     signature: Optional[str] = None
     nonce: str = Field(default_factory=lambda: str(uuid4()))  # 防重放
     timestamp: int = Field(default_factory=lambda: int(datetime.now().timestamp()))
+    # HMAC 会话模式（acp0.core.session）：session_id 非空时 signature 为会话标签而非 ECDSA 签名
+    session_id: Optional[str] = None
+    ecdh_key: Optional[str] = None  # 会话握手的临时 ECDH 公钥（base64）
     
     def to_canonical_bytes(self) -> bytes:
         """
@@ -49,41 +105,67 @@ class ACPMessage(BaseModel):
         sign_message(self, keypair)
     
     @abstractmethod
-    def get_signer_public_key(self) -> str:
+    def get_signer_public_key(self) -> Optional[str]:
         """
         返回签名者的公钥
-        子类必须实现（Intent/Deal 返回 buyer.public_key，Offer 返回 seller.public_key）
+        子类必须实现（Intent/Deal 返回 buyer 的公钥，Offer 返回 seller 的公钥；
+        只带 key_id 且无法解析时为 None）
         """
         pass
     
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """是否已超过 expires_at（Intent / Offer；无 expires_at 的消息永不过期）"""
+        expires_at = getattr(self, "expires_at", None)
+        return expires_at is not None and (time.time() if now is None else now) >= expires_at
+    
     def verify(self) -> bool:
-        """验证消息签名 + 时间戳"""
-        # 1. 时间戳校验
+        """验证消息签名 + 时间戳（只带 key_id 的消息经注册表解析公钥，见 acp0.core.keys）"""
+        # 1. 时间戳与有效期校验（在任何密码学运算之前）
         if not is_timestamp_valid(self.timestamp, tolerance_seconds=60):
             return False
+        if self.is_expired():
+            return False
         
-        # 2. 签名校验
-        if not self.signature:
+        # 2. 签名校验（会话标签须由持有会话密钥的 SessionManager.verify() 验证）
+        if not self.signature or self.session_id is not None:
             return False
+        public_key = self.get_signer_public_key()
+        if public_key is None:
+            return False  # key_id 无法解析
         
-        from .crypto import KeyPair
-        return KeyPair.verify_bytes(
+        # 3. 进程级缓存：同一条消息只做一次 ECDSA
+        from .verify_cache import verification_cache
+        return verification_cache.verify(
             self.to_canonical_bytes(),
             self.signature,
-            self.get_signer_public_key()
+            public_key
         )
 
 
-class BuyerInfo(BaseModel):
+class _SignerInfo(ACPModel):
+    """签名者身份：完整公钥或短指纹 key_id（至少其一）"""
+    
+    @model_validator(mode="after")
+    def _require_key(self):
+        if self.public_key is None and self.key_id is None:
+            raise ValueError("public_key or key_id is required")
+        return self
+    
+    def signer_key(self) -> Optional[str]:
+        """base64 公钥；只有 key_id 时查进程级注册表，无法解析时返回 None"""
+        return resolve_signer_key(self)
+
+class BuyerInfo(_SignerInfo):
     agent_id: str
-    public_key: str  # base64 encoded
+    public_key: Optional[str] = None  # base64 encoded
+    key_id: Optional[str] = None      # 公钥指纹，见 acp0.core.keys
 
-class Budget(BaseModel):
+class Budget(ACPModel):
     min: int
     max: int
     currency: str
 
-class Demand(BaseModel):
+class Demand(ACPModel):
     category: str
     budget: Budget
     attributes: Optional[list[str]] = None
@@ -96,22 +178,25 @@ class Intent(ACPMessage):
     buyer: BuyerInfo
     demand: Demand
     expires_at: Optional[int] = None
+    # HMAC 会话模式：买家已完成、卖家尚未使用的 session_id，确认卖家的待确认会话
+    session_acks: Optional[list[str]] = None
     
-    def get_signer_public_key(self) -> str:
-        return self.buyer.public_key
+    def get_signer_public_key(self) -> Optional[str]:
+        return self.buyer.signer_key()
 
-class SellerInfo(BaseModel):
+class SellerInfo(_SignerInfo):
     agent_id: str
     name: str
-    public_key: str
+    public_key: Optional[str] = None
+    key_id: Optional[str] = None
 
-class Item(BaseModel):
+class Item(ACPModel):
     name: str
     sku: str
     images: Optional[list[str]] = None
     attributes: Optional[Dict[str, Any]] = None
 
-class Price(BaseModel):
+class Price(ACPModel):
     amount: int  # cents
     currency: str
 
@@ -125,10 +210,10 @@ class Offer(ACPMessage):
     stock: int
     expires_at: Optional[int] = None
     
-    def get_signer_public_key(self) -> str:
-        return self.seller.public_key
+    def get_signer_public_key(self) -> Optional[str]:
+        return self.seller.signer_key()
 
-class Payment(BaseModel):
+class Payment(ACPModel):
     method: str
     status: str
     token: Optional[str] = None
@@ -140,5 +225,5 @@ class Deal(ACPMessage):
     buyer: BuyerInfo
     payment: Payment
     
-    def get_signer_public_key(self) -> str:
-        return self.buyer.public_key
+    def get_signer_public_key(self) -> Optional[str]:
+        return self.buyer.signer_key()
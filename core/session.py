@@ -0,0 +1,329 @@
+"""
+HMAC Session Mode
+
+纯 Python ECDSA 签名 / 验签每次都是毫秒级。同一对买家与卖家反复成交时，
+第一次交换用 ECDSA 认证的握手协商出对称会话密钥，之后的消息改用 HMAC-SHA256 标签：
+
+握手（搭载在已有消息上，不新增消息类型）：
+    1. 买家的 Intent 带上临时 ECDH 公钥 ecdh_key（Intent 照常 ECDSA 签名）
+    2. 卖家验签通过后生成自己的临时密钥，在 ECDSA 签名的 Offer 中带上 ecdh_key
+    3. 双方各自计算 ECDH(SECP256k1) 共享秘密，经 HKDF-SHA256 派生
+       会话密钥与 session_id（输入包含双方的临时公钥和长期公钥）
+    4. 确认：握手 Offer 可能丢失或被买家的准入链拒绝，卖家的会话先处于待确认状态，
+       此间照常 ECDSA 签名；同一临时公钥的后续 Intent 复用待确认会话，重发握手。
+       买家在之后的 Intent 中带上已完成、尚未见到对端使用的 session_id（session_acks，
+       随 Intent 一起 ECDSA 签名），或用该会话发来通过验证的消息，卖家才确认会话
+之后：
+    - 卖家对该买家的 Offer 只写 session_id，signature 为 base64(HMAC-SHA256(密钥, 规范化字节))
+    - 接收方用 SessionManager.verify() 验证：会话有效、签名者是会话对端、标签一致、时间戳合法
+    - Deal 默认仍用 ECDSA 签名（不可否认）；买家显式选择时才用会话标签
+
+过期与换密钥：
+    - 会话 ttl 秒后失效，失效后的 HMAC 消息一律拒绝
+    - 超过 rekey_after 秒或 max_messages 条后不再用于新消息：对端下一次带 ecdh_key 的
+      Intent 会触发新的握手，旧会话在 ttl 内仍可验证，交接期间不丢消息
+    - 发起方（买家）的临时密钥每 rekey_after 秒轮换一次，同一个临时公钥可与多个卖家握手
+
+用法:
+    buyer = BuyerAgent("buyer", network, sessions=SessionManager())
+    seller = SellerAgent("seller", "Shop", inventory, network, sessions=SessionManager())
+
+NOTE: HMAC 标签只能向会话双方证明消息来源，不能向第三方证明（对称密钥双方都持有），
+      需要留作纠纷凭证的消息必须用 ECDSA 签名。会话只在内存中，进程重启后重新握手。
+"""
+
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from ecdsa import ECDH, SECP256k1, SigningKey, VerifyingKey
+from .messages import ACPMessage, is_timestamp_valid
+
+_SALT = b"acp0-session-v1"
+_MAX_ACKS = 16  # 一条 Intent 最多携带的 session_acks
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _hkdf(ikm: bytes, info: bytes, length: int) -> bytes:
+    """HKDF-SHA256（RFC 5869）"""
+    prk = hmac.new(_SALT, ikm, hashlib.sha256).digest()
+    okm, block, counter = b"", b"", 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes((counter,)), hashlib.sha256).digest()
+        okm += block
+        counter += 1
+    return okm[:length]
+
+
+def _derive(private_key: SigningKey, peer_ecdh: str,
+            initiator: Tuple[str, str], responder: Tuple[str, str]) -> Tuple[str, bytes]:
+    """
+    ECDH + HKDF
+
+    Args:
+        initiator / responder: (长期公钥, 临时公钥)，两端按同样的顺序传入
+
+    Returns:
+        (session_id, 会话密钥)
+    """
+    try:
+        peer = VerifyingKey.from_string(base64.b64decode(peer_ecdh), curve=SECP256k1)
+    except Exception:
+        raise ValueError("Invalid ECDH public key")
+    shared = ECDH(curve=SECP256k1, private_key=private_key,
+                  public_key=peer).generate_sharedsecret_bytes()
+    info = "|".join(initiator + responder).encode("ascii")
+    okm = _hkdf(shared, info, 44)
+    session_id = base64.urlsafe_b64encode(okm[32:]).rstrip(b"=").decode("ascii")
+    return session_id, okm[:32]
+
+
+class Session:
+    """一对代理之间的会话"""
+
+    def __init__(self, session_id: str, key: bytes, peer: str, now: float,
+                 ttl: float, rekey_after: float):
+        self.session_id = session_id
+        self.peer = peer  # 对端长期公钥（base64）
+        self.created_at = now
+        self.expires_at = now + ttl
+        self.rekey_at = now + rekey_after
+        self.messages = 0  # 本端用该会话发出的消息数
+        self.confirmed = True  # 响应方在对端证明持有密钥前为 False，不用于发送
+        self._key = key
+
+    def tag(self, data: bytes) -> str:
+        return _b64(hmac.new(self._key, data, hashlib.sha256).digest())
+
+    def live(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def __repr__(self) -> str:
+        state = "" if self.confirmed else ", pending"
+        return f"Session({self.session_id}, messages={self.messages}{state})"
+
+
+class SessionManager:
+    """一个代理的全部会话（线程安全）"""
+
+    def __init__(self, ttl: float = 600.0, rekey_after: Optional[float] = None,
+                 max_messages: int = 100000):
+        """
+        Args:
+            ttl: 会话有效期（秒），过期后 HMAC 消息一律拒绝
+            rekey_after: 多少秒后不再用于新消息、发起新的握手（默认 ttl / 2）
+            max_messages: 单个会话最多发出的消息数，达到后同样换密钥
+        """
+        rekey_after = ttl / 2 if rekey_after is None else rekey_after
+        if not 0 < rekey_after <= ttl:
+            raise ValueError("rekey_after must be in (0, ttl]")
+        self.ttl = ttl
+        self.rekey_after = rekey_after
+        self.max_messages = max_messages
+        self._sessions: Dict[str, Session] = {}        # session_id -> 会话（含待确认的）
+        self._by_peer: Dict[str, Session] = {}         # 对端公钥 -> 最新的已确认会话
+        # 响应方待确认的会话：(对端公钥, 对端临时公钥) -> (会话, 本端临时公钥)
+        self._pending: Dict[Tuple[str, str], Tuple[Session, str]] = {}
+        # 发起方已完成、尚未见到对端使用的会话，放入 Intent.session_acks
+        self._unacked: Dict[str, Session] = {}
+        self._ephemeral: Dict[str, Tuple[SigningKey, float]] = {}  # 发起方临时公钥 -> (私钥, 过期)
+        self._current: Optional[Tuple[str, float]] = None          # (当前临时公钥, 轮换时刻)
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "handshakes": 0, "confirmed": 0, "sealed": 0, "verified": 0, "rejected": 0, "rekeyed": 0,
+        }
+
+    # ---------- 握手 ----------
+
+    def initiator_key(self) -> str:
+        """发起方（买家）当前的临时公钥，放入 Intent.ecdh_key；每 rekey_after 秒轮换"""
+        now = time.time()
+        with self._lock:
+            if self._current is not None and now < self._current[1]:
+                return self._current[0]
+            private_key = SigningKey.generate(curve=SECP256k1)
+            public_key = _b64(private_key.get_verifying_key().to_string())
+            # 轮换后旧私钥保留到 ttl，迟到的握手回复仍可完成
+            self._ephemeral[public_key] = (private_key, now + self.ttl)
+            self._current = (public_key, now + self.rekey_after)
+            self._purge(now)
+            return public_key
+
+    def accept(self, local: str, peer: str, peer_ecdh: str) -> str:
+        """
+        响应方（卖家）：用对端已验签消息中的 ecdh_key 建立待确认的会话
+
+        同一 (peer, peer_ecdh) 已有待确认的会话时直接复用（重发握手），不再做 ECDH。
+
+        Args:
+            local: 本端长期公钥
+            peer: 对端长期公钥（已验签消息的签名者）
+            peer_ecdh: 对端临时公钥
+
+        Returns:
+            本端临时公钥，放入 ECDSA 签名的回复（Offer.ecdh_key）
+
+        Raises:
+            ValueError: peer_ecdh 不是合法的曲线点
+        """
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get((peer, peer_ecdh))
+            if pending is not None and pending[0].live(now):
+                return pending[1]
+        private_key = SigningKey.generate(curve=SECP256k1)
+        local_ecdh = _b64(private_key.get_verifying_key().to_string())
+        session_id, key = _derive(private_key, peer_ecdh, (peer, peer_ecdh), (local, local_ecdh))
+        session = Session(session_id, key, peer, now, self.ttl, self.rekey_after)
+        session.confirmed = False
+        with self._lock:
+            self._pending[(peer, peer_ecdh)] = (session, local_ecdh)
+        self._add(session)
+        return local_ecdh
+
+    def complete(self, local: str, peer: str, local_ecdh: str, peer_ecdh: str) -> Optional[Session]:
+        """
+        发起方（买家）：收到带 ecdh_key 的已验签回复后完成握手
+
+        对端在收到确认（acks() / 本端用该会话发出的消息）之前不会用它发送
+
+        Returns:
+            新会话；local_ecdh 不是本端（未过期的）临时公钥或对端公钥非法时返回 None
+        """
+        with self._lock:
+            entry = self._ephemeral.get(local_ecdh)
+        if entry is None or time.time() >= entry[1]:
+            return None
+        try:
+            session_id, key = _derive(entry[0], peer_ecdh, (local, local_ecdh), (peer, peer_ecdh))
+        except ValueError:
+            return None
+        if session_id in self._sessions:
+            return self._sessions[session_id]  # 重复投递的握手回复
+        session = Session(session_id, key, peer, time.time(), self.ttl, self.rekey_after)
+        with self._lock:
+            self._unacked[session_id] = session
+        self._add(session)
+        return session
+
+    def acks(self) -> List[str]:
+        """发起方：放入下一条 Intent 的 session_acks（最近完成、对端尚未使用的会话）"""
+        now = time.time()
+        with self._lock:
+            live = [sid for sid, session in self._unacked.items() if session.live(now)]
+        return live[-_MAX_ACKS:]
+
+    def confirm(self, peer: str, session_ids: Iterable[str]) -> int:
+        """
+        响应方：对端在已验签的消息中确认了这些会话
+
+        Args:
+            peer: 已验签消息的签名者；只确认与其建立的会话
+
+        Returns:
+            新确认的会话数
+        """
+        now = time.time()
+        confirmed = 0
+        with self._lock:
+            for session_id in session_ids:
+                session = self._sessions.get(session_id)
+                if (session is not None and not session.confirmed
+                        and session.peer == peer and session.live(now)):
+                    self._confirm(session)
+                    confirmed += 1
+        return confirmed
+
+    def _confirm(self, session: Session):
+        """调用方持有 _lock"""
+        session.confirmed = True
+        self.counters["confirmed"] += 1
+        current = self._by_peer.get(session.peer)
+        if current is None or current.created_at <= session.created_at:
+            self._by_peer[session.peer] = session
+        for key in [k for k, (pending, _) in self._pending.items() if pending is session]:
+            del self._pending[key]
+
+    def _add(self, session: Session):
+        with self._lock:
+            previous = self._by_peer.get(session.peer)
+            if previous is not None and previous.live(session.created_at):
+                self.counters["rekeyed"] += 1
+            self._sessions[session.session_id] = session
+            if session.confirmed:
+                self._by_peer[session.peer] = session
+            self.counters["handshakes"] += 1
+            self._purge(session.created_at)
+
+    def _purge(self, now: float):
+        """调用方持有 _lock；握手不频繁，顺带清理过期条目"""
+        for session_id in [sid for sid, s in self._sessions.items() if not s.live(now)]:
+            session = self._sessions.pop(session_id)
+            self._unacked.pop(session_id, None)
+            if self._by_peer.get(session.peer) is session:
+                del self._by_peer[session.peer]
+        for key in [k for k, (session, _) in self._pending.items() if not session.live(now)]:
+            del self._pending[key]
+        for public_key in [k for k, (_, expires) in self._ephemeral.items() if now >= expires]:
+            del self._ephemeral[public_key]
+
+    # ---------- 认证 ----------
+
+    def session_for(self, peer: str) -> Optional[Session]:
+        """可用于向对端发送新消息的会话（已确认、未到换密钥时间、未达消息上限）"""
+        session = self._by_peer.get(peer)
+        if session is None or time.time() >= session.rekey_at or session.messages >= self.max_messages:
+            return None
+        return session
+
+    def seal(self, message: ACPMessage, session: Session) -> ACPMessage:
+        """用会话标签代替 ECDSA 签名"""
+        message.session_id = session.session_id
+        message.signature = session.tag(message.to_canonical_bytes())
+        with self._lock:
+            session.messages += 1
+            self.counters["sealed"] += 1
+        return message
+
+    def verify(self, message: ACPMessage) -> bool:
+        """带 session_id 的消息验证会话标签，其余消息走 message.verify()（ECDSA）"""
+        if message.session_id is None:
+            return message.verify()
+        ok = self._check(message)
+        with self._lock:
+            self.counters["verified" if ok else "rejected"] += 1
+            session = self._sessions.get(message.session_id) if ok else None
+            if session is not None:
+                # 对端用该会话发来消息：证明其持有密钥（响应方确认），也说明已收到确认（发起方）
+                if not session.confirmed:
+                    self._confirm(session)
+                self._unacked.pop(session.session_id, None)
+        return ok
+
+    def _check(self, message: ACPMessage) -> bool:
+        session = self._sessions.get(message.session_id)
+        if session is None or not session.live(time.time()) or not message.signature:
+            return False
+        if not is_timestamp_valid(message.timestamp, tolerance_seconds=60) or message.is_expired():
+            return False
+        # 会话绑定对端长期公钥：消息声称的签名者必须是会话对端
+        if message.get_signer_public_key() != session.peer:
+            return False
+        return hmac.compare_digest(session.tag(message.to_canonical_bytes()), message.signature)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["sessions"] = len(self._sessions)
+            stats["peers"] = len(self._by_peer)
+            stats["pending"] = len(self._pending)
+            stats["unacked"] = len(self._unacked)
+        return stats
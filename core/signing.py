@@ -0,0 +1,309 @@
+"""
+Process-Pool Signing Service
+
+sign_message() 在调用方线程上持有 GIL 做纯 Python ECDSA，
+大量出价的卖家签名时会阻塞同进程的其他工作（网络分发、匹配、验签）。
+
+SigningService 把签名放到独立的工作进程里：
+- register() 时私钥只发送一次，常驻在每个工作进程中；之后每次请求只传 摘要 + 密钥名
+- 请求以批为单位（一批 SHA256 摘要），返回 concurrent.futures.Future，
+  线程调用方 .result()，asyncio 调用方 await sign_async() / sign_messages_async()
+- 每批交给未完成摘要最少的工作进程
+- 工作进程意外退出时自动重启，重新下发全部密钥并重发该进程未完成的请求（签名幂等）
+
+用法:
+    with SigningService(workers=2) as signer:
+        signer.register("seller-1", seller.keypair)
+        signer.sign_messages("seller-1", offers).result()     # 线程
+        await signer.sign_messages_async("seller-1", offers)  # asyncio
+
+NOTE: 签名结果与 KeyPair.sign_bytes() 格式相同（base64 DER），可直接写入 message.signature。
+      摘要在调用方计算（to_canonical_bytes + sha256），只有 ECDSA 在工作进程中执行。
+"""
+
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Connection, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+from acp0.core.crypto import KeyPair
+from acp0.core.exceptions import SigningError
+
+
+def _signer_main(conn: Connection):
+    """工作进程入口：持有已注册的私钥，按批签名"""
+    keys: Dict[str, KeyPair] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return  # 父进程已退出
+        kind = message[0]
+        if kind == "sign":
+            _, request_id, key_id, digests = message
+            keypair = keys.get(key_id)
+            if keypair is None:
+                conn.send(("error", request_id, f"Unknown signing key: {key_id}"))
+                continue
+            try:
+                conn.send(("done", request_id, [keypair.sign_digest(d) for d in digests]))
+            except Exception as e:
+                conn.send(("error", request_id, str(e)))
+        elif kind == "key":
+            keys[message[1]] = KeyPair.from_private_key_bytes(message[2])
+        elif kind == "drop":
+            keys.pop(message[1], None)
+        elif kind == "stop":
+            return
+
+
+class _SignerWorker:
+    """父进程侧的工作进程句柄"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn: Optional[Connection] = None
+        self.send_lock = threading.Lock()
+        # request_id -> (key_id, digests)，重启后重发
+        self.pending: Dict[int, Tuple[str, List[bytes]]] = {}
+        self.outstanding = 0  # 未完成的摘要数
+        self.restarts = 0
+
+    def send(self, message) -> bool:
+        """调用方须持有 send_lock；连接已断开时返回 False（由重启补发）"""
+        try:
+            self.conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+
+class SigningService:
+    """多进程签名服务"""
+
+    def __init__(self, workers: int = 2, context=None):
+        """
+        Args:
+            workers: 工作进程数
+            context: multiprocessing 上下文（默认 spawn，父进程中有线程时 fork 不安全）
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.context = context or multiprocessing.get_context("spawn")
+        self._workers = [_SignerWorker(i) for i in range(workers)]
+        self._keys: Dict[str, bytes] = {}  # key_id -> 私钥字节（重启时重新下发）
+        self._futures: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self.running = False
+        self.counters: Dict[str, int] = {"batches": 0, "signatures": 0, "errors": 0, "restarts": 0}
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> "SigningService":
+        if self.running:
+            return self
+        self.running = True
+        for worker in self._workers:
+            with worker.send_lock:
+                self._spawn(worker)
+        self._collector = threading.Thread(target=self._collect_loop, name="acp0-signer-collect", daemon=True)
+        self._collector.start()
+        return self
+
+    def _spawn(self, worker: _SignerWorker):
+        """启动（或重启）工作进程，下发密钥并重发未完成的请求；调用方持有 send_lock"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_signer_main, args=(child_conn,),
+                                       name=f"acp0-signer-{worker.index}", daemon=True)
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn = process, parent_conn
+        with self._lock:
+            keys = list(self._keys.items())
+        for key_id, private_key in keys:
+            worker.send(("key", key_id, private_key))
+        for request_id, (key_id, digests) in worker.pending.items():
+            worker.send(("sign", request_id, key_id, digests))
+
+    def close(self, timeout: float = 5.0):
+        """停止工作进程；未完成的请求以 SigningError 结束"""
+        if not self.running:
+            return
+        self.running = False
+        for worker in self._workers:
+            with worker.send_lock:
+                worker.send(("stop",))
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        self._collector.join()
+        for worker in self._workers:
+            worker.conn.close()
+            worker.pending.clear()
+            worker.outstanding = 0
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(SigningError("Signing service closed"))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 密钥 ----------
+
+    def register(self, key_id: str, keypair: KeyPair):
+        """登记密钥：私钥只在此时发送给各工作进程一次"""
+        private_key = keypair.private_key.to_string()
+        with self._lock:
+            self._keys[key_id] = private_key
+        if self.running:
+            for worker in self._workers:
+                with worker.send_lock:
+                    worker.send(("key", key_id, private_key))
+
+    def unregister(self, key_id: str):
+        with self._lock:
+            self._keys.pop(key_id, None)
+        if self.running:
+            for worker in self._workers:
+                with worker.send_lock:
+                    worker.send(("drop", key_id))
+
+    def __contains__(self, key_id: str) -> bool:
+        return key_id in self._keys
+
+    # ---------- 签名 ----------
+
+    def sign_digests(self, key_id: str, digests: Sequence[bytes]) -> "Future[List[str]]":
+        """
+        对一批 SHA256 摘要签名
+
+        Returns:
+            Future，结果为与 digests 一一对应的 base64 DER 签名
+        """
+        if not self.running:
+            raise SigningError("Signing service is not running")
+        if key_id not in self._keys:
+            raise ValueError(f"Unknown signing key: {key_id}")
+        digests = list(digests)
+        future: Future = Future()
+        if not digests:
+            future.set_result([])
+            return future
+
+        request_id = next(self._ids)
+        with self._lock:
+            self._futures[request_id] = future
+            self.counters["batches"] += 1
+        worker = min(self._workers, key=lambda w: w.outstanding)
+        with worker.send_lock:
+            worker.pending[request_id] = (key_id, digests)
+            worker.outstanding += len(digests)
+            worker.send(("sign", request_id, key_id, digests))
+        return future
+
+    def sign_messages(self, key_id: str, messages: Sequence) -> "Future[List]":
+        """
+        对一批消息签名：调用方计算规范化摘要，签名完成后写入 message.signature
+
+        Returns:
+            Future，结果为已签名的 messages
+        """
+        messages = list(messages)
+        digests = [hashlib.sha256(m.to_canonical_bytes()).digest() for m in messages]
+        inner = self.sign_digests(key_id, digests)
+        outer: Future = Future()
+
+        def apply(done: Future):
+            try:
+                signatures = done.result()
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            for message, signature in zip(messages, signatures):
+                message.signature = signature
+            outer.set_result(messages)
+
+        inner.add_done_callback(apply)
+        return outer
+
+    async def sign_async(self, key_id: str, digests: Sequence[bytes]) -> List[str]:
+        """asyncio 版 sign_digests()"""
+        return await asyncio.wrap_future(self.sign_digests(key_id, digests))
+
+    async def sign_messages_async(self, key_id: str, messages: Sequence) -> List:
+        """asyncio 版 sign_messages()"""
+        return await asyncio.wrap_future(self.sign_messages(key_id, messages))
+
+    # ---------- 汇聚 ----------
+
+    def _collect_loop(self):
+        while self.running:
+            conns = {worker.conn: worker for worker in self._workers}
+            try:
+                ready = wait(list(conns), timeout=0.2)
+            except OSError:
+                continue
+            for conn in ready:
+                worker = conns[conn]
+                try:
+                    kind, request_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    self._restart(worker, conn)
+                    continue
+                self._complete(worker, kind, request_id, payload)
+
+    def _complete(self, worker: _SignerWorker, kind: str, request_id: int, payload):
+        with worker.send_lock:
+            request = worker.pending.pop(request_id, None)
+            if request is not None:
+                worker.outstanding -= len(request[1])
+        with self._lock:
+            future = self._futures.pop(request_id, None)
+            if kind == "done":
+                self.counters["signatures"] += len(payload)
+            else:
+                self.counters["errors"] += 1
+        if future is None or future.done():
+            return
+        if kind == "done":
+            future.set_result(payload)
+        else:
+            future.set_exception(SigningError(payload))
+
+    def _restart(self, worker: _SignerWorker, conn: Connection):
+        """工作进程退出：在收集线程上重启（连接只在本线程关闭）"""
+        if not self.running:
+            return
+        with worker.send_lock:
+            if worker.conn is not conn:
+                return
+            worker.process.join(0.1)
+            conn.close()
+            worker.restarts += 1
+            self._spawn(worker)
+        with self._lock:
+            self.counters["restarts"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["keys"] = len(self._keys)
+            stats["in_flight"] = len(self._futures)
+        stats["workers"] = [
+            {"pid": w.process.pid if w.process else None, "outstanding": w.outstanding, "restarts": w.restarts}
+            for w in self._workers
+        ]
+        return stats
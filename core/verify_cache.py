@@ -0,0 +1,72 @@
+"""
+Verification Result Cache
+
+一个进程里挂多个 SellerAgent 时，同一个已签名 Intent 会被每个卖家完整验签一次。
+VerificationCache 以 (signature, sha256(规范化字节), public_key) 为键缓存 ECDSA 验签结果，
+同一条消息只做一次 ECDSA，其余卖家命中字典。
+
+- 进程级单例 verification_cache，ACPMessage.verify() 默认使用
+- 有界 LRU，线程安全
+- 只缓存签名校验结果；时间戳校验每次调用都会执行
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+class VerificationCache:
+    """有界 LRU 验签结果缓存"""
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def verify(self, data: bytes, signature_b64: str, public_key_b64: str) -> bool:
+        """验证字节流签名，命中缓存时跳过 ECDSA"""
+        from .crypto import KeyPair
+
+        digest = hashlib.sha256(data).digest()
+        if not self.enabled or self.maxsize <= 0:
+            return KeyPair.verify_digest(digest, signature_b64, public_key_b64)
+
+        key = (signature_b64, digest, public_key_b64)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        # ECDSA 在锁外执行，避免串行化不同消息的验签
+        result = KeyPair.verify_digest(digest, signature_b64, public_key_b64)
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# 进程级共享实例
+verification_cache = VerificationCache()
@@ -1,7 +1,28 @@
 from .base import NetworkLayer
 from .memory import InMemoryNetwork
+from .envelope import MessageView, RoutingHeader
+from .shm import SharedMemoryBus, SharedMemoryNetwork
+from .trace import RecordingNetwork, TraceReplayer
+from .relay import RelayNode, SeenSet
+from .compression import FrameCompression, PresetDictionaries
+from .keys import KeyRegistryServer, RemoteKeyRegistry
+from .faults import FaultProfile, FaultyNetwork
 
 __all__ = [
     "NetworkLayer",
-    "InMemoryNetwork"
+    "InMemoryNetwork",
+    "MessageView",
+    "RoutingHeader",
+    "SharedMemoryBus",
+    "SharedMemoryNetwork",
+    "RecordingNetwork",
+    "TraceReplayer",
+    "RelayNode",
+    "SeenSet",
+    "FrameCompression",
+    "PresetDictionaries",
+    "KeyRegistryServer",
+    "RemoteKeyRegistry",
+    "FaultProfile",
+    "FaultyNetwork"
 ]
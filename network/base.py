@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import Callable, List
 from acp0.core.messages import Intent, Offer, Deal
 
 class NetworkLayer(ABC):
@@ -29,3 +29,25 @@ class NetworkLayer(ABC):
     def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
         """监听特定 Intent 的 Offer"""
         pass
+    
+    def broadcast_intents(self, batch: List[Intent]):
+        """
+        批量广播 Intent
+        
+        默认逐个调用 broadcast_intent()；支持批量帧的传输层应覆盖此方法，
+        在一个帧里发送整批。
+        """
+        for intent in batch:
+            self.broadcast_intent(intent)
+    
+    def unlisten_offers(self, intent_id: str):
+        """
+        注销特定 Intent 的 Offer 监听器（Intent 过期或等待超时后调用）
+        
+        默认不做任何事；持有监听器表的传输层应覆盖此方法释放回调。
+        """
+        pass
+    
+    def unlisten_deals(self, offer_id: str):
+        """注销特定 Offer 的 Deal 监听器（Offer 过期后调用），默认不做任何事"""
+        pass
@@ -0,0 +1,304 @@
+"""
+Preset-Dictionary Frame Compression
+
+带图片列表、大量属性的 Offer 正文有几 KB，其中绝大部分是每条消息都一样的字段名和词汇。
+zlib 支持预置字典（zdict）：压缩器一开始就能引用字典中的字节串，
+小消息也能获得与长文本相近的压缩率。
+
+- 每种消息类型一份字典；字典集合带版本号，两端在连接时协商共同支持的最高版本
+- 只压缩 envelope 帧的 JSON 正文，路由头保持明文（中继不必解压即可转发）
+- 正文小于 threshold 或压缩后没有变小时自动跳过，帧保持原样
+
+压缩后的正文格式：
+    字典版本 (B) | zlib 流（带字典 Adler-32，字典不一致时解压报错而不是得到错误数据）
+
+版本 1 为内置字典（字段名骨架 + 常见词汇）；业务方可以用真实流量训练新版本：
+
+    dictionaries = PresetDictionaries.train(2, sample_messages)
+    register_dictionaries(dictionaries)          # 两端都要注册
+    compression = FrameCompression(version=2)
+    frame = encode_frame(offer, compression=compression)
+
+NOTE: 字典内容一旦发布就不能修改，只能发布新版本号；版本 0 保留表示不压缩。
+"""
+
+import json
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from acp0.core.messages import ACPMessage
+from acp0.core.exceptions import MessageValidationError
+
+MAX_BODY_SIZE = 16 * 1024 * 1024  # 解压后正文上限，防止压缩炸弹
+
+
+class PresetDictionaries:
+    """某个版本的各消息类型字典"""
+
+    def __init__(self, version: int, dictionaries: Dict[str, bytes]):
+        if not 1 <= version <= 255:
+            raise ValueError("Dictionary version must be between 1 and 255")
+        self.version = version
+        self.dictionaries = dict(dictionaries)
+
+    def get(self, message_type: str) -> Optional[bytes]:
+        return self.dictionaries.get(message_type)
+
+    @classmethod
+    def train(cls, version: int, samples: Iterable[Union[ACPMessage, bytes]],
+              size: int = 8192) -> "PresetDictionaries":
+        """
+        从样本消息训练字典
+
+        按 JSON 记号（"键":、短键值对、数组中的字符串及其 URL 前缀）统计出现次数，
+        取 出现次数 × 长度 最高的记号拼成字典；zlib 引用越靠近末尾的字节代价越低，
+        所以收益最高的记号放在后面，最常见的文档结构（叶子值清空）放在最末尾。
+        只出现一次的记号（id、签名、nonce）不入选。
+
+        Args:
+            samples: 消息模型或 JSON 正文
+            size: 每个字典的最大字节数（zlib 窗口为 32KB）
+        """
+        documents: Dict[str, List[Dict]] = {}
+        for sample in samples:
+            if isinstance(sample, ACPMessage):
+                document = json.loads(sample.model_dump_json(exclude_none=True))
+            else:
+                document = json.loads(sample)
+            message_type = document.get("message_type") if isinstance(document, dict) else None
+            if message_type is not None:
+                documents.setdefault(message_type, []).append(document)
+        return cls(version, {
+            message_type: _train_one(samples_of_type, size)
+            for message_type, samples_of_type in documents.items()
+        })
+
+
+def _dump(value) -> bytes:
+    # 与 model_dump_json 的紧凑输出一致
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _tokens(value, out: List[bytes]):
+    """JSON 记号：'"键":'（后接 { / [ 时带上）、'"键":"短值"'、数组中的字符串值"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            prefix = _dump(key) + b":"
+            if isinstance(item, str) and len(item) <= 48:
+                out.append(prefix + _dump(item))
+            elif isinstance(item, dict):
+                out.append(prefix + b"{")
+            elif isinstance(item, list):
+                out.append(prefix + b"[")
+            else:
+                out.append(prefix)
+            if isinstance(item, (dict, list)):
+                _tokens(item, out)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, str):
+                out.append(_dump(item))
+                _prefixes(item, out)
+            else:
+                _tokens(item, out)
+
+
+def _prefixes(text: str, out: List[bytes]):
+    """URL / 路径类字符串按 / 切出的前缀（'"https://cdn.example.com/items/' 这类公共部分）"""
+    end = text.find("/")
+    while end != -1:
+        out.append(_dump(text[:end + 1])[:-1])
+        end = text.find("/", end + 1)
+
+
+def _skeleton(value):
+    """叶子值清空后的文档结构，保留字段的相邻关系"""
+    if isinstance(value, dict):
+        return {key: _skeleton(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_skeleton(item) for item in value[:1]]
+    if isinstance(value, str):
+        return ""
+    return 0
+
+
+def _train_one(documents: Sequence[Dict], size: int) -> bytes:
+    counts: Counter = Counter()
+    skeletons: Counter = Counter()
+    for document in documents:
+        tokens: List[bytes] = []
+        _tokens(document, tokens)
+        counts.update(tokens)
+        skeletons[_dump(_skeleton(document))] += 1
+    # 最常见的文档结构放在字典最末尾
+    skeleton = skeletons.most_common(1)[0][0][:size] if skeletons else b""
+    size -= len(skeleton)
+    ranked = sorted(
+        (token for token, count in counts.items() if count > 1),
+        key=lambda token: counts[token] * len(token)
+    )
+    chosen, total = [], 0
+    for token in reversed(ranked):
+        if total + len(token) > size:
+            continue
+        chosen.append(token)
+        total += len(token)
+    chosen.reverse()  # 收益最高的在末尾
+    return b"".join(chosen) + skeleton
+
+
+# ---------- 内置字典（版本 1） ----------
+
+_COMMON = (
+    '"currency":"CNY""currency":"USD""currency":"EUR""currency":"JPY"'
+    '"location":"Beijing""location":"Shanghai""location":"Shenzhen"'
+)
+_V1 = {
+    "intent": (
+        _COMMON
+        + '"attributes":["'
+        + '","location":"'
+        + '"delivery_days":'
+        + '{"acp_version":"0.9","message_type":"intent","anchor_mode":"none","signature":"'
+        + '","nonce":"'
+        + '","timestamp":'
+        + ',"intent_id":"'
+        + '","buyer":{"agent_id":"'
+        + '","public_key":"'
+        + '"},"demand":{"category":"'
+        + '","budget":{"min":'
+        + ',"max":'
+        + ',"currency":"'
+        + '"},"expires_at":'
+    ),
+    "offer": (
+        _COMMON
+        + '"color":"black""color":"white""color":"silver""brand":"""model":"'
+        + '"ram":"8GB""ram":"16GB""ram":"32GB""storage":"256GB""storage":"512GB""storage":"1TB"'
+        + '"cpu":"""gpu":"""screen":"""size":"""weight":"""material":"""warranty":"'
+        + '"battery":"""resolution":"""origin":"""version":"'
+        + '"images":["https://cdn.'
+        + '.jpg","https://'
+        + '.png","https://'
+        + '.webp"],"attributes":{"'
+        + '{"acp_version":"0.9","message_type":"offer","anchor_mode":"none","signature":"'
+        + '","nonce":"'
+        + '","timestamp":'
+        + ',"offer_id":"'
+        + '","intent_id":"'
+        + '","seller":{"agent_id":"'
+        + '","name":"'
+        + '","public_key":"'
+        + '"},"item":{"name":"'
+        + '","sku":"'
+        + '"},"price":{"amount":'
+        + ',"currency":"'
+        + '"},"stock":'
+        + ',"expires_at":'
+    ),
+    "deal": (
+        '"status":"authorized""status":"captured""method":"mock""method":"card"'
+        + '{"acp_version":"0.9","message_type":"deal","anchor_mode":"none","signature":"'
+        + '","nonce":"'
+        + '","timestamp":'
+        + ',"deal_id":"'
+        + '","offer_id":"'
+        + '","buyer":{"agent_id":"'
+        + '","public_key":"'
+        + '"},"payment":{"method":"'
+        + '","status":"'
+        + '","token":"'
+    ),
+}
+
+_registry: Dict[int, PresetDictionaries] = {}
+_registry_lock = threading.Lock()
+
+
+def register_dictionaries(dictionaries: PresetDictionaries):
+    """注册一个字典版本（同一版本号不能注册不同内容）"""
+    with _registry_lock:
+        existing = _registry.get(dictionaries.version)
+        if existing is not None and existing.dictionaries != dictionaries.dictionaries:
+            raise ValueError(f"Dictionary version {dictionaries.version} already registered")
+        _registry[dictionaries.version] = dictionaries
+
+
+def get_dictionaries(version: int) -> PresetDictionaries:
+    dictionaries = _registry.get(version)
+    if dictionaries is None:
+        raise MessageValidationError(f"Unknown compression dictionary version: {version}")
+    return dictionaries
+
+
+def supported_versions() -> List[int]:
+    """本进程可以解压的字典版本（升序）"""
+    return sorted(_registry)
+
+
+def negotiate(local: Iterable[int], remote: Iterable[int]) -> Optional[int]:
+    """双方都支持的最高版本；没有时返回 None（不压缩）"""
+    common = set(local) & set(remote)
+    return max(common) if common else None
+
+
+register_dictionaries(PresetDictionaries(1, {
+    message_type: text.encode("utf-8") for message_type, text in _V1.items()
+}))
+
+
+# ---------- 压缩 / 解压 ----------
+
+class FrameCompression:
+    """envelope 帧正文的压缩策略"""
+
+    def __init__(self, version: int = 1, threshold: int = 512, level: int = 6):
+        """
+        Args:
+            version: 使用的字典版本（须已注册）
+            threshold: 正文小于该字节数时不压缩
+            level: zlib 压缩级别
+        """
+        if version not in _registry:
+            raise ValueError(f"Unknown compression dictionary version: {version}")
+        self.dictionaries = _registry[version]
+        self.version = version
+        self.threshold = threshold
+        self.level = level
+
+    def with_version(self, version: int) -> "FrameCompression":
+        """同样的阈值和级别，换用协商出的字典版本"""
+        return FrameCompression(version, self.threshold, self.level)
+
+    def compress(self, message_type: str, body: bytes) -> Optional[bytes]:
+        """压缩正文；低于阈值或没有变小时返回 None"""
+        if len(body) < self.threshold:
+            return None
+        zdict = self.dictionaries.get(message_type)
+        if zdict:
+            compressor = zlib.compressobj(self.level, zdict=zdict)
+        else:
+            compressor = zlib.compressobj(self.level)
+        packed = bytes((self.version,)) + compressor.compress(body) + compressor.flush()
+        return packed if len(packed) < len(body) else None
+
+
+def decompress(message_type: str, payload: bytes) -> bytes:
+    """解压 compress() 的输出（按正文里的版本号选字典）"""
+    if not payload:
+        raise MessageValidationError("Empty compressed body")
+    zdict = get_dictionaries(payload[0]).get(message_type)
+    try:
+        if zdict:
+            decompressor = zlib.decompressobj(zdict=zdict)
+        else:
+            decompressor = zlib.decompressobj()
+        body = decompressor.decompress(payload[1:], MAX_BODY_SIZE)
+    except zlib.error as e:
+        raise MessageValidationError(f"Invalid compressed body: {e}")
+    if decompressor.unconsumed_tail:
+        raise MessageValidationError("Compressed body exceeds size limit")
+    if not decompressor.eof:
+        raise MessageValidationError("Truncated compressed body")
+    return body
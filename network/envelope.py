@@ -0,0 +1,382 @@
+"""
+Lazy Message Envelope
+
+路由器、中继只需要 message_type、intent_id / offer_id、demand.category、timestamp
+就能决定消息去向，不必先构建完整的 pydantic 模型。
+
+两种线上格式：
+- JSON：消息的 model_dump_json()；MessageView 只做 json.loads（C 实现），不做模型校验
+- 二进制帧：定长头 + 路由字段 + JSON 正文，读取路由头只需 struct.unpack，正文原样转发
+
+帧格式（网络字节序）:
+    magic "A0" (2) | version (1) | type (1) | timestamp (q) | expires_at (q, 0=无)
+    | len(id) (H) | len(ref) (H) | len(nonce) (H) | len(body) (I)
+    | id | ref | nonce | body
+其中 id 为 intent_id / offer_id / deal_id，ref 为路由键：
+    intent -> demand.category, offer -> intent_id, deal -> offer_id
+type 的最高位表示正文经过预置字典压缩（acp0.network.compression），路由头始终明文。
+
+完整的 Intent / Offer / Deal 校验只在最终接收方调用 MessageView.to_model() 时发生。
+"""
+
+import json
+import struct
+import time
+from typing import Dict, NamedTuple, Optional, Union
+from acp0.core.messages import ACPMessage, Intent, Offer, Deal
+from acp0.core.exceptions import MessageValidationError
+from acp0.network.compression import FrameCompression, decompress
+
+FRAME_MAGIC = b"A0"
+FRAME_VERSION = 1
+
+_HEADER = struct.Struct("!2sBBqqHHHI")
+
+_TYPE_CODES = {"intent": 1, "offer": 2, "deal": 3}
+_TYPE_NAMES = {code: name for name, code in _TYPE_CODES.items()}
+_COMPRESSED = 0x80
+_MODELS = {"intent": Intent, "offer": Offer, "deal": Deal}
+_ID_FIELDS = {"intent": "intent_id", "offer": "offer_id", "deal": "deal_id"}
+
+
+class RoutingHeader(NamedTuple):
+    """路由所需的最小字段集"""
+    message_type: str
+    message_id: str
+    ref: str              # intent: category; offer: intent_id; deal: offer_id
+    nonce: str
+    timestamp: int
+    expires_at: Optional[int]
+
+    @property
+    def category(self) -> Optional[str]:
+        return self.ref if self.message_type == "intent" else None
+
+    @property
+    def intent_id(self) -> Optional[str]:
+        if self.message_type == "intent":
+            return self.message_id
+        return self.ref if self.message_type == "offer" else None
+
+    @property
+    def offer_id(self) -> Optional[str]:
+        if self.message_type == "offer":
+            return self.message_id
+        return self.ref if self.message_type == "deal" else None
+
+
+def _model_header(model: ACPMessage) -> RoutingHeader:
+    """由已校验的模型得到应有的路由头（expires_at 与帧格式一致，0 / None 都视为无）"""
+    message_type = model.message_type
+    return RoutingHeader(
+        message_type,
+        getattr(model, _ID_FIELDS[message_type]),
+        _routing_ref(message_type, model),
+        model.nonce,
+        model.timestamp,
+        getattr(model, "expires_at", None) or None
+    )
+
+
+def _routing_ref(message_type: str, data) -> str:
+    """从模型或 dict 中取路由键"""
+    get = data.get if isinstance(data, dict) else lambda k: getattr(data, k)
+    if message_type == "intent":
+        demand = get("demand")
+        if isinstance(demand, dict):
+            return demand["category"]
+        if isinstance(data, dict):
+            raise TypeError("demand must be an object")
+        return demand.category
+    if message_type == "offer":
+        return get("intent_id")
+    return get("offer_id")
+
+
+# ---------- 编码 ----------
+
+def encode_json(message: ACPMessage) -> bytes:
+    """消息 -> JSON 字节"""
+    return message.model_dump_json(exclude_none=True).encode("utf-8")
+
+
+def encode_frame(message: ACPMessage, body: Optional[bytes] = None,
+                 compression: Optional[FrameCompression] = None) -> bytes:
+    """
+    消息 -> 二进制帧
+
+    Args:
+        body: 已编码的 JSON 正文（可选，避免重复序列化）
+        compression: 正文压缩策略（可选；低于阈值时自动不压缩）
+    """
+    message_type = message.message_type
+    if message_type not in _TYPE_CODES:
+        raise MessageValidationError(f"Unknown message type: {message_type}")
+    if body is None:
+        body = encode_json(message)
+    compressed = False
+    if compression is not None:
+        packed = compression.compress(message_type, body)
+        if packed is not None:
+            body, compressed = packed, True
+    return pack_frame(
+        message_type,
+        getattr(message, _ID_FIELDS[message_type]),
+        _routing_ref(message_type, message),
+        message.nonce,
+        message.timestamp,
+        getattr(message, "expires_at", None),
+        body,
+        compressed
+    )
+
+
+def pack_frame(message_type: str, message_id: str, ref: str, nonce: str,
+               timestamp: int, expires_at: Optional[int], body: bytes,
+               compressed: bool = False) -> bytes:
+    """按帧格式打包（供已持有路由字段的转发方使用；compressed 表示 body 已压缩）"""
+    id_bytes = message_id.encode("utf-8")
+    ref_bytes = ref.encode("utf-8")
+    nonce_bytes = nonce.encode("utf-8")
+    return b"".join((
+        _HEADER.pack(
+            FRAME_MAGIC, FRAME_VERSION, _TYPE_CODES[message_type] | (_COMPRESSED if compressed else 0),
+            timestamp, expires_at or 0,
+            len(id_bytes), len(ref_bytes), len(nonce_bytes), len(body)
+        ),
+        id_bytes, ref_bytes, nonce_bytes, body
+    ))
+
+
+def is_frame(raw: bytes) -> bool:
+    return raw[:2] == FRAME_MAGIC
+
+
+# ---------- 延迟解析 ----------
+
+class MessageView:
+    """
+    原始字节上的延迟消息视图
+
+    header 只解析一次；to_model() 才做完整校验（结果缓存）。
+    """
+
+    __slots__ = ("_raw", "_frame", "_header", "_body_offset", "_compressed", "_body", "_data", "_model")
+
+    def __init__(self, raw: Union[bytes, bytearray, memoryview, str]):
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        self._raw: Optional[bytes] = bytes(raw)
+        self._frame = is_frame(self._raw)
+        self._header: Optional[RoutingHeader] = None
+        self._body_offset: Optional[int] = None
+        self._compressed = False
+        self._body: Optional[bytes] = None
+        self._data: Optional[Dict] = None
+        self._model: Optional[ACPMessage] = None
+
+    @classmethod
+    def from_message(cls, message: ACPMessage, frame: bool = True) -> "MessageView":
+        """已有模型的视图：路由头取自模型，原始字节在首次访问 raw 时才编码"""
+        view = cls.__new__(cls)
+        view._raw = None
+        view._frame = frame
+        view._header = _model_header(message)
+        view._body_offset = None
+        view._compressed = False
+        view._body = None
+        view._data = None
+        view._model = message
+        return view
+
+    @property
+    def raw(self) -> bytes:
+        if self._raw is None:
+            body = self._body = encode_json(self._model)
+            self._raw = pack_frame(*self._header, body) if self._frame else body
+            self._body_offset = len(self._raw) - len(body)
+        return self._raw
+
+    @property
+    def is_frame(self) -> bool:
+        return self._frame
+
+    def frame(self, compression: Optional[FrameCompression] = None) -> bytes:
+        """
+        转发用的帧（不做模型校验）
+
+        原始字节已是所需形态（帧、压缩与否、字典版本都符合）时原样返回；
+        否则按路由头重新打包，正文按需解压 / 压缩。
+
+        Args:
+            compression: 目标链路的压缩策略；None 表示不压缩
+        """
+        raw, header = self.raw, self.header
+        if self._frame:
+            if not self._compressed and compression is None:
+                return raw
+            if self._compressed and compression is not None and raw[self._body_offset] == compression.version:
+                return raw
+        body, compressed = self.body, False
+        if compression is not None:
+            packed = compression.compress(header.message_type, body)
+            if packed is not None:
+                body, compressed = packed, True
+            elif self._frame and not self._compressed:
+                return raw
+        return pack_frame(*header, body, compressed)
+
+    # ---------- 路由头 ----------
+
+    @property
+    def header(self) -> RoutingHeader:
+        if self._header is None:
+            self._header = self._parse_frame_header() if self.is_frame else self._parse_json_header()
+        return self._header
+
+    def _parse_frame_header(self) -> RoutingHeader:
+        raw = self.raw
+        try:
+            (_, version, type_code, timestamp, expires_at,
+             id_len, ref_len, nonce_len, body_len) = _HEADER.unpack_from(raw)
+        except struct.error as e:
+            raise MessageValidationError(f"Truncated frame header: {e}")
+        if version != FRAME_VERSION:
+            raise MessageValidationError(f"Unsupported frame version: {version}")
+        message_type = _TYPE_NAMES.get(type_code & ~_COMPRESSED)
+        if message_type is None:
+            raise MessageValidationError(f"Unknown message type code: {type_code}")
+
+        offset = _HEADER.size
+        end = offset + id_len + ref_len + nonce_len
+        if end + body_len != len(raw):
+            raise MessageValidationError("Frame length mismatch")
+        try:
+            message_id = raw[offset:offset + id_len].decode("utf-8")
+            offset += id_len
+            ref = raw[offset:offset + ref_len].decode("utf-8")
+            offset += ref_len
+            nonce = raw[offset:offset + nonce_len].decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise MessageValidationError(f"Invalid frame header: {e}")
+        self._body_offset = end
+        self._compressed = bool(type_code & _COMPRESSED)
+        return RoutingHeader(message_type, message_id, ref, nonce,
+                             timestamp, expires_at or None)
+
+    def _parse_json_header(self) -> RoutingHeader:
+        data = self.data
+        try:
+            message_type = data["message_type"]
+            return RoutingHeader(
+                message_type,
+                data[_ID_FIELDS[message_type]],
+                _routing_ref(message_type, data),
+                data["nonce"],
+                data["timestamp"],
+                data.get("expires_at")
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            raise MessageValidationError(f"Missing routing field: {e}")
+
+    # 常用字段快捷访问
+    @property
+    def message_type(self) -> str:
+        return self.header.message_type
+
+    @property
+    def message_id(self) -> str:
+        return self.header.message_id
+
+    @property
+    def intent_id(self) -> Optional[str]:
+        return self.header.intent_id
+
+    @property
+    def offer_id(self) -> Optional[str]:
+        return self.header.offer_id
+
+    @property
+    def category(self) -> Optional[str]:
+        return self.header.category
+
+    @property
+    def timestamp(self) -> int:
+        return self.header.timestamp
+
+    @property
+    def nonce(self) -> str:
+        return self.header.nonce
+
+    @property
+    def expires_at(self) -> Optional[int]:
+        return self.header.expires_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """只读路由头判断是否过期，无需解析正文"""
+        expires_at = self.header.expires_at
+        return expires_at is not None and (time.time() if now is None else now) >= expires_at
+
+    # ---------- 正文 ----------
+
+    @property
+    def is_compressed(self) -> bool:
+        """正文是否经过压缩（只看路由头）"""
+        if not self.is_frame:
+            return False
+        self.header
+        return self._compressed
+
+    @property
+    def body(self) -> bytes:
+        """JSON 正文（压缩的正文在首次访问时解压）"""
+        if not self.is_frame:
+            return self.raw
+        if self._body is None:
+            header, raw = self.header, self.raw  # 由模型延迟编码时 raw 顺带设置正文
+            if self._body is None:
+                body = raw[self._body_offset:]
+                self._body = decompress(header.message_type, body) if self._compressed else body
+        return self._body
+
+    @property
+    def data(self) -> Dict:
+        """正文解析成 dict（json.loads，不做模型校验）"""
+        if self._data is None:
+            try:
+                data = json.loads(self.body)
+            except ValueError as e:
+                raise MessageValidationError(f"Invalid JSON body: {e}")
+            if not isinstance(data, dict):
+                raise MessageValidationError("Message body must be a JSON object")
+            self._data = data
+        return self._data
+
+    def to_model(self) -> ACPMessage:
+        """完整校验，返回 Intent / Offer / Deal（仅最终接收方调用）"""
+        if self._model is None:
+            model_cls = _MODELS.get(self.message_type)
+            if model_cls is None:
+                raise MessageValidationError(f"Unknown message type: {self.message_type}")
+            try:
+                model = model_cls.model_validate(self.data)
+            except ValueError as e:
+                raise MessageValidationError(str(e))
+            # 中继按路由头去重（nonce）、判断过期（timestamp / expires_at），每个字段都必须与签名正文一致
+            if self.is_frame:
+                header, expected = self.header, _model_header(model)
+                mismatched = [field for field in RoutingHeader._fields
+                              if getattr(header, field) != getattr(expected, field)]
+                if mismatched:
+                    raise MessageValidationError(
+                        f"Frame header does not match message body: {', '.join(mismatched)}")
+            self._model = model
+        return self._model
+
+    def __repr__(self) -> str:
+        return f"MessageView({self.message_type}, {self.message_id})"
+
+
+def decode(raw: Union[bytes, str]) -> ACPMessage:
+    """原始字节 -> 完整校验后的消息"""
+    return MessageView(raw).to_model()
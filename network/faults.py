@@ -0,0 +1,291 @@
+"""
+Fault & Latency Injection
+
+InMemoryNetwork 同步、无损地投递，测不出尾延迟。FaultyNetwork 包装任意 NetworkLayer，
+按消息类型注入网络状况：
+
+- 时延：基础分布（constant / uniform / exponential / lognormal / pareto）+ 均匀抖动
+- 丢包：按概率丢弃
+- 重复：按概率再投递一份（另取一次时延）
+- 乱序：按概率额外滞留 reorder_delay 秒，让后发的消息先到
+- 在途消息在监听器注销后到达时丢弃（计入 late），与真实网络一致
+- 投递线程上监听器抛出的异常计入 errors 并打印告警（无故障直接投递时照常抛给发送方）
+
+故障在接收端按"每个接收方一次"判定：同一条广播的 Intent 对不同卖家的时延、丢包互相独立。
+没有任何故障的消息在发送线程上直接投递；其余由一个投递线程按到达时刻依次投递。
+
+用法:
+    network = FaultyNetwork(InMemoryNetwork(), {
+        "intent": FaultProfile(delay=lognormal(0.005, 0.5), drop=0.01),
+        "offer": FaultProfile(delay=pareto(0.002, 2.5), jitter=0.001, duplicate=0.01, reorder=0.05),
+    }, seed=42)
+    seller = SellerAgent(..., network)
+    ...
+    network.flush()
+    print(network.stats())
+
+NOTE: 每条消息对每个接收方的故障由 random.Random(f"{seed}:{nonce}:{订阅}") 决定，与到达顺序、
+      线程交错无关：同一 seed 下同一条消息（nonce 相同）对同一个监听器总是得到相同的结果。
+      订阅按注册顺序编号（Offer / Deal 在各自的 intent_id / offer_id 下编号）。
+      投递线程是单线程的，监听器（验签等）在其上串行执行；卖家宜使用 listen_pipelined()。
+"""
+
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from acp0.core.messages import ACPMessage, Intent, Offer, Deal
+from acp0.network.base import NetworkLayer
+
+Distribution = Callable[[random.Random], float]
+
+
+# ---------- 时延分布（秒） ----------
+
+def constant(seconds: float) -> Distribution:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Distribution:
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean: float) -> Distribution:
+    return lambda rng: rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+
+
+def lognormal(median: float, sigma: float) -> Distribution:
+    """中位数为 median 的对数正态分布（sigma 越大尾部越长）"""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def pareto(scale: float, alpha: float, cap: Optional[float] = None) -> Distribution:
+    """最小值为 scale 的帕累托分布（重尾，alpha 越小尾部越重）；cap 为上限"""
+    def sample(rng: random.Random) -> float:
+        value = scale * rng.paretovariate(alpha)
+        return value if cap is None else min(value, cap)
+    return sample
+
+
+class FaultProfile(NamedTuple):
+    """某类消息的网络状况"""
+    delay: Optional[Distribution] = None  # 基础时延分布；None 为 0
+    jitter: float = 0.0                   # 叠加 [-jitter, +jitter] 的均匀抖动（结果不小于 0）
+    drop: float = 0.0                     # 丢包概率
+    duplicate: float = 0.0                # 重复投递概率
+    reorder: float = 0.0                  # 额外滞留（被后发消息超过）的概率
+    reorder_delay: float = 0.05           # 滞留时长（秒）
+
+    @property
+    def faultless(self) -> bool:
+        return (self.delay is None and not self.jitter and not self.drop
+                and not self.duplicate and not self.reorder)
+
+
+_NO_FAULTS = FaultProfile()
+_COUNTERS = ("received", "delivered", "dropped", "duplicated", "reordered", "late", "errors")
+
+
+class _Subscription:
+    """包装后的监听器；注销后在途消息不再投递"""
+
+    __slots__ = ("callback", "key", "active")
+
+    def __init__(self, callback: Callable, key: str):
+        self.callback = callback
+        self.key = key  # 故障随机数种子的一部分
+        self.active = True
+
+
+class FaultyNetwork(NetworkLayer):
+    """带时延、丢包、重复、乱序注入的网络层包装"""
+
+    def __init__(self, network: NetworkLayer, profiles: Optional[Dict[str, FaultProfile]] = None,
+                 default: FaultProfile = _NO_FAULTS, seed: int = 0):
+        """
+        Args:
+            network: 被包装的网络层
+            profiles: 消息类型（"intent" / "offer" / "deal"）-> FaultProfile
+            default: 未列出的消息类型使用的配置
+            seed: 随机种子
+        """
+        self.network = network
+        self.profiles = dict(profiles or {})
+        self.default = default
+        self.seed = seed
+        self._intent_subs = itertools.count()
+        self._offer_subs: Dict[str, List[_Subscription]] = {}
+        self._deal_subs: Dict[str, List[_Subscription]] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._counter_lock = threading.Lock()
+
+        # 投递线程：(到达时刻, 序号, 订阅, 消息) 的最小堆
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def profile(self, message_type: str) -> FaultProfile:
+        return self.profiles.get(message_type, self.default)
+
+    # ---------- 发送：透传 ----------
+
+    def broadcast_intent(self, intent: Intent):
+        self.network.broadcast_intent(intent)
+
+    def broadcast_intents(self, batch: List[Intent]):
+        self.network.broadcast_intents(batch)
+
+    def send_offer(self, offer: Offer, intent_id: str):
+        self.network.send_offer(offer, intent_id)
+
+    def send_deal(self, deal: Deal, offer_id: str):
+        self.network.send_deal(deal, offer_id)
+
+    # ---------- 接收：按接收方注入故障 ----------
+
+    def listen_intents(self, callback: Callable[[Intent], None]):
+        subscription = _Subscription(callback, f"intent:{next(self._intent_subs)}")
+        self.network.listen_intents(self._wrap(subscription))
+
+    def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
+        subscriptions = self._offer_subs.setdefault(intent_id, [])
+        subscription = _Subscription(callback, f"offer:{intent_id}:{len(subscriptions)}")
+        subscriptions.append(subscription)
+        self.network.listen_offers(intent_id, self._wrap(subscription))
+
+    def listen_deals(self, offer_id: str, callback: Callable[[Deal], None]):
+        subscriptions = self._deal_subs.setdefault(offer_id, [])
+        subscription = _Subscription(callback, f"deal:{offer_id}:{len(subscriptions)}")
+        subscriptions.append(subscription)
+        self.network.listen_deals(offer_id, self._wrap(subscription))
+
+    def unlisten_offers(self, intent_id: str):
+        for subscription in self._offer_subs.pop(intent_id, ()):
+            subscription.active = False
+        self.network.unlisten_offers(intent_id)
+
+    def unlisten_deals(self, offer_id: str):
+        for subscription in self._deal_subs.pop(offer_id, ()):
+            subscription.active = False
+        self.network.unlisten_deals(offer_id)
+
+    def __getattr__(self, name):
+        # register_agent 等其余接口透传给被包装的网络层
+        if name == "network":
+            raise AttributeError(name)
+        return getattr(self.network, name)
+
+    def _wrap(self, subscription: _Subscription) -> Callable[[ACPMessage], None]:
+        def receive(message: ACPMessage):
+            self._inject(subscription, message)
+        return receive
+
+    def _inject(self, subscription: _Subscription, message: ACPMessage):
+        message_type = message.message_type
+        profile = self.profile(message_type)
+        self._count(message_type, "received")
+        if profile.faultless:
+            self._deliver(subscription, message)
+            return
+
+        # 每条消息、每个接收方独立的随机数流：结果不依赖并发发送方的交错顺序
+        rng = random.Random(f"{self.seed}:{message.nonce}:{subscription.key}")
+        if profile.drop and rng.random() < profile.drop:
+            delays = []
+        else:
+            delays = [self._sample(profile, rng)]
+            if profile.reorder and rng.random() < profile.reorder:
+                delays[0] += profile.reorder_delay
+                self._count(message_type, "reordered")
+            if profile.duplicate and rng.random() < profile.duplicate:
+                delays.append(self._sample(profile, rng))
+                self._count(message_type, "duplicated")
+        if not delays:
+            self._count(message_type, "dropped")
+            return
+
+        now = time.monotonic()
+        with self._cond:
+            for delay in delays:
+                heapq.heappush(self._heap, (now + delay, next(self._seq), subscription, message))
+                self._in_flight += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._delivery_loop, daemon=True,
+                                                name="faulty-network-delivery")
+                self._thread.start()
+            self._cond.notify()
+
+    @staticmethod
+    def _sample(profile: FaultProfile, rng: random.Random) -> float:
+        delay = profile.delay(rng) if profile.delay is not None else 0.0
+        if profile.jitter:
+            delay += rng.uniform(-profile.jitter, profile.jitter)
+        return max(delay, 0.0)
+
+    def _deliver(self, subscription: _Subscription, message: ACPMessage):
+        if not subscription.active:
+            self._count(message.message_type, "late")
+            return
+        self._count(message.message_type, "delivered")
+        subscription.callback(message)
+
+    def _delivery_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                _, _, subscription, message = heapq.heappop(self._heap)
+            try:
+                self._deliver(subscription, message)
+            except Exception as e:
+                # 同步投递时异常抛给发送方；投递线程上没有调用方可抛，计数并告警后继续投递其他消息
+                self._count(message.message_type, "errors")
+                print(f"⚠️ Listener failed on delayed {message.message_type}: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _count(self, message_type: str, name: str):
+        with self._counter_lock:
+            counters = self.counters.get(message_type)
+            if counters is None:
+                counters = self.counters[message_type] = dict.fromkeys(_COUNTERS, 0)
+            counters[name] += 1
+
+    # ---------- 控制 ----------
+
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有在途消息投递完（含其投递时产生的新消息）；超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def close(self):
+        """停止投递线程，丢弃在途消息"""
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._in_flight = 0
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._counter_lock:
+            return {message_type: dict(counters) for message_type, counters in self.counters.items()}
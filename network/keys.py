@@ -0,0 +1,235 @@
+"""
+Networked Key Registry
+
+进程内的 KeyRegistry（acp0.core.keys）只对同一进程里的代理有效。
+跨进程 / 跨主机时由一个 KeyRegistryServer 保存 key_id -> 公钥，
+各进程用 RemoteKeyRegistry 作为进程级注册表：
+
+- register()：先写本地缓存，再上报服务端（发出 key_id 消息前调用，对端才能解析）；
+  已成功上报（或从服务端取回）的公钥不再重复上报
+- resolve()：先查本地缓存；未命中时向服务端查询一次，结果按指纹校验后写入本地缓存，
+  之后同一签名者的消息不再走网络
+- 查不到的 key_id 在 miss_ttl 秒内不再重复查询（伪造的 key_id 不会放大成查询风暴）
+
+协议（localhost TCP，长连接，请求串行）：
+    请求: op (B) | len (H) | payload       op: "R" 登记公钥 / "G" 按 key_id 查询
+    响应: status (B) | len (H) | payload   status: 1 成功 / 0 未知 key_id / 2 请求错误
+
+用法:
+    server = KeyRegistryServer()
+    port = server.serve()
+    set_key_registry(RemoteKeyRegistry("127.0.0.1", port))   # 每个进程
+
+NOTE: 服务端不可信也不影响安全性：取回的公钥必须与 key_id 指纹一致才会被采用；
+      服务端只能造成"解析不到"（验签失败），不能替换公钥。
+"""
+
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from acp0.core.exceptions import NetworkError
+from acp0.core.keys import KeyRegistry
+
+_HEADER = struct.Struct("!BH")
+
+_REGISTER = ord("R")
+_GET = ord("G")
+
+_OK = 1
+_UNKNOWN = 0
+_BAD_REQUEST = 2
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _read_message(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    kind, length = _HEADER.unpack(header)
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _pack(kind: int, payload: bytes) -> bytes:
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+class KeyRegistryServer:
+    """对外提供 KeyRegistry 的 TCP 服务"""
+
+    def __init__(self, registry: Optional[KeyRegistry] = None):
+        self.registry = KeyRegistry() if registry is None else registry
+        self._server: Optional[socket.socket] = None
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """开始监听，返回实际端口"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        self._server = server
+        threading.Thread(target=self._accept_loop, daemon=True, name="keys-accept").start()
+        return server.getsockname()[1]
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._connections.add(sock)
+            threading.Thread(target=self._serve_connection, args=(sock,), daemon=True,
+                             name="keys-conn").start()
+
+    def _serve_connection(self, sock: socket.socket):
+        try:
+            while True:
+                request = _read_message(sock)
+                if request is None:
+                    break
+                sock.sendall(self._handle(*request))
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(sock)
+            sock.close()
+
+    def _handle(self, op: int, payload: bytes) -> bytes:
+        try:
+            text = payload.decode("ascii")
+            if op == _REGISTER:
+                return _pack(_OK, self.registry.register(text).encode("ascii"))
+            if op == _GET:
+                public_key = self.registry.resolve(text)
+                if public_key is None:
+                    return _pack(_UNKNOWN, b"")
+                return _pack(_OK, public_key.encode("ascii"))
+        except ValueError:  # 包括 UnicodeDecodeError
+            pass
+        return _pack(_BAD_REQUEST, b"")
+
+    def close(self):
+        self._closed = True
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+class RemoteKeyRegistry(KeyRegistry):
+    """带本地缓存的 KeyRegistryServer 客户端"""
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0, miss_ttl: float = 5.0):
+        """
+        Args:
+            host, port: KeyRegistryServer 地址
+            timeout: 单次请求超时（秒）
+            miss_ttl: 服务端也不认识的 key_id 在多少秒内不再查询
+        """
+        super().__init__()
+        self.address = (host, port)
+        self.timeout = timeout
+        self.miss_ttl = miss_ttl
+        self.counters.update({"fetched": 0, "rejected": 0, "errors": 0})
+        self._misses: Dict[str, float] = {}  # key_id -> 可再次查询的时刻
+        self._reported: Set[str] = set()      # 服务端已确认持有的 key_id
+        self._sock: Optional[socket.socket] = None
+        self._request_lock = threading.Lock()
+
+    def register(self, public_key_b64: str) -> str:
+        """登记到本地缓存并上报服务端；服务端不可达时抛出 NetworkError"""
+        key_id = super().register(public_key_b64)
+        if key_id in self._reported:
+            return key_id
+        status, payload = self._request(_REGISTER, public_key_b64.encode("ascii"))
+        if status != _OK or payload.decode("ascii") != key_id:
+            raise NetworkError("Key registry rejected public key")
+        with self._lock:
+            self._reported.add(key_id)
+        return key_id
+
+    def resolve(self, key_id: str) -> Optional[str]:
+        public_key = self._keys.get(key_id)
+        if public_key is not None:
+            with self._lock:
+                self.counters["hits"] += 1
+            return public_key
+        with self._lock:
+            self.counters["misses"] += 1
+            retry_at = self._misses.get(key_id)
+        if retry_at is not None and time.monotonic() < retry_at:
+            return None
+
+        try:
+            status, payload = self._request(_GET, key_id.encode("ascii"))
+        except (NetworkError, UnicodeEncodeError):
+            with self._lock:
+                self.counters["errors"] += 1
+            return None
+        if status == _OK and self._store(key_id, payload.decode("ascii", "replace")):
+            with self._lock:
+                self.counters["fetched"] += 1
+                self._misses.pop(key_id, None)
+                self._reported.add(key_id)
+            return self._keys[key_id]
+
+        with self._lock:
+            if status == _OK:
+                self.counters["rejected"] += 1  # 服务端返回的公钥与指纹不符
+            self._misses[key_id] = time.monotonic() + self.miss_ttl
+            if len(self._misses) > 65536:
+                self._misses.clear()
+        return None
+
+    def _request(self, op: int, payload: bytes) -> Tuple[int, bytes]:
+        """发送一个请求并等待响应；连接断开时重连一次"""
+        with self._request_lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self._sock.sendall(_pack(op, payload))
+                    response = _read_message(self._sock)
+                    if response is not None:
+                        return response
+                    error: Exception = ConnectionError("connection closed")
+                except OSError as e:
+                    error = e
+                self._disconnect()
+            raise NetworkError(f"Key registry {self.address[0]}:{self.address[1]} unreachable: {error}")
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def close(self):
+        with self._request_lock:
+            self._disconnect()
@@ -5,40 +5,65 @@ WARNING: NOT thread-safe!
 - This implementation uses list.append() and dict access without locks
 - Intended for single-threaded demonstration only
 - Production use requires threading.Lock or asyncio-based implementation
+- Exception: unlisten_offers()/unlisten_deals() may run on the shared timer
+  wheel thread (agents expire listeners via acp0.utils.timer_wheel), so
+  send_offer()/send_deal() iterate over a snapshot of the callback list
 
 For production, see: acp0/network/http.py (Phase 2)
 """
 
 from typing import Dict, List, Callable
 from acp0.network.base import NetworkLayer
-from acp0.core.messages import Intent, Offer, Deal
+from acp0.core.messages import ACPMessage, Intent, Offer, Deal
+from acp0.core.compact import compact
 
 class InMemoryNetwork(NetworkLayer):
     """内存版网络层，用于本地 Demo"""
     
-    def __init__(self):
+    def __init__(self, compact_history: bool = False):
+        """
+        Args:
+            compact_history: 消息历史中的 Intent/Offer/Deal 以紧凑表示
+                             (acp0.core.compact) 保存，节省内存
+        """
+        self.compact_history = compact_history
         self.intent_listeners: List[Callable] = []
         self.offer_callbacks: Dict[str, List[Callable]] = {}
         self.deal_callbacks: Dict[str, List[Callable]] = {}
         self.agents: Dict[str, str] = {}  # agent_id -> agent_type
         self.messages: Dict[str, List[Dict]] = {}  # agent_id -> list of messages
+        self.expired_dropped = 0  # 投递前因过期被丢弃的 Intent/Offer 数
     
     def broadcast_intent(self, intent: Intent):
-        """广播给所有监听者"""
+        """广播给所有监听者（已过期的 Intent 直接丢弃，不再交给卖家验签）"""
+        if intent.is_expired():
+            self.expired_dropped += 1
+            return
         for listener in self.intent_listeners:
             listener(intent)
     
+    def broadcast_intents(self, batch: List[Intent]):
+        """批量广播：每个监听者按顺序收到整批"""
+        batch = list(batch)
+        live = [intent for intent in batch if not intent.is_expired()]
+        self.expired_dropped += len(batch) - len(live)
+        for listener in self.intent_listeners:
+            for intent in live:
+                listener(intent)
+    
     def send_offer(self, offer: Offer, intent_id: str):
         """发送给监听该 intent_id 的回调"""
-        if intent_id in self.offer_callbacks:
-            for callback in self.offer_callbacks[intent_id]:
-                callback(offer)
+        if offer.is_expired():
+            self.expired_dropped += 1
+            return
+        # 快照：时间轮线程可能同时注销该 intent_id 的监听器
+        for callback in list(self.offer_callbacks.get(intent_id, ())):
+            callback(offer)
     
     def send_deal(self, deal: Deal, offer_id: str):
         """发送 Deal"""
-        if offer_id in self.deal_callbacks:
-            for callback in self.deal_callbacks[offer_id]:
-                callback(deal)
+        for callback in list(self.deal_callbacks.get(offer_id, ())):
+            callback(deal)
     
     def listen_intents(self, callback: Callable[[Intent], None]):
         """注册 Intent 监听器"""
@@ -46,15 +71,19 @@ class InMemoryNetwork(NetworkLayer):
     
     def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
         """注册 Offer 监听器"""
-        if intent_id not in self.offer_callbacks:
-            self.offer_callbacks[intent_id] = []
-        self.offer_callbacks[intent_id].append(callback)
+        self.offer_callbacks.setdefault(intent_id, []).append(callback)
     
     def listen_deals(self, offer_id: str, callback: Callable[[Deal], None]):
         """注册 Deal 监听器"""
-        if offer_id not in self.deal_callbacks:
-            self.deal_callbacks[offer_id] = []
-        self.deal_callbacks[offer_id].append(callback)
+        self.deal_callbacks.setdefault(offer_id, []).append(callback)
+    
+    def unlisten_offers(self, intent_id: str):
+        """注销 Offer 监听器"""
+        self.offer_callbacks.pop(intent_id, None)
+    
+    def unlisten_deals(self, offer_id: str):
+        """注销 Deal 监听器"""
+        self.deal_callbacks.pop(offer_id, None)
     
     def register_agent(self, agent_id: str, agent_type: str):
         """注册代理到网络"""
@@ -68,6 +97,7 @@ class InMemoryNetwork(NetworkLayer):
     def broadcast(self, message: Dict, message_type: str):
         """广播消息给所有相关代理"""
         # 记录消息到所有代理的消息历史
+        message = self._history_entry(message)
         for agent_id in self.agents:
             self.messages[agent_id].append({
                 "type": message_type,
@@ -83,10 +113,16 @@ class InMemoryNetwork(NetworkLayer):
         
         self.messages[target_agent_id].append({
             "type": message_type,
-            "data": message,
+            "data": self._history_entry(message),
             "timestamp": "mock_timestamp"
         })
     
+    def _history_entry(self, message):
+        """消息历史中保存的对象"""
+        if self.compact_history and isinstance(message, ACPMessage):
+            return compact(message)
+        return message
+    
     def clear_messages(self, agent_id: str = None):
         """清除消息历史"""
         if agent_id:
@@ -0,0 +1,464 @@
+"""
+Relay Federation
+
+单个网络实例是扩展上限。RelayNode 挂在一个本地网络层（InMemoryNetwork 等）上，
+与其他中继互联，把多个网络实例联成一个集群：
+
+    [network A] ── relay A ══ relay B ── [network B]
+                         ╲     ╱
+                         relay C ── [network C]
+
+- Intent：本地广播的 Intent 转发给所有对端；收到对端的 Intent 先投递到本地网络，
+  跳数未达上限时再转发给除来源外的其他对端（泛洪）
+- Offer / Deal 沿反向路径返回：收到 Intent 时记下来源链路，本地卖家的 Offer 交回
+  该链路；收到 Offer 时记下来源链路，本地买家的 Deal 交回该链路
+- 去重：有界的 nonce 集合（SeenSet），同一条消息经多条路径到达时只处理第一次，
+  第一次到达的链路即为反向路径（集群上的一棵最短到达树）
+- 跳数上限：max_hops 限制 Intent 的传播半径，防止环路拓扑上无限泛洪
+- 反向路径的监听器在 Intent / Offer 过期时（无 expires_at 时 route_ttl 后）由时间轮注销
+
+链路：
+- connect(a, b)：同进程内直接调用（测试、基准）
+- RelayNode.serve() / connect_tcp()：localhost TCP，长度前缀 + 跳数 + envelope 二进制帧；
+  握手时交换各自可解压的字典版本，配置了 compression 的一端按协商出的版本压缩正文
+  （acp0.network.compression）
+
+NOTE: 中继不验签：去重、过期、跳数只读帧的路由头（MessageView.header），帧字节原样转发，
+      只在投递到本地网络时才完整解析（to_model）；验签仍由最终接收方（卖家 / 买家）完成。
+      每个网络层只挂一个中继。中继锁只保护去重与反向路径登记，投递与转发都在锁外进行；
+      TCP 链路上本地监听器在读线程上执行，发往对端的帧交给各链路的写线程。
+"""
+
+import queue
+import socket
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from acp0.core.messages import ACPMessage, Intent, Offer
+from acp0.core.exceptions import NetworkError
+from acp0.network.base import NetworkLayer
+from acp0.network.envelope import MessageView, RoutingHeader
+from acp0.network.compression import FrameCompression, negotiate, supported_versions
+from acp0.utils.timer_wheel import TimerWheel, timer_wheel
+
+_LINK_HEADER = struct.Struct("!IB")  # len(frame), hops
+
+
+class SeenSet:
+    """有界的已见集合（FIFO 淘汰，线程安全）"""
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        """记录 key；已见过时返回 False"""
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys[key] = None
+            if len(self._keys) > self.capacity:
+                self._keys.popitem(last=False)
+            return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class _Link(ABC):
+    """到某个对端中继的链路"""
+
+    peer_id: str = "?"
+
+    @abstractmethod
+    def send(self, view: MessageView, hops: int):
+        """把消息交给对端"""
+        pass
+
+    def close(self):
+        pass
+
+
+class _LocalLink(_Link):
+    """同进程链路：直接调用对端的 receive()"""
+
+    def __init__(self, peer: "RelayNode"):
+        self.peer = peer
+        self.peer_id = peer.node_id
+        self.back: Optional["_LocalLink"] = None  # 对端指回本节点的链路
+
+    def send(self, view: MessageView, hops: int):
+        self.peer.receive(view, hops, self.back)
+
+
+class _SocketLink(_Link):
+    """
+    TCP 链路：每条消息为 len(frame) (I) | hops (B) | envelope 帧
+
+    send() 只把帧放入有界发送队列，由本链路的写线程执行 sendall。读线程（投递本地监听器、
+    转发给其他链路）因此不会阻塞在 sendall 上：两个中继互相写满对方的 socket 缓冲区时，
+    双方的读线程仍在读取，不会互相等待而死锁。队列满时丢弃新消息（计入 overflow）。
+    """
+
+    _STOP = object()
+
+    def __init__(self, node: "RelayNode", sock: socket.socket, peer_id: str,
+                 compression: Optional[FrameCompression] = None):
+        self.node = node
+        self.sock = sock
+        self.peer_id = peer_id
+        self.compression = compression  # 协商后的压缩策略；None 不压缩
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._outbox: queue.Queue = queue.Queue(maxsize=node.send_queue)
+        self._closed = False
+        self.thread = threading.Thread(target=self._read_loop, daemon=True,
+                                       name=f"relay-{node.node_id}-{peer_id}")
+        self.writer = threading.Thread(target=self._write_loop, daemon=True,
+                                       name=f"relay-{node.node_id}-{peer_id}-writer")
+
+    def start(self):
+        self.thread.start()
+        self.writer.start()
+
+    def send(self, view: MessageView, hops: int):
+        if self._closed:
+            raise NetworkError(f"Relay link to {self.peer_id} is closed")
+        frame = view.frame(self.compression)  # 形态相同时直接是收到的原始帧
+        try:
+            self._outbox.put_nowait(_LINK_HEADER.pack(len(frame), hops) + frame)
+        except queue.Full:
+            self.node._count("overflow")
+
+    def _write_loop(self):
+        while True:
+            data = self._outbox.get()
+            if data is self._STOP:
+                return
+            try:
+                self.sock.sendall(data)
+                self.bytes_sent += len(data)
+            except OSError:
+                if not self._closed:
+                    self.node._drop_link(self)
+                    self.close()
+                return
+
+    def _recv_exact(self, size: int) -> Optional[bytes]:
+        chunks, remaining = [], size
+        while remaining:
+            chunk = self.sock.recv(remaining)
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def _read_loop(self):
+        try:
+            while True:
+                header = self._recv_exact(_LINK_HEADER.size)
+                if header is None:
+                    break
+                length, hops = _LINK_HEADER.unpack(header)
+                frame = self._recv_exact(length)
+                if frame is None:
+                    break
+                self.bytes_received += _LINK_HEADER.size + length
+                self.node.receive(MessageView(frame), hops, self)
+        except OSError:
+            pass
+        finally:
+            self.node._drop_link(self)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._outbox.put_nowait(self._STOP)
+        except queue.Full:
+            pass  # 写线程在下面的 shutdown 后 sendall 失败退出
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class RelayNode:
+    """挂在本地网络层上的联邦中继"""
+
+    COUNTERS = ("received", "delivered", "forwarded", "duplicates", "hop_limited",
+                "expired", "unroutable", "malformed", "overflow")
+
+    def __init__(self, network: NetworkLayer, node_id: str, max_hops: int = 4,
+                 seen_capacity: int = 65536, route_ttl: float = 60.0,
+                 timers: Optional[TimerWheel] = None,
+                 compression: Optional[FrameCompression] = None,
+                 send_queue: int = 65536):
+        """
+        Args:
+            network: 本地网络层（本节点的买家、卖家挂在上面）
+            node_id: 中继标识（TCP 握手时交换）
+            max_hops: Intent 最多经过的中继链路数
+            seen_capacity: nonce 去重集合容量
+            route_ttl: 无 expires_at 的消息的反向路径保留时间（秒）
+            timers: 注销反向路径用的时间轮（默认进程共享的 timer_wheel）
+            compression: TCP 链路的正文压缩策略（阈值、级别、首选字典版本）；
+                         实际版本与对端协商，不超过首选版本
+            send_queue: 每条 TCP 链路发送队列的容量（条），满时丢弃新消息
+        """
+        if max_hops < 1 or max_hops > 255:
+            raise ValueError("max_hops must be between 1 and 255")
+        self.network = network
+        self.node_id = node_id
+        self.max_hops = max_hops
+        self.route_ttl = route_ttl
+        self.timers = timer_wheel if timers is None else timers
+        self.compression = compression
+        self.send_queue = send_queue
+        self.seen = SeenSet(seen_capacity)
+        self.links: List[_Link] = []
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = threading.RLock()
+        self._delivering = threading.local()  # 正在投递到本地网络的帧（_route_back 复用）
+        self._server: Optional[socket.socket] = None
+        self._closed = False
+        # 投递观察者（基准测量传播延迟）：callback(node_id, message, hops)
+        self.on_deliver: Optional[Callable[[str, ACPMessage, int], None]] = None
+        network.listen_intents(self._local_intent)
+
+    # ---------- 本地 -> 对端 ----------
+
+    def _local_intent(self, intent: Intent):
+        """本地网络上的 Intent：本地买家发出的转发给所有对端；中继自己投递的已在 seen 中"""
+        if not self.seen.add(intent.nonce):
+            return
+        self._forward(MessageView.from_message(intent), 1, self._targets(exclude=None))
+
+    def _targets(self, exclude: Optional[_Link]) -> List[_Link]:
+        with self._lock:
+            return [link for link in self.links if link is not exclude]
+
+    def _forward(self, view: MessageView, hops: int, links: List[_Link]):
+        for link in links:
+            try:
+                link.send(view, hops)
+                self._count("forwarded")
+            except NetworkError:
+                self._drop_link(link)
+
+    def _route_back(self, link: _Link, message: ACPMessage):
+        """
+        本地网络上的 Offer / Deal 交回来源链路
+
+        本地代理的回复与下游中继投递上来的回复都经过这里（反向路径是树，不会成环）；
+        后者在投递线程上同步回调时，复用收到的帧原样转发
+        """
+        self.seen.add(message.nonce)
+        view = getattr(self._delivering, "view", None)
+        if view is None or view.to_model() is not message:
+            view = MessageView.from_message(message)
+        try:
+            link.send(view, 0)
+            self._count("forwarded")
+        except NetworkError:
+            self._drop_link(link)
+
+    def _expire_route(self, header: RoutingHeader, unlisten: Callable[[str], None], key: str):
+        deadline = header.expires_at if header.expires_at is not None else time.time() + self.route_ttl
+        self.timers.schedule(deadline, unlisten, key)
+
+    # ---------- 对端 -> 本地 ----------
+
+    def receive(self, view: MessageView, hops: int, link: _Link):
+        """
+        处理对端转发来的消息
+
+        锁内只按路由头去重、判断过期、登记反向路径；转发与本地投递在锁外进行，
+        本地监听器（验签、经 _route_back 调用对端）不会持有本节点的锁
+        """
+        try:
+            header = view.header
+        except Exception:
+            self._count("malformed")
+            return
+
+        targets: List[_Link] = []
+        with self._lock:
+            self.counters["received"] += 1
+            if not self.seen.add(header.nonce):
+                self.counters["duplicates"] += 1
+                return
+            if view.is_expired():
+                self.counters["expired"] += 1
+                return
+
+            if header.message_type == "intent":
+                # 反向路径：本地卖家的 Offer 交回来源链路
+                self.network.listen_offers(
+                    header.intent_id, lambda offer, link=link: self._route_back(link, offer))
+                self._expire_route(header, self.network.unlisten_offers, header.intent_id)
+                if hops < self.max_hops:
+                    targets = [other for other in self.links if other is not link]
+                elif len(self.links) > 1:
+                    self.counters["hop_limited"] += 1
+            elif header.message_type == "offer":
+                # 反向路径：本地买家的 Deal 交回来源链路
+                self.network.listen_deals(
+                    header.offer_id, lambda deal, link=link: self._route_back(link, deal))
+                self._expire_route(header, self.network.unlisten_deals, header.offer_id)
+            elif header.message_type != "deal":
+                self.counters["unroutable"] += 1
+                return
+
+        self._forward(view, hops + 1, targets)
+        self._deliver(view, hops)
+
+    def _deliver(self, view: MessageView, hops: int):
+        """完整解析后投递到本地网络（本节点唯一的 to_model() 调用点）"""
+        try:
+            message = view.to_model()
+        except Exception:
+            self._count("malformed")
+            return
+        self._count("delivered")
+        outer, self._delivering.view = getattr(self._delivering, "view", None), view
+        try:
+            if isinstance(message, Intent):
+                self.network.broadcast_intent(message)
+            elif isinstance(message, Offer):
+                self.network.send_offer(message, message.intent_id)
+            else:
+                self.network.send_deal(message, message.offer_id)
+        finally:
+            self._delivering.view = outer
+        if self.on_deliver is not None:
+            self.on_deliver(self.node_id, message, hops)
+
+    # ---------- 链路管理 ----------
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _drop_link(self, link: _Link):
+        with self._lock:
+            if link in self.links:
+                self.links.remove(link)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """监听 TCP 连接，返回实际端口"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        self._server = server
+        threading.Thread(target=self._accept_loop, daemon=True,
+                         name=f"relay-{self.node_id}-accept").start()
+        return server.getsockname()[1]
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            try:
+                peer_id, compression = self._handshake(sock)
+            except (OSError, NetworkError):
+                sock.close()
+                continue
+            self._attach(_SocketLink(self, sock, peer_id, compression))
+
+    def connect_tcp(self, host: str, port: int, timeout: float = 5.0):
+        """连接另一个中继的 serve() 端口"""
+        sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            peer_id, compression = self._handshake(sock)
+        except (OSError, NetworkError):
+            sock.close()
+            raise
+        sock.settimeout(None)
+        link = _SocketLink(self, sock, peer_id, compression)
+        self._attach(link)
+        return link
+
+    def _handshake(self, sock: socket.socket) -> Tuple[str, Optional[FrameCompression]]:
+        """
+        交换 node_id 与可解压的字典版本：len(id) (H) | id | 版本数 (B) | 版本 (B)...
+
+        Returns:
+            (对端 node_id, 发往对端时使用的压缩策略)
+        """
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        name = self.node_id.encode("utf-8")
+        versions = supported_versions()
+        sock.sendall(struct.pack("!H", len(name)) + name + bytes([len(versions)] + versions))
+
+        def recv_exact(size: int) -> bytes:
+            data = sock.recv(size, socket.MSG_WAITALL) if size else b""
+            if len(data) != size:
+                raise NetworkError("Relay handshake failed")
+            return data
+
+        (length,) = struct.unpack("!H", recv_exact(2))
+        peer = recv_exact(length).decode("utf-8")
+        peer_versions = recv_exact(recv_exact(1)[0])
+
+        compression = None
+        if self.compression is not None:
+            usable = [v for v in versions if v <= self.compression.version]
+            version = negotiate(usable, peer_versions)
+            if version is not None:
+                compression = self.compression.with_version(version)
+        return peer, compression
+
+    def _attach(self, link: _Link):
+        with self._lock:
+            self.links.append(link)
+        if isinstance(link, _SocketLink):
+            link.start()
+
+    def peers(self) -> List[str]:
+        return [link.peer_id for link in self.links]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["peers"] = len(self.links)
+            stats["seen"] = len(self.seen)
+        received = stats["received"]
+        stats["duplicate_rate"] = stats["duplicates"] / received if received else 0.0
+        sockets = [link for link in self.links if isinstance(link, _SocketLink)]
+        if sockets:
+            stats["bytes_sent"] = sum(link.bytes_sent for link in sockets)
+            stats["bytes_received"] = sum(link.bytes_received for link in sockets)
+        return stats
+
+    def close(self):
+        """关闭所有链路和监听端口（不关闭本地网络层）"""
+        self._closed = True
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            links, self.links = self.links, []
+        for link in links:
+            link.close()
+
+
+def connect(a: RelayNode, b: RelayNode) -> Tuple[_Link, _Link]:
+    """同进程内把两个中继互联"""
+    a_to_b, b_to_a = _LocalLink(b), _LocalLink(a)
+    a_to_b.back, b_to_a.back = b_to_a, a_to_b
+    a._attach(a_to_b)
+    b._attach(b_to_a)
+    return a_to_b, b_to_a
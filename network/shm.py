@@ -0,0 +1,480 @@
+"""
+Shared-Memory Ring Buffer Network Layer
+
+同一主机上把买家、卖家代理放到不同进程里，又不想走 socket：
+每个进程（节点）拥有一个 multiprocessing.shared_memory 上的环形缓冲区，
+自己是唯一的写入者，其他所有节点各自维护读游标（单生产者 / 多消费者广播环）。
+
+    节点 0 ──写──▶ [ring 0] ──读──▶ 节点 1, 节点 2 ...
+    节点 1 ──写──▶ [ring 1] ──读──▶ 节点 0, 节点 2 ...
+
+- 消息以 envelope 二进制帧编码（acp0.network.envelope），消费方只解析路由头：
+  Intent 交给本进程的 Intent 监听器；Offer / Deal 只有本进程监听了对应
+  intent_id / offer_id 时才做完整解码和校验，其余直接跳过
+- 每个进程一个分发线程读取所有其他节点的环，回调在分发线程上执行
+- 通知：分发线程没有数据时在共享内存中标记 sleeping，然后阻塞在本节点的门铃信号量上；
+  生产者发布后只唤醒处于 sleeping 的消费者，繁忙时不产生任何系统调用，也没有忙等
+- 环满时生产者等待最慢的已连接消费者（背压），超时抛出 NetworkError
+- 本进程内的监听器同步投递（与 InMemoryNetwork 一致），不经过环
+
+环布局:
+    magic (8) | capacity (Q) | write_pos (Q) | slots (Q)
+    | 每个消费者: cursor (Q) | attached (Q) | sleeping (Q) | 保留 (Q)
+    | 数据区（记录: length (I) + 帧，按 8 字节对齐；length=0xFFFFFFFF 表示回绕）
+
+用法（父进程创建总线，子进程通过参数继承）:
+    bus = SharedMemoryBus(nodes=2)
+    Process(target=run_seller, args=(bus, 1)).start()
+    network = SharedMemoryNetwork(bus, node_id=0)
+    ...
+    network.close(); bus.unlink()
+
+NOTE: 游标和写位置是对齐的 8 字节字段，单写者更新；读取方对 write_pos 做双读确认。
+      门铃等待带超时，作为跨进程内存可见性的兜底。
+"""
+
+import multiprocessing
+import struct
+import threading
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+from acp0.network.base import NetworkLayer
+from acp0.network.envelope import MessageView, encode_frame
+from acp0.core.messages import Intent, Offer, Deal
+from acp0.core.exceptions import NetworkError
+
+_MAGIC = b"ACPRING1"
+_U64 = struct.Struct("<Q")
+_LEN = struct.Struct("<I")
+_WRAP = 0xFFFFFFFF
+_HEADER_SIZE = 32
+_SLOT_SIZE = 32
+# 环头字段偏移
+_CAPACITY = 8
+_WRITE_POS = 16
+# 消费者槽内字段偏移
+_CURSOR = 0
+_ATTACHED = 8
+_SLEEPING = 16
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """连接已有的共享内存段，不交给 resource_tracker 管理（由创建者负责 unlink）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 没有 track 参数
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class _Ring:
+    """单个节点的环形缓冲区视图"""
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self.shm = shm
+        self.buf = shm.buf
+        if bytes(self.buf[:8]) != _MAGIC:
+            raise NetworkError(f"Not an ACP ring buffer: {shm.name}")
+        self.capacity = self._get(_CAPACITY)
+        self.slots = self._get(24)
+        self.data = _align(_HEADER_SIZE + self.slots * _SLOT_SIZE)
+
+    @classmethod
+    def initialize(cls, shm: shared_memory.SharedMemory, capacity: int, slots: int):
+        buf = shm.buf
+        buf[:8] = _MAGIC
+        _U64.pack_into(buf, _CAPACITY, capacity)
+        _U64.pack_into(buf, _WRITE_POS, 0)
+        _U64.pack_into(buf, 24, slots)
+        for i in range(slots):
+            for field in (_CURSOR, _ATTACHED, _SLEEPING):
+                _U64.pack_into(buf, _HEADER_SIZE + i * _SLOT_SIZE + field, 0)
+
+    @staticmethod
+    def size_for(capacity: int, slots: int) -> int:
+        return _align(_HEADER_SIZE + slots * _SLOT_SIZE) + capacity
+
+    def _get(self, offset: int) -> int:
+        return _U64.unpack_from(self.buf, offset)[0]
+
+    def _set(self, offset: int, value: int):
+        _U64.pack_into(self.buf, offset, value)
+
+    def slot(self, consumer: int, field: int) -> int:
+        return self._get(_HEADER_SIZE + consumer * _SLOT_SIZE + field)
+
+    def set_slot(self, consumer: int, field: int, value: int):
+        self._set(_HEADER_SIZE + consumer * _SLOT_SIZE + field, value)
+
+    @property
+    def write_pos(self) -> int:
+        # 双读确认，避免读到写入中途的值
+        while True:
+            first = self._get(_WRITE_POS)
+            if self._get(_WRITE_POS) == first:
+                return first
+
+    # ---------- 生产者 ----------
+
+    def _min_cursor(self, write_pos: int) -> int:
+        cursors = [self.slot(i, _CURSOR) for i in range(self.slots) if self.slot(i, _ATTACHED)]
+        return min(cursors, default=write_pos)
+
+    def publish(self, frames: List[bytes], timeout: float) -> int:
+        """写入一批帧，返回新的 write_pos；空间不足时等待最慢的消费者"""
+        capacity, data = self.capacity, self.data
+        pos = self._get(_WRITE_POS)
+        limit = self._min_cursor(pos) + capacity  # 可写到的位置，不足时才重新读取游标
+        for frame in frames:
+            record = _align(_LEN.size + len(frame))
+            if record > capacity // 2:
+                raise NetworkError(f"Message too large for ring: {len(frame)} bytes")
+            phys = pos % capacity
+            waste = capacity - phys if phys + record > capacity else 0
+
+            deadline = None
+            while pos + waste + record > limit:
+                limit = self._min_cursor(pos) + capacity
+                if pos + waste + record <= limit:
+                    break
+                # 先发布已写入的部分，让消费者能继续推进
+                self._set(_WRITE_POS, pos)
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                elif time.monotonic() > deadline:
+                    raise NetworkError("Ring buffer full: slow consumer")
+                time.sleep(0.0002)
+
+            if waste:
+                _LEN.pack_into(self.buf, data + phys, _WRAP)
+                pos += waste
+                phys = 0
+            _LEN.pack_into(self.buf, data + phys, len(frame))
+            self.buf[data + phys + _LEN.size:data + phys + _LEN.size + len(frame)] = frame
+            pos += record
+        self._set(_WRITE_POS, pos)  # 正文写完后再推进写位置
+        return pos
+
+    # ---------- 消费者 ----------
+
+    def read(self, consumer: int, limit: int = 256) -> List[bytes]:
+        """读取至多 limit 条新记录并推进本消费者的游标"""
+        cursor = self.slot(consumer, _CURSOR)
+        end = self.write_pos
+        capacity, data, buf = self.capacity, self.data, self.buf
+        frames = []
+        while cursor < end and len(frames) < limit:
+            phys = cursor % capacity
+            length = _LEN.unpack_from(buf, data + phys)[0]
+            if length == _WRAP:
+                cursor += capacity - phys
+                continue
+            start = data + phys + _LEN.size
+            frames.append(bytes(buf[start:start + length]))
+            cursor += _align(_LEN.size + length)
+        if frames or cursor != self.slot(consumer, _CURSOR):
+            self.set_slot(consumer, _CURSOR, cursor)
+        return frames
+
+    def pending(self, consumer: int) -> bool:
+        return self.slot(consumer, _CURSOR) < self.write_pos
+
+
+class SharedMemoryBus:
+    """
+    一组节点共享的环形缓冲区和门铃
+
+    由父进程创建，作为 Process 参数传给子进程（门铃信号量只能随进程创建继承）。
+    """
+
+    def __init__(self, nodes: int, capacity: int = 1 << 20, name: Optional[str] = None,
+                 context=None):
+        """
+        Args:
+            nodes: 节点（进程）数
+            capacity: 每个环的数据区字节数
+            name: 共享内存段名前缀（默认随机）
+            context: multiprocessing 上下文（默认当前默认上下文）
+        """
+        ctx = context or multiprocessing.get_context()
+        self.nodes = nodes
+        self.capacity = _align(capacity)
+        self.name = name or f"acp0-{uuid.uuid4().hex[:12]}"
+        self.doorbells = [ctx.Semaphore(0) for _ in range(nodes)]
+        self._owner = True
+        self._segments: Dict[int, shared_memory.SharedMemory] = {}
+        size = _Ring.size_for(self.capacity, nodes)
+        for node in range(nodes):
+            shm = shared_memory.SharedMemory(name=self.segment_name(node), create=True, size=size)
+            _Ring.initialize(shm, self.capacity, nodes)
+            self._segments[node] = shm
+
+    def segment_name(self, node: int) -> str:
+        return f"{self.name}-{node}"
+
+    def ring(self, node: int) -> _Ring:
+        shm = self._segments.get(node)
+        if shm is None:
+            shm = self._segments[node] = _attach(self.segment_name(node))
+        return _Ring(shm)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_segments"] = {}  # 子进程按名字重新连接
+        state["_owner"] = False
+        return state
+
+    def close(self):
+        """关闭本进程对共享内存的映射"""
+        for shm in self._segments.values():
+            shm.close()
+        self._segments = {}
+
+    def unlink(self):
+        """删除共享内存段（仅创建者调用，所有进程退出后）"""
+        if not self._owner:
+            return
+        for node in range(self.nodes):
+            try:
+                shm = self._segments.get(node) or _attach(self.segment_name(node))
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = {}
+
+
+class SharedMemoryNetwork(NetworkLayer):
+    """基于共享内存环形缓冲区的跨进程网络层"""
+
+    def __init__(self, bus: SharedMemoryBus, node_id: int,
+                 publish_timeout: float = 5.0, wait_timeout: float = 0.05,
+                 dispatch_thread: bool = True):
+        """
+        Args:
+            bus: SharedMemoryBus
+            node_id: 本进程的节点号（0 ~ bus.nodes-1，每个进程唯一）
+            publish_timeout: 环满时生产者最长等待秒数
+            wait_timeout: 分发线程阻塞在门铃上的超时（内存可见性兜底）
+            dispatch_thread: False 时不启动分发线程，由调用方循环调用 poll()
+                             （嵌入自有事件循环，或省去一次线程切换）
+        """
+        if not 0 <= node_id < bus.nodes:
+            raise ValueError(f"node_id must be in [0, {bus.nodes})")
+        self.bus = bus
+        self.node_id = node_id
+        self.publish_timeout = publish_timeout
+        self.wait_timeout = wait_timeout
+
+        self.intent_listeners: List[Callable] = []
+        self.raw_listeners: List[Callable[[MessageView], None]] = []
+        self.offer_callbacks: Dict[str, List[Callable]] = {}
+        self.deal_callbacks: Dict[str, List[Callable]] = {}
+        self.agents: Dict[str, str] = {}
+        self.counters: Dict[str, int] = {
+            "published": 0,   # 写入本节点环的帧数
+            "received": 0,    # 从其他节点环读到的帧数
+            "delivered": 0,   # 交给本进程回调的消息数
+            "skipped": 0,     # 本进程无监听者，未解码
+            "invalid": 0,     # 帧解码/校验失败
+            "wakeups": 0,     # 发出的门铃唤醒
+        }
+
+        self._out = bus.ring(node_id)
+        self._peers = {n: bus.ring(n) for n in range(bus.nodes) if n != node_id}
+        self._publish_lock = threading.Lock()
+        self._listener_lock = threading.Lock()
+
+        # 从当前写位置开始消费，不回放连接之前的消息
+        for ring in self._peers.values():
+            ring.set_slot(node_id, _CURSOR, ring.write_pos)
+            ring.set_slot(node_id, _SLEEPING, 0)
+            ring.set_slot(node_id, _ATTACHED, 1)
+
+        self._running = True
+        self._dispatcher: Optional[threading.Thread] = None
+        if dispatch_thread:
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name=f"acp0-shm-dispatch-{node_id}", daemon=True
+            )
+            self._dispatcher.start()
+
+    # ---------- 发送 ----------
+
+    def _publish(self, frames: List[bytes]):
+        ring = self._out
+        with self._publish_lock:
+            ring.publish(frames, self.publish_timeout)
+            self.counters["published"] += len(frames)
+            # 只唤醒正在睡眠的消费者
+            for node in range(self.bus.nodes):
+                if node != self.node_id and ring.slot(node, _ATTACHED) and ring.slot(node, _SLEEPING):
+                    ring.set_slot(node, _SLEEPING, 0)
+                    self.bus.doorbells[node].release()
+                    self.counters["wakeups"] += 1
+
+    def publish_frames(self, frames: List[bytes]):
+        """
+        直接写入已编码的 envelope 帧（转发/中继场景，不重新编码）
+
+        只发给其他节点，不投递给本进程的监听器。
+        """
+        if frames:
+            self._publish(list(frames))
+
+    def broadcast_intent(self, intent: Intent):
+        self.broadcast_intents([intent])
+
+    def broadcast_intents(self, batch: List[Intent]):
+        """整批写入环，只敲一次门铃"""
+        batch = [intent for intent in batch if not intent.is_expired()]
+        if not batch:
+            return
+        self._publish([encode_frame(intent) for intent in batch])
+        for listener in list(self.intent_listeners):
+            for intent in batch:
+                listener(intent)
+
+    def send_offer(self, offer: Offer, intent_id: str):
+        if offer.is_expired():
+            return
+        self._publish([encode_frame(offer)])
+        for callback in list(self.offer_callbacks.get(intent_id, ())):
+            callback(offer)
+
+    def send_deal(self, deal: Deal, offer_id: str):
+        self._publish([encode_frame(deal)])
+        for callback in list(self.deal_callbacks.get(offer_id, ())):
+            callback(deal)
+
+    # ---------- 监听 ----------
+
+    def listen_intents(self, callback: Callable[[Intent], None]):
+        self.intent_listeners.append(callback)
+
+    def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
+        with self._listener_lock:
+            self.offer_callbacks.setdefault(intent_id, []).append(callback)
+
+    def listen_deals(self, offer_id: str, callback: Callable[[Deal], None]):
+        with self._listener_lock:
+            self.deal_callbacks.setdefault(offer_id, []).append(callback)
+
+    def listen_raw(self, callback: Callable[[MessageView], None]):
+        """
+        监听其他节点的所有原始帧（不解码、不校验）
+
+        供中继、录制等只看路由头的组件使用。
+        """
+        self.raw_listeners.append(callback)
+
+    def unlisten_offers(self, intent_id: str):
+        with self._listener_lock:
+            self.offer_callbacks.pop(intent_id, None)
+
+    def unlisten_deals(self, offer_id: str):
+        with self._listener_lock:
+            self.deal_callbacks.pop(offer_id, None)
+
+    def register_agent(self, agent_id: str, agent_type: str):
+        self.agents[agent_id] = agent_type
+
+    # ---------- 分发 ----------
+
+    def poll(self, timeout: Optional[float] = None) -> int:
+        """
+        在调用线程上分发一轮；没有新消息时阻塞在门铃上，最多 timeout 秒
+
+        Returns:
+            本次分发的帧数
+        """
+        delivered = self._drain()
+        if delivered:
+            return delivered
+        # 先声明要睡眠，再检查一次，避免错过声明前刚写入的消息
+        for ring in self._peers.values():
+            ring.set_slot(self.node_id, _SLEEPING, 1)
+        if not any(ring.pending(self.node_id) for ring in self._peers.values()):
+            self.bus.doorbells[self.node_id].acquire(
+                timeout=self.wait_timeout if timeout is None else timeout
+            )
+        self._clear_sleeping()
+        return self._drain()
+
+    def _dispatch_loop(self):
+        while self._running:
+            self.poll()
+
+    def _clear_sleeping(self):
+        for ring in self._peers.values():
+            ring.set_slot(self.node_id, _SLEEPING, 0)
+
+    def _drain(self) -> int:
+        total = 0
+        for ring in self._peers.values():
+            frames = ring.read(self.node_id)
+            total += len(frames)
+            for frame in frames:
+                self._deliver(frame)
+        self.counters["received"] += total
+        return total
+
+    def _deliver(self, frame: bytes):
+        try:
+            view = MessageView(frame)
+            header = view.header
+            for listener in self.raw_listeners:
+                listener(view)
+
+            if header.message_type == "intent":
+                callbacks = self.intent_listeners
+            elif header.message_type == "offer":
+                callbacks = self.offer_callbacks.get(header.ref)
+            else:
+                callbacks = self.deal_callbacks.get(header.ref)
+            if not callbacks or view.is_expired():
+                self.counters["skipped"] += 1
+                return
+            message = view.to_model()
+        except Exception as e:
+            self.counters["invalid"] += 1
+            print(f"⚠️ Invalid frame from shared memory: {e}")
+            return
+
+        self.counters["delivered"] += 1
+        for callback in list(callbacks):
+            try:
+                callback(message)
+            except Exception as e:  # 回调异常不能终止分发线程
+                print(f"⚠️ Listener failed: {e}")
+
+    # ---------- 生命周期 ----------
+
+    def stats(self) -> Dict[str, int]:
+        stats = dict(self.counters)
+        stats["backlog"] = sum(
+            ring.write_pos - ring.slot(self.node_id, _CURSOR) for ring in self._peers.values()
+        )
+        return stats
+
+    def close(self):
+        """停止分发线程并从其他节点的环上注销（不再阻塞它们的生产者）"""
+        if not self._running:
+            return
+        self._running = False
+        if self._dispatcher is not None:
+            self.bus.doorbells[self.node_id].release()
+            self._dispatcher.join()
+        for ring in self._peers.values():
+            ring.set_slot(self.node_id, _ATTACHED, 0)
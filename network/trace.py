@@ -0,0 +1,320 @@
+"""
+Traffic Record & Replay
+
+把真实流量录下来，离线按原有节奏重放，用于比较不同版本的匹配、验签、传输实现：
+
+    recorder = RecordingNetwork(InMemoryNetwork(), "session.trace")
+    seller = SellerAgent(..., recorder)
+    ...
+    recorder.close()
+
+    replayer = TraceReplayer(network, speed=10, refresh=True)
+    stats = replayer.replay("session.trace", types=("intent",))
+
+文件格式（网络字节序）:
+    文件头: magic "ACPT" (4) | version (1) | 保留 (3) | 录制开始的 Unix 时间 (d)
+    记录:   相对开始的秒数 (d) | 方向 (B, 0=发出 1=收到) | len(frame) (I) | envelope 帧
+
+重放会先把整个 trace 解码成模型（可选重新签名），再按时间表投递，
+计时只覆盖网络层调用本身（含同步执行的监听者：验签、匹配、签名）。
+
+NOTE: 录制时间超过 60 秒的消息无法通过 verify() 的时间戳校验。
+      refresh=True 时重放器按重放时间表重写 timestamp / expires_at（保持原有效期长度），
+      并用每个原签名者对应的替身密钥重新签名；消息 id 与引用关系不变。
+"""
+
+import statistics
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from acp0.core.messages import ACPMessage, Intent, Offer, Deal
+from acp0.core.crypto import KeyPair
+from acp0.core.exceptions import MessageValidationError
+from acp0.network.base import NetworkLayer
+from acp0.network.envelope import MessageView, encode_frame
+
+TRACE_MAGIC = b"ACPT"
+TRACE_VERSION = 1
+
+_FILE_HEADER = struct.Struct("!4sB3xd")
+_RECORD = struct.Struct("!dBI")
+
+SENT = 0
+RECEIVED = 1
+
+
+class TraceRecord(NamedTuple):
+    offset: float      # 相对录制开始的秒数
+    direction: int     # SENT / RECEIVED
+    frame: bytes
+
+    @property
+    def view(self) -> MessageView:
+        return MessageView(self.frame)
+
+
+class TraceWriter:
+    """追加写 trace 文件（线程安全）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start_time = time.time()
+        self._start = time.monotonic()
+        self._file = open(path, "wb")
+        self._file.write(_FILE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.start_time))
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, frame: bytes, direction: int = SENT):
+        with self._lock:
+            offset = time.monotonic() - self._start
+            self._file.write(_RECORD.pack(offset, direction, len(frame)))
+            self._file.write(frame)
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_trace(path: str) -> Tuple[float, Iterator[TraceRecord]]:
+    """
+    读取 trace 文件
+
+    Returns:
+        (录制开始的 Unix 时间, 记录迭代器)；末尾不完整的记录（录制中断）被忽略
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, start_time = _FILE_HEADER.unpack_from(data)
+    except struct.error:
+        raise MessageValidationError(f"Truncated trace header: {path}")
+    if magic != TRACE_MAGIC:
+        raise MessageValidationError(f"Not a trace file: {path}")
+    if version != TRACE_VERSION:
+        raise MessageValidationError(f"Unsupported trace version: {version}")
+
+    def records():
+        pos, end = _FILE_HEADER.size, len(data)
+        while pos + _RECORD.size <= end:
+            offset, direction, length = _RECORD.unpack_from(data, pos)
+            pos += _RECORD.size
+            if pos + length > end:
+                return
+            yield TraceRecord(offset, direction, data[pos:pos + length])
+            pos += length
+
+    return start_time, records()
+
+
+class RecordingNetwork(NetworkLayer):
+    """
+    录制包装：把经过的 Intent / Offer / Deal 写入 trace，再交给被包装的网络层
+
+    默认只录制本节点发出的消息；record_received=True 时同时录制监听者收到的消息
+    （适合被录节点只收不发、或对端在其他进程的场景）。同进程的 InMemoryNetwork 上
+    两者同时打开会把同一条消息录两次。
+    """
+
+    def __init__(self, network: NetworkLayer, path: str, record_received: bool = False):
+        self.network = network
+        self.writer = TraceWriter(path)
+        self.record_received = record_received
+
+    # ---------- 发送 ----------
+
+    def broadcast_intent(self, intent: Intent):
+        self.writer.write(encode_frame(intent))
+        self.network.broadcast_intent(intent)
+
+    def broadcast_intents(self, batch: List[Intent]):
+        batch = list(batch)
+        for intent in batch:
+            self.writer.write(encode_frame(intent))
+        self.network.broadcast_intents(batch)
+
+    def send_offer(self, offer: Offer, intent_id: str):
+        self.writer.write(encode_frame(offer))
+        self.network.send_offer(offer, intent_id)
+
+    def send_deal(self, deal: Deal, offer_id: str):
+        self.writer.write(encode_frame(deal))
+        self.network.send_deal(deal, offer_id)
+
+    # ---------- 监听 ----------
+
+    def _wrap(self, callback: Callable) -> Callable:
+        if not self.record_received:
+            return callback
+
+        def recorded(message: ACPMessage):
+            self.writer.write(encode_frame(message), RECEIVED)
+            callback(message)
+        return recorded
+
+    def listen_intents(self, callback: Callable[[Intent], None]):
+        self.network.listen_intents(self._wrap(callback))
+
+    def listen_offers(self, intent_id: str, callback: Callable[[Offer], None]):
+        self.network.listen_offers(intent_id, self._wrap(callback))
+
+    def listen_deals(self, offer_id: str, callback: Callable[[Deal], None]):
+        self.network.listen_deals(offer_id, self._wrap(callback))
+
+    def unlisten_offers(self, intent_id: str):
+        self.network.unlisten_offers(intent_id)
+
+    def unlisten_deals(self, offer_id: str):
+        self.network.unlisten_deals(offer_id)
+
+    def __getattr__(self, name):
+        # 其他接口（stats、poll...）透传给被包装的网络层
+        if name == "network":
+            raise AttributeError(name)
+        return getattr(self.network, name)
+
+    def close(self):
+        """结束录制（不关闭被包装的网络层）"""
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReplayer:
+    """按录制节奏（或加速 / 全速）把 trace 投递到网络层"""
+
+    def __init__(self, network: NetworkLayer, speed: Optional[float] = 1.0,
+                 refresh: bool = False):
+        """
+        Args:
+            network: 目标网络层
+            speed: 1 为原速，N 为 N 倍速，None / 0 为全速（不等待）
+            refresh: 按重放时间重写时间戳并用替身密钥重新签名（见模块说明）
+        """
+        self.network = network
+        self.speed = speed or None
+        self.refresh = refresh
+        self._surrogates: Dict[str, KeyPair] = {}  # 原公钥（或 key_id）-> 替身密钥
+
+    def load(self, path: str, types: Optional[Iterable[str]] = None,
+             directions: Iterable[int] = (SENT, RECEIVED)) -> List[Tuple[float, ACPMessage]]:
+        """解码 trace，返回 [(offset, message)]；同一条消息（按类型 + id）只保留第一次出现"""
+        _, records = read_trace(path)
+        types = set(types) if types is not None else None
+        directions = set(directions)
+        seen = set()
+        schedule = []
+        for record in records:
+            if record.direction not in directions:
+                continue
+            view = record.view
+            if types is not None and view.message_type not in types:
+                continue
+            key = (view.message_type, view.message_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            schedule.append((record.offset, view.to_model()))
+        return schedule
+
+    def _refreshed(self, message: ACPMessage, timestamp: int) -> ACPMessage:
+        signer = "seller" if isinstance(message, Offer) else "buyer"
+        info = getattr(message, signer)
+        identity = info.public_key or info.key_id
+        keypair = self._surrogates.get(identity)
+        if keypair is None:
+            keypair = self._surrogates[identity] = KeyPair()
+        update = {
+            signer: info.model_copy(update={"public_key": keypair.get_public_key_base64(), "key_id": None}),
+            "timestamp": timestamp,
+            "signature": None,
+            "session_id": None,  # 会话标签无法用替身密钥重建，改为 ECDSA 签名
+        }
+        expires_at = getattr(message, "expires_at", None)
+        if expires_at is not None:
+            update["expires_at"] = timestamp + (expires_at - message.timestamp)
+        refreshed = message.model_copy(update=update)
+        refreshed.sign(keypair)
+        return refreshed
+
+    def _dispatch(self, message: ACPMessage):
+        if isinstance(message, Intent):
+            self.network.broadcast_intent(message)
+        elif isinstance(message, Offer):
+            self.network.send_offer(message, message.intent_id)
+        else:
+            self.network.send_deal(message, message.offer_id)
+
+    def replay(self, path: str, types: Optional[Iterable[str]] = None,
+               directions: Iterable[int] = (SENT, RECEIVED)) -> Dict:
+        """
+        重放 trace
+
+        Args:
+            types: 只重放这些消息类型（如 ("intent",) 只重放买家需求）
+            directions: 只重放这些方向的记录
+
+        Returns:
+            计时统计：投递数、录制时长、实际耗时、吞吐、调度滞后与单次调用耗时分位数
+        """
+        schedule = self.load(path, types, directions)
+        if self.refresh:
+            planned = time.time()
+            scale = self.speed or float("inf")
+            schedule = [
+                (offset, self._refreshed(message, int(planned + offset / scale)))
+                for offset, message in schedule
+            ]
+
+        counts: Dict[str, int] = {}
+        calls: Dict[str, List[float]] = {}
+        lags: List[float] = []
+        start = time.perf_counter()
+        for offset, message in schedule:
+            if self.speed is not None:
+                target = start + offset / self.speed
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                lags.append(time.perf_counter() - target)
+            t0 = time.perf_counter()
+            self._dispatch(message)
+            elapsed = time.perf_counter() - t0
+            message_type = message.message_type
+            counts[message_type] = counts.get(message_type, 0) + 1
+            calls.setdefault(message_type, []).append(elapsed)
+        elapsed = time.perf_counter() - start
+
+        total = len(schedule)
+        return {
+            "messages": total,
+            "by_type": counts,
+            "recorded_seconds": schedule[-1][0] - schedule[0][0] if schedule else 0.0,
+            "elapsed_seconds": elapsed,
+            "rate": total / elapsed if elapsed > 0 else 0.0,
+            "lag": _percentiles(lags),
+            "call": {message_type: _percentiles(samples) for message_type, samples in calls.items()},
+        }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """秒 -> 毫秒的 p50 / p99 / max"""
+    if not samples:
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1e3,
+        "p99_ms": ordered[max(int(len(ordered) * 0.99) - 1, 0)] * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+    }
@@ -0,0 +1,8 @@
+from .journal import Journal
+from .catalog import ColumnarCatalog, CatalogRow
+
+__all__ = [
+    "Journal",
+    "ColumnarCatalog",
+    "CatalogRow"
+]
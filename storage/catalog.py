@@ -0,0 +1,525 @@
+"""
+Columnar Catalog
+
+百万级 SKU 的卖家目录，列式存储在磁盘上并通过 mmap 打开，常驻内存的只有元数据：
+- 定宽列：price / stock (int64)、delivery_days (int32，-1 表示不限)
+- 字符串表：sku / name / attributes (JSON) / location (JSON)，各为 [偏移数组 + 数据区]
+- 行按 (类目, 价格, 原始顺序) 排序：每个类目是一段连续的行，价格列本身就是价格索引
+- 倒排表：每个类目的 "key=value" / 裸值 / location -> 升序行号数组 (uint32)
+- SKU 索引：按 SKU 排序的行号数组，查找为二分
+
+目录结构:
+    catalog_dir/
+        meta.json                      行数、类目区间、倒排表位置
+        price.i64  stock.i64  delivery.i32
+        sku.off  sku.dat  name.off  name.dat  attrs.off  attrs.dat  location.off  location.dat
+        sku_order.u32  postings.u32
+
+ColumnarCatalog 实现了 SellerAgent 需要的库存接口：按类目取得的是行序列，
+每行是 CatalogRow（只读 dict 视图，stock 可写），因此 MatchingEngine / ReservationEngine /
+SellerAgent 可以直接在其上工作；库存扣减直接写入 mmap 的 stock 列。
+
+用法:
+    catalog = ColumnarCatalog.build("catalog_dir", "products.jsonl")
+    seller = SellerAgent("seller_001", "Shop", catalog, network)
+
+JSONL 每行一个商品，与 inventory 商品格式相同，另加 category 字段:
+    {"category": "laptop", "sku": "LTP-001", "name": "...", "price": 499900, "stock": 10, ...}
+
+NOTE: 列以本机字节序存储，目录不能跨字节序的机器共享。
+      目录建好后只有 stock 可以原地修改；增删商品、改价需重新 build。
+"""
+
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from acp0.core.exceptions import StorageError
+
+CATALOG_VERSION = 1
+
+_STRING_COLUMNS = ("sku", "name", "attrs", "location")
+_NO_DELIVERY = -1
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise StorageError(f"Invalid catalog row at {path}:{lineno}: {e}")
+
+
+def _map(path: str, writable: bool = False) -> Tuple[Optional[mmap.mmap], memoryview]:
+    """mmap 整个文件；空文件无法映射，返回空视图"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return None, memoryview(b"")
+    with open(path, "r+b" if writable else "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    return mm, memoryview(mm)
+
+
+class _StringTableWriter:
+    """追加写字符串表：偏移数组 + 数据区"""
+
+    def __init__(self, path: str):
+        self.offsets = array("Q", [0])
+        self.file = open(path, "wb")
+        self.size = 0
+
+    def append(self, data: bytes):
+        self.file.write(data)
+        self.size += len(data)
+        self.offsets.append(self.size)
+
+    def close(self):
+        self.file.close()
+
+
+class CatalogRow:
+    """
+    目录中一行的 dict 视图
+
+    支持 product["price"] / product.get("attributes") 等读取方式；
+    只有 product["stock"] 可以赋值，直接写入 mmap 的 stock 列。
+    """
+
+    __slots__ = ("catalog", "row")
+
+    FIELDS = ("sku", "name", "price", "stock", "attributes", "location", "delivery_days")
+
+    def __init__(self, catalog: "ColumnarCatalog", row: int):
+        self.catalog = catalog
+        self.row = row
+
+    def __getitem__(self, key: str):
+        catalog, row = self.catalog, self.row
+        if key == "price":
+            return catalog.prices[row]
+        if key == "stock":
+            return catalog.stocks[row]
+        if key == "sku":
+            return catalog.sku(row)
+        if key == "name":
+            return catalog.name(row)
+        if key == "attributes":
+            return catalog.attributes(row)
+        if key == "location":
+            return catalog.location(row)
+        if key == "delivery_days":
+            return catalog.delivery_days(row)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __setitem__(self, key: str, value: int):
+        if key != "stock":
+            raise KeyError(f"Catalog field is read-only: {key}")
+        self.catalog.stocks[self.row] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS and self.get(key) is not None
+
+    def keys(self) -> List[str]:
+        return [key for key in self.FIELDS if key in self]
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CatalogRow):
+            return self.catalog is other.catalog and self.row == other.row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self.catalog), self.row))
+
+    def __repr__(self) -> str:
+        return f"CatalogRow({self.row}, {self.catalog.sku(self.row)!r})"
+
+
+class _CategoryRows(Sequence):
+    """单个类目的行序列（价格升序）"""
+
+    def __init__(self, catalog: "ColumnarCatalog", start: int, end: int):
+        self.catalog = catalog
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return CatalogRow(self.catalog, self.start + index)
+
+
+class _SkuLookup:
+    """sku -> CatalogRow（供 ReservationEngine 使用，二分查找，不物化整张表）"""
+
+    def __init__(self, catalog: "ColumnarCatalog"):
+        self.catalog = catalog
+
+    def get(self, sku: str, default=None):
+        row = self.catalog.find(sku)
+        return default if row is None else CatalogRow(self.catalog, row)
+
+    def __contains__(self, sku: str) -> bool:
+        return self.catalog.find(sku) is not None
+
+    def __len__(self) -> int:
+        return self.catalog.rows
+
+
+class ColumnarCatalog(Mapping):
+    """mmap 打开的列式商品目录（Mapping: 类目 -> 行序列）"""
+
+    def __init__(self, path: str, writable: bool = True):
+        """
+        Args:
+            path: build() 生成的目录
+            writable: stock 列是否可写（只读打开时库存扣减会报错）
+        """
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Cannot open catalog {path}: {e}")
+        if meta.get("version") != CATALOG_VERSION:
+            raise StorageError(f"Unsupported catalog version: {meta.get('version')}")
+
+        self.rows: int = meta["rows"]
+        self._categories: Dict[str, Tuple[int, int]] = {
+            category: tuple(bounds) for category, bounds in meta["categories"].items()
+        }
+        self._postings_meta: Dict[str, Dict] = meta["postings"]
+        self._maps: List[Tuple[mmap.mmap, memoryview]] = []
+        self._views: List[memoryview] = []
+
+        self.prices = self._column("price.i64", "q")
+        self.stocks = self._column("stock.i64", "q", writable)
+        self.delivery = self._column("delivery.i32", "i")
+        self._strings = {
+            name: (self._column(f"{name}.off", "Q"), self._column(f"{name}.dat", "B"))
+            for name in _STRING_COLUMNS
+        }
+        self.sku_order = self._column("sku_order.u32", "I")
+        self._postings = self._column("postings.u32", "I")
+        self.by_sku = _SkuLookup(self)
+
+    def _column(self, name: str, fmt: str, writable: bool = False) -> memoryview:
+        try:
+            mm, view = _map(os.path.join(self.path, name), writable)
+        except OSError as e:
+            raise StorageError(f"Cannot map catalog column {name}: {e}")
+        if mm is not None:
+            self._maps.append((mm, view))
+        column = view.cast(fmt)
+        self._views.append(column)
+        return column
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def build(cls, path: str, source: Union[str, Iterable[Dict]]) -> "ColumnarCatalog":
+        """
+        从 JSONL 文件（或商品 dict 的迭代器）流式构建目录
+
+        第一遍把字符串写入临时表、数值列放进紧凑数组；第二遍按 (类目, 价格) 重排写出。
+        构建期间常驻内存的是每行几个整数，而不是每行一个 dict。
+        """
+        os.makedirs(path, exist_ok=True)
+        rows = _read_jsonl(source) if isinstance(source, str) else source
+
+        prices, stocks, delivery = array("q"), array("q"), array("i")
+        by_category: Dict[str, array] = {}
+        skus = set()
+        with tempfile.TemporaryDirectory(dir=path) as tmp:
+            staged = {name: _StringTableWriter(os.path.join(tmp, name)) for name in _STRING_COLUMNS}
+            for n, product in enumerate(rows):
+                try:
+                    category = product["category"]
+                    sku = product["sku"]
+                    price = int(product["price"])
+                    stock = int(product["stock"])
+                    name = product["name"]
+                except (KeyError, TypeError, ValueError) as e:
+                    raise StorageError(f"Invalid catalog row {n}: {e}")
+                if sku in skus:
+                    raise StorageError(f"Duplicate SKU in catalog: {sku}")
+                skus.add(sku)
+                days = product.get("delivery_days")
+                by_category.setdefault(category, array("L")).append(n)
+                prices.append(price)
+                stocks.append(stock)
+                delivery.append(_NO_DELIVERY if days is None else int(days))
+                staged["sku"].append(sku.encode("utf-8"))
+                staged["name"].append(name.encode("utf-8"))
+                attributes = product.get("attributes")
+                staged["attrs"].append(json.dumps(attributes).encode("utf-8") if attributes else b"")
+                location = product.get("location")
+                staged["location"].append(json.dumps(location).encode("utf-8") if location else b"")
+            del skus
+            for writer in staged.values():
+                writer.close()
+
+            # 每个类目内按价格稳定排序（同价保持原始顺序）
+            order = array("L")
+            categories = {}
+            for category in sorted(by_category):
+                start = len(order)
+                order.extend(sorted(by_category[category], key=prices.__getitem__))
+                categories[category] = [start, len(order)]
+            del by_category
+
+            for name, fmt, column in (("price.i64", "q", prices), ("stock.i64", "q", stocks),
+                                      ("delivery.i32", "i", delivery)):
+                with open(os.path.join(path, name), "wb") as f:
+                    array(fmt, (column[i] for i in order)).tofile(f)
+            del prices, stocks, delivery
+
+            for name, writer in staged.items():
+                cls._write_strings(path, name, writer.offsets, os.path.join(tmp, name), order)
+
+        cls._write_indexes(path, categories, len(order))
+        return cls(path)
+
+    @staticmethod
+    def _write_strings(path: str, name: str, offsets: array, staged_path: str, order: array):
+        """按新行序重写字符串表"""
+        out_offsets = array("Q", [0])
+        mm, data = _map(staged_path)
+        data.release()
+        try:
+            with open(os.path.join(path, f"{name}.dat"), "wb") as f:
+                size = 0
+                for i in order:
+                    start, end = offsets[i], offsets[i + 1]
+                    if end > start:
+                        f.write(mm[start:end])
+                        size += end - start
+                    out_offsets.append(size)
+        finally:
+            if mm is not None:
+                mm.close()
+        with open(os.path.join(path, f"{name}.off"), "wb") as f:
+            out_offsets.tofile(f)
+
+    @staticmethod
+    def _write_indexes(path: str, categories: Dict[str, List[int]], rows: int):
+        """SKU 排序索引与每个类目的倒排表，最后写 meta.json（目录在此之前不可打开）"""
+        meta = {"version": CATALOG_VERSION, "rows": rows, "categories": categories, "postings": {}}
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        maps = []
+
+        def load(name, fmt):
+            mm, view = _map(os.path.join(path, name))
+            column = view.cast(fmt)
+            maps.append((mm, view, column))
+            return column
+
+        sku_off, sku_dat = load("sku.off", "Q"), load("sku.dat", "B")
+        attr_off, attr_dat = load("attrs.off", "Q"), load("attrs.dat", "B")
+        loc_off, loc_dat = load("location.off", "Q"), load("location.dat", "B")
+
+        def text(off, dat, i) -> bytes:
+            return bytes(dat[off[i]:off[i + 1]])
+
+        try:
+            with open(os.path.join(path, "sku_order.u32"), "wb") as f:
+                array("I", sorted(range(rows), key=lambda i: text(sku_off, sku_dat, i))).tofile(f)
+
+            postings = array("I")
+            for category, (start, end) in categories.items():
+                attributes: Dict[str, array] = {}
+                locations: Dict[str, array] = {}
+                anywhere = array("I")
+                for i in range(start, end):
+                    raw = text(attr_off, attr_dat, i)
+                    for key, value in (json.loads(raw) if raw else {}).items():
+                        for v in _as_list(value):
+                            for term in (f"{key}={v}", str(v)):
+                                hits = attributes.setdefault(term, array("I"))
+                                if not hits or hits[-1] != i:
+                                    hits.append(i)
+                    raw = text(loc_off, loc_dat, i)
+                    places = _as_list(json.loads(raw)) if raw else []
+                    if places:
+                        for place in places:
+                            hits = locations.setdefault(place, array("I"))
+                            if not hits or hits[-1] != i:
+                                hits.append(i)
+                    else:
+                        anywhere.append(i)
+
+                def place(hits: array) -> List[int]:
+                    offset = len(postings)
+                    postings.extend(hits)
+                    return [offset, len(hits)]
+
+                meta["postings"][category] = {
+                    "attributes": {term: place(hits) for term, hits in attributes.items()},
+                    "locations": {loc: place(hits) for loc, hits in locations.items()},
+                    "anywhere": place(anywhere),
+                }
+            with open(os.path.join(path, "postings.u32"), "wb") as f:
+                postings.tofile(f)
+        finally:
+            for mm, view, column in maps:
+                column.release()
+                view.release()
+                if mm is not None:
+                    mm.close()
+
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @classmethod
+    def from_inventory(cls, path: str, inventory: Dict[str, List[Dict]]) -> "ColumnarCatalog":
+        """把 SellerAgent 的 dict 库存转换成列式目录"""
+        return cls.build(path, (
+            dict(product, category=category)
+            for category, products in inventory.items()
+            for product in products
+        ))
+
+    # ---------- 读取 ----------
+
+    def _string(self, column: str, row: int) -> bytes:
+        offsets, data = self._strings[column]
+        return bytes(data[offsets[row]:offsets[row + 1]])
+
+    def sku(self, row: int) -> str:
+        return self._string("sku", row).decode("utf-8")
+
+    def name(self, row: int) -> str:
+        return self._string("name", row).decode("utf-8")
+
+    def attributes(self, row: int) -> Optional[Dict]:
+        raw = self._string("attrs", row)
+        return json.loads(raw) if raw else None
+
+    def location(self, row: int):
+        raw = self._string("location", row)
+        return json.loads(raw) if raw else None
+
+    def delivery_days(self, row: int) -> Optional[int]:
+        days = self.delivery[row]
+        return None if days == _NO_DELIVERY else days
+
+    def row(self, row: int) -> CatalogRow:
+        return CatalogRow(self, row)
+
+    def find(self, sku: str) -> Optional[int]:
+        """sku -> 行号（在 SKU 排序索引上二分）"""
+        target = sku.encode("utf-8")
+        order = self.sku_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string("sku", order[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._string("sku", order[lo]) == target:
+            return order[lo]
+        return None
+
+    def bounds(self, category: str) -> Tuple[int, int]:
+        """类目的行区间 [start, end)；未知类目返回空区间"""
+        return self._categories.get(category, (0, 0))
+
+    def postings(self, category: str, kind: str, key: Optional[str] = None) -> memoryview:
+        """
+        倒排表（升序行号）
+
+        Args:
+            kind: "attributes" / "locations" / "anywhere"
+        """
+        entry = self._postings_meta.get(category)
+        if entry is None:
+            return self._postings[0:0]
+        position = entry[kind] if key is None else entry[kind].get(key)
+        if position is None:
+            return self._postings[0:0]
+        offset, length = position
+        return self._postings[offset:offset + length]
+
+    # ---------- Mapping ----------
+
+    def __getitem__(self, category: str) -> _CategoryRows:
+        if category not in self._categories:
+            raise KeyError(category)
+        return _CategoryRows(self, *self._categories[category])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    # ---------- 生命周期 ----------
+
+    def flush(self):
+        """把 stock 列的修改刷到磁盘"""
+        for mm, _ in self._maps:
+            mm.flush()
+
+    def close(self):
+        """解除映射；调用方仍持有的 CatalogRow / 倒排表切片随之失效"""
+        for view in self._views:
+            view.release()
+        for mm, view in self._maps:
+            try:
+                view.release()
+                mm.close()
+            except BufferError:
+                pass  # 仍有切片在用，映射随其回收
+        self._views, self._maps = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> Dict:
+        size = sum(
+            os.path.getsize(os.path.join(self.path, name))
+            for name in os.listdir(self.path)
+            if os.path.isfile(os.path.join(self.path, name))
+        )
+        return {"rows": self.rows, "categories": len(self._categories), "bytes_on_disk": size}
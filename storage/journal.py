@@ -0,0 +1,595 @@
+"""
+Durable Message Journal
+
+Intent / Offer / Deal 的持久化日志，用于审计和纠纷处理：
+- 追加写的分段日志：每条记录为 [length | crc32 | envelope 帧]，段文件写满后轮转
+- mmap 哈希索引：message_id（intent_id / offer_id / deal_id）-> (段号, 偏移)，
+  开放寻址 + 线性探测，负载过高时翻倍重建
+- 组提交：durable=True 的写入者中由一个 leader 统一 flush + fsync，
+  其余等待者共享这次 fsync（可设置 commit_delay 攒批）
+- 崩溃恢复：索引头记录检查点，打开时只重放检查点之后的尾部；
+  最后一段末尾的残缺记录（torn write）被截断
+- 压缩：重写已封存的段，只保留每个 id 的最新记录（可附加保留条件）；
+  以 COMPACTING 清单作为提交点，中途崩溃后打开时回滚（清单未写）或继续完成（清单已写）
+
+目录结构:
+    journal_dir/
+        00000001.log
+        00000002.log
+        index.bin
+        COMPACTING        （仅压缩提交后、完成前存在）
+
+NOTE: 索引只是加速结构，随时可以从日志重建；查找时会校验记录的 id，
+      过期或损坏的索引项只会导致未命中，不会返回错误的消息。
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from acp0.core.messages import ACPMessage
+from acp0.core.exceptions import StorageError, MessageValidationError
+from acp0.network.envelope import MessageView, encode_frame
+
+_RECORD = struct.Struct("<II")          # length, crc32
+_INDEX_HEADER = struct.Struct("<8sQQQQ")  # magic, capacity, count, ckpt_segment, ckpt_offset
+_INDEX_HEADER_SIZE = 64
+_SLOT = struct.Struct("<QQQ")           # key_hash, segment, offset
+_INDEX_MAGIC = b"ACPIDX01"
+_SEGMENT_SUFFIX = ".log"
+_COMPACT_SUFFIX = ".compact"
+_MANIFEST = "COMPACTING"
+_MAX_LOAD = 0.7
+
+
+def _key_hash(message_id: str) -> int:
+    digest = hashlib.blake2b(message_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # 0 表示空槽
+
+
+class _HashIndex:
+    """mmap 上的开放寻址哈希表"""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) >= _INDEX_HEADER_SIZE
+        if not exists:
+            self._create(path, capacity)
+        self._open(path)
+        magic, capacity, count, ckpt_segment, ckpt_offset = _INDEX_HEADER.unpack_from(self.mm, 0)
+        expected = _INDEX_HEADER_SIZE + capacity * _SLOT.size
+        if magic != _INDEX_MAGIC or capacity == 0 or len(self.mm) != expected:
+            raise StorageError(f"Corrupt journal index: {path}")
+        self.capacity = capacity
+        self.count = count
+        self.checkpoint = (ckpt_segment, ckpt_offset)
+
+    @staticmethod
+    def _create(path: str, capacity: int):
+        with open(path, "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, capacity, 0, 0, 0).ljust(_INDEX_HEADER_SIZE, b"\0"))
+            f.truncate(_INDEX_HEADER_SIZE + capacity * _SLOT.size)
+
+    def _open(self, path: str):
+        self.file = open(path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+
+    def close(self):
+        self.flush()
+        self.mm.close()
+        self.file.close()
+
+    def flush(self):
+        _INDEX_HEADER.pack_into(self.mm, 0, _INDEX_MAGIC, self.capacity, self.count, *self.checkpoint)
+        self.mm.flush()
+
+    def set_checkpoint(self, segment: int, offset: int):
+        """检查点之前的记录都已写入索引（先刷索引再写检查点）"""
+        self.mm.flush()
+        self.checkpoint = (segment, offset)
+        self.flush()
+
+    def _slots(self, key_hash: int) -> Iterator[int]:
+        start = key_hash % self.capacity
+        for i in range(self.capacity):
+            yield _INDEX_HEADER_SIZE + ((start + i) % self.capacity) * _SLOT.size
+
+    def lookup(self, key_hash: int) -> Iterator[Tuple[int, int]]:
+        """依次产出哈希相同的候选位置，由调用方校验 id"""
+        for pos in self._slots(key_hash):
+            slot_hash, segment, offset = _SLOT.unpack_from(self.mm, pos)
+            if slot_hash == 0:
+                return
+            if slot_hash == key_hash:
+                yield segment, offset
+
+    def insert(self, key_hash: int, segment: int, offset: int,
+               same_key: Callable[[int, int], bool]):
+        """
+        插入或更新
+
+        Args:
+            same_key: 判断已有位置是否为同一 message_id（64 位哈希碰撞时区分）
+        """
+        if (self.count + 1) > self.capacity * _MAX_LOAD:
+            self._grow()
+        for pos in self._slots(key_hash):
+            slot_hash, old_segment, old_offset = _SLOT.unpack_from(self.mm, pos)
+            if slot_hash == 0:
+                _SLOT.pack_into(self.mm, pos, key_hash, segment, offset)
+                self.count += 1
+                return
+            if slot_hash == key_hash and same_key(old_segment, old_offset):
+                _SLOT.pack_into(self.mm, pos, key_hash, segment, offset)
+                return
+        raise StorageError("Journal index is full")
+
+    def _grow(self):
+        """容量翻倍：哈希值已存，重建时无需读取日志"""
+        entries = []
+        for i in range(self.capacity):
+            slot = _SLOT.unpack_from(self.mm, _INDEX_HEADER_SIZE + i * _SLOT.size)
+            if slot[0]:
+                entries.append(slot)
+        checkpoint = self.checkpoint
+        self.mm.close()
+        self.file.close()
+
+        tmp = self.path + ".tmp"
+        capacity = self.capacity * 2
+        self._create(tmp, capacity)
+        os.replace(tmp, self.path)
+        self._open(self.path)
+        self.capacity = capacity
+        self.count = 0
+        self.checkpoint = checkpoint
+        for key_hash, segment, offset in entries:
+            for pos in self._slots(key_hash):
+                if _SLOT.unpack_from(self.mm, pos)[0] == 0:
+                    _SLOT.pack_into(self.mm, pos, key_hash, segment, offset)
+                    self.count += 1
+                    break
+        self.flush()
+
+
+class Journal:
+    """追加写的消息日志"""
+
+    def __init__(self, path: str, segment_size: int = 64 * 1024 * 1024,
+                 fsync: bool = True, commit_delay: float = 0.0,
+                 index_capacity: int = 1 << 16, checkpoint_every: int = 10000):
+        """
+        Args:
+            path: 日志目录
+            segment_size: 段文件大小上限（字节），超过后轮转
+            fsync: False 时只 flush 到操作系统，不 fsync
+            commit_delay: 组提交 leader 在 fsync 前等待的秒数，用于攒批
+            index_capacity: 索引初始槽位数
+            checkpoint_every: 每提交多少条记录写一次索引检查点
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.commit_delay = commit_delay
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._commit = threading.Condition(self._lock)
+        self._readers: Dict[int, object] = {}
+        self._written_seq = 0   # 已写入（未必落盘）的记录序号
+        self._synced_seq = 0    # 已 fsync 的记录序号
+        self._syncing = False
+        self._since_checkpoint = 0
+        self.closed = False
+
+        # 上次压缩已提交则继续完成（此时索引已过时，丢弃重建）；未提交的临时文件直接清理
+        stale_index = self._finish_compaction()
+        for name in os.listdir(path):
+            if name.endswith(_COMPACT_SUFFIX) or name == _MANIFEST + ".tmp":
+                os.remove(os.path.join(path, name))
+
+        self.segments: List[int] = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(path)
+            if name.endswith(_SEGMENT_SUFFIX) and name[:-len(_SEGMENT_SUFFIX)].isdigit()
+        )
+        if not self.segments:
+            self.segments = [1]
+            open(self._segment_path(1), "ab").close()
+
+        index_path = os.path.join(path, "index.bin")
+        if stale_index and os.path.exists(index_path):
+            os.remove(index_path)
+        try:
+            self._index = _HashIndex(index_path, index_capacity)
+        except StorageError:
+            os.remove(index_path)  # 索引损坏：丢弃并从日志重建
+            self._index = _HashIndex(index_path, index_capacity)
+
+        self._recover()
+        self.active = self.segments[-1]
+        self._writer = open(self._segment_path(self.active), "ab")
+        self._offset = self._writer.tell()
+
+    # ---------- 文件 ----------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{segment:08d}{_SEGMENT_SUFFIX}")
+
+    def _fsync_dir(self):
+        """重命名 / 删除落盘（POSIX 需要 fsync 目录）"""
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _finish_compaction(self) -> bool:
+        """
+        完成已提交的压缩：用压缩结果替换第一段、删除其余被压缩的段，最后删除清单
+
+        每一步都可重复执行，完成过程中再次崩溃也能在下次打开时继续。
+
+        Returns:
+            是否存在已提交的压缩（调用方需重建索引）
+        """
+        manifest = os.path.join(self.path, _MANIFEST)
+        if not os.path.exists(manifest):
+            return False
+        with open(manifest, "r") as f:
+            sealed = [int(s) for s in f.read().split()]
+        tmp_path = self._segment_path(sealed[0]) + _COMPACT_SUFFIX
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, self._segment_path(sealed[0]))
+        for segment in sealed[1:]:
+            if os.path.exists(self._segment_path(segment)):
+                os.remove(self._segment_path(segment))
+        self._fsync_dir()
+        os.remove(manifest)
+        self._fsync_dir()
+        return True
+
+    def _reader(self, segment: int):
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+        return reader
+
+    def _read_record(self, segment: int, offset: int) -> Optional[bytes]:
+        """读取并校验一条记录；位置无效时返回 None"""
+        if segment not in self.segments:
+            return None
+        if segment == getattr(self, "active", None):
+            self._writer.flush()
+        reader = self._reader(segment)
+        reader.seek(offset)
+        head = reader.read(_RECORD.size)
+        if len(head) < _RECORD.size:
+            return None
+        length, crc = _RECORD.unpack(head)
+        payload = reader.read(length)
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    def _iter_segment(self, segment: int, start: int = 0) -> Iterator[Tuple[int, Optional[bytes]]]:
+        """
+        顺序读取一个段，产出 (offset, payload)
+
+        遇到残缺/损坏记录时产出 (offset, None) 并结束。
+        """
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(start)
+            offset = start
+            while True:
+                head = f.read(_RECORD.size)
+                if not head:
+                    return
+                if len(head) < _RECORD.size:
+                    yield offset, None
+                    return
+                length, crc = _RECORD.unpack(head)
+                payload = f.read(length)
+                if len(payload) != length or zlib.crc32(payload) != crc:
+                    yield offset, None
+                    return
+                yield offset, payload
+                offset += _RECORD.size + length
+
+    # ---------- 恢复 ----------
+
+    def _recover(self):
+        """从索引检查点开始重放尾部记录；截断最后一段的残缺尾巴"""
+        ckpt_segment, ckpt_offset = self._index.checkpoint
+        if ckpt_segment not in self.segments:
+            ckpt_segment, ckpt_offset = self.segments[0], 0
+
+        for segment in self.segments:
+            if segment < ckpt_segment:
+                continue
+            start = ckpt_offset if segment == ckpt_segment else 0
+            if start > os.path.getsize(self._segment_path(segment)):
+                start = 0  # 检查点超出文件（索引比日志新），从段头重放
+            for offset, payload in self._iter_segment(segment, start):
+                if payload is None:
+                    if segment != self.segments[-1]:
+                        raise StorageError(
+                            f"Corrupt record in sealed segment {segment} at offset {offset}"
+                        )
+                    with open(self._segment_path(segment), "r+b") as f:
+                        f.truncate(offset)
+                    break
+                self._index_record(segment, offset, payload)
+
+        last = self.segments[-1]
+        self._index.set_checkpoint(last, os.path.getsize(self._segment_path(last)))
+
+    def _index_record(self, segment: int, offset: int, payload: bytes):
+        message_id = MessageView(payload).message_id
+
+        def same_key(old_segment: int, old_offset: int) -> bool:
+            old = self._read_record(old_segment, old_offset)
+            return old is None or MessageView(old).message_id == message_id
+
+        self._index.insert(_key_hash(message_id), segment, offset, same_key)
+
+    def rebuild_index(self):
+        """丢弃索引并从全部段重建"""
+        with self._lock:
+            self._rebuild_index_locked()
+
+    def _rebuild_index_locked(self):
+        capacity = self._index.capacity
+        index_path = self._index.path
+        self._index.close()
+        os.remove(index_path)
+        self._index = _HashIndex(index_path, capacity)
+        self._writer.flush()
+        for segment in self.segments:
+            for offset, payload in self._iter_segment(segment):
+                if payload is None:
+                    break
+                self._index_record(segment, offset, payload)
+        self._index.set_checkpoint(self.active, self._offset)
+
+    # ---------- 写入 ----------
+
+    def append(self, message: Union[ACPMessage, bytes], durable: bool = True) -> Tuple[int, int]:
+        """
+        追加一条消息
+
+        Args:
+            message: 消息对象或已编码的 envelope 帧
+            durable: True 时等待组提交 fsync 完成后返回
+
+        Returns:
+            (段号, 偏移)
+        """
+        return self.append_many([message], durable=durable)[0]
+
+    def append_many(self, messages, durable: bool = True) -> List[Tuple[int, int]]:
+        """批量追加；整批共享一次组提交"""
+        frames = [m if isinstance(m, (bytes, bytearray)) else encode_frame(m) for m in messages]
+        for frame in frames:
+            MessageView(frame).header  # 拒绝无法路由/索引的帧
+
+        positions = []
+        with self._lock:
+            if self.closed:
+                raise StorageError("Journal is closed")
+            for frame in frames:
+                if self._offset >= self.segment_size:
+                    self._rotate_locked()
+                record = _RECORD.pack(len(frame), zlib.crc32(frame)) + bytes(frame)
+                self._writer.write(record)
+                position = (self.active, self._offset)
+                self._offset += len(record)
+                self._index_record(*position, bytes(frame))
+                positions.append(position)
+            self._written_seq += len(frames)
+            seq = self._written_seq
+
+        if durable:
+            self._sync_to(seq)
+        return positions
+
+    def _rotate_locked(self):
+        """封存当前段并打开新段（持有锁）"""
+        while self._syncing:  # 等待 leader 完成对旧段的 fsync
+            self._commit.wait()
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+        self._writer.close()
+        self._synced_seq = self._written_seq
+
+        self.active += 1
+        self.segments.append(self.active)
+        self._writer = open(self._segment_path(self.active), "ab")
+        self._offset = 0
+
+    def _sync_to(self, seq: int):
+        """组提交：等待序号 seq 之前的记录落盘"""
+        with self._commit:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self._commit.wait()
+                    continue
+
+                # 成为 leader
+                self._syncing = True
+                if self.commit_delay:
+                    self._commit.wait(self.commit_delay)  # 释放锁，让其他写入者攒进这一批
+                self._writer.flush()
+                target = self._written_seq
+                fd = self._writer.fileno()
+                offset = (self.active, self._offset)
+
+                self._commit.release()
+                try:
+                    if self.fsync:
+                        os.fsync(fd)
+                finally:
+                    self._commit.acquire()
+                    self._syncing = False
+
+                if target > self._synced_seq:
+                    self._since_checkpoint += target - self._synced_seq
+                    self._synced_seq = target
+                if self._since_checkpoint >= self.checkpoint_every:
+                    self._index.set_checkpoint(*offset)
+                    self._since_checkpoint = 0
+                self._commit.notify_all()
+
+    def sync(self):
+        """强制落盘所有已写入的记录"""
+        with self._lock:
+            seq = self._written_seq
+        self._sync_to(seq)
+
+    # ---------- 读取 ----------
+
+    def get_view(self, message_id: str) -> Optional[MessageView]:
+        """按 intent_id / offer_id / deal_id 查找，返回延迟视图"""
+        with self._lock:
+            for segment, offset in self._index.lookup(_key_hash(message_id)):
+                payload = self._read_record(segment, offset)
+                if payload is None:
+                    continue
+                view = MessageView(payload)
+                if view.message_id == message_id:
+                    return view
+        return None
+
+    def get(self, message_id: str) -> Optional[ACPMessage]:
+        """按 id 查找，返回完整校验后的消息"""
+        view = self.get_view(message_id)
+        return None if view is None else view.to_model()
+
+    def __contains__(self, message_id: str) -> bool:
+        return self.get_view(message_id) is not None
+
+    def scan(self, message_type: Optional[str] = None) -> Iterator[MessageView]:
+        """
+        按写入顺序流式遍历所有记录（审计/纠纷场景）
+
+        Args:
+            message_type: 只产出指定类型（"intent" / "offer" / "deal"）
+        """
+        with self._lock:
+            self._writer.flush()
+            segments = list(self.segments)
+            end = (self.active, self._offset)
+
+        for segment in segments:
+            for offset, payload in self._iter_segment(segment):
+                if payload is None or (segment, offset) >= end:
+                    break
+                view = MessageView(payload)
+                if message_type is None or view.message_type == message_type:
+                    yield view
+
+    # ---------- 压缩 ----------
+
+    def compact(self, keep: Optional[Callable[[MessageView], bool]] = None) -> Dict[str, int]:
+        """
+        压缩已封存的段：每个 id 只保留最新记录，可附加保留条件
+
+        Args:
+            keep: 返回 False 的记录被丢弃（如已过期且无 Deal 的 Intent）
+
+        NOTE: 压缩期间持有写锁，写入会被阻塞；活跃段不参与压缩
+        """
+        with self._lock:
+            sealed = [s for s in self.segments if s != self.active]
+            stats = {"segments": len(sealed), "kept": 0, "dropped": 0}
+            if not sealed:
+                return stats
+
+            tmp_path = self._segment_path(sealed[0]) + _COMPACT_SUFFIX
+            with open(tmp_path, "wb") as out:
+                for segment in sealed:
+                    for offset, payload in self._iter_segment(segment):
+                        if payload is None:
+                            break
+                        view = MessageView(payload)
+                        latest = self._latest_position(view.message_id)
+                        if latest != (segment, offset) or (keep is not None and not keep(view)):
+                            stats["dropped"] += 1
+                            continue
+                        out.write(_RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+                        stats["kept"] += 1
+                out.flush()
+                if self.fsync:
+                    os.fsync(out.fileno())
+
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+
+            # 提交点：清单原子出现之前崩溃，原有段完好、临时文件在打开时清理；
+            # 之后崩溃，打开时按清单完成替换和删除。不能只靠替换顺序：压缩结果写在最小的段号上，
+            # 若后面的旧段还在，重放时其中的旧版本会覆盖压缩结果
+            manifest = os.path.join(self.path, _MANIFEST)
+            with open(manifest + ".tmp", "w") as f:
+                f.write(" ".join(str(segment) for segment in sealed))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(manifest + ".tmp", manifest)
+            self._fsync_dir()
+
+            os.replace(tmp_path, self._segment_path(sealed[0]))
+            for segment in sealed[1:]:
+                os.remove(self._segment_path(segment))
+            self.segments = [sealed[0]] + [s for s in self.segments if s not in sealed]
+            # 索引重建（落盘）之后才删除清单；否则崩溃后会用过时的索引打开
+            self._rebuild_index_locked()
+            self._fsync_dir()
+            os.remove(manifest)
+            return stats
+
+    def _latest_position(self, message_id: str) -> Optional[Tuple[int, int]]:
+        for segment, offset in self._index.lookup(_key_hash(message_id)):
+            payload = self._read_record(segment, offset)
+            if payload is not None and MessageView(payload).message_id == message_id:
+                return segment, offset
+        return None
+
+    # ---------- 生命周期 ----------
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "segments": len(self.segments),
+                "active_segment": self.active,
+                "active_offset": self._offset,
+                "indexed": self._index.count,
+                "written": self._written_seq,
+                "synced": self._synced_seq,
+            }
+
+    def close(self):
+        if self.closed:
+            return
+        self.sync()
+        with self._lock:
+            self.closed = True
+            self._writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._index.set_checkpoint(self.active, self._offset)
+            self._index.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,123 @@
+"""Test cases for the pre-verification admission chain"""
+
+import time
+import pytest
+from acp0.agents.admission import (
+    AdmissionChain, AdmissionStage, SIGNATURE, not_expired, nonce_replay, blocklist, price_cap
+)
+from acp0.agents.seller import SellerAgent
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.snapshots import CatalogStore, CatalogDelta
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.messages import Intent, Offer, BuyerInfo, SellerInfo, Item, Price, Demand, Budget
+
+INVENTORY = {
+    "laptop": [
+        {"sku": "LTP-001", "name": "Cheap", "price": 120000, "stock": 5},
+        {"sku": "LTP-002", "name": "Big", "price": 300000, "stock": 5},
+    ],
+}
+
+
+def make_intent(keypair, category="laptop", low=100000, high=200000, **kwargs) -> Intent:
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+        demand=Demand(category=category, budget=Budget(min=low, max=high, currency="CNY")),
+        **kwargs
+    )
+    sign_message(intent, keypair)
+    return intent
+
+
+def make_seller(inventory=None) -> SellerAgent:
+    return SellerAgent("seller", "Shop", inventory or {k: list(v) for k, v in INVENTORY.items()},
+                       InMemoryNetwork())
+
+
+def test_cheap_stages_run_before_signature():
+    """Test irrelevant intents are rejected per stage without any verify() call"""
+    seller = make_seller()
+    calls = []
+    seller.admission.verify = lambda message: calls.append(message) or message.verify()
+    keypair = KeyPair()
+
+    chain = seller.admission
+    assert chain.check(make_intent(keypair, category="phone")) == "category"
+    assert chain.check(make_intent(keypair, low=1, high=2)) == "budget"
+    assert chain.check(make_intent(keypair, expires_at=int(time.time()) - 1)) == "expired"
+    stale = make_intent(keypair, timestamp=int(time.time()) - 3600)
+    assert chain.check(stale) == "skew"
+    seller.blocked_keys.add(keypair.get_public_key_base64())
+    assert chain.check(make_intent(keypair)) == "blocked"
+    assert calls == []
+
+    seller.blocked_keys.clear()
+    assert chain.check(make_intent(keypair)) is None
+    stats = chain.stats()
+    assert stats["verified"] == stats["admitted"] == 1
+    assert stats["saved"] == 5
+    assert stats["rejected"]["category"] == stats["rejected"]["budget"] == 1
+
+
+def test_replay_is_recorded_only_after_signature():
+    """Test a forged copy cannot claim a nonce, and a verified nonce is not accepted twice"""
+    chain = AdmissionChain([not_expired(), nonce_replay()])
+    keypair = KeyPair()
+    intent = make_intent(keypair)
+
+    forged = intent.model_copy()
+    forged.signature = KeyPair().sign_bytes(intent.to_canonical_bytes())
+    assert chain.check(forged) == SIGNATURE
+    assert chain.admit(intent)
+    assert chain.check(intent) == "replay"
+    assert chain.stats()["rejected"] == {"expired": 0, "replay": 1, SIGNATURE: 1}
+
+
+def test_budget_stage_follows_catalog_updates():
+    """Test the price range comes from the current catalog snapshot"""
+    store = CatalogStore({k: list(v) for k, v in INVENTORY.items()})
+    seller = make_seller(store)
+    keypair = KeyPair()
+    assert seller.admission.check(make_intent(keypair, low=400000, high=500000)) == "budget"
+    store.apply([CatalogDelta.price("LTP-002", 450000)])
+    assert seller.admission.check(make_intent(keypair, low=400000, high=500000)) is None
+
+
+def test_buyer_drops_offers_over_price_cap_before_verify():
+    """Test the buyer price cap and blocklist run before offer signature verification"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", {k: list(v) for k, v in INVENTORY.items()}, network)
+    seller.listen()
+    buyer = BuyerAgent("buyer", network, max_price=100000)
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    assert handle.wait(timeout=0.5) == []
+    assert buyer.admission.stats()["rejected"]["price"] == 1
+    assert buyer.admission.stats()["verified"] == 0
+
+    buyer.admission = AdmissionChain([price_cap(), blocklist({seller.keypair.get_public_key_base64()})])
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    assert handle.wait(timeout=0.5) == []
+    assert buyer.admission.stats()["rejected"]["blocked"] == 1
+
+
+def test_price_cap_checks_intent_and_budget():
+    """Test offers for another intent or above budget are rejected when configured"""
+    keypair = KeyPair()
+    intent = make_intent(keypair)
+    offer = Offer(intent_id=intent.intent_id,
+                  seller=SellerInfo(agent_id="s", name="S", public_key=keypair.get_public_key_base64()),
+                  item=Item(name="X", sku="X"), price=Price(amount=250000, currency="CNY"), stock=1)
+    assert price_cap().check(offer, intent)
+    assert not price_cap(within_budget=True).check(offer, intent)
+    assert not price_cap(max_price=100).check(offer, None)
+    offer.intent_id = "other"
+    assert not price_cap().check(offer, intent)
+
+
+def test_reserved_and_duplicate_stage_names():
+    """Test stage names must be unique and cannot shadow the signature stage"""
+    with pytest.raises(ValueError):
+        AdmissionStage(SIGNATURE, lambda message, context: True)
+    with pytest.raises(ValueError):
+        AdmissionChain([not_expired(), not_expired()])
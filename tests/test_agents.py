@@ -319,3 +319,61 @@ def test_agent_network_registration():
     # Both should be registered with network
     assert "test_buyer" in network.agents
     assert "test_seller" in network.agents
+
+
+def test_buyer_broadcast_many():
+    """Test BuyerAgent broadcasting a batch of intents in one call"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    network = InMemoryNetwork()
+    seller = SellerAgent(
+        agent_id="test_seller",
+        shop_name="Test Shop",
+        inventory={
+            "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}],
+            "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 5}]
+        },
+        network=network
+    )
+    seller.listen()
+    buyer = BuyerAgent(agent_id="test_buyer", network=network)
+    
+    demands = [
+        {"category": "laptop", "budget_range": (100000, 200000)},
+        Demand(category="phone", budget=Budget(min=10000, max=60000, currency="CNY")),
+        {"category": "tablet", "budget_range": (1, 2), "location": "shanghai"},
+    ]
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = buyer.broadcast_many(demands, executor=executor, wait=0)
+    
+    assert len(results) == 3
+    skus = sorted(offer.item.sku for offers in results.values() for offer in offers)
+    assert skus == ["LTP-001", "PHN-001"]
+    for intent_id, offers in results.items():
+        assert all(offer.intent_id == intent_id for offer in offers)
+    
+    # 批量广播不影响单次广播的结果缓冲
+    assert buyer.received_offers == []
+
+
+def test_broadcast_many_signs_one_chunk_per_worker():
+    """Test executor signing submits one task per worker chunk, so the key is restored once per chunk"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    class CountingExecutor(ThreadPoolExecutor):
+        tasks = 0
+
+        def submit(self, fn, *args, **kwargs):
+            self.tasks += 1
+            return super().submit(fn, *args, **kwargs)
+
+    network = InMemoryNetwork()
+    received = []
+    network.listen_intents(received.append)
+    buyer = BuyerAgent(agent_id="test_buyer", network=network)
+    with CountingExecutor(max_workers=2) as executor:
+        buyer.broadcast_many([{"category": "laptop", "budget_range": (1, 2 + i)} for i in range(5)],
+                             executor=executor, wait=0)
+    assert executor.tasks == 2
+    assert len(received) == 5 and all(intent.verify() for intent in received)
@@ -0,0 +1,121 @@
+"""Test cases for memory-mapped columnar catalog"""
+
+import copy
+import json
+import random
+import pytest
+from acp0.storage.catalog import ColumnarCatalog, CatalogRow
+from acp0.agents.matching import MatchingEngine
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Demand, Budget
+from acp0.core.exceptions import StorageError
+
+
+def random_inventory(seed=1, per_category=200):
+    rng = random.Random(seed)
+    inventory = {}
+    for category in ("laptop", "phone", "tablet"):
+        products = []
+        for i in range(per_category):
+            product = {
+                "sku": f"{category}-{i}", "name": f"{category} {i}",
+                "price": rng.randrange(10, 100) * 1000, "stock": rng.choice([0, 1, 5]),
+                "attributes": {"ram": rng.choice(["8GB", "16GB", "32GB"]),
+                               "color": rng.choice(["black", "silver"])},
+            }
+            if rng.random() < 0.6:
+                product["location"] = rng.choice(["shanghai", "beijing", ["beijing", "shenzhen"]])
+            if rng.random() < 0.5:
+                product["delivery_days"] = rng.randint(1, 7)
+            products.append(product)
+        inventory[category] = products
+    return inventory
+
+
+def random_demand(rng):
+    kwargs = {}
+    if rng.random() < 0.5:
+        kwargs["attributes"] = rng.sample(["ram=16GB", "black", "color=silver", "32GB", "ram=64GB"], rng.randint(1, 2))
+    if rng.random() < 0.4:
+        kwargs["location"] = rng.choice(["shanghai", "beijing", "shenzhen", "chengdu"])
+    if rng.random() < 0.3:
+        kwargs["delivery_days"] = rng.randint(1, 7)
+    low = rng.randrange(10, 100) * 1000
+    return Demand(category=rng.choice(["laptop", "phone", "tablet", "camera"]),
+                  budget=Budget(min=low, max=low + rng.randrange(1, 60) * 1000, currency="CNY"),
+                  **kwargs)
+
+
+def test_build_from_jsonl(tmp_path):
+    """Test JSONL loading, price-sorted categories and SKU lookup"""
+    source = tmp_path / "products.jsonl"
+    rows = [
+        {"category": "laptop", "sku": "LTP-2", "name": "Pricey", "price": 200, "stock": 1},
+        {"category": "phone", "sku": "PHN-1", "name": "Phone", "price": 50, "stock": 3, "location": "shanghai"},
+        {"category": "laptop", "sku": "LTP-1", "name": "Cheap", "price": 100, "stock": 2,
+         "attributes": {"ram": "16GB"}, "delivery_days": 2},
+    ]
+    source.write_text("\n".join(json.dumps(row) for row in rows) + "\n")
+
+    with ColumnarCatalog.build(str(tmp_path / "catalog"), str(source)) as catalog:
+        assert sorted(catalog) == ["laptop", "phone"]
+        laptops = catalog["laptop"]
+        assert [p["sku"] for p in laptops] == ["LTP-1", "LTP-2"]
+        assert laptops[0].to_dict() == {"sku": "LTP-1", "name": "Cheap", "price": 100, "stock": 2,
+                                        "attributes": {"ram": "16GB"}, "delivery_days": 2}
+        assert laptops[1].get("attributes") is None
+        assert catalog.by_sku.get("PHN-1")["location"] == "shanghai"
+        assert catalog.find("missing") is None
+        assert catalog.stats()["rows"] == 3
+
+    source.write_text(json.dumps(rows[0]) + "\n" + json.dumps(rows[0]) + "\n")
+    with pytest.raises(StorageError):
+        ColumnarCatalog.build(str(tmp_path / "dup"), str(source))
+    source.write_text("{not json\n")
+    with pytest.raises(StorageError):
+        ColumnarCatalog.build(str(tmp_path / "bad"), str(source))
+
+
+def test_matching_agrees_with_dict_engine(tmp_path):
+    """Test columnar matching returns the same SKU as the in-memory index"""
+    inventory = random_inventory()
+    catalog = ColumnarCatalog.from_inventory(str(tmp_path / "catalog"), inventory)
+    by_dict, by_catalog = MatchingEngine(inventory), MatchingEngine(catalog)
+    rng = random.Random(2)
+    matched = 0
+    for _ in range(500):
+        d = random_demand(rng)
+        expected, actual = by_dict.match(d), by_catalog.match(d)
+        assert (expected and expected["sku"]) == (actual and actual["sku"]), d
+        matched += expected is not None
+    assert matched > 100
+    catalog.close()
+
+
+def test_seller_on_catalog_updates_stock_in_place(tmp_path):
+    """Test a seller matches and reserves directly against the mapped columns"""
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 2}]}
+    path = str(tmp_path / "catalog")
+    catalog = ColumnarCatalog.from_inventory(path, inventory)
+
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", catalog, network)
+    deals = []
+    seller.listen(on_deal=deals.append)
+    buyer = BuyerAgent("buyer", network)
+
+    offers = buyer.broadcast("laptop", (100000, 200000))
+    assert len(offers) == 1 and offers[0].item.sku == "LTP-001"
+    assert isinstance(catalog.by_sku.get("LTP-001"), CatalogRow)
+    assert catalog["laptop"][0]["stock"] == 1  # 预留直接扣减 mmap 列
+    buyer.purchase(offers[0])
+    assert deals and seller.reservations.stats()["confirmed"] == 1
+
+    with pytest.raises(KeyError):
+        catalog["laptop"][0]["price"] = 1
+    catalog.flush()
+    catalog.close()
+    with ColumnarCatalog(path) as reopened:
+        assert reopened["laptop"][0]["stock"] == 1
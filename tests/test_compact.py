@@ -0,0 +1,104 @@
+"""Test cases for trusted construction and compact message representation"""
+
+import pickle
+import pytest
+from acp0.core.messages import (
+    Intent, Offer, Deal, BuyerInfo, SellerInfo, Demand, Budget, Item, Price, Payment
+)
+from acp0.core.compact import CompactIntent, CompactOffer, CompactDeal, compact, expand
+from acp0.core.crypto import KeyPair
+from acp0.network.memory import InMemoryNetwork
+
+
+@pytest.fixture
+def keypair():
+    return KeyPair()
+
+
+def make_messages(keypair):
+    public_key = keypair.get_public_key_base64()
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key=public_key),
+        demand=Demand(
+            category="laptop",
+            budget=Budget(min=1000, max=2000, currency="CNY"),
+            attributes=["ram=16GB"],
+            location="shanghai"
+        )
+    )
+    offer = Offer(
+        intent_id=intent.intent_id,
+        seller=SellerInfo(agent_id="seller", name="Shop", public_key=public_key),
+        item=Item(name="Laptop", sku="LTP-001", images=["a.png"], attributes={"ram": "16GB"}),
+        price=Price(amount=1500, currency="CNY"),
+        stock=3
+    )
+    deal = Deal(
+        offer_id=offer.offer_id,
+        buyer=BuyerInfo(agent_id="buyer", public_key=public_key),
+        payment=Payment(method="mock", status="authorized")
+    )
+    for message in (intent, offer, deal):
+        message.sign(keypair)
+    return intent, offer, deal
+
+
+def test_trusted_construction_matches_validated(keypair):
+    """Test trusted factory yields identical canonical bytes and verifies"""
+    validated = Offer(
+        intent_id="intent-1",
+        seller=SellerInfo(agent_id="seller", name="Shop", public_key=keypair.get_public_key_base64()),
+        item=Item(name="Laptop", sku="LTP-001"),
+        price=Price(amount=1500, currency="CNY"),
+        stock=3
+    )
+    trusted = Offer.trusted(
+        intent_id="intent-1",
+        seller=SellerInfo.trusted(agent_id="seller", name="Shop",
+                                  public_key=keypair.get_public_key_base64()),
+        item=Item.trusted(name="Laptop", sku="LTP-001"),
+        price=Price.trusted(amount=1500, currency="CNY"),
+        stock=3,
+        offer_id=validated.offer_id,
+        nonce=validated.nonce,
+        timestamp=validated.timestamp
+    )
+
+    assert trusted.to_canonical_bytes() == validated.to_canonical_bytes()
+    trusted.sign(keypair)
+    assert trusted.verify()
+
+    # 默认值照常生成
+    assert Intent.trusted(buyer=None, demand=None).nonce != Intent.trusted(buyer=None, demand=None).nonce
+
+
+@pytest.mark.parametrize("validate", [False, True])
+def test_compact_round_trip(keypair, validate):
+    """Test compact <-> model conversion preserves signatures"""
+    for message, compact_type in zip(make_messages(keypair), (CompactIntent, CompactOffer, CompactDeal)):
+        small = compact(message)
+        assert isinstance(small, compact_type)
+        assert not hasattr(small, "__dict__")
+
+        restored = expand(small, validate=validate)
+        assert type(restored) is type(message)
+        assert restored.to_canonical_bytes() == message.to_canonical_bytes()
+        assert restored.verify()
+
+        assert pickle.loads(pickle.dumps(small)) == small
+
+
+def test_network_compact_history(keypair):
+    """Test InMemoryNetwork can keep compact message history"""
+    network = InMemoryNetwork(compact_history=True)
+    network.register_agent("buyer", "buyer")
+    intent, offer, _ = make_messages(keypair)
+
+    network.broadcast(intent, "intent")
+    network.send_message("buyer", offer, "offer")
+    network.send_message("buyer", {"raw": True}, "custom")
+
+    history = network.get_messages("buyer")
+    assert isinstance(history[0]["data"], CompactIntent)
+    assert expand(history[1]["data"]).offer_id == offer.offer_id
+    assert history[2]["data"] == {"raw": True}
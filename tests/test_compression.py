@@ -0,0 +1,108 @@
+"""Test cases for preset-dictionary frame compression"""
+
+import copy
+import time
+import zlib
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.core.exceptions import MessageValidationError
+from acp0.core.messages import Offer, SellerInfo, Item, Price, Intent, BuyerInfo, Demand, Budget
+from acp0.network.compression import (
+    FrameCompression, PresetDictionaries, decompress, negotiate, register_dictionaries, supported_versions
+)
+from acp0.network.envelope import MessageView, encode_frame, encode_json
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.relay import RelayNode
+from acp0.utils.timer_wheel import TimerWheel
+
+ATTRIBUTES = {"color": "black", "ram": "16GB", "storage": "512GB", "cpu": "8-core", "screen": "14 inch",
+              "weight": "1.3kg", "warranty": "2 years", "battery": "72Wh", "resolution": "2880x1800"}
+
+
+def rich_offer(i=0) -> Offer:
+    return Offer(
+        intent_id=f"intent-{i}",
+        seller=SellerInfo(agent_id="seller", name="Shop", public_key="pk" * 40),
+        item=Item(name=f"Laptop {i}", sku=f"LTP-{i:03d}",
+                  images=[f"https://cdn.example.com/items/LTP-{i:03d}/{n}.jpg" for n in range(6)],
+                  attributes=dict(ATTRIBUTES, model=f"X{i}")),
+        price=Price(amount=150000 + i, currency="CNY"),
+        stock=5
+    )
+
+
+def test_roundtrip_and_threshold():
+    """Test large bodies are compressed behind a plaintext routing header and small ones skipped"""
+    compression = FrameCompression(threshold=512)
+    offer = rich_offer()
+    plain = encode_frame(offer)
+    frame = encode_frame(offer, compression=compression)
+    assert len(frame) < len(plain) * 0.7
+
+    view = MessageView(frame)
+    assert view.is_compressed and not MessageView(plain).is_compressed
+    assert view.message_type == "offer" and view.intent_id == "intent-0"
+    assert view.body == encode_json(offer)
+    assert view.to_model() == offer
+
+    intent = Intent(buyer=BuyerInfo(agent_id="b", public_key="pk"),
+                    demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY")))
+    small = encode_frame(intent, compression=compression)
+    assert small == encode_frame(intent) and not MessageView(small).is_compressed
+
+
+def test_trained_versions_and_errors():
+    """Test trained dictionaries, negotiation and rejection of bad payloads"""
+    dictionaries = PresetDictionaries.train(7, [rich_offer(i) for i in range(50)], size=2048)
+    assert 0 < len(dictionaries.get("offer")) <= 2048 and b'"ram":"16GB"' in dictionaries.get("offer")
+    register_dictionaries(dictionaries)
+    register_dictionaries(dictionaries)  # 相同内容可重复注册
+    with pytest.raises(ValueError):
+        register_dictionaries(PresetDictionaries(7, {"offer": b"other"}))
+    with pytest.raises(ValueError):
+        FrameCompression(version=200)
+
+    trained = encode_frame(rich_offer(99), compression=FrameCompression(version=7))
+    builtin = encode_frame(rich_offer(99), compression=FrameCompression(version=1))
+    assert len(trained) < len(builtin)
+    assert MessageView(trained).to_model() == rich_offer(99).model_copy(
+        update={"offer_id": MessageView(trained).message_id, "nonce": MessageView(trained).nonce,
+                "timestamp": MessageView(trained).timestamp})
+
+    assert 7 in supported_versions()
+    assert negotiate([1, 7], [1, 3]) == 1 and negotiate([1], [2]) is None
+
+    body = encode_json(rich_offer())
+    packed = FrameCompression(version=7).compress("offer", body)
+    with pytest.raises(MessageValidationError):
+        decompress("offer", bytes([1]) + packed[1:])  # 字典版本不一致
+    with pytest.raises(MessageValidationError):
+        decompress("offer", packed[:-10])
+    with pytest.raises(MessageValidationError):
+        decompress("offer", bytes([201]) + packed[1:])
+    compressor = zlib.compressobj(zdict=dictionaries.get("offer"))
+    bomb = bytes([7]) + compressor.compress(b" " * (17 * 1024 * 1024)) + compressor.flush()
+    with pytest.raises(MessageValidationError):
+        decompress("offer", bomb)
+
+
+def test_relay_links_negotiate_compression():
+    """Test TCP relay links compress rich offers with the negotiated dictionary"""
+    timers = TimerWheel()
+    a = RelayNode(InMemoryNetwork(), "a", timers=timers)
+    b = RelayNode(InMemoryNetwork(), "b", timers=timers, compression=FrameCompression(version=1, threshold=256))
+    try:
+        port = a.serve()
+        link = b.connect_tcp("127.0.0.1", port)
+        assert link.compression.version == 1
+        inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5,
+                                 "attributes": ATTRIBUTES}]}
+        SellerAgent("seller", "Shop", copy.deepcopy(inventory), b.network, timers=timers).listen()
+        buyer = BuyerAgent("buyer", a.network, timers=timers)
+        offers = buyer.broadcast("laptop", (100000, 200000))
+        assert [o.item.attributes for o in offers] == [ATTRIBUTES]
+        assert b.stats()["bytes_sent"] < len(encode_frame(offers[0]))
+    finally:
+        a.close()
+        b.close()
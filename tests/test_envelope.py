@@ -0,0 +1,110 @@
+"""Test cases for lazy message envelopes"""
+
+import pytest
+from acp0.network.envelope import MessageView, encode_frame, encode_json, decode, pack_frame
+from acp0.core.messages import Intent, Offer, Deal, BuyerInfo, SellerInfo, Demand, Budget, Item, Price, Payment
+from acp0.core.exceptions import MessageValidationError
+from acp0.core.crypto import KeyPair
+
+
+@pytest.fixture
+def messages():
+    keypair = KeyPair()
+    public_key = keypair.get_public_key_base64()
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key=public_key),
+        demand=Demand(category="laptop", budget=Budget(min=1000, max=2000, currency="CNY")),
+        expires_at=2000000000
+    )
+    offer = Offer(
+        intent_id=intent.intent_id,
+        seller=SellerInfo(agent_id="seller", name="Shop", public_key=public_key),
+        item=Item(name="Laptop", sku="LTP-001"),
+        price=Price(amount=1500, currency="CNY"),
+        stock=3
+    )
+    deal = Deal(
+        offer_id=offer.offer_id,
+        buyer=BuyerInfo(agent_id="buyer", public_key=public_key),
+        payment=Payment(method="mock", status="authorized")
+    )
+    for message in (intent, offer, deal):
+        message.sign(keypair)
+    return intent, offer, deal
+
+
+@pytest.mark.parametrize("encode", [encode_frame, encode_json])
+def test_routing_header(messages, encode):
+    """Test routing fields are available from both wire formats"""
+    intent, offer, deal = messages
+
+    view = MessageView(encode(intent))
+    assert view.message_type == "intent"
+    assert view.intent_id == intent.intent_id
+    assert view.category == "laptop"
+    assert view.timestamp == intent.timestamp
+    assert view.expires_at == 2000000000
+
+    view = MessageView(encode(offer))
+    assert (view.message_type, view.offer_id, view.intent_id) == ("offer", offer.offer_id, intent.intent_id)
+    assert view.category is None and view.expires_at is None
+
+    view = MessageView(encode(deal))
+    assert (view.message_type, view.message_id, view.offer_id) == ("deal", deal.deal_id, offer.offer_id)
+
+
+@pytest.mark.parametrize("encode", [encode_frame, encode_json])
+def test_full_validation_only_at_recipient(messages, encode):
+    """Test to_model() restores a verifiable message"""
+    for message in messages:
+        restored = decode(encode(message))
+        assert type(restored) is type(message)
+        assert restored.to_canonical_bytes() == message.to_canonical_bytes()
+        assert restored.verify()
+
+
+def test_frame_header_read_without_parsing_body(messages):
+    """Test routing a frame never touches an invalid body until to_model()"""
+    intent = messages[0]
+    raw = pack_frame("intent", intent.intent_id, "laptop", intent.nonce,
+                     intent.timestamp, None, b"not json")
+    view = MessageView(raw)
+
+    assert view.category == "laptop"
+    with pytest.raises(MessageValidationError):
+        view.to_model()
+
+
+def test_malformed_frames(messages):
+    """Test malformed frames and mismatched headers are rejected"""
+    intent, offer, _ = messages
+    raw = encode_frame(intent)
+
+    with pytest.raises(MessageValidationError):
+        MessageView(raw[:10]).header
+    with pytest.raises(MessageValidationError):
+        MessageView(raw[:-1]).header
+
+    # 路由头与正文不一致（伪造路由键）
+    forged = pack_frame("intent", intent.intent_id, "phone", intent.nonce,
+                        intent.timestamp, None, encode_json(intent))
+    assert MessageView(forged).category == "phone"
+    with pytest.raises(MessageValidationError):
+        MessageView(forged).to_model()
+
+    with pytest.raises(MessageValidationError):
+        MessageView(b'{"message_type": "offer"}').header
+    with pytest.raises(MessageValidationError):
+        MessageView(b'{"message_type": "intent", "intent_id": "i", "demand": 5}').header
+
+
+@pytest.mark.parametrize("field", ["nonce", "timestamp", "expires_at"])
+def test_frame_header_fields_must_match_body(messages, field):
+    """Test every routing header field used for dedup and expiry is checked against the body"""
+    intent = messages[0]
+    header = {"nonce": intent.nonce, "timestamp": intent.timestamp, "expires_at": intent.expires_at}
+    header[field] = {"nonce": "replayed", "timestamp": intent.timestamp + 3600, "expires_at": None}[field]
+    forged = pack_frame("intent", intent.intent_id, "laptop", header["nonce"],
+                        header["timestamp"], header["expires_at"], encode_json(intent))
+    with pytest.raises(MessageValidationError, match=field):
+        MessageView(forged).to_model()
@@ -0,0 +1,168 @@
+"""Test cases for the fault and latency injection network wrapper"""
+
+import random
+import threading
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.core.messages import Intent, Offer, BuyerInfo, SellerInfo, Demand, Budget, Item, Price
+from acp0.network.faults import FaultProfile, FaultyNetwork, constant, exponential, pareto, uniform
+from acp0.network.memory import InMemoryNetwork
+
+INVENTORY = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 20}]}
+
+
+def make_intent(**kwargs) -> Intent:
+    return Intent(buyer=BuyerInfo(agent_id="buyer", public_key="dGVzdA=="),
+                  demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY")), **kwargs)
+
+
+def make_offer(intent_id: str, **kwargs) -> Offer:
+    return Offer(intent_id=intent_id, seller=SellerInfo(agent_id="seller", name="Shop", public_key="dGVzdA=="),
+                 item=Item(name="Laptop", sku="LTP-001"), price=Price(amount=150000, currency="CNY"), stock=3,
+                 **kwargs)
+
+
+def run_lossy(seed: int):
+    network = FaultyNetwork(InMemoryNetwork(), {
+        "intent": FaultProfile(delay=uniform(0, 0.01), drop=0.3, duplicate=0.2, reorder=0.2, reorder_delay=0.01),
+    }, seed=seed)
+    received = []
+    network.listen_intents(lambda intent: received.append(intent.intent_id))
+    intents = [make_intent(nonce=f"nonce-{i}") for i in range(200)]
+    for intent in intents:
+        network.broadcast_intent(intent)
+    assert network.flush(timeout=5)
+    network.close()
+    order = {intent.intent_id: i for i, intent in enumerate(intents)}
+    return sorted(order[intent_id] for intent_id in received), network.stats()["intent"]
+
+
+def run_market(seed: int):
+    """两个线程并发广播延迟的 Intent，两个卖家在投递线程上回 Offer"""
+    network = FaultyNetwork(InMemoryNetwork(), {
+        "intent": FaultProfile(delay=uniform(0, 0.005), drop=0.2, duplicate=0.2),
+        "offer": FaultProfile(delay=uniform(0, 0.005), drop=0.2, reorder=0.3, reorder_delay=0.005),
+    }, seed=seed)
+    for seller in ("s1", "s2"):
+        network.listen_intents(lambda intent, seller=seller: network.send_offer(
+            make_offer(intent.intent_id, nonce=f"{seller}:{intent.nonce}"), intent.intent_id))
+    received = []
+    intents = [make_intent(intent_id=f"intent-{i}", nonce=f"nonce-{i}") for i in range(100)]
+    for intent in intents:
+        network.listen_offers(intent.intent_id, lambda offer: received.append(offer.nonce))
+
+    threads = [threading.Thread(target=lambda part=part: [network.broadcast_intent(i) for i in part])
+               for part in (intents[::2], intents[1::2])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert network.flush(timeout=5)
+    network.close()
+    return sorted(received), network.stats()
+
+
+def test_faultless_delivery_is_inline():
+    """Test message types without a profile are delivered synchronously on the sender's thread"""
+    network = FaultyNetwork(InMemoryNetwork(), {"offer": FaultProfile(drop=1.0)})
+    received = []
+    network.listen_intents(received.append)
+    network.broadcast_intent(make_intent())
+    assert len(received) == 1
+    assert network._thread is None
+    assert network.stats()["intent"]["delivered"] == 1
+
+
+def test_seeded_runs_are_reproducible():
+    """Test the same seed drops, duplicates and reorders the same messages"""
+    first, first_stats = run_lossy(seed=7)
+    second, second_stats = run_lossy(seed=7)
+    assert first == second
+    assert first_stats == second_stats
+    assert first_stats["dropped"] > 0 and first_stats["duplicated"] > 0 and first_stats["reordered"] > 0
+    assert first_stats["delivered"] == 200 - first_stats["dropped"] + first_stats["duplicated"]
+
+    other, _ = run_lossy(seed=8)
+    assert other != first
+
+
+def test_fault_decisions_do_not_depend_on_thread_interleaving():
+    """Test concurrent senders and replies from the delivery thread still reproduce under the same seed"""
+    first, first_stats = run_market(seed=3)
+    for _ in range(3):
+        assert run_market(seed=3) == (first, first_stats)
+    assert first_stats["offer"]["dropped"] > 0 and first_stats["intent"]["duplicated"] > 0
+
+
+def test_delay_distributions():
+    """Test the distribution helpers are seeded and respect their bounds"""
+    assert constant(0.5)(random.Random(0)) == 0.5
+    samples = [pareto(0.01, 1.5, cap=0.1)(random.Random(i)) for i in range(100)]
+    assert all(0.01 <= s <= 0.1 for s in samples)
+    rng_a, rng_b = random.Random(3), random.Random(3)
+    assert [exponential(0.02)(rng_a) for _ in range(5)] == [exponential(0.02)(rng_b) for _ in range(5)]
+
+
+def test_late_messages_after_unlisten_are_discarded():
+    """Test an in-flight offer arriving after its listener is removed is counted as late"""
+    network = FaultyNetwork(InMemoryNetwork(), {"offer": FaultProfile(delay=constant(0.1))})
+    received = []
+    network.listen_offers("intent-1", received.append)
+    network.listen_offers("intent-2", received.append)
+
+    offer = make_offer("intent-1")
+    network.send_offer(offer, "intent-1")
+    network.send_offer(offer, "intent-2")
+    network.unlisten_offers("intent-1")
+    assert received == []
+    assert network.flush(timeout=2)
+    assert len(received) == 1
+    assert network.stats()["offer"]["late"] == 1
+
+
+def test_buyer_collection_degrades_under_faults():
+    """Test offers are delayed by the intent and offer latencies, and lost when offers drop"""
+    network = FaultyNetwork(InMemoryNetwork(), {
+        "intent": FaultProfile(delay=constant(0.1), duplicate=1.0),
+        "offer": FaultProfile(delay=constant(0.1)),
+    }, seed=1)
+    seller = SellerAgent("seller", "Shop", {k: [dict(p) for p in v] for k, v in INVENTORY.items()}, network)
+    seller.listen()
+    buyer = BuyerAgent("buyer", network)
+
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    assert handle.poll() == []
+    offers = handle.wait(timeout=2)
+    assert len(offers) == 1
+    assert handle.first_offer_at - handle.opened_at >= 0.2
+    # 重复投递的 Intent 被卖家的重放准入阶段拒绝，只回一个 Offer
+    assert network.flush(timeout=2)
+    assert len(handle.poll()) == 1
+    assert network.stats()["intent"]["duplicated"] == 1
+
+    network.profiles["offer"] = FaultProfile(drop=1.0)
+    lost = buyer.open_intent("laptop", (100000, 200000))
+    assert lost.wait(timeout=0.5) == []
+    assert lost.first_offer_at is None
+    assert network.stats()["offer"]["dropped"] == 1
+    network.close()
+
+
+def test_listener_errors_on_delivery_thread_are_counted(capsys):
+    """Test exceptions raised by delayed listeners are counted and reported, not swallowed"""
+    network = FaultyNetwork(InMemoryNetwork(), {"intent": FaultProfile(delay=constant(0.01))})
+    received = []
+
+    def listener(intent):
+        received.append(intent)
+        if len(received) == 1:
+            raise RuntimeError("boom")
+
+    network.listen_intents(listener)
+    network.broadcast_intent(make_intent())
+    network.broadcast_intent(make_intent())
+    assert network.flush(timeout=2)
+    assert len(received) == 2
+    assert network.stats()["intent"]["errors"] == 1
+    assert "boom" in capsys.readouterr().out
+    network.close()
@@ -0,0 +1,102 @@
+"""Test cases for multi-process seller fleet"""
+
+import copy
+import multiprocessing
+import os
+import time
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.fleet import SellerFleet, _WorkerNetwork, shard_for
+from acp0.core.exceptions import NetworkError
+from acp0.network.memory import InMemoryNetwork
+
+INVENTORY = {
+    "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}],
+    "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 5}],
+}
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def fleet():
+    network = InMemoryNetwork()
+    fleet = SellerFleet(network, workers=2, heartbeat_interval=0.2, heartbeat_timeout=5.0)
+    yield fleet
+    fleet.stop()
+
+
+def test_placement_by_category(fleet):
+    """Test seller inventories are sharded to workers by category hash"""
+    keypair = fleet.add_seller("seller_001", "Shop", copy.deepcopy(INVENTORY))
+    assert fleet.worker_for("laptop") == shard_for("laptop", 2)
+    assert fleet.worker_for("phone") == shard_for("phone", 2)
+    assert fleet.worker_for("tablet") is None
+    shards = [s for shards in fleet._placement.values() for s in shards]
+    assert {s.category for s in shards} == {"laptop", "phone"}
+    assert all(s.private_key == keypair.private_key.to_string() for s in shards)
+
+
+def test_buyer_purchases_through_fleet(fleet):
+    """Test intents reach only the hosting worker and offers/deals flow back"""
+    keypair = fleet.add_seller("seller_001", "Shop", copy.deepcopy(INVENTORY))
+    deals = []
+    fleet.start(on_deal=deals.append)
+    assert fleet.wait_ready()
+
+    buyer = BuyerAgent("buyer", fleet.network)
+    buyer.broadcast("laptop", (100000, 200000))
+    assert wait_for(lambda: buyer.received_offers)
+    offer = buyer.received_offers[0]
+    assert offer.verify() and offer.seller.public_key == keypair.get_public_key_base64()
+
+    deal = buyer.purchase(offer)
+    assert wait_for(lambda: deals)
+    assert deals[0].deal_id == deal.deal_id
+
+    buyer.broadcast("tablet", (1, 2))
+    stats = fleet.stats()
+    assert stats["routed"] == 1 and stats["unrouted"] == 1
+    assert stats["offers"] == 1 and stats["deals"] == 1
+    hosting = fleet.worker_for("laptop")
+    assert wait_for(lambda: fleet.stats()["workers"][hosting].get("intents") == 1)
+
+
+def test_dead_worker_is_restarted(fleet):
+    """Test a killed worker is restarted and keeps serving its shards"""
+    fleet.add_seller("seller_001", "Shop", copy.deepcopy(INVENTORY))
+    fleet.start()
+    assert fleet.wait_ready()
+    index = fleet.worker_for("phone")
+    old_pid = fleet._workers[index].process.pid
+    os.kill(old_pid, 9)
+
+    assert wait_for(lambda: fleet.stats()["restarts"] == 1)
+    assert fleet.wait_ready()
+    assert fleet._workers[index].process.pid != old_pid
+
+    buyer = BuyerAgent("buyer", fleet.network)
+    buyer.broadcast("phone", (10000, 60000))
+    assert wait_for(lambda: buyer.received_offers)
+
+
+def test_worker_network_rejects_buyer_side_calls():
+    """Test buyer-side calls inside a worker raise NetworkError instead of NotImplementedError"""
+    parent, child = multiprocessing.Pipe()
+    network = _WorkerNetwork(child)
+    with pytest.raises(NetworkError, match="broadcast"):
+        network.broadcast_intent(None)
+    with pytest.raises(NetworkError, match="deals"):
+        network.send_deal(None, "offer")
+    with pytest.raises(NetworkError, match="offers"):
+        network.listen_offers("intent", lambda offer: None)
+    network.unlisten_offers("intent")  # 基类的空操作
+    parent.close()
+    child.close()
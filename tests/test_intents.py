@@ -0,0 +1,112 @@
+"""Test cases for concurrent buyer intents"""
+
+import asyncio
+import copy
+import threading
+import time
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.intents import OPEN, COLLECTING, DECIDED, EXPIRED
+from acp0.agents.seller import SellerAgent
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+from acp0.network.memory import InMemoryNetwork
+from acp0.utils.timer_wheel import TimerWheel
+
+INVENTORY = {
+    "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 500}],
+    "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 500}],
+}
+
+
+def setup(seller=True):
+    timers = TimerWheel()
+    network = InMemoryNetwork()
+    if seller:
+        SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), network, timers=timers).listen()
+    buyer = BuyerAgent("buyer", network, timers=timers, listen_timeout=10, intent_retention=5)
+    return network, buyer, timers
+
+
+def late_offer(buyer, intent_id, sku="X-1", delay=0.05):
+    """另一个线程稍后送达的 Offer（由买家密钥代签，验签可通过）"""
+    offer = Offer(
+        intent_id=intent_id,
+        seller=SellerInfo(agent_id="late", name="Late", public_key=buyer.keypair.get_public_key_base64()),
+        item=Item(name="Late", sku=sku),
+        price=Price(amount=100, currency="CNY"),
+        stock=1
+    )
+    offer.sign(buyer.keypair)
+
+    def send():
+        time.sleep(delay)
+        buyer.network.send_offer(offer, intent_id)
+    threading.Thread(target=send).start()
+    return offer
+
+
+def test_parallel_intents_keep_separate_offers():
+    """Test concurrent intents collect offers independently of broadcast()"""
+    network, buyer, _ = setup()
+    laptop = buyer.open_intent("laptop", (100000, 200000))
+    phone = buyer.open_intent("phone", (1, 100000))
+    assert [o.item.sku for o in laptop.poll()] == ["LTP-001"]
+    assert [o.item.sku for o in buyer.poll_offers(phone.intent_id)] == ["PHN-001"]
+    assert laptop.state == phone.state == COLLECTING
+
+    buyer.broadcast("phone", (1, 100000))
+    assert [o.item.sku for o in laptop.offers] == ["LTP-001"]  # 旧接口不再覆盖
+    assert buyer.select_best(laptop).item.sku == "LTP-001"
+    assert buyer.poll_offers("unknown") == []
+    assert buyer.intents.stats()[COLLECTING] == 3
+
+
+def test_lifecycle_decided_and_expired():
+    """Test purchase decides an intent and the deadline expires the rest"""
+    network, buyer, timers = setup()
+    decided = buyer.open_intent("laptop", (100000, 200000), ttl=30)
+    empty = buyer.open_intent("tablet", (1, 2))
+    assert empty.state == OPEN
+
+    deal = buyer.purchase(decided.offers[0])
+    assert decided.state == DECIDED and decided.deal is deal
+    assert decided.intent_id not in network.offer_callbacks
+
+    timers.advance(time.time() + 11)
+    assert empty.state == EXPIRED and empty.intent_id not in network.offer_callbacks
+    assert empty.wait(timeout=0) == []  # 终态立即返回
+    assert decided.state == DECIDED  # 终态不再改变
+
+    timers.advance(time.time() + 60)
+    assert len(buyer.intents) == 0
+
+
+def test_sub_second_ttl_is_not_expired_on_creation():
+    """Test expires_at rounds up, so a ttl below one second still reaches sellers"""
+    network, buyer, timers = setup()
+    for _ in range(5):
+        before = time.time()
+        handle = buyer.open_intent("laptop", (100000, 200000), ttl=0.5)
+        assert handle.intent.expires_at >= before + 0.5
+        assert len(handle.poll()) == 1
+    assert network.expired_dropped == 0
+
+
+def test_wait_and_await_offers():
+    """Test threads and coroutines wake when any intent receives offers"""
+    _, buyer, _ = setup(seller=False)
+    first = buyer.open_intent("laptop", (1, 2))
+    late_offer(buyer, first.intent_id)
+    offers = buyer.wait_offers(first.intent_id, timeout=5)
+    assert [o.item.sku for o in offers] == ["X-1"]
+    assert buyer.wait_offers(first.intent_id, min_offers=2, timeout=0.01) == offers
+
+    handles = [buyer.open_intent("laptop", (1, 2)) for _ in range(200)]
+    for i, handle in enumerate(handles[:100]):
+        late_offer(buyer, handle.intent_id, sku=f"X-{i}", delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*(buyer.await_offers(h.intent_id, timeout=0.5) for h in handles))
+
+    results = asyncio.run(main())
+    assert [len(r) for r in results] == [1] * 100 + [0] * 100
+    assert all(r[0].intent_id == h.intent_id for r, h in zip(results, handles[:100]))
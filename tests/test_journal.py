@@ -0,0 +1,238 @@
+"""Test cases for the durable message journal"""
+
+import os
+import threading
+import pytest
+from acp0.storage.journal import Journal
+from acp0.core.messages import Intent, Offer, Deal, BuyerInfo, SellerInfo, Demand, Budget, Item, Price, Payment
+from acp0.core.crypto import KeyPair
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.memory import InMemoryNetwork
+
+
+@pytest.fixture
+def keypair():
+    return KeyPair()
+
+
+def make_offer(keypair, sku="LTP-001", intent_id="intent-1"):
+    offer = Offer(
+        intent_id=intent_id,
+        seller=SellerInfo(agent_id="seller", name="Shop", public_key=keypair.get_public_key_base64()),
+        item=Item(name="Laptop", sku=sku),
+        price=Price(amount=1500, currency="CNY"),
+        stock=3
+    )
+    offer.sign(keypair)
+    return offer
+
+
+def make_deal(keypair, offer_id):
+    deal = Deal(
+        offer_id=offer_id,
+        buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+        payment=Payment(method="mock", status="authorized")
+    )
+    deal.sign(keypair)
+    return deal
+
+
+def make_intent(keypair):
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+        demand=Demand(category="laptop", budget=Budget(min=1000, max=2000, currency="CNY"))
+    )
+    intent.sign(keypair)
+    return intent
+
+
+def test_append_and_get(tmp_path, keypair):
+    """Test messages can be looked up by id and verify after reload"""
+    offer = make_offer(keypair)
+    deal = make_deal(keypair, offer.offer_id)
+
+    with Journal(str(tmp_path)) as journal:
+        journal.append(offer)
+        journal.append(deal)
+        assert journal.get(offer.offer_id).to_canonical_bytes() == offer.to_canonical_bytes()
+        assert journal.get_view(deal.deal_id).offer_id == offer.offer_id
+        assert "missing" not in journal
+
+    with Journal(str(tmp_path)) as journal:
+        restored = journal.get(deal.deal_id)
+        assert isinstance(restored, Deal)
+        assert restored.verify()
+        assert journal.stats()["indexed"] == 2
+
+
+def test_segment_rotation_and_index_growth(tmp_path, keypair):
+    """Test lookups across rotated segments and a grown index"""
+    offers = [make_offer(keypair, sku=f"SKU-{i}") for i in range(40)]
+    with Journal(str(tmp_path), segment_size=4096, index_capacity=8) as journal:
+        journal.append_many(offers)
+        assert journal.stats()["segments"] > 1
+        for offer in offers:
+            assert journal.get_view(offer.offer_id).message_id == offer.offer_id
+
+    with Journal(str(tmp_path)) as journal:
+        assert all(offer.offer_id in journal for offer in offers)
+
+
+def test_recover_torn_tail(tmp_path, keypair):
+    """Test a partially written last record is truncated on open"""
+    first, second = make_offer(keypair, "A"), make_offer(keypair, "B")
+    with Journal(str(tmp_path)) as journal:
+        journal.append(first)
+        journal.append(second)
+        segment = os.path.join(str(tmp_path), "00000001.log")
+
+    size = os.path.getsize(segment)
+    with open(segment, "r+b") as f:
+        f.truncate(size - 10)
+    os.remove(os.path.join(str(tmp_path), "index.bin"))
+
+    with Journal(str(tmp_path)) as journal:
+        assert first.offer_id in journal
+        assert second.offer_id not in journal
+        journal.append(second)
+        assert journal.get(second.offer_id).verify()
+
+
+def test_rebuild_corrupt_index(tmp_path, keypair):
+    """Test a corrupt index file is discarded and rebuilt from the log"""
+    offer = make_offer(keypair)
+    with Journal(str(tmp_path)) as journal:
+        journal.append(offer)
+
+    with open(os.path.join(str(tmp_path), "index.bin"), "r+b") as f:
+        f.write(b"garbage!")
+
+    with Journal(str(tmp_path)) as journal:
+        assert journal.get(offer.offer_id).offer_id == offer.offer_id
+
+
+def test_scan_by_type(tmp_path, keypair):
+    """Test streaming scan in write order with type filter"""
+    intent = make_intent(keypair)
+    offer = make_offer(keypair, intent_id=intent.intent_id)
+    deal = make_deal(keypair, offer.offer_id)
+
+    with Journal(str(tmp_path)) as journal:
+        journal.append_many([intent, offer, deal])
+        assert [v.message_type for v in journal.scan()] == ["intent", "offer", "deal"]
+        assert [v.message_id for v in journal.scan("deal")] == [deal.deal_id]
+
+
+def test_compaction(tmp_path, keypair):
+    """Test compaction keeps the latest record per id and honours keep()"""
+    intents = [make_intent(keypair) for _ in range(10)]
+    offer = make_offer(keypair)
+
+    with Journal(str(tmp_path), segment_size=2048) as journal:
+        journal.append_many(intents)
+        journal.append(offer)
+        journal.append(offer)  # 重复记录
+        journal.append_many([make_offer(keypair, sku=f"X-{i}") for i in range(10)])
+
+        stats = journal.compact(keep=lambda view: view.message_type != "intent")
+        assert stats["dropped"] >= len(intents)
+        assert journal.stats()["segments"] <= 2
+        assert not any(intent.intent_id in journal for intent in intents)
+        assert journal.get(offer.offer_id).verify()
+        assert sum(1 for v in journal.scan("offer") if v.message_id == offer.offer_id) == 1
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("step", ["manifest", "replace", "remove", "index"])
+def test_compaction_crash_recovery(tmp_path, keypair, monkeypatch, step):
+    """Test a crash between compaction steps never lets stale versions override the compacted record"""
+    offer = make_offer(keypair)
+    updated = offer.model_copy(update={"stock": 1})
+    updated.sign(keypair)
+    fillers = [make_offer(keypair, sku=f"X-{i}") for i in range(30)]
+
+    journal = Journal(str(tmp_path), segment_size=2048)
+    journal.append(offer)
+    journal.append_many(fillers[:10])
+    journal.append(updated)            # 同一 id 的新版本在后面的段
+    journal.append_many(fillers[10:])
+    assert journal.stats()["segments"] >= 3
+
+    real_replace, real_remove = os.replace, os.remove
+
+    def replace(src, dst):
+        if (step == "manifest" and dst.endswith("COMPACTING")) or (step == "replace" and dst.endswith(".log")):
+            raise Crash()
+        return real_replace(src, dst)
+
+    def remove(path):
+        if step == "remove" and path.endswith(".log"):
+            raise Crash()
+        return real_remove(path)
+
+    def rebuild():
+        raise Crash()
+
+    monkeypatch.setattr(os, "replace", replace)
+    monkeypatch.setattr(os, "remove", remove)
+    if step == "index":
+        monkeypatch.setattr(journal, "_rebuild_index_locked", rebuild)
+    with pytest.raises(Crash):
+        journal.compact()
+    monkeypatch.undo()
+
+    # 不调用 close()，模拟进程崩溃后重新打开
+    with Journal(str(tmp_path), segment_size=2048) as recovered:
+        assert recovered.get(offer.offer_id).stock == 1
+        assert all(filler.offer_id in recovered for filler in fillers)
+        assert sum(1 for v in recovered.scan("offer") if v.message_id == offer.offer_id) == (
+            2 if step == "manifest" else 1)
+    assert not any(name.endswith(".compact") or name.startswith("COMPACTING") for name in os.listdir(tmp_path))
+
+
+def test_concurrent_group_commit(tmp_path, keypair):
+    """Test concurrent durable appends from many threads"""
+    offers = [make_offer(keypair, sku=f"SKU-{i}") for i in range(64)]
+
+    with Journal(str(tmp_path), commit_delay=0.001) as journal:
+        def writer(chunk):
+            for offer in chunk:
+                journal.append(offer)
+
+        threads = [threading.Thread(target=writer, args=(offers[i::8],)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = journal.stats()
+        assert stats["written"] == stats["synced"] == len(offers)
+        assert all(offer.offer_id in journal for offer in offers)
+
+
+def test_agents_journal_offers_and_deals(tmp_path):
+    """Test buyer and seller record accepted offers and deals"""
+    network = InMemoryNetwork()
+    buyer_journal = Journal(str(tmp_path / "buyer"))
+    seller_journal = Journal(str(tmp_path / "seller"))
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 1500, "stock": 3}]}
+    seller = SellerAgent("seller", "Shop", inventory, network, journal=seller_journal)
+    buyer = BuyerAgent("buyer", network, journal=buyer_journal)
+
+    deals = []
+    seller.listen(on_deal=deals.append)
+    offers = buyer.broadcast("laptop", (1000, 2000))
+    deal = buyer.purchase(buyer.select_best(offers))
+
+    assert deals and deals[0].deal_id == deal.deal_id
+    assert buyer_journal.get(deal.deal_id).verify()
+    assert offers[0].offer_id in buyer_journal
+    assert offers[0].offer_id in seller_journal
+    assert deal.deal_id in seller_journal
+
+    buyer_journal.close()
+    seller_journal.close()
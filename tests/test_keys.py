@@ -0,0 +1,145 @@
+"""Test cases for short key IDs and the public key registry"""
+
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.core.compact import compact, expand
+from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.keys import KeyRegistry, key_fingerprint, set_key_registry
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.network.envelope import encode_json
+from acp0.network.keys import KeyRegistryServer, RemoteKeyRegistry
+from acp0.network.memory import InMemoryNetwork
+
+
+@pytest.fixture
+def registry():
+    """每个测试使用独立的进程级注册表"""
+    registry = KeyRegistry()
+    previous = set_key_registry(registry)
+    yield registry
+    set_key_registry(previous)
+
+
+def make_intent(keypair, **signer) -> Intent:
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", **signer),
+        demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY"))
+    )
+    sign_message(intent, keypair)
+    return intent
+
+
+def test_key_id_messages_verify_through_registry(registry):
+    """Test a key_id-only intent verifies once its key is registered, and is smaller"""
+    keypair = KeyPair()
+    public_key = keypair.get_public_key_base64()
+    key_id = key_fingerprint(public_key)
+    assert len(key_id) == 22
+
+    short = make_intent(keypair, key_id=key_id)
+    assert not short.verify()  # 未登记
+    assert registry.register(public_key) == key_id
+    assert short.verify()
+    assert short.get_signer_public_key() == public_key
+
+    full = make_intent(keypair, public_key=public_key)
+    assert full.verify()
+    assert "key_id" not in full.to_canonical_bytes().decode()
+    assert len(encode_json(full)) - len(encode_json(short)) > 50
+
+
+def test_key_id_cannot_be_swapped(registry):
+    """Test a message signed by another key cannot borrow a registered key_id"""
+    victim, attacker = KeyPair(), KeyPair()
+    key_id = registry.register(victim.get_public_key_base64())
+    assert not make_intent(attacker, key_id=key_id).verify()
+
+    # 两者都有时指纹必须一致
+    mixed = make_intent(attacker, public_key=attacker.get_public_key_base64(), key_id=key_id)
+    assert not mixed.verify()
+
+    with pytest.raises(ValueError):
+        BuyerInfo(agent_id="buyer")
+    with pytest.raises(ValueError):
+        registry.register("not-a-key")
+
+
+def test_agents_exchange_key_id_messages(registry):
+    """Test buyer and seller can trade using only key IDs"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", {"laptop": [
+        {"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 3}
+    ]}, network, key_ids=True)
+    deals = []
+    seller.listen(on_deal=deals.append)
+    buyer = BuyerAgent("buyer", network, key_ids=True)
+
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    offers = handle.wait(timeout=2)
+    assert len(offers) == 1
+    assert offers[0].seller.public_key is None
+    assert offers[0].seller.key_id == key_fingerprint(seller.keypair.get_public_key_base64())
+    assert handle.intent.buyer.public_key is None
+
+    buyer.purchase(offers[0])
+    assert len(deals) == 1
+    assert expand(compact(offers[0])).verify()
+    assert len(registry) == 2
+
+
+def test_remote_registry_fetches_and_caches():
+    """Test the networked registry resolves keys once and rejects forged answers"""
+    server = KeyRegistryServer()
+    port = server.serve()
+    try:
+        publisher = RemoteKeyRegistry("127.0.0.1", port)
+        verifier = RemoteKeyRegistry("127.0.0.1", port, miss_ttl=60)
+        keypair = KeyPair()
+        key_id = publisher.register(keypair.get_public_key_base64())
+
+        assert verifier.resolve(key_id) == keypair.get_public_key_base64()
+        assert verifier.resolve(key_id) == keypair.get_public_key_base64()
+        assert verifier.stats()["fetched"] == 1
+        assert verifier.stats()["hits"] == 1
+
+        # 服务端返回与指纹不符的公钥时不采用
+        forged = key_fingerprint(KeyPair().get_public_key_base64())
+        server.registry._keys[forged] = keypair.get_public_key_base64()
+        assert verifier.resolve(forged) is None
+        assert verifier.stats()["rejected"] == 1
+        # miss_ttl 内不再查询
+        assert verifier.resolve(forged) is None
+        assert verifier.stats()["rejected"] == 1
+
+        previous = set_key_registry(verifier)
+        try:
+            assert make_intent(keypair, key_id=key_id).verify()
+        finally:
+            set_key_registry(previous)
+        publisher.close()
+        verifier.close()
+    finally:
+        server.close()
+
+
+
+def test_remote_registry_reports_each_key_once():
+    """Test an already-reported key is not sent to the server again, by the registry or the buyer"""
+    server = KeyRegistryServer()
+    port = server.serve()
+    registry = RemoteKeyRegistry("127.0.0.1", port)
+    previous = set_key_registry(registry)
+    try:
+        buyer = BuyerAgent("buyer", InMemoryNetwork(), key_ids=True)
+        first = buyer.open_intent("laptop", (1, 2))
+        key_id = first.intent.buyer.key_id
+        server.close()
+        registry.close()  # 之后任何上报都会因服务端不可达而失败
+
+        assert registry.register(buyer.keypair.get_public_key_base64()) == key_id
+        assert buyer.open_intent("laptop", (1, 2)).intent.buyer.key_id == key_id
+        assert first.intent.verify()
+    finally:
+        set_key_registry(previous)
+        server.close()
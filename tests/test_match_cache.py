@@ -0,0 +1,131 @@
+"""Test cases for match result cache and coalescing"""
+
+import copy
+import threading
+import time
+from acp0.agents.match_cache import MatchCache
+from acp0.agents.matching import MatchingEngine
+from acp0.agents.reservation import ReservationEngine
+from acp0.agents.snapshots import CatalogStore, CatalogDelta
+from acp0.agents.seller import SellerAgent
+from acp0.agents.buyer import BuyerAgent
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Demand, Budget
+
+INVENTORY = {
+    "laptop": [
+        {"sku": "LTP-001", "name": "Cheap", "price": 120000, "stock": 1, "attributes": {"ram": "16GB"}},
+        {"sku": "LTP-002", "name": "Mid", "price": 150000, "stock": 5, "attributes": {"ram": "16GB"}},
+        {"sku": "LTP-003", "name": "Big", "price": 300000, "stock": 0, "attributes": {"ram": "32GB"}},
+    ],
+    "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 3}],
+}
+
+
+def demand(low=100000, high=200000, category="laptop", **kwargs) -> Demand:
+    return Demand(category=category, budget=Budget(min=low, max=high, currency="CNY"), **kwargs)
+
+
+class CountingMatcher:
+    def __init__(self, matcher, delay=0.0):
+        self.matcher = matcher
+        self.delay = delay
+        self.calls = 0
+
+    def match(self, d):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.matcher.match(d)
+
+    def rebuild(self, category=None):
+        self.matcher.rebuild(category)
+
+
+def setup():
+    inventory = copy.deepcopy(INVENTORY)
+    counting = CountingMatcher(MatchingEngine(inventory))
+    cache = MatchCache(counting, capacity=16)
+    engine = ReservationEngine(inventory, ttl=60)
+    engine.add_listener(cache.stock_changed)
+    return inventory, counting, cache, engine
+
+
+def test_identical_demands_hit_cache():
+    """Test normalized demands share one cached result"""
+    _, counting, cache, _ = setup()
+    first = cache.match(demand(attributes=["ram=16GB", "16GB"]))
+    again = cache.match(demand(attributes=["16GB", "ram=16GB", "16GB"]))
+    assert first is again and first["sku"] == "LTP-001"
+    assert cache.match(demand(high=100)) is None and cache.match(demand(high=100)) is None
+    assert counting.calls == 2
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["size"] == 2
+
+
+def test_invalidation_is_precise():
+    """Test only entries affected by a stock crossing or catalog change are dropped"""
+    _, counting, cache, engine = setup()
+    cheap = demand()
+    pricey = demand(low=140000)
+    phone = demand(low=1, category="phone")
+    big = demand(low=250000, high=400000)
+    for d in (cheap, pricey, phone, big):
+        cache.match(d)
+    assert cache.match(big) is None and len(cache) == 4
+
+    # LTP-001 售罄：只有以它为结果的条目失效
+    assert engine.reserve("o1", "LTP-001")
+    assert len(cache) == 3
+    assert cache.match(cheap)["sku"] == "LTP-002"
+    # LTP-002 少一件不改变任何结果
+    assert engine.reserve("o2", "LTP-002")
+    calls = counting.calls
+    assert cache.match(pricey)["sku"] == "LTP-002" and counting.calls == calls
+
+    # LTP-001 重新有货：只失效它能胜出的条目（cheap），pricey / phone / big 保留
+    assert engine.release("o1")
+    assert cache.match(cheap)["sku"] == "LTP-001"
+    assert counting.calls == calls + 1
+    cache.match(pricey), cache.match(phone), cache.match(big)
+    assert counting.calls == calls + 1
+
+
+def test_catalog_store_changes_invalidate():
+    """Test snapshot swaps invalidate entries for changed or newly winning products"""
+    store = CatalogStore(copy.deepcopy(INVENTORY))
+    counting = CountingMatcher(store)
+    cache = MatchCache(counting)
+    store.subscribe(cache.catalog_changed)
+    assert cache.match(demand(low=140000))["sku"] == "LTP-002"
+    assert cache.match(demand(category="phone", low=1))["sku"] == "PHN-001"
+
+    store.apply([CatalogDelta.price("LTP-003", 145000), CatalogDelta.restock("LTP-003", 2)])
+    assert cache.match(demand(low=140000))["sku"] == "LTP-003"
+    assert cache.match(demand(category="phone", low=1))["sku"] == "PHN-001"
+    assert counting.calls == 3
+
+
+def test_coalescing_shares_inflight_match():
+    """Test concurrent identical demands run the matcher once"""
+    counting = CountingMatcher(MatchingEngine(copy.deepcopy(INVENTORY)), delay=0.05)
+    cache = MatchCache(counting, capacity=0, coalesce_window=0.02)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.match(demand()))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counting.calls == 1
+    assert len(results) == 8 and all(r["sku"] == "LTP-001" for r in results)
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_seller_with_match_cache():
+    """Test a caching seller stops offering a sold-out SKU"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), network, match_cache=64)
+    seller.listen()
+    buyer = BuyerAgent("buyer", network)
+    assert buyer.broadcast("laptop", (100000, 200000))[0].item.sku == "LTP-001"
+    assert buyer.broadcast("laptop", (100000, 200000))[0].item.sku == "LTP-002"
+    assert seller.matcher.stats()["invalidated"] >= 1
@@ -0,0 +1,71 @@
+"""Test cases for inventory matching engine"""
+
+import pytest
+from acp0.agents.matching import MatchingEngine
+from acp0.core.messages import Demand, Budget
+
+
+INVENTORY = {
+    "laptop": [
+        {"sku": "LTP-001", "name": "Budget", "price": 120000, "stock": 5,
+         "attributes": {"cpu": "i5", "ram": "8GB"}},
+        {"sku": "LTP-002", "name": "Mid", "price": 150000, "stock": 3,
+         "attributes": {"cpu": "i7", "ram": "16GB"}, "location": "shanghai", "delivery_days": 1},
+        {"sku": "LTP-003", "name": "Mid Remote", "price": 140000, "stock": 3,
+         "attributes": {"cpu": "i7", "ram": "16GB"}, "location": ["beijing", "shenzhen"],
+         "delivery_days": 5},
+        {"sku": "LTP-004", "name": "Sold Out", "price": 100000, "stock": 0,
+         "attributes": {"cpu": "i7", "ram": "16GB"}},
+    ]
+}
+
+
+def demand(**kwargs) -> Demand:
+    return Demand(
+        category="laptop",
+        budget=Budget(min=100000, max=200000, currency="CNY"),
+        **kwargs
+    )
+
+
+def test_budget_only_picks_cheapest_in_stock():
+    """Test plain demand matches cheapest product with stock"""
+    engine = MatchingEngine(INVENTORY)
+    assert engine.match(demand())["sku"] == "LTP-001"
+
+
+def test_attribute_filter():
+    """Test key=value and bare value attribute postings"""
+    engine = MatchingEngine(INVENTORY)
+    assert engine.match(demand(attributes=["ram=16GB"]))["sku"] == "LTP-003"
+    assert engine.match(demand(attributes=["16GB", "cpu=i7"]))["sku"] == "LTP-003"
+    assert engine.match(demand(attributes=["ram=64GB"])) is None
+
+
+def test_location_and_delivery_filters():
+    """Test location and delivery-time filters"""
+    engine = MatchingEngine(INVENTORY)
+
+    # 不限地点的商品对任何地点可见
+    assert engine.match(demand(location="shanghai"))["sku"] == "LTP-001"
+    assert engine.match(demand(attributes=["ram=16GB"], location="shanghai"))["sku"] == "LTP-002"
+    assert engine.match(demand(attributes=["ram=16GB"], location="shenzhen"))["sku"] == "LTP-003"
+    assert engine.match(demand(attributes=["ram=16GB"], location="chengdu")) is None
+
+    assert engine.match(demand(attributes=["ram=16GB"], delivery_days=2))["sku"] == "LTP-002"
+    assert engine.match(demand(attributes=["cpu=i7"], location="beijing", delivery_days=2)) is None
+
+
+def test_stock_is_read_live_and_rebuild_picks_up_price_changes():
+    """Test stock changes need no rebuild while price changes do"""
+    inventory = {"laptop": [dict(p) for p in INVENTORY["laptop"]]}
+    engine = MatchingEngine(inventory)
+
+    inventory["laptop"][0]["stock"] = 0
+    assert engine.match(demand())["sku"] == "LTP-003"
+
+    inventory["laptop"][1]["price"] = 110000
+    engine.rebuild("laptop")
+    assert engine.match(demand())["sku"] == "LTP-002"
+
+    assert engine.match(Demand(category="phone", budget=Budget(min=0, max=1, currency="CNY"))) is None
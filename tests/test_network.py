@@ -293,3 +293,50 @@ def test_broadcast_to_multiple_agent_types():
         assert len(messages) == 1
         assert messages[0]["data"] == intent
         assert messages[0]["type"] == "intent"
+
+
+def test_broadcast_intents_batch():
+    """Test batched intent broadcast reaches every listener in order"""
+    network = InMemoryNetwork()
+    keypair = KeyPair()
+    received = []
+    network.listen_intents(received.append)
+    
+    batch = [
+        Intent(
+            buyer=BuyerInfo(agent_id="buyer_001", public_key=keypair.get_public_key_base64()),
+            demand=Demand(category=category, budget=Budget(min=1, max=2, currency="CNY"))
+        )
+        for category in ["laptop", "phone", "tablet"]
+    ]
+    network.broadcast_intents(batch)
+    
+    assert [intent.intent_id for intent in received] == [intent.intent_id for intent in batch]
+
+
+
+class RacingCallbacks(dict):
+    """每次成员检查后立刻注销该键，模拟时间轮线程在检查与取值之间注销监听器"""
+
+    def __contains__(self, key):
+        found = dict.__contains__(self, key)
+        self.pop(key, None)
+        return found
+
+
+def test_unlisten_between_check_and_delivery():
+    """Test send_offer/send_deal tolerate listeners removed concurrently (e.g. by the timer wheel thread)"""
+    network = InMemoryNetwork()
+    network.offer_callbacks = RacingCallbacks(network.offer_callbacks)
+    network.deal_callbacks = RacingCallbacks(network.deal_callbacks)
+    received = []
+    network.listen_offers("intent-1", received.append)
+    network.listen_deals("offer-1", received.append)
+
+    offer = Offer(intent_id="intent-1", seller=SellerInfo(agent_id="seller", name="Shop", public_key="dGVzdA=="),
+                  item=Item(name="Laptop", sku="LTP-001"), price=Price(amount=150000, currency="CNY"), stock=3)
+    deal = Deal(offer_id="offer-1", buyer=BuyerInfo(agent_id="buyer", public_key="dGVzdA=="),
+                payment=Payment(method="card", status="pending"))
+    network.send_offer(offer, "intent-1")
+    network.send_deal(deal, "offer-1")
+    assert received == [offer, deal]
@@ -0,0 +1,108 @@
+"""Test cases for columnar offer buffer"""
+
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.offer_buffer import OfferBuffer, np
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Offer, SellerInfo, Item, Price
+
+
+MODES = [False] + ([True] if np is not None else [])
+
+
+def make_offer(seller_id: str, price: int, stock: int = 5, ram: str = None) -> Offer:
+    return Offer(
+        intent_id="test_intent",
+        seller=SellerInfo(agent_id=seller_id, name="Shop", public_key="pk"),
+        item=Item(
+            name="Laptop",
+            sku=f"SKU-{seller_id}-{price}",
+            attributes={"ram": ram} if ram else None
+        ),
+        price=Price(amount=price, currency="CNY"),
+        stock=stock
+    )
+
+
+@pytest.mark.parametrize("use_numpy", MODES)
+def test_best_matches_min_price(use_numpy):
+    """Test best() agrees with min() over price, keeping first on ties"""
+    offers = [
+        make_offer("s1", 500),
+        make_offer("s2", 300),
+        make_offer("s3", 300),
+        make_offer("s4", 900),
+    ]
+    buffer = OfferBuffer(use_numpy=use_numpy, capacity=2)  # 强制扩容
+    buffer.extend(offers)
+
+    assert len(buffer) == 4
+    assert buffer.best() is min(offers, key=lambda o: o.price.amount)
+    assert buffer.best() is offers[1]
+
+
+@pytest.mark.parametrize("use_numpy", MODES)
+def test_filters(use_numpy):
+    """Test price, stock, attribute and seller filters"""
+    buffer = OfferBuffer(attribute_keys=["ram"], use_numpy=use_numpy)
+    buffer.extend([
+        make_offer("s1", 100, stock=0, ram="8GB"),
+        make_offer("s2", 200, ram="16GB"),
+        make_offer("s3", 300, ram="16GB"),
+        make_offer("s4", 400),
+    ])
+
+    assert buffer.filter(max_price=250) == [0, 1]
+    assert buffer.filter(min_stock=1) == [1, 2, 3]
+    assert buffer.filter(attributes={"ram": "16GB"}) == [1, 2]
+    assert buffer.filter(attributes={"ram": "64GB"}) == []
+    assert buffer.filter(attributes={"ram": "16GB"}, exclude_sellers=["s2"]) == [2]
+
+    assert buffer.best(min_stock=1).seller.agent_id == "s2"
+    assert buffer.best(min_price=1000) is None
+    assert [o.seller.agent_id for o in buffer.top_k(2, min_stock=1)] == ["s2", "s3"]
+
+    with pytest.raises(KeyError):
+        buffer.filter(attributes={"cpu": "i7"})
+
+
+@pytest.mark.parametrize("use_numpy", MODES)
+def test_unhashable_attribute_values(use_numpy):
+    """Test list / dict attribute values are encoded by value instead of crashing append()"""
+    buffer = OfferBuffer(attribute_keys=["ram"], use_numpy=use_numpy)
+    buffer.extend([
+        make_offer("s1", 100, ram=["8GB", "16GB"]),
+        make_offer("s2", 200, ram={"size": 16, "unit": "GB"}),
+        make_offer("s3", 300, ram=["8GB", "16GB"]),
+        make_offer("s4", 400, ram='["8GB", "16GB"]'),
+    ])
+
+    assert buffer.filter(attributes={"ram": ["8GB", "16GB"]}) == [0, 2]
+    assert buffer.filter(attributes={"ram": {"unit": "GB", "size": 16}}) == [1]
+    assert buffer.filter(attributes={"ram": '["8GB", "16GB"]'}) == [3]
+
+
+@pytest.mark.parametrize("use_numpy", MODES)
+def test_stock_weighted_score(use_numpy):
+    """Test stock weight can outrank a slightly cheaper offer"""
+    buffer = OfferBuffer(use_numpy=use_numpy)
+    buffer.extend([make_offer("s1", 1000, stock=1), make_offer("s2", 1005, stock=100)])
+
+    assert buffer.best().seller.agent_id == "s1"
+    assert buffer.best(stock_weight=1.0).seller.agent_id == "s2"
+
+
+def test_buyer_select_best_uses_buffer():
+    """Test BuyerAgent.select_best accepts buffers and filters"""
+    buyer = BuyerAgent(agent_id="test_buyer", network=InMemoryNetwork(),
+                       score_attributes=["ram"])
+    offers = [make_offer("s1", 200, ram="8GB"), make_offer("s2", 300, ram="16GB")]
+    buyer.received_offers = list(offers)
+    buyer.offer_buffer.extend(offers)
+
+    assert buyer.select_best(buyer.received_offers) is offers[0]
+    assert buyer.select_best(buyer.received_offers, attributes={"ram": "16GB"}) is offers[1]
+    assert buyer.select_best(offers, max_price=250) is offers[0]
+
+    with pytest.raises(ValueError):
+        buyer.select_best(offers, max_price=100)
@@ -0,0 +1,88 @@
+"""Test cases for prebuilt offer templates and cached key encodings"""
+
+import base64
+import time
+from acp0.agents.seller import SellerAgent
+from acp0.agents.snapshots import CatalogStore, CatalogDelta
+from acp0.core.crypto import KeyPair
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.network.memory import InMemoryNetwork
+
+
+def make_seller(inventory=None):
+    inventory = inventory if inventory is not None else {
+        "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 10,
+                    "attributes": {"ram": "16GB"}}],
+    }
+    return SellerAgent("seller", "Shop", inventory, InMemoryNetwork(), offer_ttl=30)
+
+
+def make_intent(currency="CNY") -> Intent:
+    return Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key="pk"),
+        demand=Demand(category="laptop", budget=Budget(min=1, max=500000, currency=currency))
+    )
+
+
+def test_key_encodings_cached():
+    """Test public key encodings are computed once and stay correct"""
+    keypair = KeyPair()
+    encoded = keypair.get_public_key_base64()
+    assert keypair.get_public_key_base64() is encoded
+    assert base64.b64decode(encoded) == keypair.public_key.to_string() == keypair.get_public_key_bytes()
+
+
+def test_offers_share_skeleton():
+    """Test offers for the same SKU reuse nested models and fill per-offer fields"""
+    seller = make_seller()
+    first = seller._build_offer(make_intent())
+    second = seller._build_offer(make_intent())
+    assert first.seller is second.seller and first.item is second.item and first.price is second.price
+    assert first.offer_id != second.offer_id and first.nonce != second.nonce
+    assert first.intent_id != second.intent_id
+    assert first.timestamp + 30 <= first.expires_at <= first.timestamp + 31 and abs(first.timestamp - time.time()) <= 1
+    assert first.seller.public_key == seller.keypair.get_public_key_base64()
+    assert seller._build_offer(make_intent("USD")).price is not first.price
+    assert seller.templates.built == 2
+
+    first.sign(seller.keypair)
+    assert first.verify()
+
+
+def test_templates_follow_product_changes():
+    """Test price edits, reindex, catalog swaps and key changes rebuild templates"""
+    seller = make_seller()
+    product = seller.inventory["laptop"][0]
+    before = seller._build_offer(make_intent())
+
+    product["price"] = 140000  # 未调用 reindex
+    assert seller._build_offer(make_intent()).price.amount == 140000
+
+    product["attributes"] = {"ram": "32GB"}
+    seller.reindex()
+    assert seller._build_offer(make_intent()).item.attributes == {"ram": "32GB"}
+
+    seller.keypair = KeyPair()
+    offer = seller._build_offer(make_intent())
+    assert offer.seller is not before.seller
+    assert offer.seller.public_key == seller.keypair.get_public_key_base64()
+
+    store = CatalogStore({"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 10}]})
+    seller = make_seller(store)
+    assert seller._build_offer(make_intent()).item.name == "Laptop"
+    store.apply([CatalogDelta.update("LTP-001", name="Laptop 2", attributes={"ram": "8GB"})])
+    item = seller._build_offer(make_intent()).item
+    assert item.name == "Laptop 2" and item.attributes == {"ram": "8GB"}
+
+
+def test_sub_second_ttl_offer_outlives_creation():
+    """Test a fractional offer_ttl is rounded up instead of expiring the offer on creation"""
+    seller = SellerAgent("seller", "Shop", {
+        "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 10}],
+    }, InMemoryNetwork(), offer_ttl=0.5)
+    before = time.time()
+    offer = seller._match_intent(make_intent())
+    assert not offer.is_expired()
+    assert offer.expires_at >= before + 0.5
+    assert offer.expires_at - offer.timestamp <= 2
+    assert seller.reservations.held("LTP-001") == 1
@@ -0,0 +1,158 @@
+"""Test cases for seller intent pipeline"""
+
+import copy
+import time
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.agents.pipeline import SellerPipeline
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.core.crypto import KeyPair, sign_message
+
+
+INVENTORY = {
+    "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}]
+}
+
+
+def make_intent(keypair: KeyPair, category: str = "laptop", signed: bool = True) -> Intent:
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="test_buyer", public_key=keypair.get_public_key_base64()),
+        demand=Demand(category=category, budget=Budget(min=100000, max=200000, currency="CNY"))
+    )
+    if signed:
+        sign_message(intent, keypair)
+    return intent
+
+
+def make_seller(network=None) -> SellerAgent:
+    return SellerAgent(
+        agent_id="test_seller",
+        shop_name="Test Shop",
+        inventory=copy.deepcopy(INVENTORY),  # 预留会扣减库存，各测试独立
+        network=network or InMemoryNetwork()
+    )
+
+
+def test_pipelined_seller_responds_to_buyer():
+    """Test offers flow through all pipeline stages back to the buyer"""
+    network = InMemoryNetwork()
+    seller = make_seller(network)
+    deals = []
+    pipeline = seller.listen_pipelined(on_deal=deals.append, verify_workers=2, sign_batch_size=4)
+
+    buyer = BuyerAgent(agent_id="test_buyer", network=network)
+    results = buyer.broadcast_many(
+        [{"category": "laptop", "budget_range": (100000, 200000)} for _ in range(5)]
+        + [{"category": "phone", "budget_range": (1, 2)}],
+        wait=0
+    )
+    pipeline.stop()
+
+    offers = [offer for batch in results.values() for offer in batch]
+    assert len(offers) == 5
+    assert all(offer.verify() for offer in offers)
+
+    stats = pipeline.stats()
+    assert stats["received"] == 6
+    assert stats["signed"] == stats["sent"] == 5
+    assert stats["unmatched"] == 1
+    assert stats["shed"] == 0
+    assert stats["queue_depth"] == 0
+
+    buyer.purchase(offers[0])
+    assert len(deals) == 1
+
+
+def test_drop_policy_sheds_when_full():
+    """Test drop policy rejects intents once the intake queue is full"""
+    keypair = KeyPair()
+    pipeline = SellerPipeline(make_seller(), queue_size=2, overflow="drop")
+
+    results = [pipeline.submit(make_intent(keypair, signed=False)) for _ in range(4)]
+
+    assert results == [True, True, False, False]
+    stats = pipeline.stats()
+    assert stats["accepted"] == 2
+    assert stats["shed"] == 2
+    assert stats["max_queue_depth"] == 2
+
+
+def test_defer_policy_drains_deferred_intents():
+    """Test deferred intents are processed once capacity frees up"""
+    keypair = KeyPair()
+    pipeline = SellerPipeline(make_seller(), queue_size=1, overflow="defer", defer_limit=2)
+
+    intents = [make_intent(keypair) for _ in range(3)] + [make_intent(keypair, signed=False)]
+    results = [pipeline.submit(intent) for intent in intents]
+    assert results == [True, True, True, False]
+    assert pipeline.stats()["deferred_depth"] == 2
+
+    pipeline.start()
+    pipeline.stop(drain=True)
+
+    stats = pipeline.stats()
+    assert stats["deferred"] == 2
+    assert stats["shed"] == 1
+    assert stats["sent"] == 3
+    assert stats["deferred_depth"] == 0
+
+
+def test_invalid_intents_are_counted():
+    """Test unsigned intents are rejected at the verify stage"""
+    keypair = KeyPair()
+    pipeline = SellerPipeline(make_seller())
+    pipeline.start()
+    pipeline.submit(make_intent(keypair, signed=False))
+    pipeline.stop()
+
+    assert pipeline.stats()["invalid"] == 1
+    assert pipeline.stats()["sent"] == 0
+
+
+def test_stopped_pipeline_rejects_new_intents():
+    """Test intents arriving after stop() are rejected instead of piling up in the queues"""
+    network = InMemoryNetwork()
+    pipeline = make_seller(network).listen_pipelined()
+    pipeline.stop()
+
+    buyer = BuyerAgent(agent_id="test_buyer", network=network)
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    assert handle.wait(timeout=0.2) == []
+    assert not pipeline.submit(make_intent(KeyPair()))
+
+    stats = pipeline.stats()
+    assert stats["stopped"] == 2
+    assert stats["accepted"] == 0
+    assert stats["queue_depth"] == stats["deferred_depth"] == 0
+
+
+def test_non_draining_stop_loses_no_work():
+    """Test stop(drain=False) accounts for every accepted intent and leaves no orphaned reservations"""
+    keypair = KeyPair()
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 1000}]}
+    seller = SellerAgent("test_seller", "Test Shop", inventory, InMemoryNetwork())
+    pipeline = SellerPipeline(seller, queue_size=1024, verify_workers=4, match_workers=2,
+                              sign_workers=2, send_workers=2, sign_batch_size=4)
+    intents = [make_intent(keypair) for _ in range(200)]
+    pipeline.start()
+    for intent in intents:
+        pipeline.submit(intent)
+    deadline = time.time() + 5
+    while pipeline.stats()["sent"] < 10 and time.time() < deadline:
+        time.sleep(0.001)  # 让各阶段都有在途的工作
+    pipeline.stop(drain=False)
+
+    stats = pipeline.stats()
+    settled = sum(stats[name] for name in ("sent", "shed", "expired", "filtered", "invalid", "unmatched", "errors"))
+    assert stats["accepted"] == 200
+    assert settled == stats["accepted"]
+    assert stats["sent"] > 0
+    assert seller.reservations.held("LTP-001") == stats["sent"]
+
+
+def test_unknown_overflow_policy():
+    """Test unknown overflow policies are rejected"""
+    with pytest.raises(ValueError):
+        SellerPipeline(make_seller(), overflow="block")
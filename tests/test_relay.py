@@ -0,0 +1,189 @@
+"""Test cases for relay federation"""
+
+import copy
+import socket
+import threading
+import time
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.network.envelope import MessageView, encode_frame, pack_frame
+from acp0.network.relay import RelayNode, SeenSet, _Link, _SocketLink, connect
+from acp0.utils.timer_wheel import TimerWheel
+
+INVENTORY = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}]}
+
+
+def make_cluster(n, max_hops=4, edges=None):
+    timers = TimerWheel()
+    relays = [RelayNode(InMemoryNetwork(), f"r{i}", max_hops=max_hops, timers=timers) for i in range(n)]
+    for a, b in edges if edges is not None else [(i, i + 1) for i in range(n - 1)]:
+        connect(relays[a], relays[b])
+    return relays, timers
+
+
+def test_seen_set_bounded():
+    """Test the nonce set rejects repeats and evicts oldest entries"""
+    seen = SeenSet(capacity=2)
+    assert seen.add("a") and not seen.add("a")
+    assert seen.add("b") and seen.add("c")
+    assert len(seen) == 2 and "a" not in seen and seen.add("a")
+
+
+def test_chain_forward_and_reverse_path():
+    """Test intents cross a chain and offers / deals return along the reverse path"""
+    relays, timers = make_cluster(3)
+    deals = []
+    seller = SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), relays[2].network, timers=timers)
+    seller.listen(on_deal=deals.append)
+    buyer = BuyerAgent("buyer", relays[0].network, timers=timers)
+
+    offers = buyer.broadcast("laptop", (100000, 200000))
+    assert len(offers) == 1 and offers[0].item.sku == "LTP-001"
+    deal = buyer.purchase(offers[0])
+    assert [d.deal_id for d in deals] == [deal.deal_id]
+    assert relays[1].stats()["forwarded"] == 3  # intent 下行，offer 上行，deal 下行
+    assert relays[2].stats()["delivered"] == 2
+
+    # 反向路径在 Intent / Offer 过期后注销
+    timers.advance(time.time() + 3600)
+    assert not relays[2].network.offer_callbacks and not relays[0].network.deal_callbacks
+
+
+def test_mesh_duplicate_suppression_and_hop_limit():
+    """Test a full mesh delivers each intent once per node and hop limit bounds a chain"""
+    edges = [(a, b) for a in range(4) for b in range(a + 1, 4)]
+    relays, timers = make_cluster(4, edges=edges)
+    sellers = [SellerAgent(f"s{i}", "Shop", copy.deepcopy(INVENTORY), r.network, timers=timers)
+               for i, r in enumerate(relays)]
+    for seller in sellers:
+        seller.listen()
+    buyer = BuyerAgent("buyer", relays[0].network, timers=timers)
+    offers = buyer.broadcast("laptop", (100000, 200000))
+    assert sorted(o.seller.agent_id for o in offers) == ["s0", "s1", "s2", "s3"]
+    stats = [r.stats() for r in relays]
+    assert sum(s["duplicates"] for s in stats) == 6  # 3 个节点各收到 3 份，只处理 1 份
+    assert all(s["delivered"] >= 1 for s in stats[1:])
+
+    chain, _ = make_cluster(4, max_hops=2)
+    reached = []
+    for relay in chain:
+        relay.network.listen_intents(lambda intent, relay=relay: reached.append(relay.node_id))
+    BuyerAgent("buyer", chain[0].network, timers=timers).broadcast("laptop", (1, 2))
+    assert sorted(reached) == ["r0", "r1", "r2"]
+    assert chain[2].stats()["hop_limited"] == 1
+
+    with pytest.raises(ValueError):
+        RelayNode(InMemoryNetwork(), "bad", max_hops=0)
+
+
+def test_tcp_relays():
+    """Test two relays federate over localhost sockets"""
+    timers = TimerWheel()
+    a = RelayNode(InMemoryNetwork(), "a", timers=timers)
+    b = RelayNode(InMemoryNetwork(), "b", timers=timers)
+    try:
+        port = b.serve()
+        a.connect_tcp("127.0.0.1", port)
+        deadline = time.monotonic() + 5
+        while not b.peers() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert a.peers() == ["b"] and b.peers() == ["a"]
+
+        deals = []
+        seller = SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), b.network, timers=timers)
+        seller.listen(on_deal=deals.append)
+        buyer = BuyerAgent("buyer", a.network, timers=timers)
+        offers = buyer.broadcast("laptop", (100000, 200000))
+        assert [o.item.sku for o in offers] == ["LTP-001"]
+        buyer.purchase(offers[0])
+        while not deals and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(deals) == 1
+    finally:
+        a.close()
+        b.close()
+
+
+def test_socket_send_never_blocks_on_a_stalled_peer():
+    """Test sends go through the link's writer queue, so a peer that stops reading cannot block the relay"""
+    node = RelayNode(InMemoryNetwork(), "a", send_queue=64)
+    local, remote = socket.socketpair()
+    local.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    link = _SocketLink(node, local, "stalled")
+    link.writer.start()  # 对端从不读取
+    intent = Intent(buyer=BuyerInfo(agent_id="buyer", public_key="x" * 1000),
+                    demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY")))
+    view = MessageView.from_message(intent)
+    try:
+        start = time.monotonic()
+        for _ in range(1000):  # 约 1 MB，远超 socket 缓冲区
+            link.send(view, 1)
+        assert time.monotonic() - start < 2
+        assert node.stats()["overflow"] > 0
+    finally:
+        link.close()
+        remote.close()
+
+
+class RecordingLink(_Link):
+    """记录转发出去的帧"""
+
+    def __init__(self, peer_id: str):
+        self.peer_id = peer_id
+        self.frames = []
+
+    def send(self, view, hops):
+        self.frames.append(view.frame())
+
+
+def make_intent(**kwargs) -> Intent:
+    return Intent(buyer=BuyerInfo(agent_id="buyer", public_key="dGVzdA=="),
+                  demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY")), **kwargs)
+
+
+def test_relay_forwards_raw_frames_without_decoding_duplicates():
+    """Test relays route on the frame header: original bytes are forwarded and duplicates are never parsed"""
+    node = RelayNode(InMemoryNetwork(), "r", timers=TimerWheel())
+    source, out = RecordingLink("source"), RecordingLink("out")
+    node._attach(source)
+    node._attach(out)
+    raw = encode_frame(make_intent())
+
+    node.receive(MessageView(raw), 1, source)
+    duplicate = MessageView(raw)
+    node.receive(duplicate, 1, source)
+    assert out.frames == [raw]
+    assert duplicate._data is None and duplicate._model is None
+    assert node.stats()["duplicates"] == 1 and node.stats()["delivered"] == 1
+
+    # 正文损坏的帧照样按路由头转发，只在本地投递时计入 malformed
+    intent = make_intent()
+    corrupt = pack_frame("intent", intent.intent_id, "laptop", intent.nonce, intent.timestamp, None, b"{")
+    node.receive(MessageView(corrupt), 1, source)
+    assert out.frames[-1] == corrupt
+    assert node.stats()["malformed"] == 1 and node.stats()["delivered"] == 1
+
+
+def test_local_delivery_runs_outside_the_relay_lock():
+    """Test listeners run without the node lock held, so relays calling each other cannot deadlock"""
+    (a, b), timers = make_cluster(2)
+    acquired = []
+
+    def try_lock():
+        if b._lock.acquire(timeout=1):
+            b._lock.release()
+            acquired.append(True)
+
+    def listener(intent):
+        # 另一个线程（如对端向 b 注入消息的线程）此时必须能拿到 b 的锁
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+
+    b.network.listen_intents(listener)
+    a.network.broadcast_intent(make_intent())
+    assert acquired == [True]
+    timers.stop()
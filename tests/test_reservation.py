@@ -0,0 +1,113 @@
+"""Test cases for stock reservation engine"""
+
+import threading
+import pytest
+from acp0.agents.reservation import ReservationEngine
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.memory import InMemoryNetwork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def inventory():
+    return {
+        "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 2}],
+        "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 1}]
+    }
+
+
+def test_reserve_confirm_release(inventory):
+    """Test holds decrement available stock until confirmed or released"""
+    engine = ReservationEngine(inventory, ttl=10)
+    laptop = inventory["laptop"][0]
+
+    assert engine.reserve("o1", "LTP-001")
+    assert engine.reserve("o2", "LTP-001")
+    assert not engine.reserve("o3", "LTP-001")  # 已全部预留
+    assert not engine.reserve("o1", "PHN-001")  # 同一 Offer 不重复预留
+    assert not engine.reserve("o4", "UNKNOWN")
+    assert laptop["stock"] == 0 and engine.held("LTP-001") == 2
+
+    assert engine.confirm("o1")
+    assert not engine.confirm("o1")
+    assert engine.release("o2")
+    assert laptop["stock"] == 1
+
+    stats = engine.stats()
+    assert (stats["reserved"], stats["confirmed"], stats["released"], stats["rejected"]) == (2, 1, 1, 3)
+    assert stats["pending"] == 0
+
+
+def test_expired_holds_are_released(inventory):
+    """Test expiry returns stock and late deals are rejected"""
+    clock = FakeClock()
+    engine = ReservationEngine(inventory, ttl=5, sweep_interval=1, clock=clock)
+    phone = inventory["phone"][0]
+
+    assert engine.reserve("o1", "PHN-001")
+    clock.now = 6
+    assert not engine.confirm("o1")
+    assert phone["stock"] == 1
+
+    assert engine.reserve("o2", "PHN-001")
+    clock.now = 12
+    assert engine.reserve("o3", "LTP-001")  # 顺带清扫 o2
+    assert engine.get("o2") is None
+    assert phone["stock"] == 1
+    assert engine.stats()["expired"] == 2
+
+
+def test_concurrent_reservations_never_oversell():
+    """Test many threads competing for the same SKUs"""
+    inventory = {"laptop": [{"sku": f"SKU-{i}", "name": "Laptop", "price": 1, "stock": 50}
+                            for i in range(4)]}
+    engine = ReservationEngine(inventory, ttl=60, stripes=2)
+    granted = []
+
+    def worker(n):
+        count = 0
+        for i in range(100):
+            if engine.reserve(f"offer-{n}-{i}", f"SKU-{i % 4}"):
+                count += 1
+        granted.append(count)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(granted) == 200
+    assert all(p["stock"] == 0 for p in inventory["laptop"])
+    assert engine.stats()["reserved"] == 200
+
+
+def test_seller_confirms_reservation_on_deal():
+    """Test offers hold stock and a verified deal confirms the hold"""
+    network = InMemoryNetwork()
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 1}]}
+    seller = SellerAgent("seller", "Shop", inventory, network, offer_ttl=60)
+    deals = []
+    seller.listen(on_deal=deals.append)
+
+    first = BuyerAgent("buyer-1", network)
+    second = BuyerAgent("buyer-2", network)
+    offers = first.broadcast("laptop", (100000, 200000))
+    assert len(offers) == 1
+    assert offers[0].timestamp + 60 <= offers[0].expires_at <= offers[0].timestamp + 61
+
+    # 唯一一件已被预留，第二个买家收不到 Offer
+    assert second.broadcast("laptop", (100000, 200000)) == []
+
+    first.purchase(offers[0])
+    assert len(deals) == 1
+    assert inventory["laptop"][0]["stock"] == 0
+    assert seller.reservations.stats()["confirmed"] == 1
@@ -0,0 +1,173 @@
+"""Test cases for the HMAC session mode"""
+
+import time
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.core.compact import compact, expand
+from acp0.core.crypto import KeyPair, sign_message
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.core.session import SessionManager
+from acp0.network.faults import FaultProfile, FaultyNetwork
+from acp0.network.memory import InMemoryNetwork
+
+INVENTORY = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 20}]}
+
+
+def setup(**session_options):
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", {k: [dict(p) for p in v] for k, v in INVENTORY.items()},
+                         network, sessions=SessionManager(**session_options))
+    deals = []
+    seller.listen(on_deal=deals.append)
+    buyer = BuyerAgent("buyer", network, sessions=SessionManager(**session_options))
+    return seller, buyer, deals
+
+
+def collect(buyer):
+    handle = buyer.open_intent("laptop", (100000, 200000))
+    offers = handle.wait(timeout=2)
+    assert len(offers) == 1
+    return offers[0]
+
+
+def test_handshake_then_hmac_offers():
+    """Test the first offer is an ECDSA handshake and follow-ups carry session tags"""
+    seller, buyer, _ = setup()
+
+    first = collect(buyer)
+    assert first.session_id is None and first.ecdh_key is not None
+    assert first.verify()
+    assert len(buyer.sessions) == len(seller.sessions) == 1
+
+    second = collect(buyer)
+    assert second.session_id == next(iter(buyer.sessions._sessions))
+    assert not second.verify()  # 会话标签不是 ECDSA 签名
+    assert buyer.sessions.verify(second)
+    assert buyer.sessions.verify(expand(compact(second)))
+    assert seller.sessions.stats()["sealed"] == 1
+    assert buyer.sessions.stats()["verified"] >= 1
+
+
+def test_tampered_or_foreign_tags_are_rejected():
+    """Test the tag covers the message and binds the peer's long-term key"""
+    seller, buyer, _ = setup()
+    collect(buyer)
+    offer = collect(buyer)
+
+    tampered = offer.model_copy(deep=True)
+    tampered.price.amount = 1
+    assert not buyer.sessions.verify(tampered)
+
+    forged = offer.model_copy(deep=True)
+    forged.seller.public_key = KeyPair().get_public_key_base64()
+    assert not buyer.sessions.verify(forged)
+
+    # 其他代理没有该会话
+    assert not SessionManager().verify(offer)
+
+
+def test_deals_use_ecdsa_unless_repudiation_is_allowed():
+    """Test deals stay ECDSA-signed by default and can opt into session tags"""
+    seller, buyer, deals = setup()
+    collect(buyer)
+    offer = collect(buyer)
+
+    signed = buyer.purchase(offer)
+    assert signed.session_id is None and signed.verify()
+
+    offer = collect(buyer)
+    sealed = buyer.purchase(offer, non_repudiation=False)
+    assert sealed.session_id is not None
+    assert [deal.deal_id for deal in deals] == [signed.deal_id, sealed.deal_id]
+
+
+def test_expiry_and_rekey():
+    """Test a rekey-due session triggers a new handshake and expired sessions are rejected"""
+    seller, buyer, _ = setup(ttl=2, rekey_after=1)
+    collect(buyer)
+    sealed = collect(buyer)
+    assert sealed.session_id is not None
+
+    time.sleep(1.1)
+    rekeyed = collect(buyer)
+    assert rekeyed.session_id is None and rekeyed.ecdh_key is not None
+    assert seller.sessions.stats()["rekeyed"] == 1
+    assert buyer.sessions.verify(sealed)  # 旧会话在 ttl 内仍可验证
+
+    time.sleep(1)
+    assert not buyer.sessions.verify(sealed)
+
+
+def test_invalid_handshake_key_falls_back_to_ecdsa():
+    """Test an intent with a bogus ECDH key still gets a plain signed offer"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", {k: [dict(p) for p in v] for k, v in INVENTORY.items()},
+                         network, sessions=SessionManager())
+    keypair = KeyPair()
+    intent = Intent(buyer=BuyerInfo(agent_id="b", public_key=keypair.get_public_key_base64()),
+                    demand=Demand(category="laptop", budget=Budget(min=1, max=200000, currency="CNY")),
+                    ecdh_key="bm90IGEga2V5")
+    sign_message(intent, keypair)
+    offer = seller._match_intent(intent)
+    assert not seller._seal_offer(offer, intent)
+    assert offer.ecdh_key is None
+    assert len(seller.sessions) == 0
+
+    with pytest.raises(ValueError):
+        SessionManager(ttl=10, rekey_after=20)
+
+
+def test_rejected_handshake_keeps_seller_on_ecdsa():
+    """Test a handshake offer the buyer rejects leaves the seller's session pending, not sealing"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", {
+        "laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 500, "stock": 20}],
+        "mouse": [{"sku": "MSE-001", "name": "Mouse", "price": 50, "stock": 20}],
+    }, network, sessions=SessionManager())
+    seller.listen()
+    buyer = BuyerAgent("buyer", network, max_price=100, sessions=SessionManager())
+
+    assert buyer.open_intent("laptop", (1, 1000)).wait(timeout=0.2) == []  # 握手 Offer 超出价格上限
+    assert seller.sessions.stats()["pending"] == 1
+    assert len(buyer.sessions) == 0
+
+    # 卖家不能用买家没有的会话：重发同一握手，照常 ECDSA 签名
+    offers = buyer.open_intent("mouse", (1, 100)).wait(timeout=2)
+    assert len(offers) == 1
+    assert offers[0].session_id is None and offers[0].ecdh_key is not None
+    assert seller.sessions.stats()["handshakes"] == 1
+    acks = buyer.sessions.acks()
+    assert acks == [next(iter(buyer.sessions._sessions))]
+
+    # 下一条 Intent 带 session_acks，卖家确认后才用会话标签
+    handle = buyer.open_intent("mouse", (1, 100))
+    assert handle.intent.session_acks == acks
+    sealed = handle.wait(timeout=2)
+    assert len(sealed) == 1 and sealed[0].session_id is not None
+    assert buyer.sessions.acks() == []
+    assert seller.sessions.stats()["confirmed"] == 1
+    assert seller.sessions.stats()["pending"] == 0
+
+
+def test_dropped_handshake_is_resent_and_confirmed_by_sealed_deal():
+    """Test a lost handshake offer is resent, and a sealed deal also confirms the session"""
+    network = FaultyNetwork(InMemoryNetwork(), {"offer": FaultProfile(drop=1.0)})
+    seller = SellerAgent("seller", "Shop", {k: [dict(p) for p in v] for k, v in INVENTORY.items()},
+                         network, sessions=SessionManager())
+    deals = []
+    seller.listen(on_deal=deals.append)
+    buyer = BuyerAgent("buyer", network, sessions=SessionManager())
+
+    assert buyer.open_intent("laptop", (100000, 200000)).wait(timeout=0.2) == []
+    assert network.stats()["offer"]["dropped"] == 1
+
+    network.profiles.clear()
+    offer = collect(buyer)
+    assert offer.session_id is None and offer.ecdh_key is not None and offer.verify()
+    assert seller.sessions.stats()["pending"] == 1
+
+    sealed = buyer.purchase(offer, non_repudiation=False)
+    assert sealed.session_id is not None and len(deals) == 1
+    assert seller.sessions.stats()["confirmed"] == 1
+    assert collect(buyer).session_id is not None
@@ -0,0 +1,116 @@
+"""Test cases for shared-memory ring buffer network"""
+
+import multiprocessing
+import time
+import pytest
+from acp0.network.shm import SharedMemoryBus, SharedMemoryNetwork
+from acp0.core.exceptions import NetworkError
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+
+INVENTORY = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}]}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def bus():
+    bus = SharedMemoryBus(nodes=2, capacity=4096)
+    yield bus
+    bus.unlink()
+
+
+def test_agents_across_nodes(bus):
+    """Test buyer and seller on different ring nodes complete a deal"""
+    buyer_net = SharedMemoryNetwork(bus, node_id=0)
+    seller_net = SharedMemoryNetwork(bus, node_id=1)
+    try:
+        seller = SellerAgent("seller", "Shop", {"laptop": [dict(INVENTORY["laptop"][0])]}, seller_net)
+        deals = []
+        seller.listen(on_deal=deals.append)
+
+        buyer = BuyerAgent("buyer", buyer_net)
+        offers = buyer.broadcast("laptop", (100000, 200000))
+        assert len(offers) == 1 and offers[0].verify()
+
+        deal = buyer.purchase(offers[0])
+        assert wait_for(lambda: deals)
+        assert deals[0].deal_id == deal.deal_id
+        assert seller_net.stats()["delivered"] == 2  # Intent + Deal
+    finally:
+        buyer_net.close()
+        seller_net.close()
+
+
+def test_ring_wraps_and_applies_backpressure(bus):
+    """Test messages survive wrap-around and a stalled consumer blocks the producer"""
+    from acp0.core.crypto import KeyPair
+    from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+
+    keypair = KeyPair()
+    producer = SharedMemoryNetwork(bus, node_id=0, publish_timeout=0.2)
+    consumer = SharedMemoryNetwork(bus, node_id=1, dispatch_thread=False)
+    received = []
+    consumer.listen_raw(lambda view: received.append(view.message_id))
+
+    def intent():
+        return Intent(
+            buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+            demand=Demand(category="laptop", budget=Budget(min=1, max=2, currency="CNY"))
+        )
+
+    try:
+        sent = [intent() for _ in range(60)]  # 远超 4KB 环容量
+        for message in sent:
+            producer.broadcast_intent(message)
+            consumer.poll(timeout=0)
+        assert received == [message.intent_id for message in sent]
+
+        # 消费者不再读取时，生产者在超时后报错，而不是覆盖未读数据
+        with pytest.raises(NetworkError):
+            for _ in range(60):
+                producer.broadcast_intent(intent())
+        assert consumer.stats()["backlog"] > 0
+    finally:
+        producer.close()
+        consumer.close()
+
+
+def _run_seller(bus, ready, done):
+    network = SharedMemoryNetwork(bus, node_id=1)
+    seller = SellerAgent("seller", "Shop", {"laptop": [dict(INVENTORY["laptop"][0])]}, network)
+    seller.listen(on_deal=lambda deal: done.set())
+    ready.set()
+    done.wait(10)
+    time.sleep(0.1)
+    network.close()
+    bus.close()
+
+
+def test_agents_across_processes():
+    """Test a seller in a child process answers a buyer in the parent"""
+    ctx = multiprocessing.get_context("fork")
+    bus = SharedMemoryBus(nodes=2, context=ctx)
+    ready, done = ctx.Event(), ctx.Event()
+    child = ctx.Process(target=_run_seller, args=(bus, ready, done))
+    child.start()
+    network = SharedMemoryNetwork(bus, node_id=0)
+    try:
+        assert ready.wait(10)
+        buyer = BuyerAgent("buyer", network)
+        offers = buyer.broadcast("laptop", (100000, 200000))
+        assert len(offers) == 1
+        buyer.purchase(offers[0])
+        assert done.wait(10)
+    finally:
+        network.close()
+        child.join(10)
+        bus.unlink()
+    assert child.exitcode == 0
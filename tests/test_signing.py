@@ -0,0 +1,118 @@
+"""Test cases for the process-pool signing service"""
+
+import asyncio
+import hashlib
+import threading
+import pytest
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.pipeline import SellerPipeline
+from acp0.agents.seller import SellerAgent
+from acp0.core.crypto import KeyPair
+from acp0.core.exceptions import SigningError
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.core.signing import SigningService
+from acp0.network.memory import InMemoryNetwork
+
+
+@pytest.fixture(scope="module")
+def signer():
+    service = SigningService(workers=2).start()
+    yield service
+    service.close()
+
+
+def make_intents(keypair, n):
+    return [
+        Intent(buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+               demand=Demand(category="laptop", budget=Budget(min=1, max=200000 + i, currency="CNY")))
+        for i in range(n)
+    ]
+
+
+def test_sign_batches_from_threads_and_asyncio(signer):
+    """Test digests and messages are signed by resident keys from threads and coroutines"""
+    keypair = KeyPair()
+    signer.register("buyer", keypair)
+    assert "buyer" in signer
+
+    digests = [hashlib.sha256(bytes([i])).digest() for i in range(8)]
+    signatures = signer.sign_digests("buyer", digests).result(timeout=30)
+    assert all(KeyPair.verify_digest(d, s, keypair.get_public_key_base64()) for d, s in zip(digests, signatures))
+    assert signer.sign_digests("buyer", []).result() == []
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(
+        signer.sign_messages("buyer", make_intents(keypair, 5)).result(timeout=30))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 20 and all(intent.verify() for intent in results)
+
+    async def main():
+        intents = make_intents(keypair, 3)
+        batches = await asyncio.gather(
+            signer.sign_messages_async("buyer", intents[:2]),
+            signer.sign_async("buyer", [hashlib.sha256(intents[2].to_canonical_bytes()).digest()]),
+        )
+        return intents, batches
+
+    intents, (signed, [signature]) = asyncio.run(main())
+    intents[2].signature = signature
+    assert signed == intents[:2] and all(intent.verify() for intent in intents)
+
+    with pytest.raises(ValueError):
+        signer.sign_digests("nobody", digests)
+    signer.unregister("buyer")
+    assert "buyer" not in signer
+
+
+def test_worker_restart_resends_keys(signer):
+    """Test a killed worker is restarted with its keys and pending batches"""
+    keypair = KeyPair()
+    signer.register("seller", keypair)
+    signer.sign_digests("seller", [b"\0" * 32]).result(timeout=30)
+    for worker in signer._workers:
+        worker.process.kill()
+    future = signer.sign_digests("seller", [b"\1" * 32] * 4)
+    signatures = future.result(timeout=60)
+    assert all(KeyPair.verify_digest(b"\1" * 32, s, keypair.get_public_key_base64()) for s in signatures)
+    assert signer.stats()["restarts"] >= 1
+
+
+def test_pipeline_uses_signer(signer):
+    """Test the seller pipeline signs offer batches through the service"""
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller-p", "Shop", {"laptop": [
+        {"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 50}]}, network)
+    pipeline = seller.listen_pipelined(signer=signer, sign_workers=2, sign_batch_size=4)
+    buyer_keys = KeyPair()
+    sent = []
+    for intent in make_intents(buyer_keys, 10):
+        intent.sign(buyer_keys)
+        network.listen_offers(intent.intent_id, sent.append)
+        network.broadcast_intent(intent)
+    pipeline.stop()
+    assert len(sent) == 10 and all(offer.verify() for offer in sent)
+    assert pipeline.stats()["signed"] == 10
+
+
+def test_buyer_batch_signs_through_service(signer):
+    """Test broadcast_many() hands the whole batch to the service instead of shipping the key per item"""
+    network = InMemoryNetwork()
+    received = []
+    network.listen_intents(received.append)
+    buyer = BuyerAgent("buyer-s", network, signer=signer)
+    assert "buyer-s" in signer
+
+    buyer.broadcast_many([{"category": "laptop", "budget_range": (1, 2 + i)} for i in range(6)], wait=0)
+    assert len(received) == 6 and all(intent.verify() for intent in received)
+
+
+def test_closed_service_rejects():
+    """Test requests fail once the service is closed"""
+    service = SigningService(workers=1)
+    with pytest.raises(SigningError):
+        service.sign_digests("k", [b"\0" * 32])
+    with pytest.raises(ValueError):
+        SigningService(workers=0)
@@ -0,0 +1,117 @@
+"""Test cases for copy-on-write catalog snapshots"""
+
+import threading
+import pytest
+from acp0.agents.snapshots import CatalogStore, CatalogDelta
+from acp0.agents.reservation import ReservationEngine
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.network.memory import InMemoryNetwork
+from acp0.core.messages import Demand, Budget
+
+
+def make_inventory():
+    return {
+        "laptop": [
+            {"sku": "LTP-001", "name": "Budget", "price": 120000, "stock": 5},
+            {"sku": "LTP-002", "name": "Pro", "price": 180000, "stock": 2},
+        ],
+        "phone": [{"sku": "PHN-001", "name": "Phone", "price": 50000, "stock": 3}],
+    }
+
+
+def laptop(low=100000, high=200000) -> Demand:
+    return Demand(category="laptop", budget=Budget(min=low, max=high, currency="CNY"))
+
+
+def test_apply_builds_new_version_with_sharing():
+    """Test deltas produce a new snapshot while old snapshots stay intact"""
+    store = CatalogStore(make_inventory())
+    v1 = store.current
+    assert store.match(laptop())["sku"] == "LTP-001"
+
+    v2 = store.apply([
+        CatalogDelta.price("LTP-002", 110000),
+        CatalogDelta.restock("LTP-001", 10),
+        CatalogDelta.add("tablet", {"sku": "TAB-001", "name": "Tab", "price": 90000, "stock": 1}),
+    ])
+    assert v2.version == 2 and store.current is v2
+    assert store.match(laptop())["sku"] == "LTP-002"
+    assert v1.match(laptop())["sku"] == "LTP-001"        # 旧快照不受影响
+    assert v1.get("LTP-002")["price"] == 180000
+    assert v2.get("LTP-001")["stock"] == 15
+    assert v2.shares(v1, "phone") and not v2.shares(v1, "laptop")
+    assert sorted(store) == ["laptop", "phone", "tablet"]
+
+    store.apply([CatalogDelta.remove("PHN-001"), CatalogDelta.update("LTP-001", name="Budget 2")])
+    assert "phone" not in store.current
+    assert store.current.get("LTP-001")["name"] == "Budget 2"
+
+    stats = store.stats()
+    assert stats["version"] == 3 and stats["applies"] == 2 and stats["deltas"] == 5
+    assert stats["max_apply_ms"] >= stats["last_apply_ms"] > 0
+    assert stats["age_seconds"] >= 0 and stats["products"] == 3
+
+
+def test_invalid_batch_is_rejected_atomically():
+    """Test one bad delta leaves the current snapshot untouched"""
+    store = CatalogStore(make_inventory())
+    with pytest.raises(ValueError):
+        store.apply([CatalogDelta.price("LTP-001", 1), CatalogDelta.price("NOPE", 1)])
+    with pytest.raises(ValueError):
+        store.apply([CatalogDelta.add("laptop", {"sku": "LTP-001", "name": "Dup", "price": 1})])
+    assert store.current.version == 1 and store.current.get("LTP-001")["price"] == 120000
+    assert store.stats()["rejected"] == 2
+
+
+def test_reservations_survive_snapshot_swap():
+    """Test live stock and holds migrate to the replacing product dicts"""
+    store = CatalogStore(make_inventory())
+    engine = ReservationEngine(store, ttl=60)
+    assert engine.reserve("o1", "LTP-002")
+    assert store.current.get("LTP-002")["stock"] == 1
+
+    store.apply([CatalogDelta.price("LTP-002", 170000)])
+    assert store.current.get("LTP-002")["stock"] == 1    # 实时库存随新 dict 迁移
+    store.apply([CatalogDelta.stock("LTP-002", 10)])
+    assert store.current.get("LTP-002")["stock"] == 9    # 实物 10 件，1 件预留中
+    assert engine.release("o1")
+    assert store.current.get("LTP-002")["stock"] == 10   # 释放加回最新的 dict
+
+    assert engine.reserve("o2", "LTP-002")
+    store.apply([CatalogDelta.remove("LTP-002")])
+    assert engine.confirm("o2")
+    assert engine.reserve("o3", "LTP-002") is False
+
+
+def test_seller_matches_while_catalog_changes():
+    """Test concurrent matching against a store under continuous repricing"""
+    store = CatalogStore(make_inventory())
+    network = InMemoryNetwork()
+    seller = SellerAgent("seller", "Shop", store, network)
+    seller.listen()
+    buyer = BuyerAgent("buyer", network)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                assert store.match(laptop()) is not None
+        except Exception as e:  # pragma: no cover - 失败时记录
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(200):
+        store.apply([CatalogDelta.price("LTP-001", 120000 + i), CatalogDelta.restock("LTP-002", 1)])
+    stop.set()
+    for thread in readers:
+        thread.join()
+    assert not errors
+    assert store.current.version == 201
+
+    offers = buyer.broadcast("laptop", (100000, 200000))
+    assert offers[0].item.sku == "LTP-001" and offers[0].price.amount == 120199
+    assert store.current.get("LTP-001")["stock"] == 4
@@ -0,0 +1,140 @@
+"""Test cases for timer wheel and message expiry"""
+
+import time
+import pytest
+from acp0.utils.timer_wheel import TimerWheel
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.agents.pipeline import SellerPipeline
+from acp0.agents.reservation import ReservationEngine
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.envelope import MessageView
+from acp0.core.messages import Intent, Offer, BuyerInfo, SellerInfo, Demand, Budget, Item, Price
+from acp0.core.crypto import KeyPair
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_intent(keypair, expires_at=None):
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="buyer", public_key=keypair.get_public_key_base64()),
+        demand=Demand(category="laptop", budget=Budget(min=100000, max=200000, currency="CNY")),
+        expires_at=expires_at
+    )
+    intent.sign(keypair)
+    return intent
+
+
+def test_schedule_cancel_and_cascade():
+    """Test timers fire in order across levels and cancelled ones never fire"""
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1, levels=(4, 4, 4), clock=clock)
+    fired = []
+
+    for deadline in (3, 10, 40, 500):  # 第 0 / 1 / 2 层，以及超出范围
+        wheel.schedule(deadline, fired.append, deadline)
+    cancelled = wheel.schedule(20, fired.append, 20)
+    assert cancelled.cancel() and not cancelled.cancel()
+    assert len(wheel) == 4
+
+    for now in range(1, 501):
+        wheel.advance(now)
+        assert all(deadline <= now for deadline in fired)
+    assert fired == [3, 10, 40, 500]
+    assert len(wheel) == 0 and wheel.fired == 4
+
+
+def test_past_deadline_fires_on_next_advance():
+    """Test already expired deadlines fire immediately"""
+    clock = FakeClock(100)
+    wheel = TimerWheel(tick=0.5, clock=clock)
+    fired = []
+    wheel.schedule(50, fired.append, "late")
+    assert wheel.advance(100.5) == 1
+    assert fired == ["late"]
+
+
+def test_expired_messages_skip_crypto():
+    """Test expired intents are dropped by the network and the pipeline before verification"""
+    keypair = KeyPair()
+    expired = make_intent(keypair, expires_at=int(time.time()) - 1)
+    assert expired.is_expired() and not expired.verify()
+    assert MessageView.from_message(expired).is_expired()
+
+    network = InMemoryNetwork()
+    received = []
+    network.listen_intents(received.append)
+    network.broadcast_intent(expired)
+    network.broadcast_intents([expired, make_intent(keypair)])
+    assert len(received) == 1
+    assert network.expired_dropped == 2
+
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 5}]}
+    pipeline = SellerPipeline(SellerAgent("seller", "Shop", inventory, InMemoryNetwork()))
+    assert not pipeline.submit(expired)
+    assert pipeline.stats()["expired"] == 1
+    assert pipeline.stats()["accepted"] == 0
+
+
+def test_buyer_expires_offers_and_listeners():
+    """Test buyers drop expired offers from their buffers and stop listening"""
+    clock = FakeClock(time.time())
+    wheel = TimerWheel(clock=clock)
+    network = InMemoryNetwork()
+    inventory = {"laptop": [
+        {"sku": "LTP-001", "name": "Cheap", "price": 120000, "stock": 5},
+    ]}
+    seller = SellerAgent("seller", "Shop", inventory, network, offer_ttl=5, timers=wheel)
+    seller.listen()
+    buyer = BuyerAgent("buyer", network, timers=wheel, listen_timeout=10)
+
+    offers = buyer.broadcast("laptop", (100000, 200000))
+    assert len(offers) == 1
+    intent_id = offers[0].intent_id
+
+    # 另一个卖家的 Offer 有效期更长
+    other = Offer(
+        intent_id=intent_id,
+        seller=SellerInfo(agent_id="other", name="Other", public_key=buyer.keypair.get_public_key_base64()),
+        item=Item(name="Pricey", sku="X-1"),
+        price=Price(amount=150000, currency="CNY"),
+        stock=1,
+        expires_at=int(clock.now) + 60
+    )
+    other.sign(buyer.keypair)
+    network.send_offer(other, intent_id)
+    assert buyer.select_best(buyer.received_offers).item.sku == "LTP-001"
+
+    wheel.advance(offers[0].expires_at + 1)
+    assert [o.item.sku for o in buyer.received_offers] == ["X-1"]
+    assert buyer.select_best(buyer.received_offers).item.sku == "X-1"
+    assert offers[0].offer_id not in network.deal_callbacks
+    assert inventory["laptop"][0]["stock"] == 5  # 预留已释放
+
+    wheel.advance(clock.now + 11)
+    assert intent_id not in network.offer_callbacks
+
+
+def test_reservation_released_by_timer():
+    """Test reservation holds are released precisely by the timer wheel"""
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.1, clock=clock)
+    inventory = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 1, "stock": 1}]}
+    engine = ReservationEngine(inventory, ttl=2, timers=wheel)
+
+    assert engine.reserve("o1", "LTP-001")
+    assert engine.reserve("o2", "LTP-001") is False
+    clock.now = 2.1
+    wheel.advance()
+    assert inventory["laptop"][0]["stock"] == 1
+    assert engine.stats()["expired"] == 1
+
+    assert engine.reserve("o3", "LTP-001")
+    assert engine.confirm("o3")
+    assert len(wheel) == 0
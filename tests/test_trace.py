@@ -0,0 +1,89 @@
+"""Test cases for traffic record and replay"""
+
+import copy
+import time
+import pytest
+from acp0.network.memory import InMemoryNetwork
+from acp0.network.trace import RecordingNetwork, TraceReplayer, read_trace, SENT, RECEIVED
+from acp0.agents.buyer import BuyerAgent
+from acp0.agents.seller import SellerAgent
+from acp0.core.exceptions import MessageValidationError
+
+INVENTORY = {"laptop": [{"sku": "LTP-001", "name": "Laptop", "price": 150000, "stock": 10}]}
+
+
+def record_session(path, rounds=2):
+    recorder = RecordingNetwork(InMemoryNetwork(), str(path))
+    seller = SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), recorder)
+    seller.listen()
+    buyer = BuyerAgent("buyer", recorder)
+    for _ in range(rounds):
+        offers = buyer.broadcast("laptop", (100000, 200000))
+        buyer.purchase(offers[0])
+    recorder.close()
+
+
+def test_record_session(tmp_path):
+    """Test every intent, offer and deal is written in order with timestamps"""
+    path = tmp_path / "session.trace"
+    record_session(path)
+    start_time, records = read_trace(str(path))
+    records = list(records)
+    assert abs(start_time - time.time()) < 30
+    assert [r.view.message_type for r in records] == ["intent", "offer", "deal"] * 2
+    assert all(r.direction == SENT for r in records)
+    offsets = [r.offset for r in records]
+    assert offsets == sorted(offsets) and offsets[-1] >= 1.0  # broadcast() 等待 1 秒
+
+    # 截断的尾部记录被忽略，非 trace 文件被拒绝
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    assert len(list(read_trace(str(path))[1])) == 5
+    path.write_bytes(b"junk" + data[4:])
+    with pytest.raises(MessageValidationError):
+        read_trace(str(path))
+
+
+def test_record_received(tmp_path):
+    """Test listener-side recording captures inbound messages"""
+    path = tmp_path / "inbound.trace"
+    network = InMemoryNetwork()
+    recorder = RecordingNetwork(network, str(path), record_received=True)
+    seller = SellerAgent("seller", "Shop", copy.deepcopy(INVENTORY), recorder)
+    seller.listen()
+    BuyerAgent("buyer", network).broadcast("laptop", (100000, 200000))
+    recorder.close()
+    records = list(read_trace(str(path))[1])
+    assert [(r.direction, r.view.message_type) for r in records] == [(RECEIVED, "intent"), (SENT, "offer")]
+
+
+def test_replay_into_new_seller(tmp_path):
+    """Test recorded intents drive a fresh seller at max speed after refresh"""
+    path = tmp_path / "session.trace"
+    record_session(path)
+
+    network = InMemoryNetwork()
+    offers = []
+    seller = SellerAgent("seller2", "Shop", copy.deepcopy(INVENTORY), network)
+    seller.listen()
+    _, records = read_trace(str(path))
+    for record in records:
+        if record.view.message_type == "intent":
+            network.listen_offers(record.view.message_id, offers.append)
+
+    stats = TraceReplayer(network, speed=None, refresh=True).replay(str(path), types=("intent",))
+    assert stats["messages"] == 2 and stats["by_type"] == {"intent": 2}
+    assert len(offers) == 2 and all(offer.verify() for offer in offers)
+    assert stats["call"]["intent"]["p50_ms"] > 0
+    assert stats["elapsed_seconds"] < stats["recorded_seconds"]
+
+
+def test_replay_preserves_pacing(tmp_path):
+    """Test N× speed compresses inter-arrival gaps proportionally"""
+    path = tmp_path / "session.trace"
+    record_session(path)
+    stats = TraceReplayer(InMemoryNetwork(), speed=4).replay(str(path))
+    assert stats["messages"] == 6
+    expected = stats["recorded_seconds"] / 4
+    assert expected * 0.9 <= stats["elapsed_seconds"] <= expected + 0.5
+    assert stats["lag"]["max_ms"] < 100
@@ -0,0 +1,70 @@
+"""Test cases for shared verification cache"""
+
+import time
+import pytest
+from acp0.core.messages import Intent, BuyerInfo, Demand, Budget
+from acp0.core.crypto import KeyPair
+from acp0.core.verify_cache import VerificationCache, verification_cache
+
+
+def make_signed_intent(keypair: KeyPair) -> Intent:
+    intent = Intent(
+        buyer=BuyerInfo(agent_id="test_buyer", public_key=keypair.get_public_key_base64()),
+        demand=Demand(category="laptop", budget=Budget(min=1000, max=2000, currency="CNY"))
+    )
+    intent.sign(keypair)
+    return intent
+
+
+def test_identical_message_verified_once():
+    """Test repeated verify() of one message hits the shared cache"""
+    verification_cache.clear()
+    intent = make_signed_intent(KeyPair())
+
+    for _ in range(5):
+        assert intent.verify()
+
+    stats = verification_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 4
+
+
+def test_tampered_message_is_not_a_cache_hit():
+    """Test a modified message misses the cache and fails verification"""
+    verification_cache.clear()
+    intent = make_signed_intent(KeyPair())
+    assert intent.verify()
+
+    intent.demand.budget.max = 999999
+    assert not intent.verify()
+    assert verification_cache.stats()["misses"] == 2
+
+
+def test_timestamp_checked_on_every_call(monkeypatch):
+    """Test cached signatures do not bypass timestamp validation"""
+    verification_cache.clear()
+    intent = make_signed_intent(KeyPair())
+    assert intent.verify()
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3600)
+    assert not intent.verify()
+
+
+def test_cache_is_bounded_lru():
+    """Test the cache evicts least recently used entries"""
+    keypair = KeyPair()
+    cache = VerificationCache(maxsize=2)
+    messages = [b"a", b"b", b"c"]
+    signatures = [keypair.sign_bytes(m) for m in messages]
+    public_key = keypair.get_public_key_base64()
+
+    for message, signature in zip(messages, signatures):
+        assert cache.verify(message, signature, public_key)
+    assert len(cache) == 2
+
+    # b"a" 已被淘汰，重新验证是一次 miss；错误签名的结果同样被缓存
+    assert cache.verify(b"a", signatures[0], public_key)
+    assert not cache.verify(b"a", signatures[1], public_key)
+    assert not cache.verify(b"a", signatures[1], public_key)
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 5}
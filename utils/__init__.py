@@ -1 +1,8 @@
 # Utility functions for ACP0
+from .timer_wheel import Timer, TimerWheel, timer_wheel
+
+__all__ = [
+    "Timer",
+    "TimerWheel",
+    "timer_wheel"
+]
@@ -0,0 +1,204 @@
+"""
+Hierarchical Timer Wheel
+
+Intent / Offer 的过期、库存预留超时、待定监听器的超时都是"大量定时器、绝大多数被取消"的场景。
+分层时间轮的 schedule / cancel 都是 O(1)：
+- 第 0 层每格一个 tick，其上每层一格覆盖下一层一整圈
+- 定时器按剩余 tick 数放入能容纳它的最低层；上层的格子转到时逐个下放（cascade）
+- cancel 只是把定时器从所在格子的集合中移除
+- 超出最高层范围的定时器放在最高层最远的格子，下放时重新计算位置
+
+用法:
+    from acp0.utils.timer_wheel import timer_wheel
+    timer = timer_wheel.schedule(intent.expires_at, on_expired, intent.intent_id)
+    timer.cancel()
+
+共享实例 timer_wheel 使用 wall clock（与消息的 expires_at 一致），第一次调度时自动启动后台线程，
+回调都在该线程上执行（与调用方线程并发）；
+测试或单线程场景可以创建自己的 TimerWheel 并手动调用 advance()。
+"""
+
+import math
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Set
+
+
+class Timer:
+    """时间轮中的单个定时器"""
+
+    __slots__ = ("deadline", "tick", "callback", "args", "_wheel", "_slot")
+
+    def __init__(self, deadline: float, tick: int, callback: Callable, args: tuple, wheel: "TimerWheel"):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self._wheel = wheel
+        self._slot: Optional[Set["Timer"]] = None
+
+    @property
+    def active(self) -> bool:
+        return self._slot is not None
+
+    def cancel(self) -> bool:
+        """取消定时器；已触发或已取消时返回 False"""
+        return self._wheel.cancel(self)
+
+    def __repr__(self) -> str:
+        return f"Timer(deadline={self.deadline}, active={self.active})"
+
+
+class TimerWheel:
+    """分层时间轮"""
+
+    def __init__(self, tick: float = 0.05, levels: Sequence[int] = (256, 64, 64, 64),
+                 clock: Callable[[], float] = time.time, auto_start: bool = False):
+        """
+        Args:
+            tick: 第 0 层每格的时长（秒），即定时精度
+            levels: 每层的格子数（默认覆盖 tick * 256 * 64^3 ≈ 39 天）
+            clock: 时钟（默认 wall clock，与消息 expires_at 一致）
+            auto_start: 第一次 schedule() 时自动启动后台推进线程
+        """
+        self.tick = tick
+        self.levels = tuple(levels)
+        self.clock = clock
+        self.auto_start = auto_start
+        # 每层一格覆盖的 tick 数
+        self._spans = [1]
+        for size in self.levels[:-1]:
+            self._spans.append(self._spans[-1] * size)
+        self._wheels: List[List[Set[Timer]]] = [[set() for _ in range(size)] for size in self.levels]
+        self._current = self._to_tick(clock())
+        self._count = 0
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.fired = 0
+
+    def _to_tick(self, t: float) -> int:
+        return math.ceil(t / self.tick)
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ---------- 调度 ----------
+
+    def schedule(self, deadline: float, callback: Callable, *args) -> Timer:
+        """
+        在时刻 deadline（clock 同一时间域）触发 callback(*args)
+
+        已过期的 deadline 在下一次 advance() 时触发。
+        """
+        timer = Timer(deadline, self._to_tick(deadline), callback, args, self)
+        with self._lock:
+            self._insert(timer)
+            self._count += 1
+        if self.auto_start and self._thread is None:
+            self.start()
+        return timer
+
+    def schedule_after(self, delay: float, callback: Callable, *args) -> Timer:
+        """delay 秒后触发 callback(*args)"""
+        return self.schedule(self.clock() + delay, callback, *args)
+
+    def cancel(self, timer: Timer) -> bool:
+        with self._lock:
+            slot = timer._slot
+            if slot is None:
+                return False
+            slot.discard(timer)
+            timer._slot = None
+            self._count -= 1
+            return True
+
+    def _insert(self, timer: Timer, cascading: bool = False):
+        remaining = timer.tick - self._current
+        if not cascading:
+            remaining = max(remaining, 1)  # 新调度的已过期定时器放到下一格
+        elif remaining < 0:
+            remaining = 0  # 下放时恰好到期的留在当前格，本 tick 内触发
+        target = self._current + remaining
+        for level, span in enumerate(self._spans):
+            if remaining < span * self.levels[level] or level == len(self.levels) - 1:
+                if remaining >= span * self.levels[level]:
+                    # 超出时间轮范围：放到最高层最远的格子，下放时重新计算
+                    target = self._current + span * (self.levels[level] - 1)
+                slot = self._wheels[level][(target // span) % self.levels[level]]
+                break
+        slot.add(timer)
+        timer._slot = slot
+
+    # ---------- 推进 ----------
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """
+        推进到时刻 now，触发所有到期的定时器
+
+        Returns:
+            本次触发的定时器数量
+        """
+        target = self._to_tick(self.clock() if now is None else now)
+        due: List[Timer] = []
+        with self._lock:
+            if self._count == 0:
+                self._current = max(self._current, target)
+                return 0
+            while self._current < target:
+                self._current += 1
+                current = self._current
+                # 从高层到低层下放，使下放的定时器能在同一 tick 内继续下放到第 0 层
+                for level in range(len(self.levels) - 1, 0, -1):
+                    span = self._spans[level]
+                    if current % span == 0:
+                        slot = self._wheels[level][(current // span) % self.levels[level]]
+                        cascading = list(slot)
+                        slot.clear()
+                        for timer in cascading:
+                            self._insert(timer, cascading=True)
+                slot = self._wheels[0][current % self.levels[0]]
+                for timer in list(slot):
+                    if timer.tick <= current:
+                        slot.discard(timer)
+                        timer._slot = None
+                        self._count -= 1
+                        due.append(timer)
+                if self._count == 0:
+                    self._current = max(self._current, target)
+                    break
+
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:  # 单个回调失败不影响其他定时器
+                print(f"⚠️ Timer callback failed: {e}")
+        self.fired += len(due)
+        return len(due)
+
+    # ---------- 后台线程 ----------
+
+    def start(self):
+        """启动后台推进线程（守护线程）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="acp0-timer-wheel", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.tick):
+            self.advance()
+
+
+# 进程级共享实例
+timer_wheel = TimerWheel(auto_start=True)